@@ -0,0 +1,159 @@
+"""
+Benchmark collection on synthetic media trees.
+
+For each given total of media files, a synthetic tree is built then collected without
+and with checksum. Each collection runs in its own process to measure its wall time,
+its peak resident memory and the number of filesystem operations it issued.
+
+Results are compared to the baseline file and regressions are reported, the script
+exits with an error code if there is any regression or if a case has no baseline
+results. Use option ``--update-baseline`` to record results as the new baseline.
+
+Usage: ::
+
+    python benchmarks/collector.py --files 10000 --files 100000
+
+This must be called with the Python interpreter from your virtual environment.
+"""
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+
+from deovi.collector import Collector
+from deovi.utils.benchmark import (
+    compare_results, load_baseline, missing_cases, run_isolated, write_baseline,
+)
+from deovi.utils.instrumentation import PhaseRecorder
+from deovi.utils.synthetic import SyntheticTree
+
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+
+def collect_case(basepath, destination, checksum):
+    """
+    Collect a tree and return measures.
+
+    Arguments:
+        basepath (pathlib.Path): Tree to collect.
+        destination (pathlib.Path): Registry destination file path.
+        checksum (boolean): Enable checksums.
+
+    Returns:
+        dict: Measures.
+    """
+    recorder = PhaseRecorder()
+    collector = Collector(basepath, recorder=recorder)
+
+    start = time.perf_counter()
+    collector.run(destination=destination, checksum=checksum)
+    wall = time.perf_counter() - start
+
+    operations = recorder.operations_report()["total"]
+
+    return {
+        "wall": wall,
+        "directories": collector.stats["directories"],
+        "files": collector.stats["files"],
+        "operations": sum(operations.values()),
+        "operations_detail": operations,
+    }
+
+
+@click.command()
+@click.option(
+    "--files",
+    "totals",
+    type=int,
+    multiple=True,
+    default=[10000, 100000, 1000000],
+    show_default=True,
+    help="Total of media files for a tree to benchmark. Can be given many times.",
+)
+@click.option("--depth", type=int, default=3, show_default=True)
+@click.option("--fanout", type=int, default=10, show_default=True)
+@click.option(
+    "--workdir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Directory where to build trees. Default to a temporary directory.",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=BASELINE_PATH,
+    show_default=True,
+)
+@click.option(
+    "--update-baseline",
+    is_flag=True,
+    help="Record results as the new baseline instead of comparing them.",
+)
+def main(totals, depth, fanout, workdir, baseline, update_baseline):
+    cleanup = workdir is None
+    workdir = workdir or Path(tempfile.mkdtemp(prefix="deovi-benchmark-"))
+    results = {}
+
+    for total in totals:
+        tree = SyntheticTree.for_files(total, depth=depth, fanout=fanout)
+        basepath = workdir / "tree-{}".format(total)
+        if basepath.exists():
+            shutil.rmtree(basepath)
+
+        start = time.perf_counter()
+        built = tree.build(basepath)
+        click.echo("Built tree with {} files in {} directories in {:.2f}s".format(
+            built["files"],
+            built["directories"],
+            time.perf_counter() - start,
+        ))
+
+        for checksum in (False, True):
+            name = "collect-{}{}".format(total, "-checksum" if checksum else "")
+            destination = workdir / "{}.json".format(name)
+
+            results[name] = run_isolated(collect_case, basepath, destination, checksum)
+            click.echo("{}: {:.2f}s, {:.1f}MiB peak, {} operations".format(
+                name,
+                results[name]["wall"],
+                results[name]["peak_memory"] / (1024 * 1024),
+                results[name]["operations"],
+            ))
+
+        shutil.rmtree(basepath)
+
+    if cleanup:
+        shutil.rmtree(workdir)
+
+    if update_baseline:
+        write_baseline(baseline, results)
+        click.echo("Baseline saved to: {}".format(baseline))
+        return
+
+    references = load_baseline(baseline)
+    missing = missing_cases(references, results)
+    for name in missing:
+        click.echo(
+            "No baseline for {}, use --update-baseline to record it".format(name),
+            err=True,
+        )
+
+    regressions = compare_results(references, results)
+    for item in regressions:
+        click.echo("Regression on {case} {metric}: {value} against {baseline}".format(
+            **item
+        ), err=True)
+
+    click.echo(json.dumps(results, indent=4))
+
+    if regressions or missing:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Benchmark renaming jobs on synthetic directories.
+
+For each given total of files, a flat directory is built with a job which chains every
+built-in task. The job is run in dry run mode then in commit mode, each run in its own
+process to measure planning, tasks and renaming times, peak resident memory and the
+number of filesystem operations. The cost of each task is measured apart on the same
+files, its time per file and the peak memory it has allocated are recorded as a case
+for each task. Task peak memory is traced with ``MemoryProfiler`` checkpoints in
+another process so tracing does not slow down the timed tasks.
+
+Results are compared to the baseline file like the collector benchmark, use option
+``--update-baseline`` to record results as the new baseline.
+
+Usage: ::
+
+    python benchmarks/renamer.py --files 10000 --files 100000
+
+This must be called with the Python interpreter from your virtual environment.
+"""
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+
+from deovi.renamer.jobs import Job
+from deovi.renamer.tasks import TaskMaster
+from deovi.utils.benchmark import (
+    compare_results, load_baseline, missing_cases, run_isolated, write_baseline,
+)
+from deovi.utils.instrumentation import PhaseRecorder
+from deovi.utils.memory import MemoryProfiler
+from deovi.utils.synthetic import SyntheticTree
+
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+FILENAME_TEMPLATE = "Show_Name_-_S01E{index:06d}_-_Episode_Title.{extension}"
+
+# Every built-in task in an order which keeps filenames unique
+BENCHMARK_TASKS = [
+    ["replace", {"from": "Episode", "to": "Ep"}],
+    ["catch_segments", {"divider": "_-_", "slice_start": 1}],
+    ["underscore_to_dash", {}],
+    ["uppercase", {}],
+    ["lowercase", {}],
+    ["capitalize", {}],
+    ["add_prefix", {"prefix": "archive_"}],
+    ["numerate", {"zfill": 7, "start": 1}],
+]
+
+
+def job_case(source, dry_run):
+    """
+    Run a job and return measures.
+
+    Arguments:
+        source (pathlib.Path): Job file path.
+        dry_run (boolean): Run job in dry run mode.
+
+    Returns:
+        dict: Measures.
+    """
+    recorder = PhaseRecorder()
+    job = Job.load(source, recorder=recorder)
+
+    start = time.perf_counter()
+    job.run(TaskMaster(), dry_run=dry_run)
+    wall = time.perf_counter() - start
+
+    report = recorder.report()
+    operations = report["operations"]["total"]
+
+    results = {
+        "wall": wall,
+        "operations": sum(operations.values()),
+        "operations_detail": operations,
+    }
+    for name in ("planning", "tasks", "rename"):
+        if name in report["phases"]:
+            results[name] = report["phases"][name]["wall"]
+
+    return results
+
+
+def tasks_case(basepath):
+    """
+    Run each task on every file from a directory without any renaming and return its
+    cost.
+
+    Arguments:
+        basepath (pathlib.Path): Directory of files.
+
+    Returns:
+        dict: Total time of each task and its time per file in microseconds.
+    """
+    task_manager = TaskMaster()
+    files = sorted(basepath.iterdir())
+    results = {"files": len(files), "tasks": {}}
+
+    for name, options in BENCHMARK_TASKS:
+        method = getattr(task_manager, "task_{}".format(name))
+
+        start = time.perf_counter()
+        for i, source in enumerate(files, start=1):
+            method(i, source, **options)
+        elapsed = time.perf_counter() - start
+
+        results["tasks"][name] = {
+            "wall": elapsed,
+            "per_file": elapsed / len(files) * 1000000 if files else 0.0,
+        }
+
+    results["wall"] = sum([item["wall"] for item in results["tasks"].values()])
+
+    return results
+
+
+def tasks_memory_case(basepath):
+    """
+    Run each task on every file from a directory without any renaming and return the
+    peak memory it has allocated.
+
+    A memory checkpoint is taken after each task, the peak of a task is the traced
+    peak since the previous checkpoint minus the memory still allocated at this
+    previous checkpoint.
+
+    Arguments:
+        basepath (pathlib.Path): Directory of files.
+
+    Returns:
+        dict: Peak memory in bytes of each task.
+    """
+    task_manager = TaskMaster()
+    files = sorted(basepath.iterdir())
+    results = {"tasks": {}}
+
+    # Files are listed before tracing so only task allocations are traced
+    profiler = MemoryProfiler(top=0)
+    profiler.start()
+
+    for name, options in BENCHMARK_TASKS:
+        method = getattr(task_manager, "task_{}".format(name))
+
+        for i, source in enumerate(files, start=1):
+            method(i, source, **options)
+
+        profiler.checkpoint(name)
+
+    profiler.stop()
+
+    current = 0
+    for item in profiler.checkpoints:
+        if item["label"] in results["tasks"] or item["label"] == "end":
+            continue
+        results["tasks"][item["label"]] = max(item["peak"] - current, 0)
+        current = item["current"]
+
+    return results
+
+
+@click.command()
+@click.option(
+    "--files",
+    "totals",
+    type=int,
+    multiple=True,
+    default=[10000, 100000, 500000],
+    show_default=True,
+    help="Total of files for a directory to benchmark. Can be given many times.",
+)
+@click.option(
+    "--workdir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Directory where to build directories. Default to a temporary directory.",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=BASELINE_PATH,
+    show_default=True,
+)
+@click.option(
+    "--update-baseline",
+    is_flag=True,
+    help="Record results as the new baseline instead of comparing them.",
+)
+def main(totals, workdir, baseline, update_baseline):
+    cleanup = workdir is None
+    workdir = workdir or Path(tempfile.mkdtemp(prefix="deovi-benchmark-"))
+    results = {}
+
+    for total in totals:
+        tree = SyntheticTree(
+            depth=0,
+            files=total,
+            file_size=0,
+            manifest=False,
+            cover=False,
+            filename_template=FILENAME_TEMPLATE,
+        )
+        basepath = workdir / "directory-{}".format(total)
+        if basepath.exists():
+            shutil.rmtree(basepath)
+        tree.build(basepath)
+
+        source = workdir / "job-{}.json".format(total)
+        source.write_text(json.dumps({
+            "basepath": str(basepath),
+            "tasks": BENCHMARK_TASKS,
+        }))
+
+        # Each task is its own case so its time and memory are compared
+        tasks = run_isolated(tasks_case, basepath)["tasks"]
+        memory = run_isolated(tasks_memory_case, basepath)["tasks"]
+        for task, item in tasks.items():
+            name = "rename-{}-task-{}".format(total, task)
+            results[name] = dict(item, traced_peak=memory[task])
+            click.echo("{}: {:.1f}µs per file, {:.1f}KiB peak".format(
+                name,
+                item["per_file"],
+                memory[task] / 1024,
+            ))
+
+        # Dry run first since commit renames files
+        for dry_run in (True, False):
+            name = "rename-{}-{}".format(total, "dry" if dry_run else "commit")
+            results[name] = run_isolated(job_case, source, dry_run)
+            click.echo(
+                "{}: {:.2f}s, planning {:.2f}s, {:.1f}MiB peak, {} operations".format(
+                    name,
+                    results[name]["wall"],
+                    results[name]["planning"],
+                    results[name]["peak_memory"] / (1024 * 1024),
+                    results[name]["operations"],
+                )
+            )
+
+        shutil.rmtree(basepath)
+
+    if cleanup:
+        shutil.rmtree(workdir)
+
+    if update_baseline:
+        write_baseline(baseline, results)
+        click.echo("Baseline saved to: {}".format(baseline))
+        return
+
+    references = load_baseline(baseline)
+    missing = missing_cases(references, results)
+    for name in missing:
+        click.echo(
+            "No baseline for {}, use --update-baseline to record it".format(name),
+            err=True,
+        )
+
+    regressions = compare_results(references, results)
+    for item in regressions:
+        click.echo("Regression on {case} {metric}: {value} against {baseline}".format(
+            **item
+        ), err=True)
+
+    click.echo(json.dumps(results, indent=4))
+
+    if regressions or missing:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
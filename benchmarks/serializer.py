@@ -0,0 +1,212 @@
+"""
+Benchmark dump serialization on registries from synthetic media trees.
+
+For each given total of media files, a synthetic tree is built and collected once,
+then its dump content is serialized in its own process with the standard encoder and
+``ExtendedJsonEncoder`` (the reference), then with each available serializer backend.
+Each case measures its wall time and peak resident memory.
+
+Serializers with the ``json`` backend must output exactly the same bytes than the
+reference, the script exits with an error code if they do not, if there is any
+regression against the baseline file or if a case has no baseline results. Use option
+``--update-baseline`` to record results as the new baseline.
+
+Usage: ::
+
+    python benchmarks/serializer.py --files 10000 --files 100000
+
+This must be called with the Python interpreter from your virtual environment.
+"""
+import hashlib
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+
+from deovi.collector import Collector
+from deovi.utils.benchmark import (
+    compare_results, load_baseline, missing_cases, run_isolated, write_baseline,
+)
+from deovi.utils.jsons import ExtendedJsonEncoder, JsonSerializer, orjson
+from deovi.utils.synthetic import SyntheticTree
+
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+
+def collect_content(basepath):
+    """
+    Collect a tree and return its dump content.
+
+    Arguments:
+        basepath (pathlib.Path): Tree to collect.
+
+    Returns:
+        dict: Dump content as written by collector, without device informations and
+        covers since they change on each collection.
+    """
+    collector = Collector(basepath, allow_media_cover=False)
+    collector.run()
+
+    return {"registry": collector.registry}
+
+
+def serialize_case(basepath, destination, backend, indent):
+    """
+    Collect a tree then write its dump content and return measures.
+
+    Arguments:
+        basepath (pathlib.Path): Tree to collect.
+        destination (pathlib.Path): Dump destination file path.
+        backend (string): Serializer backend name, or None for the reference.
+        indent (integer): Indentation, None for a compact output.
+
+    Returns:
+        dict: Measures with the output checksum to compare outputs.
+    """
+    content = collect_content(basepath)
+    options = {"indent": indent}
+    if indent is None:
+        options = {"separators": (",", ":")}
+
+    start = time.perf_counter()
+    with destination.open("w") as fp:
+        if backend is None:
+            json.dump(content, fp, cls=ExtendedJsonEncoder, **options)
+        else:
+            JsonSerializer(backend=backend).dump(content, fp, **options)
+    wall = time.perf_counter() - start
+
+    output = destination.read_bytes()
+    destination.unlink()
+
+    return {
+        "wall": wall,
+        "size": len(output),
+        "digest": hashlib.blake2b(output).hexdigest(),
+    }
+
+
+@click.command()
+@click.option(
+    "--files",
+    "totals",
+    type=int,
+    multiple=True,
+    default=[10000, 100000],
+    show_default=True,
+    help="Total of media files for a tree to benchmark. Can be given many times.",
+)
+@click.option("--depth", type=int, default=3, show_default=True)
+@click.option("--fanout", type=int, default=10, show_default=True)
+@click.option(
+    "--workdir",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Directory where to build trees. Default to a temporary directory.",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=BASELINE_PATH,
+    show_default=True,
+)
+@click.option(
+    "--update-baseline",
+    is_flag=True,
+    help="Record results as the new baseline instead of comparing them.",
+)
+def main(totals, depth, fanout, workdir, baseline, update_baseline):
+    cleanup = workdir is None
+    workdir = workdir or Path(tempfile.mkdtemp(prefix="deovi-benchmark-"))
+    backends = [None, "json"] + (["orjson"] if orjson is not None else [])
+    results = {}
+    mismatches = []
+
+    for total in totals:
+        tree = SyntheticTree.for_files(total, depth=depth, fanout=fanout)
+        basepath = workdir / "tree-{}".format(total)
+        if basepath.exists():
+            shutil.rmtree(basepath)
+
+        built = tree.build(basepath)
+        click.echo("Built tree with {} files in {} directories".format(
+            built["files"],
+            built["directories"],
+        ))
+
+        for indent in (4, None):
+            reference = None
+
+            for backend in backends:
+                name = "serialize-{}-{}-{}".format(
+                    total,
+                    backend or "reference",
+                    "indent" if indent else "compact",
+                )
+
+                results[name] = run_isolated(
+                    serialize_case,
+                    basepath,
+                    workdir / "{}.json".format(name),
+                    backend,
+                    indent,
+                )
+                click.echo("{}: {:.2f}s, {:.1f}MiB peak, {} bytes".format(
+                    name,
+                    results[name]["wall"],
+                    results[name]["peak_memory"] / (1024 * 1024),
+                    results[name]["size"],
+                ))
+
+                if backend is None:
+                    reference = results[name]
+                    continue
+
+                click.echo("  {:.2f}x faster than reference".format(
+                    reference["wall"] / results[name]["wall"]
+                ))
+                if backend == "json" and (
+                    results[name]["digest"] != reference["digest"]
+                ):
+                    mismatches.append(name)
+
+        shutil.rmtree(basepath)
+
+    if cleanup:
+        shutil.rmtree(workdir)
+
+    for name in mismatches:
+        click.echo("Output differs from reference on {}".format(name), err=True)
+
+    if update_baseline:
+        write_baseline(baseline, results)
+        click.echo("Baseline saved to: {}".format(baseline))
+        return
+
+    references = load_baseline(baseline)
+    missing = missing_cases(references, results)
+    for name in missing:
+        click.echo(
+            "No baseline for {}, use --update-baseline to record it".format(name),
+            err=True,
+        )
+
+    regressions = compare_results(references, results)
+    for item in regressions:
+        click.echo("Regression on {case} {metric}: {value} against {baseline}".format(
+            **item
+        ), err=True)
+
+    click.echo(json.dumps(results, indent=4))
+
+    if regressions or missing or mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
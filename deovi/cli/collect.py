@@ -1,9 +1,51 @@
 import logging
+import sys
 from pathlib import Path
 
 import click
 
-from ..collector import MEDIAS_EXTENSIONS, Collector
+from ..collector import (
+    DUMP_COMPRESSIONS, IGNORE_FILENAME, LISTING_FORMATS, MEDIAS_EXTENSIONS,
+    PIPELINE_STAGES, REGISTRY_CACHE_SUFFIX, Collector, CollectorWatcher, FileListing,
+    OUTPUT_SINKS, load_dump, parse_output,
+)
+from ..collector.watch import DEFAULT_DEBOUNCE
+from ..collector.pipeline import DEFAULT_QUEUE_SIZE
+from ..exceptions import CollectorError
+from ..utils.instrumentation import PhaseRecorder
+from ..utils.jsons import JSON_BACKENDS, JsonSerializer
+from ..utils.memory import MemoryProfiler
+
+
+def parse_outputs(context, param, value):
+    """
+    Build output sinks from '--output' values.
+    """
+    try:
+        return [parse_output(item) for item in value]
+    except CollectorError as e:
+        raise click.BadParameter(str(e))
+
+
+def parse_workers(context, param, value):
+    """
+    Parse worker options from ``STAGE=NUMBER`` strings to a dictionnary.
+    """
+    workers = {}
+
+    for item in value:
+        name, sep, number = item.partition("=")
+        if not sep or name not in PIPELINE_STAGES or not number.isdigit():
+            raise click.BadParameter(
+                "Value must be 'STAGE=NUMBER' where 'STAGE' is one of: {}".format(
+                    ", ".join(PIPELINE_STAGES)
+                )
+            )
+        if int(number) < 1:
+            raise click.BadParameter("Number of workers must be at least 1")
+        workers[name] = int(number)
+
+    return workers
 
 
 @click.command()
@@ -36,17 +78,329 @@ from ..collector import MEDIAS_EXTENSIONS, Collector
         "from a dump to another."
     ),
 )
+@click.option(
+    "--workers",
+    multiple=True,
+    metavar="STAGE=NUMBER",
+    callback=parse_workers,
+    help=(
+        "Number of worker threads for a collection stage, given as 'STAGE=NUMBER'. "
+        "You can use this argument for each stage from: {}. On default each stage "
+        "have a single worker.".format(", ".join(PIPELINE_STAGES))
+    ),
+)
+@click.option(
+    "--queue-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_QUEUE_SIZE,
+    help=(
+        "Maximum number of directories waiting before a collection stage, a slow "
+        "stage will block the previous ones once its queue is full. Default to "
+        "{}.".format(DEFAULT_QUEUE_SIZE)
+    ),
+)
+@click.option(
+    "--stats-report",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help=(
+        "File path where to write a JSON report with wall time, CPU time, item "
+        "counts, bytes read or written and filesystem operations for each "
+        "collection phase. Phases are resumed in output also. On default nothing is "
+        "measured."
+    ),
+)
+@click.option(
+    "--top-directories",
+    type=click.IntRange(min=0),
+    default=0,
+    metavar="INTEGER",
+    help=(
+        "Number of slowest directories to scan and largest directories (by number "
+        "of entries) to output at the end of collection. They are included in "
+        "statistics report also. Default to 0 so nothing is tracked."
+    ),
+)
+@click.option(
+    "--rollups",
+    is_flag=True,
+    help=(
+        "Compute the total size, number of files and size per extension of media "
+        "files for each directory including its children directories, they are "
+        "included in dump."
+    ),
+)
+@click.option(
+    "--top-files",
+    type=click.IntRange(min=0),
+    default=0,
+    metavar="INTEGER",
+    help=(
+        "Number of largest media files to output at the end of collection, they are "
+        "included in dump. Default to 0 so nothing is tracked."
+    ),
+)
+@click.option(
+    "--identities",
+    is_flag=True,
+    help=(
+        "Include the identity of each media file (device, inode, size and "
+        "modification time) in dump so it can be used as a previous dump."
+    ),
+)
+@click.option(
+    "--previous",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help=(
+        "File path to a previous dump collected with identities. Media files moved "
+        "or renamed since are matched on their identity and get their previous path "
+        "in 'moved_from' with the items from their previous payload. This enables "
+        "'--identities'."
+    ),
+)
+@click.option(
+    "--delta-against",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help=(
+        "File path to a previous dump to compare the collected registry to. A delta "
+        "with only the added, changed and removed directories and a reference to "
+        "the previous dump is written next to the dump, like 'plop.delta.json' for "
+        "'plop.json'."
+    ),
+)
+@click.option(
+    "--delta-only",
+    is_flag=True,
+    help=(
+        "Write the delta to the destination instead of the full dump, only with "
+        "'--delta-against'."
+    ),
+)
+@click.option(
+    "--registry-cache",
+    is_flag=True,
+    help=(
+        "Also write the registry to a binary cache next to the dump, like "
+        "'plop.json{}' for 'plop.json'. It is a lot faster to load than the JSON "
+        "dump.".format(REGISTRY_CACHE_SUFFIX)
+    ),
+)
+@click.option(
+    "--compress",
+    "compression",
+    type=click.Choice(DUMP_COMPRESSIONS),
+    help=(
+        "Compress the dump and delta while they are written. Default to the "
+        "compression from destination suffix like '.gz', '.xz' or '.bz2', a "
+        "destination without one of these suffixes is not compressed."
+    ),
+)
+@click.option(
+    "--compact",
+    is_flag=True,
+    help="Write the dump and delta without indentation nor whitespaces.",
+)
+@click.option(
+    "--serializer",
+    type=click.Choice(JSON_BACKENDS),
+    default="json",
+    show_default=True,
+    help=(
+        "JSON serializer to write the dump and delta with. 'orjson' is a lot faster "
+        "but requires the orjson package and its output is indented with 2 spaces "
+        "and does not escape non ASCII characters."
+    ),
+)
+@click.option(
+    "--sort-keys",
+    is_flag=True,
+    help=(
+        "Write the dump directories sorted on their key, so dumps can be compared "
+        "with 'diff --sorted' and merged in order."
+    ),
+)
+@click.option(
+    "--output",
+    "outputs",
+    multiple=True,
+    metavar="FORMAT:PATH",
+    callback=parse_outputs,
+    help=(
+        "Additional output to write from the same scan, like 'ndjson:feed.ndjson'. "
+        "Available formats are: {}. You can use this argument multiple "
+        "times.".format(", ".join(OUTPUT_SINKS))
+    ),
+)
+@click.option(
+    "--memory-profile",
+    is_flag=True,
+    help=(
+        "Trace memory allocations and take snapshots at collection phase boundaries "
+        "to output peak memory and top allocation sites. Memory report is included "
+        "in statistics report if enabled. This slows down collection a lot."
+    ),
+)
+@click.option(
+    "--rss-interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    metavar="SECONDS",
+    help=(
+        "Interval in seconds to sample the resident memory of process into the "
+        "memory report, only with '--memory-profile'. Default to no sampling."
+    ),
+)
+@click.option(
+    "--journal",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help=(
+        "File path where to append every collected directory as soon as it is done, "
+        "so an interrupted collection can be resumed with '--resume'."
+    ),
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help=(
+        "Resume collection from the journal given with '--journal', directories "
+        "from journal which have not been modified since are not scanned again."
+    ),
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    metavar="PATTERN",
+    help=(
+        "Pattern with gitignore syntax for files or directories to exclude, relative "
+        "to the source path. Excluded directories are not walked at all. You can use "
+        "this argument multiple times. Rules from '{}' files in directories are "
+        "applied also.".format(IGNORE_FILENAME)
+    ),
+)
+@click.option(
+    "--max-depth",
+    type=click.IntRange(min=0),
+    default=None,
+    metavar="INTEGER",
+    help=(
+        "Maximum depth of directories to walk below the source path, '0' means only "
+        "the source directory is collected. Default to no limit."
+    ),
+)
+@click.option(
+    "--follow-symlinks",
+    is_flag=True,
+    help=(
+        "Walk symbolic links to directories. On default they are skipped. A directory "
+        "is never walked twice so symbolic link loops are safe."
+    ),
+)
+@click.option(
+    "--one-file-system",
+    is_flag=True,
+    help=(
+        "Skip directories on another filesystem than the source path, like mount "
+        "points."
+    ),
+)
+@click.option(
+    "--listing",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help=(
+        "File path to a listing of files from the source path to walk instead of "
+        "the filesystem, like one made with: find SOURCE -printf "
+        "'%P\\t%s\\t%T@\\t%y\\n'. Manifests, covers and checksums are still "
+        "read from filesystem."
+    ),
+)
+@click.option(
+    "--listing-format",
+    type=click.Choice(LISTING_FORMATS),
+    default="find",
+    help=(
+        "Format of listing file, either from 'find' or from a verbose 'tar' listing "
+        "with full time. Default to 'find'."
+    ),
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help=(
+        "After collection, watch directories for changes to collect changed "
+        "directories again and write the dump again. This is only available on "
+        "Linux and runs until it is interrupted."
+    ),
+)
+@click.option(
+    "--debounce",
+    type=click.FloatRange(min=0),
+    default=DEFAULT_DEBOUNCE,
+    metavar="SECONDS",
+    help=(
+        "Time in seconds without any change before changes are collected, only "
+        "with '--watch'. Default to {}.".format(DEFAULT_DEBOUNCE)
+    ),
+)
 @click.pass_context
-def collect_command(context, source, destination, extension, checksum):
+def collect_command(context, source, destination, extension, checksum, workers,
+                    queue_size, stats_report, top_directories, rollups, top_files,
+                    identities, previous, delta_against, delta_only,
+                    registry_cache, compression, compact, serializer, sort_keys,
+                    outputs, memory_profile,
+                    rss_interval, journal, resume, exclude, max_depth,
+                    follow_symlinks, one_file_system, listing, listing_format, watch,
+                    debounce):
     """
     Recursively collect every directories with elligible media files from a basepath
     and dump it to a JSON file.
 
     The 'source' argument is a path which holds directories with media files to find and
-    the 'destination' argument is a file path where to write the JSON dump.
+    the 'destination' argument is a file path where to write the JSON dump. A
+    destination ending with '.gz', '.xz' or '.bz2' is compressed.
     """
     logger = logging.getLogger("deovi")
 
+    if resume and not journal:
+        raise click.UsageError("Option '--resume' requires option '--journal'.")
+
+    if delta_only and not delta_against:
+        raise click.UsageError(
+            "Option '--delta-only' requires option '--delta-against'."
+        )
+
+    if delta_only and registry_cache:
+        raise click.UsageError(
+            "Option '--registry-cache' can not be used with option '--delta-only'."
+        )
+
+    try:
+        JsonSerializer(backend=serializer)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'--serializer'")
+
+    paths = [destination.resolve()] + [item.path.resolve() for item in outputs]
+    if len(set(paths)) != len(paths):
+        raise click.BadParameter(
+            "Outputs must have different paths than destination and each other.",
+            param_hint="'--output'",
+        )
+
+    if listing and (identities or previous):
+        raise click.UsageError(
+            "Options '--identities' and '--previous' can not be used with option "
+            "'--listing'."
+        )
+
+    if watch:
+        if not sys.platform.startswith("linux"):
+            raise click.UsageError("Option '--watch' is only available on Linux.")
+
+        if journal or listing or rollups or top_files or delta_against or outputs:
+            raise click.UsageError(
+                "Options '--journal', '--listing', '--rollups', '--top-files', "
+                "'--delta-against' and '--output' can not be used with option "
+                "'--watch'."
+            )
+
     if not extension:
         extension = MEDIAS_EXTENSIONS
 
@@ -54,10 +408,146 @@ def collect_command(context, source, destination, extension, checksum):
     logger.info("Destination: {}".format(destination))
     logger.info("Extensions: {}".format(", ".join(extension)))
 
-    collector = Collector(source, extensions=extension)
+    previous_registry = None
+    if previous:
+        logger.info("Previous dump: {}".format(previous))
+        previous_registry = load_dump(previous)["registry"]
+
+    if delta_against:
+        logger.info("Delta against: {}".format(delta_against))
+
+    file_listing = None
+    if listing:
+        logger.info("Listing: {}".format(listing))
+        try:
+            file_listing = FileListing.load(listing, source, format=listing_format)
+        except CollectorError as e:
+            raise click.BadParameter(str(e), param_hint="--listing")
+
+    memory = None
+    if memory_profile:
+        memory = MemoryProfiler(rss_interval=rss_interval)
+        memory.start()
+
+    recorder = PhaseRecorder(enabled=bool(stats_report), memory=memory)
+
+    collector = Collector(
+        source,
+        extensions=extension,
+        workers=workers,
+        queue_size=queue_size,
+        recorder=recorder,
+        top_directories=top_directories,
+        rollups=rollups,
+        top_files=top_files,
+        identities=identities,
+        previous=previous_registry,
+        listing=file_listing,
+        delta_against=delta_against,
+        delta_only=delta_only,
+        registry_cache=registry_cache,
+        compression=compression,
+        compact=compact,
+        serializer=serializer,
+        sort_keys=sort_keys,
+        sinks=outputs,
+        journal=journal,
+        resume=resume,
+        exclude=exclude,
+        max_depth=max_depth,
+        follow_symlinks=follow_symlinks,
+        one_file_system=one_file_system,
+    )
+
+    watcher = None
+    if watch:
+        watcher = CollectorWatcher(
+            collector,
+            destination,
+            checksum=checksum,
+            debounce=debounce,
+        )
 
-    stats = collector.run(destination=destination, checksum=checksum)
+    try:
+        if watcher:
+            stats = watcher.start()
+        else:
+            stats = collector.run(destination=destination, checksum=checksum)
+    finally:
+        if memory:
+            memory.stop()
+
+    for name, counters in collector.pipeline_stats.items():
+        logger.debug(
+            "Stage '{}': {} worker(s), {} directories, {:.1f}/s, {:.3f}s busy, "
+            "{:.3f}s blocked".format(
+                name,
+                counters["workers"],
+                counters["received"],
+                counters["throughput"],
+                counters["busy_time"],
+                counters["blocked_time"],
+            )
+        )
 
     logger.info("Registered directories: {}".format(stats["directories"]))
     logger.info("Registered files: {}".format(stats["files"]))
     logger.info("Total directories and files size: {}".format(stats["size"]))
+    if "moved" in stats:
+        logger.info("Files moved since previous dump: {}".format(stats["moved"]))
+    if "delta" in stats:
+        logger.info(
+            "Delta: {} added, {} changed, {} removed, {} unchanged".format(
+                stats["delta"]["added"],
+                stats["delta"]["changed"],
+                stats["delta"]["removed"],
+                stats["delta"]["unchanged"],
+            )
+        )
+    if resume:
+        logger.info("Directories resumed from journal: {}".format(stats["resumed"]))
+
+    if top_directories:
+        directories = collector.top_directories_report()
+
+        logger.info("Slowest directories:")
+        for item in directories["slowest"]:
+            logger.info("- {:.3f}s: {} ({} entries)".format(
+                item["elapsed"], item["path"], item["entries"]
+            ))
+
+        logger.info("Largest directories:")
+        for item in directories["largest"]:
+            logger.info("- {} entries: {} ({:.3f}s)".format(
+                item["entries"], item["path"], item["elapsed"]
+            ))
+
+    if top_files:
+        logger.info("Largest files:")
+        for item in collector.largest_files.items():
+            logger.info("- {}: {}".format(item["size"], item["path"]))
+
+    if memory:
+        for line in memory.summary():
+            logger.info(line)
+
+    if stats_report:
+        for line in recorder.summary():
+            logger.info(line)
+
+        recorder.write(
+            stats_report,
+            stats=stats,
+            pipeline=collector.pipeline_stats,
+            directories=collector.top_directories_report(),
+        )
+        logger.info("Statistics report saved to: {}".format(stats_report))
+
+    if watcher:
+        logger.info("Watching changes, hit Ctrl+C to stop")
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
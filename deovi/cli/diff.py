@@ -0,0 +1,116 @@
+import logging
+from pathlib import Path
+
+import click
+
+from ..collector import RegistryDiff
+from ..collector.dump import write_json
+from ..exceptions import CollectorError
+from ..utils.jsons import JSON_BACKENDS, JsonSerializer
+
+
+@click.command()
+@click.argument(
+    "old",
+    nargs=1,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path)
+)
+@click.argument(
+    "new",
+    nargs=1,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path)
+)
+@click.argument(
+    "destination",
+    nargs=1,
+    required=False,
+    type=click.Path(exists=False, dir_okay=False, path_type=Path)
+)
+@click.option(
+    "--sorted",
+    "sorted_keys",
+    is_flag=True,
+    help=(
+        "Both dumps have their directories sorted on their key so they are compared "
+        "in a single pass without any index. Dumps are sorted when they are "
+        "collected with 'collect --sort-keys'."
+    ),
+)
+@click.option(
+    "--compact",
+    is_flag=True,
+    help="Write the diff without indentation nor whitespaces.",
+)
+@click.option(
+    "--serializer",
+    type=click.Choice(JSON_BACKENDS),
+    default="json",
+    show_default=True,
+    help=(
+        "JSON serializer to write the diff with. 'orjson' is a lot faster but "
+        "requires the orjson package and its output is indented with 2 spaces and "
+        "does not escape non ASCII characters."
+    ),
+)
+@click.pass_context
+def diff_command(context, old, new, destination, sorted_keys, compact, serializer):
+    """
+    Compare the registries from two collect dumps.
+
+    The 'old' and 'new' arguments are the dump file paths to compare, either JSON dumps
+    or NDJSON dumps. The optional 'destination' argument is a file path where to write
+    the JSON diff document.
+
+    Dumps are read directory by directory. By default the signatures of every old
+    directory are kept in memory, with the added and changed directories. With
+    '--sorted' only the added and changed directories are kept in memory.
+    """
+    logger = logging.getLogger("deovi")
+
+    try:
+        json_serializer = JsonSerializer(backend=serializer)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'--serializer'")
+
+    logger.info("Old dump: {}".format(old))
+    logger.info("New dump: {}".format(new))
+
+    differ = RegistryDiff(old, new, sorted_keys=sorted_keys)
+    try:
+        diff = differ.compare()
+    except CollectorError as e:
+        logger.critical(str(e))
+        raise click.Abort()
+
+    for key in diff["added"]:
+        logger.info("+ {}".format(key))
+    for key in diff["removed"]:
+        logger.info("- {}".format(key))
+    for key, changes in diff["changed"].items():
+        logger.info("~ {}".format(key))
+        for item in changes["files"]["added"]:
+            logger.debug("  + {}".format(item["name"]))
+        for name in changes["files"]["removed"]:
+            logger.debug("  - {}".format(name))
+        for item in changes["files"]["changed"]:
+            logger.debug("  ~ {}".format(item["name"]))
+
+    stats = diff["stats"]
+    logger.info(
+        "Directories: {} added, {} removed, {} changed".format(
+            stats["added_directories"],
+            stats["removed_directories"],
+            stats["changed_directories"],
+        )
+    )
+    logger.info(
+        "Files from changed directories: {} added, {} removed, {} changed".format(
+            stats["added_files"],
+            stats["removed_files"],
+            stats["changed_files"],
+        )
+    )
+
+    if destination:
+        write_json(destination, diff, serializer=json_serializer, compact=compact)
+        logger.info("Diff saved to: {}".format(destination))
@@ -0,0 +1,135 @@
+import json
+import logging
+from pathlib import Path
+
+import click
+
+from ..collector import MEDIAS_EXTENSIONS, Collector, DuplicateFinder
+from ..utils.checksum import FINGERPRINT_SAMPLE_SIZE
+from ..utils.instrumentation import PhaseRecorder
+from ..utils.jsons import ExtendedJsonEncoder
+
+
+@click.command()
+@click.argument(
+    "source",
+    nargs=1,
+    type=click.Path(exists=True, file_okay=False, path_type=Path)
+)
+@click.argument(
+    "destination",
+    nargs=1,
+    required=False,
+    type=click.Path(exists=False, dir_okay=False, path_type=Path)
+)
+@click.option(
+    "--extension",
+    "-e",
+    multiple=True,
+    help=(
+        "Give a specific file extension (without leading dot) to search for. You can "
+        "use this argument multiple times for all extension you want to allow. On "
+        "default the media extensions from collector are used."
+    ),
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    metavar="PATTERN",
+    help=(
+        "Pattern with gitignore syntax for files or directories to exclude, relative "
+        "to the source path. You can use this argument multiple times."
+    ),
+)
+@click.option(
+    "--follow-symlinks",
+    is_flag=True,
+    help="Walk symbolic links to directories. On default they are skipped.",
+)
+@click.option(
+    "--sample-size",
+    type=click.IntRange(min=1),
+    default=FINGERPRINT_SAMPLE_SIZE,
+    metavar="BYTES",
+    help=(
+        "Size in bytes of each sample read from files to compute their fingerprint. "
+        "Default to {}.".format(FINGERPRINT_SAMPLE_SIZE)
+    ),
+)
+@click.option(
+    "--stats-report",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help=(
+        "File path where to write a JSON report with wall time, item counts, bytes "
+        "read and filesystem operations for each phase. On default nothing is "
+        "measured."
+    ),
+)
+@click.pass_context
+def duplicates_command(context, source, destination, extension, exclude,
+                       follow_symlinks, sample_size, stats_report):
+    """
+    Find media files with identical contents from a basepath.
+
+    Files are compared on their size first, then on a fingerprint of a few samples of
+    their contents and finally on a full checksum, so only files which may be
+    duplicates are read.
+
+    The 'source' argument is a path which holds directories with media files to
+    compare and the optional 'destination' argument is a file path where to write the
+    JSON report of duplicate groups.
+    """
+    logger = logging.getLogger("deovi")
+
+    if not extension:
+        extension = MEDIAS_EXTENSIONS
+
+    logger.info("Source: {}".format(source))
+
+    recorder = PhaseRecorder(enabled=bool(stats_report))
+
+    collector = Collector(
+        source,
+        extensions=extension,
+        recorder=recorder,
+        exclude=exclude,
+        follow_symlinks=follow_symlinks,
+        identities=True,
+    )
+    # Only walking is needed to get file sizes and identities
+    files = []
+    identities = {}
+    for directory in collector.walk_directory(source):
+        for item in directory["data"]["children_files"]:
+            files.append((item["path"], item["size"]))
+            identities[item["path"]] = item["identity"]
+
+    finder = DuplicateFinder(sample_size=sample_size, recorder=recorder)
+    report = finder.report(finder.find(files, identities=identities))
+
+    for group in report["groups"]:
+        logger.info("{} files of {} bytes:".format(len(group["paths"]), group["size"]))
+        for path in group["paths"]:
+            logger.info("- {}".format(path.relative_to(source)))
+
+    logger.info("Compared files: {}".format(report["stats"]["files"]))
+    logger.info("Files read for a fingerprint: {}".format(
+        report["stats"]["fingerprint_candidates"]
+    ))
+    logger.info("Files read for a full checksum: {}".format(
+        report["stats"]["checksum_candidates"]
+    ))
+    logger.info("Duplicate files: {}".format(report["duplicates"]))
+    logger.info("Reclaimable size: {}".format(report["reclaimable"]))
+
+    if destination:
+        with destination.open("w") as fp:
+            json.dump(report, fp, indent=4, cls=ExtendedJsonEncoder)
+        logger.info("Duplicates report saved to: {}".format(destination))
+
+    if stats_report:
+        for line in recorder.summary():
+            logger.info(line)
+
+        recorder.write(stats_report, stats=report["stats"])
+        logger.info("Statistics report saved to: {}".format(stats_report))
@@ -4,13 +4,20 @@ Main entrance to commandline actions
 TODO:
     R&D to implement "COMMAND -h" / "COMMAND --help" as a "help COMMAND" command.
 """
+from pathlib import Path
+
 import click
 
 from ..logger import init_logger
+from ..utils.tracing import TraceRecorder, set_tracer
 from ..cli.version import version_command
 from ..cli.rename import rename_command
 from ..cli.job import job_command
 from ..cli.collect import collect_command
+from ..cli.diff import diff_command
+from ..cli.duplicates import duplicates_command
+from ..cli.merge import merge_command
+from ..cli.query import query_command
 from ..cli.scrap import scrap_command
 
 
@@ -34,8 +41,22 @@ APP_LOGGER_CONF = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL", None)
         "level). Default to '4' (Info level)."
     )
 )
+@click.option(
+    "--trace",
+    type=click.Path(
+        file_okay=True, dir_okay=False, writable=True, resolve_path=True,
+        path_type=Path,
+    ),
+    default=None,
+    metavar="FILEPATH",
+    help=(
+        "Record spans from command in Chrome Trace Event format into given file "
+        "path. It can be opened with Perfetto or 'chrome://tracing' to inspect "
+        "concurrency and stalls."
+    )
+)
 @click.pass_context
-def cli_frontend(ctx, verbose):
+def cli_frontend(ctx, verbose, trace):
     """
     Entrypoint for commandline interface for deovi
     """
@@ -60,10 +81,25 @@ def cli_frontend(ctx, verbose):
         "logger": root_logger,
     }
 
+    if trace:
+        tracer = set_tracer(TraceRecorder())
+
+        def write_trace():
+            tracer.write(trace)
+            # Restore the default disabled tracer
+            set_tracer(TraceRecorder(enabled=False))
+            root_logger.info("Trace saved to: {}".format(trace))
+
+        ctx.call_on_close(write_trace)
+
 
 # Attach commands methods to the main grouper
 cli_frontend.add_command(version_command, name="version")
 cli_frontend.add_command(rename_command, name="rename")
 cli_frontend.add_command(job_command, name="job")
 cli_frontend.add_command(collect_command, name="collect")
+cli_frontend.add_command(duplicates_command, name="duplicates")
+cli_frontend.add_command(diff_command, name="diff")
+cli_frontend.add_command(query_command, name="query")
+cli_frontend.add_command(merge_command, name="merge")
 cli_frontend.add_command(scrap_command, name="scrap")
@@ -0,0 +1,77 @@
+import logging
+from pathlib import Path
+
+import click
+
+from ..collector import MERGE_FORMATS, DumpMerger
+from ..exceptions import CollectorError
+
+
+@click.command()
+@click.argument(
+    "sources",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path)
+)
+@click.argument(
+    "destination",
+    nargs=1,
+    type=click.Path(exists=False, dir_okay=False, path_type=Path)
+)
+@click.option(
+    "--namespace",
+    "namespaces",
+    multiple=True,
+    metavar="NAME",
+    help=(
+        "Namespace to prefix the directory keys of a dump with. You can use this "
+        "argument multiple times, namespaces are given to the dumps in the same "
+        "order. Default to the basepath each dump has been collected from."
+    ),
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(MERGE_FORMATS),
+    default="json",
+    show_default=True,
+    help="Merged dump format.",
+)
+@click.pass_context
+def merge_command(context, sources, destination, namespaces, output_format):
+    """
+    Merge collect dumps from different basepaths or devices into a single dump.
+
+    The 'sources' arguments are the dump file paths to merge, either JSON dumps or
+    NDJSON dumps. The last argument 'destination' is the file path where to write
+    the merged dump.
+
+    Directory keys are prefixed with a namespace for their dump. Dumps are read and
+    merged directory by directory, the merged registry is sorted if every dump has
+    its directories sorted on their key.
+    """
+    logger = logging.getLogger("deovi")
+
+    if len(namespaces) > len(sources):
+        raise click.UsageError("There are more namespaces than dumps to merge.")
+
+    if destination.resolve() in [item.resolve() for item in sources]:
+        raise click.UsageError("Destination can not be one of the dumps to merge.")
+
+    for item in sources:
+        logger.info("Dump: {}".format(item))
+
+    merger = DumpMerger(sources, namespaces=namespaces)
+    try:
+        with destination.open("w") as fp:
+            count = merger.write(fp, format=output_format)
+    except CollectorError as e:
+        destination.unlink()
+        logger.critical(str(e))
+        raise click.Abort()
+
+    for namespace in merger.devices:
+        logger.info("Namespace: {}".format(namespace))
+    logger.info("Directories: {}".format(count))
+    logger.info("Merged dump saved to: {}".format(destination))
@@ -0,0 +1,150 @@
+import json
+import logging
+from pathlib import Path
+
+import click
+
+from ..collector import QueryCondition, QueryIndex, Registry, RegistryQuery
+from ..exceptions import CollectorError
+from ..utils.jsons import ExtendedJsonEncoder
+
+
+@click.command()
+@click.argument(
+    "dump",
+    nargs=1,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path)
+)
+@click.argument(
+    "destination",
+    nargs=1,
+    required=False,
+    type=click.Path(exists=False, dir_okay=False, path_type=Path)
+)
+@click.option(
+    "--where",
+    "-w",
+    "expressions",
+    multiple=True,
+    metavar="EXPRESSION",
+    help=(
+        "Filter expression like 'file.extension=mkv', 'file.size>8G', 'dir.cover' or "
+        "'files>10' for directories with more than 10 matching files. Fields start "
+        "with 'dir.' for directory and manifest items or 'file.' for media file "
+        "items. You can use this argument multiple times, all expressions must "
+        "match."
+    ),
+)
+@click.option(
+    "--files",
+    "list_files",
+    is_flag=True,
+    help="Output every matching media file instead of directories.",
+)
+@click.option(
+    "--group-by",
+    metavar="FIELD",
+    help=(
+        "Group matching media files on a file item like 'container' and output the "
+        "number of files and their total size for each value."
+    ),
+)
+@click.option(
+    "--rebuild",
+    is_flag=True,
+    help="Build the dump indexes again even if they are up to date.",
+)
+@click.pass_context
+def query_command(context, dump, destination, expressions, list_files, group_by,
+                  rebuild):
+    """
+    Find directories and media files from a collect dump.
+
+    The 'dump' argument is the JSON dump file path to query. The optional
+    'destination' argument is a file path where to write the JSON results.
+
+    Indexes are built next to the dump on first query then reused until the dump
+    changes.
+    """
+    logger = logging.getLogger("deovi")
+
+    try:
+        conditions = [QueryCondition(item) for item in expressions]
+        grouping = None
+        if group_by:
+            grouping = QueryCondition(
+                group_by if group_by.startswith("file.") else "file." + group_by
+            )
+    except CollectorError as e:
+        raise click.BadParameter(str(e))
+
+    logger.info("Dump: {}".format(dump))
+
+    try:
+        registry = Registry(dump, rebuild=rebuild)
+    except CollectorError as e:
+        logger.critical(str(e))
+        raise click.Abort()
+
+    with registry, QueryIndex(registry, rebuild=rebuild) as index:
+        results = []
+        groups = {}
+        total_files = 0
+        total_size = 0
+
+        for key, payload, files in RegistryQuery(
+            registry, conditions, index=index
+        ).run():
+            size = sum([item.get("size", 0) for item in files])
+            total_files += len(files)
+            total_size += size
+            results.append({
+                "key": key,
+                "files": [item["name"] for item in files],
+                "size": size,
+            })
+
+            if grouping:
+                for item in files:
+                    value = grouping.resolve(item)
+                    group = groups.setdefault(value, {"files": 0, "size": 0})
+                    group["files"] += 1
+                    group["size"] += item.get("size", 0)
+            elif list_files:
+                for item in files:
+                    logger.info("- {}/{}: {}".format(
+                        key, item["name"], item.get("size", 0)
+                    ))
+            else:
+                logger.info("- {}: {} file(s), {} bytes".format(
+                    key, len(files), size
+                ))
+
+    if grouping:
+        for value, group in sorted(
+            groups.items(), key=lambda item: item[1]["size"], reverse=True
+        ):
+            logger.info("- {}: {} file(s), {} bytes".format(
+                value, group["files"], group["size"]
+            ))
+
+    logger.info("Directories: {}".format(len(results)))
+    logger.info("Files: {}".format(total_files))
+    logger.info("Size: {}".format(total_size))
+
+    if destination:
+        content = {
+            "query": list(expressions),
+            "directories": results,
+        }
+        if grouping:
+            content["groups"] = [
+                dict(value=value, **group)
+                for value, group in sorted(
+                    groups.items(), key=lambda item: item[1]["size"], reverse=True
+                )
+            ]
+
+        with destination.open("w") as fp:
+            json.dump(content, fp, indent=4, cls=ExtendedJsonEncoder)
+        logger.info("Query results saved to: {}".format(destination))
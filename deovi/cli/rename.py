@@ -6,13 +6,43 @@ import click
 from ..renamer.tasks import TaskMaster
 from ..renamer.runner import JobRunner
 from ..exceptions import JobValidationError
+from ..utils.instrumentation import PhaseRecorder
+from ..utils.memory import MemoryProfiler
 
 
 @click.command()
 @click.argument("jobs", nargs=-1, type=click.Path(exists=True, path_type=Path))
 @click.option('--commit', is_flag=True)
+@click.option(
+    "--stats-report",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help=(
+        "File path where to write a JSON report with time and filesystem operations "
+        "for each job phase. Phases are resumed in output also. On default nothing is "
+        "measured."
+    ),
+)
+@click.option(
+    "--memory-profile",
+    is_flag=True,
+    help=(
+        "Trace memory allocations and take snapshots at job phase boundaries "
+        "to output peak memory and top allocation sites. Memory report is included "
+        "in statistics report if enabled. This slows down jobs a lot."
+    ),
+)
+@click.option(
+    "--rss-interval",
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    metavar="SECONDS",
+    help=(
+        "Interval in seconds to sample the resident memory of process into the "
+        "memory report, only with '--memory-profile'. Default to no sampling."
+    ),
+)
 @click.pass_context
-def rename_command(context, jobs, commit):
+def rename_command(context, jobs, commit, stats_report, memory_profile, rss_interval):
     """
     Rename multiple files with some tasks in a job file.
 
@@ -37,7 +67,13 @@ def rename_command(context, jobs, commit):
             logger.info("Dry run mode is enabled, no file will be renamed.")
         logger.info("")
 
-        jobber = JobRunner(task_class=TaskMaster)
+        memory = None
+        if memory_profile:
+            memory = MemoryProfiler(rss_interval=rss_interval)
+            memory.start()
+
+        recorder = PhaseRecorder(enabled=bool(stats_report), memory=memory)
+        jobber = JobRunner(task_class=TaskMaster, recorder=recorder)
 
         try:
             jobs = jobber.run(jobs, dry_run=not(commit))  # noqa: E275
@@ -52,3 +88,17 @@ def rename_command(context, jobs, commit):
                 logger.error("")
 
             raise click.Abort()
+        finally:
+            if memory:
+                memory.stop()
+
+        if memory:
+            for line in memory.summary():
+                logger.info(line)
+
+        if stats_report:
+            for line in recorder.summary():
+                logger.info(line)
+
+            recorder.write(stats_report)
+            logger.info("Statistics report saved to: {}".format(stats_report))
@@ -1,9 +1,24 @@
 from .collect import (
     MEDIAS_CONTAINERS, MEDIAS_DEFAULT_CONTAINER_NAME, MEDIAS_EXTENSIONS,
     MANIFEST_FILENAME, MANIFEST_FORBIDDEN_VARS, COVER_NAME,
-    COVER_EXTENSIONS, Collector,
+    COVER_EXTENSIONS, PIPELINE_STAGES, Collector,
+)
+from .cache import REGISTRY_CACHE_SUFFIX, RegistryCache, registry_cache_path
+from .diff import RegistryDelta, RegistryDiff, apply_delta
+from .dump import DUMP_COMPRESSIONS, DumpReader, load_dump, open_dump
+from .duplicates import DuplicateFinder
+from .ignore import IGNORE_FILENAME, IgnoreRules
+from .journal import CollectorJournal
+from .listing import LISTING_FORMATS, FileListing
+from .merge import MERGE_FORMATS, DumpMerger
+from .pipeline import Pipeline, PipelineStage
+from .query import QUERY_INDEX_SUFFIX, QueryCondition, QueryIndex, RegistryQuery
+from .registry import REGISTRY_INDEX_SUFFIX, Registry, registry_index_path
+from .sinks import (
+    OUTPUT_SINKS, JsonSink, NdjsonSink, OutputSink, StatsSink, parse_output,
 )
 from .storage import AssetStorage
+from .watch import CollectorWatcher
 
 
 __all__ = [
@@ -14,6 +29,41 @@ __all__ = [
     "MANIFEST_FORBIDDEN_VARS",
     "COVER_NAME",
     "COVER_EXTENSIONS",
+    "DUMP_COMPRESSIONS",
+    "PIPELINE_STAGES",
+    "IGNORE_FILENAME",
+    "LISTING_FORMATS",
+    "MERGE_FORMATS",
+    "OUTPUT_SINKS",
+    "QUERY_INDEX_SUFFIX",
+    "REGISTRY_CACHE_SUFFIX",
+    "REGISTRY_INDEX_SUFFIX",
     "Collector",
+    "CollectorJournal",
+    "CollectorWatcher",
+    "DumpMerger",
+    "DumpReader",
+    "DuplicateFinder",
+    "FileListing",
+    "IgnoreRules",
+    "JsonSink",
+    "NdjsonSink",
+    "OutputSink",
+    "Pipeline",
+    "PipelineStage",
+    "QueryCondition",
+    "QueryIndex",
+    "Registry",
+    "RegistryCache",
+    "RegistryDelta",
+    "RegistryDiff",
+    "RegistryQuery",
+    "StatsSink",
     "AssetStorage",
+    "apply_delta",
+    "load_dump",
+    "open_dump",
+    "parse_output",
+    "registry_cache_path",
+    "registry_index_path",
 ]
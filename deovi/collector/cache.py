@@ -0,0 +1,618 @@
+import datetime
+import json
+import mmap
+import struct
+from pathlib import Path
+
+from ..exceptions import CollectorError
+from ..utils.jsons import ExtendedJsonEncoder
+
+
+# Cache file name suffix appended to dump file name
+REGISTRY_CACHE_SUFFIX = ".bin"
+
+# Cache file identifier and format version
+REGISTRY_CACHE_MAGIC = b"DEOVIREG"
+REGISTRY_CACHE_VERSION = 1
+
+# Header: magic, version, flags, number of directories, files and strings, then
+# offsets of meta, strings, directories, files, index and payloads sections and meta
+# size
+CACHE_HEADER = struct.Struct("<8sIIIIIQQQQQQQ")
+
+# Flag for payloads stored in another file
+CACHE_FLAG_EXTERNAL_PAYLOADS = 1
+
+# Directory row: key string, size, mtime timestamp, payload offset and size, first
+# file row and number of files
+CACHE_DIRECTORY_ROW = struct.Struct("<IqdQIII")
+
+# File row: directory row, name string, extension string, size and mtime timestamp
+CACHE_FILE_ROW = struct.Struct("<IIIqd")
+
+# Offsets of strings from string table
+CACHE_OFFSET = struct.Struct("<Q")
+
+# Directory rows from index sorted on their key
+CACHE_INDEX_ROW = struct.Struct("<I")
+
+# Number of rows read at once when iterating over a table
+CACHE_READ_ROWS = 4096
+
+
+def isoformat_to_timestamp(value):
+    """
+    Convert a datetime in ISO format from a payload to a timestamp.
+
+    Arguments:
+        value (string): Datetime in ISO format.
+
+    Returns:
+        float: Timestamp, ``0.0`` if value is empty or invalid.
+    """
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def registry_cache_path(destination):
+    """
+    Get the cache file path for a dump.
+
+    Arguments:
+        destination (pathlib.Path): Dump file path.
+
+    Returns:
+        pathlib.Path: Dump file path with ``REGISTRY_CACHE_SUFFIX`` appended, like
+        ``plop.json.bin`` for ``plop.json``.
+    """
+    return destination.with_name(destination.name + REGISTRY_CACHE_SUFFIX)
+
+
+class StringTable:
+    """
+    Deduplicated strings indexed on their insertion order.
+    """
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def add(self, value):
+        """
+        Add a string if not already in table.
+
+        Arguments:
+            value (string): String to add.
+
+        Returns:
+            integer: String identifier.
+        """
+        value = str(value)
+        sid = self.ids.get(value)
+        if sid is None:
+            sid = self.ids[value] = len(self.strings)
+            self.strings.append(value.encode("utf-8"))
+
+        return sid
+
+    def dump(self):
+        """
+        Serialize table to bytes.
+
+        Returns:
+            bytes: Offsets of every string (and the end of last string) followed by
+            the encoded strings.
+        """
+        offsets = []
+        position = 0
+        for item in self.strings:
+            offsets.append(CACHE_OFFSET.pack(position))
+            position += len(item)
+        offsets.append(CACHE_OFFSET.pack(position))
+
+        return b"".join(offsets) + b"".join(self.strings)
+
+
+class RegistryCacheWriter:
+    """
+    Accumulate directories to write them to a binary cache.
+
+    Cache is made of a string table for directory keys, file names and extensions,
+    fixed-width rows for directories and files with numeric columns for size and
+    modification time, an index of directories sorted on their key and the compact
+    JSON payload of each directory.
+
+    With external payloads, directory payloads are not written into cache, each
+    directory is given with the position of its payload in another file (like the
+    JSON dump) instead.
+
+    Keyword Arguments:
+        external (boolean): Whether payloads are stored in another file or not.
+    """
+    def __init__(self, external=False):
+        self.external = external
+        self.strings = StringTable()
+        self.directories = []
+        self.files = []
+        self.payloads = []
+        self.payload_position = 0
+        self.keys = []
+
+    def add(self, key, data, span=None):
+        """
+        Add a directory.
+
+        Arguments:
+            key (string): Directory key.
+            data (dict): Directory payload.
+
+        Keyword Arguments:
+            span (tuple): Start and end positions of payload from the other file,
+                required with external payloads.
+        """
+        key = str(key)
+        row = len(self.directories)
+        self.keys.append((key.encode("utf-8"), row))
+
+        children = data.get("children_files", [])
+        for item in children:
+            self.files.append(CACHE_FILE_ROW.pack(
+                row,
+                self.strings.add(item.get("name", "")),
+                self.strings.add(item.get("extension", "")),
+                item.get("size", 0),
+                isoformat_to_timestamp(item.get("mtime")),
+            ))
+
+        if self.external:
+            offset, size = span[0], span[1] - span[0]
+        else:
+            payload = json.dumps(
+                data,
+                separators=(",", ":"),
+                cls=ExtendedJsonEncoder,
+            ).encode("utf-8")
+            self.payloads.append(payload)
+            offset, size = self.payload_position, len(payload)
+            self.payload_position += size
+
+        self.directories.append(CACHE_DIRECTORY_ROW.pack(
+            self.strings.add(key),
+            data.get("size", 0),
+            isoformat_to_timestamp(data.get("mtime")),
+            offset,
+            size,
+            len(self.files) - len(children),
+            len(children),
+        ))
+
+    def write(self, fp, meta=None):
+        """
+        Write cache.
+
+        Arguments:
+            fp (file object): File object opened in binary mode.
+
+        Keyword Arguments:
+            meta (dict): Informations to store with the registry, like ``device``.
+
+        Returns:
+            integer: Size in bytes of written cache.
+        """
+        index = [CACHE_INDEX_ROW.pack(row) for _, row in sorted(self.keys)]
+        meta = json.dumps(meta or {}, cls=ExtendedJsonEncoder).encode("utf-8")
+        table = self.strings.dump()
+
+        meta_offset = CACHE_HEADER.size
+        strings_offset = meta_offset + len(meta)
+        directories_offset = strings_offset + len(table)
+        files_offset = (
+            directories_offset + len(self.directories) * CACHE_DIRECTORY_ROW.size
+        )
+        index_offset = files_offset + len(self.files) * CACHE_FILE_ROW.size
+        payloads_offset = index_offset + len(index) * CACHE_INDEX_ROW.size
+
+        fp.write(CACHE_HEADER.pack(
+            REGISTRY_CACHE_MAGIC,
+            REGISTRY_CACHE_VERSION,
+            CACHE_FLAG_EXTERNAL_PAYLOADS if self.external else 0,
+            len(self.directories),
+            len(self.files),
+            len(self.strings.strings),
+            meta_offset,
+            strings_offset,
+            directories_offset,
+            files_offset,
+            index_offset,
+            payloads_offset,
+            len(meta),
+        ))
+        for chunk in (
+            [meta, table] + self.directories + self.files + index + self.payloads
+        ):
+            fp.write(chunk)
+
+        return payloads_offset + self.payload_position
+
+
+def write_registry_cache(fp, registry, device=None):
+    """
+    Write a registry to a binary cache.
+
+    Arguments:
+        fp (file object): File object opened in binary mode.
+        registry (dict): Registry to write.
+
+    Keyword Arguments:
+        device (dict): Device informations to store with the registry.
+
+    Returns:
+        integer: Size in bytes of written cache.
+    """
+    writer = RegistryCacheWriter()
+    for key, data in registry.items():
+        writer.add(key, data)
+
+    return writer.write(fp, meta={"device": device})
+
+
+class RegistryCache:
+    """
+    Read a registry from a binary cache with a memory mapping.
+
+    Nothing is decoded when opening cache, a directory payload is only decoded when
+    it is accessed. Directory keys are found with a binary search on the sorted index.
+
+    Cache behaves like a read only dictionnary of directory payloads indexed on their
+    key, in the same order as in the registry it has been written from.
+
+    Arguments:
+        path (pathlib.Path): Cache file path.
+
+    Keyword Arguments:
+        payloads (mmap.mmap): Buffer to read payloads from, required when cache has
+            been written with external payloads.
+
+    Raises:
+        CollectorError: If file is not a registry cache or its format version is not
+            supported.
+    """
+    def __init__(self, path, payloads=None):
+        self.path = Path(path)
+        self._fp = self.path.open("rb")
+        try:
+            self.buffer = mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._fp.close()
+            raise CollectorError("Invalid registry cache: {}".format(str(self.path)))
+
+        try:
+            (
+                magic, version, self.flags, self.directory_count, self.file_count,
+                self.string_count, self.meta_offset, self.strings_offset,
+                self.directories_offset, self.files_offset, self.index_offset,
+                self.payloads_offset, self.meta_size,
+            ) = CACHE_HEADER.unpack_from(self.buffer, 0)
+        except struct.error:
+            magic = version = None
+
+        if magic != REGISTRY_CACHE_MAGIC or version != REGISTRY_CACHE_VERSION:
+            self.close()
+            raise CollectorError(
+                "Invalid or unsupported registry cache: {}".format(str(self.path))
+            )
+
+        if self.flags & CACHE_FLAG_EXTERNAL_PAYLOADS:
+            self.payloads = payloads
+            self.payloads_offset = 0
+        else:
+            self.payloads = self.buffer
+
+        # Strings data start right after their offsets
+        self.string_data_offset = (
+            self.strings_offset + (self.string_count + 1) * CACHE_OFFSET.size
+        )
+
+    def close(self):
+        """
+        Release memory mapping and file.
+
+        Buffer of external payloads is not released.
+        """
+        self.payloads = None
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def meta(self):
+        """
+        Informations stored with registry.
+        """
+        return json.loads(
+            self.buffer[self.meta_offset:self.meta_offset + self.meta_size]
+        )
+
+    @property
+    def device(self):
+        """
+        Device informations stored with registry.
+        """
+        return self.meta.get("device")
+
+    def string_bytes(self, sid):
+        """
+        Get an encoded string from string table.
+
+        Arguments:
+            sid (integer): String identifier.
+
+        Returns:
+            bytes: Encoded string.
+        """
+        start, end = struct.unpack_from(
+            "<QQ", self.buffer, self.strings_offset + sid * CACHE_OFFSET.size
+        )
+        offset = self.string_data_offset
+
+        return self.buffer[offset + start:offset + end]
+
+    def string(self, sid):
+        """
+        Get a string from string table.
+
+        Arguments:
+            sid (integer): String identifier.
+
+        Returns:
+            string: Decoded string.
+        """
+        return self.string_bytes(sid).decode("utf-8")
+
+    def directory_row(self, row):
+        """
+        Get a directory row.
+
+        Arguments:
+            row (integer): Directory row number.
+
+        Returns:
+            tuple: Key string identifier, size, modification timestamp, payload offset
+            and size, first file row and number of files.
+        """
+        return CACHE_DIRECTORY_ROW.unpack_from(
+            self.buffer, self.directories_offset + row * CACHE_DIRECTORY_ROW.size
+        )
+
+    def file_row(self, row):
+        """
+        Get a file row.
+
+        Arguments:
+            row (integer): File row number.
+
+        Returns:
+            tuple: Directory row number, name string identifier, extension string
+            identifier, size and modification timestamp.
+        """
+        return CACHE_FILE_ROW.unpack_from(
+            self.buffer, self.files_offset + row * CACHE_FILE_ROW.size
+        )
+
+    def _indexed_key(self, position):
+        """
+        Get encoded key of a directory from its position in sorted index.
+        """
+        row = CACHE_INDEX_ROW.unpack_from(
+            self.buffer, self.index_offset + position * CACHE_INDEX_ROW.size
+        )[0]
+        return self.string_bytes(self.directory_row(row)[0]), row
+
+    def find(self, key):
+        """
+        Find a directory row from its key.
+
+        Arguments:
+            key (string): Directory key.
+
+        Returns:
+            integer: Directory row number or None if there is no directory with this
+            key.
+        """
+        encoded = str(key).encode("utf-8")
+        position = self._bisect(encoded)
+
+        if position < self.directory_count:
+            found, row = self._indexed_key(position)
+            if found == encoded:
+                return row
+
+        return None
+
+    def _bisect(self, encoded):
+        """
+        Binary search of an encoded key position in sorted index.
+        """
+        low, high = 0, self.directory_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._indexed_key(middle)[0] < encoded:
+                low = middle + 1
+            else:
+                high = middle
+
+        return low
+
+    def payload(self, row):
+        """
+        Decode a directory payload.
+
+        Arguments:
+            row (integer): Directory row number.
+
+        Raises:
+            CollectorError: If cache has external payloads and no payloads buffer
+                has been given.
+
+        Returns:
+            dict: Directory payload.
+        """
+        if self.payloads is None:
+            raise CollectorError(
+                "Registry cache payloads are stored in another file: {}".format(
+                    str(self.path)
+                )
+            )
+
+        _, _, _, offset, size, _, _ = self.directory_row(row)
+        start = self.payloads_offset + offset
+
+        return json.loads(self.payloads[start:start + size])
+
+    def key(self, row):
+        """
+        Get the key of a directory.
+
+        Arguments:
+            row (integer): Directory row number.
+
+        Returns:
+            string: Directory key.
+        """
+        return self.string(self.directory_row(row)[0])
+
+    def __len__(self):
+        return self.directory_count
+
+    def __contains__(self, key):
+        return self.find(key) is not None
+
+    def __getitem__(self, key):
+        row = self.find(key)
+        if row is None:
+            raise KeyError(key)
+
+        return self.payload(row)
+
+    def get(self, key, default=None):
+        row = self.find(key)
+        if row is None:
+            return default
+
+        return self.payload(row)
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self):
+        """
+        Iterate over directory keys without decoding any payload.
+
+        Yields:
+            string: Directory key.
+        """
+        for row in range(self.directory_count):
+            yield self.key(row)
+
+    def values(self):
+        """
+        Iterate over directory payloads.
+
+        Yields:
+            dict: Directory payload.
+        """
+        for row in range(self.directory_count):
+            yield self.payload(row)
+
+    def items(self):
+        """
+        Iterate over directories.
+
+        Yields:
+            tuple: Directory key and payload.
+        """
+        for row in range(self.directory_count):
+            yield self.key(row), self.payload(row)
+
+    def directories(self):
+        """
+        Iterate over directory columns without decoding any payload.
+
+        Yields:
+            tuple: Directory key, size and modification timestamp.
+        """
+        for row in range(self.directory_count):
+            key_sid, size, mtime, _, _, _, _ = self.directory_row(row)
+            yield self.string(key_sid), size, mtime
+
+    def files(self, key=None):
+        """
+        Iterate over file columns without decoding any payload.
+
+        Keyword Arguments:
+            key (string): Only iterate over files from this directory. Default to
+                None to iterate over every file.
+
+        Yields:
+            tuple: Directory key, file name, extension, size and modification
+            timestamp.
+        """
+        if key is None:
+            start, count = 0, self.file_count
+        else:
+            row = self.find(key)
+            if row is None:
+                return
+            _, _, _, _, _, start, count = self.directory_row(row)
+
+        # Files are stored grouped by directory and there are only a few extensions
+        current, current_key = None, None
+        extensions = {}
+
+        for row, name_sid, extension_sid, size, mtime in self.file_rows(start, count):
+            if row != current:
+                current, current_key = row, self.key(row)
+            if extension_sid not in extensions:
+                extensions[extension_sid] = self.string(extension_sid)
+            yield (
+                current_key,
+                self.string(name_sid),
+                extensions[extension_sid],
+                size,
+                mtime,
+            )
+
+    def file_rows(self, start=0, count=None):
+        """
+        Iterate over file rows, they are read by chunks.
+
+        Keyword Arguments:
+            start (integer): First file row.
+            count (integer): Number of rows. Default to every row from start.
+
+        Yields:
+            tuple: Directory row number, name string identifier, extension string
+            identifier, size and modification timestamp.
+        """
+        if count is None:
+            count = self.file_count - start
+
+        for chunk in range(start, start + count, CACHE_READ_ROWS):
+            offset = self.files_offset + chunk * CACHE_FILE_ROW.size
+            rows = min(CACHE_READ_ROWS, start + count - chunk)
+            yield from CACHE_FILE_ROW.iter_unpack(
+                self.buffer[offset:offset + rows * CACHE_FILE_ROW.size]
+            )
@@ -1,13 +1,22 @@
 import datetime
-import json
+import time
+from pathlib import Path
 from shutil import disk_usage
 
 import yaml
 
 from ..renamer.printer import PrinterInterface
-from ..utils.jsons import ExtendedJsonEncoder
+from ..utils.jsons import JsonSerializer
 from ..utils.checksum import ChecksumOperator
+from ..utils.filesystem import FilesystemOperator
+from ..utils.instrumentation import PhaseRecorder, TopTracker
 from ..exceptions import CollectorError
+from .cache import registry_cache_path, write_registry_cache
+from .diff import RegistryDelta
+from .dump import DUMP_COMPRESSIONS, dump_compression, write_json
+from .ignore import IGNORE_FILENAME, IgnoreRules, is_ignored
+from .journal import CollectorJournal
+from .pipeline import DEFAULT_QUEUE_SIZE, Pipeline, PipelineStage
 from .storage import AssetStorage
 
 # Non exhaustive list of Video containers with their file extension and name
@@ -76,6 +85,17 @@ COVER_EXTENSIONS = [
 ]
 
 
+# Payload items which are paths, they have to be restored as Path objects when a
+# payload is loaded from a journal
+PAYLOAD_PATH_FIELDS = ["path", "absolute_dir", "relative_dir"]
+
+
+# Names of collect pipeline stages which accept a custom number of workers. Directory
+# walk is always done from the calling thread and storing is always done from a single
+# worker to keep registry order.
+PIPELINE_STAGES = ["metadata", "checksum"]
+
+
 class Collector(PrinterInterface):
     """
     Collect informations about media files.
@@ -83,9 +103,28 @@ class Collector(PrinterInterface):
     Attributes:
         registry (dict): The registry where is collected all informations from scanning.
         stats (dict): Global statistics for all collected directories, files and total
-            size.
+            size. When recorder is enabled, it also includes filesystem operation
+            counters per phase in item ``operations``. When resuming from a journal,
+            it also includes the number of directories restored from journal in item
+            ``resumed``. When there is a previous registry, it also includes the number
+            of files found from another path than in previous registry in item
+            ``moved``. When there is a delta, it also includes the delta statistics in
+            item ``delta``.
         file_storage_queue (list): A list where each item is a tuple with source and
             destination to use for copying files.
+        pipeline_stats (dict): Per stage counters from the last ``run`` pipeline.
+        slowest_directories (deovi.utils.instrumentation.TopTracker): Tracker for
+            directories which took the most time to scan.
+        largest_directories (deovi.utils.instrumentation.TopTracker): Tracker for
+            directories with the most entries.
+        directory_rollups (dict): Recursive totals of media files for each walked
+            directory indexed on its registry key, only computed when ``rollups`` is
+            enabled.
+        largest_files (deovi.utils.instrumentation.TopTracker): Tracker for the
+            largest media files.
+        watcher (deovi.collector.watch.CollectorWatcher): Watcher to notify with
+            every walked directory before it is listed. Default to None, it is set by
+            the watcher itself.
 
     Arguments:
         basepath (pathlib.Path): The base directory for all directories to scan.
@@ -107,13 +146,95 @@ class Collector(PrinterInterface):
             search for cover files.
         allow_media_cover (boolean): If False, cover files will be ignored from dump.
             By default this is True and so covers are managed and dumped.
+        workers (dict): Number of worker threads for pipeline stages, indexed on stage
+            names from ``PIPELINE_STAGES``. A stage without a value has a single
+            worker.
+        queue_size (integer): Maximum number of directories waiting in each pipeline
+            stage queue.
+        recorder (deovi.utils.instrumentation.PhaseRecorder): Recorder to measure
+            collection phases (``walk``, ``manifest``, ``cover``, ``checksum``,
+            ``store``, ``delta``, ``dump``, ``cache`` and ``assets``). Default to a
+            disabled recorder.
+        top_directories (integer): Number of slowest and largest directories to track
+            during scan. Default to 0 so nothing is tracked.
+        journal (pathlib.Path): Path to a journal file where every stored directory
+            is appended during ``run``. Default to None so there is no journal.
+        resume (boolean): If True, ``run`` resumes collection from the existing
+            journal: directories already in journal with the same modification time
+            are restored from journal instead of being scanned again. Default to
+            False.
+        exclude (list): Patterns with gitignore syntax for files and directories to
+            exclude, relative to basepath. Rules from ``.deoviignore`` files found
+            in directories are applied also. Default to None.
+        max_depth (integer): Maximum depth of directories to walk below basepath,
+            ``0`` means only basepath is walked. Default to None for no limit.
+        follow_symlinks (boolean): If True, symbolic links to directories are walked
+            like other directories. Default to False so they are skipped. Symbolic
+            links to media files are always collected.
+        one_file_system (boolean): If True, directories on another filesystem than
+            the walked directory (like mount points) are skipped. Default to False.
+        rollups (boolean): If True, recursive totals of media files are computed for
+            each directory and included in dump. Default to False.
+        top_files (integer): Number of largest media files to track and include in
+            dump. Default to 0 so nothing is tracked.
+        identities (boolean): If True, the identity of each media file (device,
+            inode, size and modification time in nanoseconds) is included in its
+            payload as item ``identity``. Default to False.
+        previous (dict): Registry from a previous dump collected with identities.
+            Media files are matched on their identity against this registry, a file
+            found from another path gets an item ``moved_from`` with its previous
+            path relative to basepath and it gets the items from its previous payload
+            which are not collected from filesystem (like checksums added from another
+            tool). This enables identities. Default to None.
+        listing (deovi.collector.listing.FileListing): Listing of files to walk
+            instead of the filesystem. Directories and media files are only stat and
+            listed from listing, manifests, covers, ignore files and checksums are
+            still read from filesystem. Identities can not be collected from a
+            listing. Default to None.
+        delta_against (pathlib.Path): Path to a previous dump to compare the registry
+            to. On ``run`` a delta with only the added, changed and removed
+            directories is written next to the dump, see ``delta_destination``.
+            Default to None so there is no delta.
+        delta_only (boolean): If True, ``run`` writes the delta to the destination
+            instead of the full dump. Only with ``delta_against``. Default to False.
+        registry_cache (boolean): If True, ``run`` also writes the registry to a
+            binary cache next to the dump, see ``write_registry_cache``. Default to
+            False.
+        compression (string): Compression name from
+            ``deovi.collector.dump.DUMP_COMPRESSIONS`` to compress the dump and delta
+            with. Default to None so compression is chosen from the destination
+            suffix, like ``.gz`` for ``gzip``, and a destination without a
+            compression suffix is not compressed.
+        compact (boolean): If True, dump and delta are written without indentation
+            nor whitespaces. Default to False.
+        serializer (string): JSON serializer backend name from
+            ``deovi.utils.jsons.JSON_BACKENDS`` to write dump and delta with. Default
+            to ``json`` which is the standard library, ``orjson`` is faster but its
+            output is not indented like with ``json``. Directory checksums are always
+            computed with the ``json`` backend so they do not depend on it.
+        sort_keys (boolean): If True, directories are written to the dump sorted on
+            their key, so dumps can be compared in a single pass with
+            ``RegistryDiff`` and merged with ``DumpMerger``. Default to False so
+            directories are written in walk order.
+        sinks (list): Output sinks from ``deovi.collector.sinks`` to feed during
+            ``run`` in addition to the dump destination, so a single scan can write
+            many outputs. Default to None so there is no additional output.
     """
     def __init__(self, basepath, extensions=MEDIAS_EXTENSIONS, allow_empty_dir=False,
                  manifest=MANIFEST_FILENAME, cover_name=COVER_NAME,
-                 cover_extensions=COVER_EXTENSIONS, allow_media_cover=True):
+                 cover_extensions=COVER_EXTENSIONS, allow_media_cover=True,
+                 workers=None, queue_size=DEFAULT_QUEUE_SIZE, recorder=None,
+                 top_directories=0, journal=None, resume=False, exclude=None,
+                 max_depth=None, follow_symlinks=False, one_file_system=False,
+                 rollups=False, top_files=0, identities=False, previous=None,
+                 listing=None, delta_against=None, delta_only=False,
+                 registry_cache=False, compression=None, compact=False,
+                 serializer="json", sort_keys=False, sinks=None):
         super().__init__()
 
-        self.checksum_op = ChecksumOperator()
+        self.recorder = recorder or PhaseRecorder(enabled=False)
+        self.fs_op = FilesystemOperator(recorder=self.recorder)
+        self.checksum_op = ChecksumOperator(recorder=self.recorder)
         self.basepath = basepath
         self.extensions = extensions
         self.allow_empty_dir = allow_empty_dir
@@ -121,14 +242,70 @@ class Collector(PrinterInterface):
         self.cover_name = cover_name
         self.cover_extensions = cover_extensions
         self.allow_media_cover = allow_media_cover
+        self.workers = workers or {}
+        self.queue_size = queue_size
+        self.top_directories = top_directories
+        self.journal_path = journal
+        self.resume = resume
+        self.exclude = exclude or []
+        self.exclude_rules = IgnoreRules(self.exclude)
+        self.max_depth = max_depth
+        self.follow_symlinks = follow_symlinks
+        self.one_file_system = one_file_system
+        self.rollups = rollups
+        self.top_files = top_files
+        self.identities = identities or previous is not None
+        self.previous_files = self.index_identities(previous or {})
+        self.listing = listing
+        self.delta_against = delta_against
+        self.delta_only = delta_only
+        self.registry_cache = registry_cache
+        self.compression = compression
+        self.compact = compact
+        self.sort_keys = sort_keys
+        try:
+            self.serializer = JsonSerializer(backend=serializer)
+        except ValueError as e:
+            raise CollectorError(str(e))
+        self.sinks = list(sinks or [])
+        # Sinks fed with stored directories, only while ``run`` scans
+        self.running_sinks = []
+        # Operator for stat and listing during walk
+        self.walk_op = listing or self.fs_op
+        self.watcher = None
         self.file_storage_queue = []
 
+        unknown = [name for name in self.workers if name not in PIPELINE_STAGES]
+        if unknown:
+            msg = "Unknown pipeline stage(s) for workers: {}"
+            raise CollectorError(msg.format(", ".join(sorted(unknown))))
+
+        if self.listing is not None and self.identities:
+            raise CollectorError("File identities can not be collected from a listing")
+
+        if self.delta_only and self.delta_against is None:
+            raise CollectorError("Delta only dump requires a previous dump")
+
+        if self.compression is not None and (
+            self.compression not in DUMP_COMPRESSIONS
+        ):
+            raise CollectorError(
+                "Unknown dump compression: {}".format(self.compression)
+            )
+
+        if self.delta_only and self.registry_cache:
+            raise CollectorError(
+                "Registry cache can not be written with a delta only dump"
+            )
+
         # Build elligible file names for cover from cover base file name and enabled
         # cover extensions
         self.cover_files = [
             self.cover_name + item
             for item in self.cover_extensions
         ]
+        # Every file names to search from directory listing
+        self.asset_filenames = set(self.cover_files + [self.manifest_filename])
 
         self.reset()
 
@@ -140,8 +317,24 @@ class Collector(PrinterInterface):
         ``scan_directory`` for different basepath since registry and global states are
         cumulative.
         """
-        self.storage = AssetStorage(allowed_cover_filenames=self.cover_files)
+        self.storage = AssetStorage(
+            allowed_cover_filenames=self.cover_files,
+            recorder=self.recorder,
+        )
         self.file_storage_queue = []
+        self.pipeline_stats = {}
+        self.slowest_directories = TopTracker(self.top_directories)
+        self.largest_directories = TopTracker(self.top_directories)
+        self.largest_files = TopTracker(self.top_files)
+        self.directory_rollups = {}
+        self.journal = None
+        self.resumed = {}
+        # Identities (device and inode) of walked directories and of scanned files
+        # with multiple links
+        self.visited_directories = set()
+        self.visited_files = set()
+        # Paths of scanned files which are links to an already counted file
+        self.linked_files = set()
 
         self.registry = {}
         self.stats = {
@@ -150,6 +343,76 @@ class Collector(PrinterInterface):
             "size": 0,
             "asset_storage": None,
         }
+        if self.previous_files:
+            self.stats["moved"] = 0
+
+    def index_identities(self, registry):
+        """
+        Index media files from a registry on their identity.
+
+        Arguments:
+            registry (dict): Registry from a dump.
+
+        Returns:
+            dict: Lists of file payloads indexed on their identity as a tuple, hard
+            links to the same file share the same identity. Files without identity
+            are ignored.
+        """
+        index = {}
+
+        for data in registry.values():
+            for item in data.get("children_files", []):
+                if item.get("identity"):
+                    index.setdefault(tuple(item["identity"]), []).append(item)
+
+        return index
+
+    def match_previous(self, data):
+        """
+        Match a scanned media file against its previous payload from its identity.
+
+        When many previous payloads share the identity (hard links), the one at the
+        same path is preferred so an unchanged link is never reported as moved. Else
+        a payload whose path does not exist anymore is preferred as the origin of a
+        moved link.
+
+        Arguments:
+            data (dict): File payload as built from ``scan_file`` with its identity.
+
+        Returns:
+            dict: Given file payload, mutated with items from previous payload and with
+            item ``moved_from`` if file has been moved.
+        """
+        candidates = self.previous_files.get(tuple(data["identity"]))
+        if not candidates:
+            return data
+
+        current_path = str(data["relative_dir"] / data["name"])
+        paths = [
+            str(Path(item["relative_dir"]) / item["name"])
+            for item in candidates
+        ]
+
+        if current_path in paths:
+            previous = candidates[paths.index(current_path)]
+            previous_path = current_path
+        else:
+            previous, previous_path = candidates[0], paths[0]
+            if len(candidates) > 1:
+                for item, path in zip(candidates, paths):
+                    if not self.fs_op.exists(self.basepath / path):
+                        previous, previous_path = item, path
+                        break
+
+        for name, value in previous.items():
+            if name not in data and name != "moved_from":
+                data[name] = value
+
+        if previous_path != current_path:
+            data["moved_from"] = previous_path
+            self.stats["moved"] += 1
+
+        return data
 
     def timestamp_to_isoformat(self, timestamp):
         """
@@ -204,13 +467,64 @@ class Collector(PrinterInterface):
         Returns:
             string: Item key name used to store the data.
         """
-        key = str(data["path"].relative_to(self.basepath))
+        with self.recorder.phase("store", path=data["path"]):
+            key = str(data["path"].relative_to(self.basepath))
+
+            self.registry[key] = self._process_file_fields(["cover"], data)
 
-        self.registry[key] = self._process_file_fields(["cover"], data)
+            for sink in self.running_sinks:
+                sink.directory(key, self.registry[key])
 
         return key
 
-    def scan_file(self, path):
+    def store_item(self, item):
+        """
+        Append walked directory to journal if any then store it.
+
+        Directories restored from journal are not appended again.
+
+        Arguments:
+            item (dict): Walked directory item once all its stages are done.
+
+        Returns:
+            string: Item key name used to store the data.
+        """
+        if self.journal is not None and not item["resumed"]:
+            self.journal.append(
+                str(item["data"]["relative_dir"]),
+                item["mtime"],
+                item["data"],
+            )
+
+        return self.store(item["data"])
+
+    def restore_payload(self, data):
+        """
+        Restore a directory payload loaded from a journal.
+
+        Path items are restored as Path objects and the cover destination is moved
+        into the current asset storage.
+
+        Arguments:
+            data (dict): Directory payload as loaded from journal.
+
+        Returns:
+            dict: Given directory payload, mutated.
+        """
+        for item in [data] + data["children_files"]:
+            for name in PAYLOAD_PATH_FIELDS:
+                item[name] = Path(item[name])
+
+        if data.get("cover"):
+            source, destination = data["cover"]
+            data["cover"] = (
+                Path(source),
+                self.storage.storage_assets / Path(destination).name,
+            )
+
+        return data
+
+    def scan_file(self, path, stats=None):
         """
         Scan a media file to get its informations.
 
@@ -219,11 +533,16 @@ class Collector(PrinterInterface):
         Arguments:
             path (pathlib.Path): File path to scan for informations.
 
+        Keyword Arguments:
+            stats (os.stat_result): File stats if they have already been retrieved.
+                Default is ``None`` so file stats are retrieved from filesystem.
+
         Returns:
             dict: Collected file informations.
         """
         # Get file stats informations
-        stats = path.stat()
+        if stats is None:
+            stats = self.walk_op.stat(path)
 
         relative_dir = path.parent.relative_to(self.basepath)
 
@@ -252,12 +571,29 @@ class Collector(PrinterInterface):
             "mtime": self.timestamp_to_isoformat(stats.st_mtime),
         }
 
+        if self.identities:
+            data["identity"] = [
+                stats.st_dev,
+                stats.st_ino,
+                stats.st_size,
+                stats.st_mtime_ns,
+            ]
+            if self.previous_files:
+                self.match_previous(data)
+
         self.stats["files"] += 1
+        # Size of a file with multiple hard links is only counted once
+        if stats.st_nlink > 1:
+            identity = (stats.st_dev, stats.st_ino)
+            if identity in self.visited_files:
+                self.linked_files.add(path)
+                return data
+            self.visited_files.add(identity)
         self.stats["size"] += data["size"]
 
         return data
 
-    def get_directory_manifest(self, path):
+    def get_directory_manifest(self, path, available=None):
         """
         Search for a YAML manifest to load medias informations related to
         given directory path.
@@ -268,15 +604,44 @@ class Collector(PrinterInterface):
             path (pathlib.Path): A Path object for the directory where to find
                 manifest.
 
+        Keyword Arguments:
+            available (set): File names known to exist in directory. If given, it is
+                used to know if manifest exists instead of checking on filesystem.
+
+        Returns:
+            dict: Manifest content.
+        """
+        with self.recorder.phase("manifest", path=path):
+            return self._load_manifest(
+                path / self.manifest_filename,
+                available=available,
+            )
+
+    def _load_manifest(self, manifest_path, available=None):
+        """
+        Load and validate manifest file if it exists.
+
+        Arguments:
+            manifest_path (pathlib.Path): Manifest file path.
+
+        Keyword Arguments:
+            available (set): File names known to exist in manifest directory.
+
         Returns:
             dict: Manifest content.
         """
         manifest = {}
-        manifest_path = path / self.manifest_filename
 
-        if manifest_path.exists():
+        if available is not None:
+            exists = manifest_path.name in available
+        else:
+            exists = self.fs_op.exists(manifest_path)
+
+        if exists:
             try:
-                manifest = yaml.load(manifest_path.read_text(), Loader=yaml.FullLoader)
+                content = self.fs_op.read_text(manifest_path)
+                self.recorder.add_bytes(read=len(content))
+                manifest = yaml.load(content, Loader=yaml.FullLoader)
             except yaml.YAMLError:
                 msg = "No YAML object could be decoded for manifest: {}"
                 self.log_warning(msg.format(str(manifest_path)))
@@ -300,20 +665,84 @@ class Collector(PrinterInterface):
 
         return manifest
 
-    def scan_directory(self, path, checksum=False):
+    def directory_scopes(self, path):
         """
-        Scan a directory to get its media files.
+        Build ignore rules which apply to a directory from exclude patterns and from
+        ignore files of its parent directories.
 
         Arguments:
-            path (pathlib.Path): Directory to scan for informations, for direct children
-                files and to recursively search for children directories.
+            path (pathlib.Path): Directory path inside basepath.
+
+        Returns:
+            list: Ignore rules as tuples ``(rules, prefix)`` to give to
+            ``walk_directory``.
+        """
+        relative_dir = path.relative_to(self.basepath)
+        scopes = []
+
+        if self.exclude_rules:
+            prefix = "" if path == self.basepath else relative_dir.as_posix() + "/"
+            scopes.append((self.exclude_rules, prefix))
+
+        # Ignore file from directory itself is read during walk
+        for index in range(len(relative_dir.parts)):
+            parent = self.basepath.joinpath(*relative_dir.parts[:index])
+            ignore_path = parent / IGNORE_FILENAME
+            if not self.fs_op.exists(ignore_path):
+                continue
+
+            rules = IgnoreRules(self.fs_op.read_text(ignore_path).splitlines())
+            if rules:
+                scopes.append((
+                    rules,
+                    "/".join(relative_dir.parts[index:]) + "/",
+                ))
+
+        return scopes
+
+    def walk_directory(self, path, scopes=None, device=None, recursive=True):
+        """
+        Recursively walk a directory to scan its media files.
+
+        This is the listing part of collection, it only list directories and get
+        stats of media files. Directories are yielded in post-order (children before
+        their parent) which is the order they are stored in registry.
+
+        Entries matching exclude patterns or rules from an ignore file in directory
+        or its parents are skipped before anything is done with them, so an excluded
+        directory is never listed.
+
+        A directory which has already been walked (from a symbolic link or a bind
+        mount) is not walked again, this avoids endless recursion with symbolic link
+        loops.
+
+        Arguments:
+            path (pathlib.Path): Directory to walk, for direct children files and to
+                recursively search for children directories.
+
+        Keyword Arguments:
+            scopes (list): Ignore rules which apply to directory as tuples
+                ``(rules, prefix)``, see ``deovi.collector.ignore.is_ignored``. This is
+                built during recursion, default to exclude patterns from collector.
+            device (integer): Device identifier of the filesystem to stay on when
+                collector ``one_file_system`` option is enabled. This is built during
+                recursion, default to the device of given directory.
+            recursive (boolean): If False, children directories are not walked.
+                Default to True.
 
         Raises:
             CollectorError: If given path is not a directory inside
                 basepath directory.
 
-        Returns:
-            dict: Directory information payload.
+        Yields:
+            dict: Walked directory item with directory payload in ``data``,
+            ``collected`` which is a boolean to know if directory is elligible to
+            registry or not, ``available`` for manifest and cover file names found in
+            directory, ``entries`` for the number of directory entries,
+            ``elapsed`` for the time spent to scan directory, ``mtime`` for the
+            directory modification time in nanoseconds, ``resumed`` which is a
+            boolean to know if directory payload has been restored from journal and
+            ``subdirectories`` for the children directory paths to walk.
         """
         self.log_debug("Scanning {}".format(str(path)))
 
@@ -323,59 +752,445 @@ class Collector(PrinterInterface):
             msg = "You cannot scan a directory which is out of given basepath: {}"
             raise CollectorError(msg.format(str(self.basepath)))
 
-        # Get directory stats informations
-        stats = path.stat()
-
-        data = {
-            "path": path,
-            "name": path.name,
-            "absolute_dir": path.parents[0],
-            "relative_dir": relative_dir,
-            "size": stats.st_size,
-            "mtime": self.timestamp_to_isoformat(stats.st_mtime),
-            "children_files": [],
-        }
-
-        for child in path.iterdir():
-            if child.is_dir():
-                self.scan_directory(child, checksum=checksum)
+        if scopes is None:
+            scopes = []
+            if self.exclude_rules:
+                prefix = "" if path == self.basepath else relative_dir.as_posix() + "/"
+                scopes.append((self.exclude_rules, prefix))
+
+        start = time.perf_counter()
+
+        with self.recorder.phase("walk", path=path):
+            # Get directory stats informations
+            stats = self.walk_op.stat(path)
+
+            # Walked directories are only tracked from the same walk
+            if device is None:
+                device = stats.st_dev
+                self.visited_directories = set()
+            elif self.one_file_system and stats.st_dev != device:
+                self.log_debug("Skipped other filesystem {}".format(str(path)))
+                return
+
+            identity = (stats.st_dev, stats.st_ino)
+            if identity in self.visited_directories:
+                self.log_warning("Directory already walked: {}".format(str(path)))
+                return
+            self.visited_directories.add(identity)
+
+            if self.watcher is not None:
+                self.watcher.watch(path)
+
+            # Directory from journal is restored if it has not changed since
+            record = self.resumed.get(str(relative_dir))
+            if record and record["mtime"] == stats.st_mtime_ns:
+                data = self.restore_payload(record["data"])
+                self.stats["files"] += len(data["children_files"])
+                self.stats["size"] += sum([
+                    item["size"] for item in data["children_files"]
+                ])
+                self.stats["resumed"] += 1
             else:
-                if child.suffix and child.suffix.lower()[1:] in self.extensions:
-                    data["children_files"].append(self.scan_file(child))
-
-        # Only append directory datas if there is at least one file or empty dir is
+                record = None
+                data = {
+                    "path": path,
+                    "name": path.name,
+                    "absolute_dir": path.parents[0],
+                    "relative_dir": relative_dir,
+                    "size": stats.st_size,
+                    "mtime": self.timestamp_to_isoformat(stats.st_mtime),
+                    "children_files": [],
+                }
+
+            # Directory entries type are known from listing so there is no need to stat
+            # every entry. Listing also gives the existing manifest and cover files so
+            # they don't need to be searched again
+            listing = []
+            links = set()
+            with self.walk_op.scandir(path) as entries:
+                for entry in entries:
+                    is_dir, is_symlink = self.walk_op.entry_type(entry)
+                    listing.append((entry.name, is_dir))
+                    if is_symlink:
+                        links.add(entry.name)
+
+            # Rules from an ignore file apply to directory and its children
+            if (IGNORE_FILENAME, False) in listing:
+                rules = IgnoreRules(
+                    self.fs_op.read_text(path / IGNORE_FILENAME).splitlines()
+                )
+                if rules:
+                    scopes = scopes + [(rules, "")]
+
+            descend = (
+                self.max_depth is None or
+                len(relative_dir.parts) < self.max_depth
+            )
+
+            subdirectories = []
+            available = set()
+            for name, is_dir in listing:
+                if scopes and is_ignored(name, is_dir, scopes):
+                    self.log_debug("Excluded {}".format(str(path / name)))
+                    continue
+
+                child = path / name
+                if is_dir:
+                    if name in links and not self.follow_symlinks:
+                        self.log_debug("Skipped symbolic link {}".format(str(child)))
+                    elif descend:
+                        subdirectories.append(child)
+                elif child.suffix and child.suffix.lower()[1:] in self.extensions:
+                    # Restored directory already have its files
+                    if record is None:
+                        data["children_files"].append(self.scan_file(child))
+                elif name in self.asset_filenames:
+                    available.add(name)
+
+        elapsed = time.perf_counter() - start
+
+        for child in (subdirectories if recursive else []):
+            yield from self.walk_directory(
+                child,
+                scopes=[
+                    (rules, prefix + child.name + "/")
+                    for rules, prefix in scopes
+                ],
+                device=device,
+            )
+
+        # Children directories have all been walked at this point
+        if self.rollups or self.top_files:
+            self.rollup_directory(data, subdirectories)
+
+        # Only collect directory datas if there is at least one file or empty dir is
         # allowed
-        if self.allow_empty_dir or len(data["children_files"]) > 0:
+        collected = self.allow_empty_dir or len(data["children_files"]) > 0
+        if collected:
             self.stats["directories"] += 1
             self.stats["size"] += data["size"]
 
-            # Get possible manifest to extend data
-            data.update(**self.get_directory_manifest(path))
+        yield {
+            "data": data,
+            "collected": collected,
+            "available": available,
+            "entries": len(listing),
+            "elapsed": elapsed,
+            "mtime": stats.st_mtime_ns,
+            "resumed": record is not None,
+            "subdirectories": subdirectories,
+        }
+
+    def rollup_directory(self, data, subdirectories):
+        """
+        Compute recursive totals of media files for a walked directory and track its
+        largest media files.
 
-            # Discover cover if any
-            if self.allow_media_cover:
-                data["cover"] = self.storage.get_directory_cover(path)
+        Totals are summed from directory files and from the totals of its children
+        directories which must have been walked before. Only directories with media
+        files in their tree have totals. Like for the size stats, the size of a file
+        with multiple hard links is only counted for its first scanned link.
 
-            # Perform content checksum if enabled
-            if checksum:
-                # Add file checksums
-                self.checksum_op.payload_files(
-                    data,
-                    files_fields=["cover"],
-                    storage=self.storage.storage_path,
+        Arguments:
+            data (dict): Directory payload as built from ``walk_directory``.
+            subdirectories (list): Walked children directory paths.
+        """
+        rollup = {"size": 0, "files": 0, "extensions": {}}
+
+        for item in data["children_files"]:
+            self.largest_files.push(item["size"], {
+                "path": str(item["path"].relative_to(self.basepath)),
+                "size": item["size"],
+            })
+            rollup["files"] += 1
+            size = item["size"]
+            if item["path"] in self.linked_files:
+                self.linked_files.discard(item["path"])
+                size = 0
+            rollup["size"] += size
+            rollup["extensions"][item["extension"]] = (
+                rollup["extensions"].get(item["extension"], 0) + size
+            )
+
+        if not self.rollups:
+            return
+
+        for child in subdirectories:
+            child_rollup = self.directory_rollups.get(
+                str(child.relative_to(self.basepath))
+            )
+            if child_rollup is None:
+                continue
+
+            rollup["size"] += child_rollup["size"]
+            rollup["files"] += child_rollup["files"]
+            for extension, size in child_rollup["extensions"].items():
+                rollup["extensions"][extension] = (
+                    rollup["extensions"].get(extension, 0) + size
                 )
-                # Then build directory info checksum
-                data["checksum"] = self.checksum_op.directory_payload(
-                    data,
-                    files_fields=["cover"],
-                    storage=self.storage.storage_path,
+
+        if rollup["files"] > 0:
+            self.directory_rollups[str(data["relative_dir"])] = rollup
+
+    def enrich_directory(self, data, available=None):
+        """
+        Extend directory payload with its manifest and cover.
+
+        Arguments:
+            data (dict): Directory payload as built from ``walk_directory``.
+
+        Keyword Arguments:
+            available (set): Manifest and cover file names known to exist in
+                directory. If not given, they are searched on filesystem.
+
+        Returns:
+            dict: Given directory payload, mutated.
+        """
+        path = data["path"]
+
+        # Get possible manifest to extend data
+        data.update(**self.get_directory_manifest(path, available=available))
+
+        # Discover cover if any
+        if self.allow_media_cover:
+            with self.recorder.phase("cover", path=path):
+                data["cover"] = self.storage.get_directory_cover(
+                    path,
+                    available=available,
                 )
 
-            # Store collected data
-            self.store(data)
+        return data
+
+    def checksum_directory(self, data):
+        """
+        Add checksums to directory payload.
+
+        Arguments:
+            data (dict): Directory payload as built from ``enrich_directory``.
+
+        Returns:
+            dict: Given directory payload, mutated.
+        """
+        with self.recorder.phase("checksum", path=data["path"]):
+            # Add file checksums
+            self.checksum_op.payload_files(
+                data,
+                files_fields=["cover"],
+                storage=self.storage.storage_path,
+            )
+            # Then build directory info checksum
+            data["checksum"] = self.checksum_op.directory_payload(
+                data,
+                files_fields=["cover"],
+                storage=self.storage.storage_path,
+            )
 
         return data
 
+    def scan_directory(self, path, checksum=False):
+        """
+        Scan a directory to get its media files.
+
+        This performs every collection parts sequentially from the calling thread, see
+        ``run`` for a concurrent collection.
+
+        Arguments:
+            path (pathlib.Path): Directory to scan for informations, for direct children
+                files and to recursively search for children directories.
+
+        Keyword Arguments:
+            checksum (boolean): Whether to enable directory checksums or not.
+
+        Raises:
+            CollectorError: If given path is not a directory inside
+                basepath directory.
+
+        Returns:
+            dict: Directory information payload.
+        """
+        data = None
+
+        for item in self.walk_directory(path):
+            data = item["data"]
+
+            if item["collected"]:
+                self._metadata_stage(item)
+
+                # Perform content checksum if enabled
+                if checksum:
+                    self._checksum_stage(item)
+
+                # Store collected data
+                self.store_item(item)
+
+            self.trace_directory(item)
+
+        return data
+
+    def trace_directory(self, item):
+        """
+        Push a scanned directory to the slowest and largest directory trackers.
+
+        Arguments:
+            item (dict): Walked directory item once all its stages are done.
+        """
+        if self.top_directories < 1:
+            return
+
+        trace = {
+            "path": str(item["data"]["relative_dir"]),
+            "elapsed": item["elapsed"],
+            "entries": item["entries"],
+            "files": len(item["data"]["children_files"]),
+        }
+
+        self.slowest_directories.push(item["elapsed"], trace)
+        self.largest_directories.push(item["entries"], trace)
+
+    def top_directories_report(self):
+        """
+        Return tracked slowest and largest directories.
+
+        Returns:
+            dict: Lists ``slowest`` and ``largest`` of directories, each directory is
+            a dictionnary with its relative ``path``, scan time (``elapsed``) in
+            seconds, number of directory ``entries`` and number of media ``files``.
+        """
+        return {
+            "slowest": self.slowest_directories.items(),
+            "largest": self.largest_directories.items(),
+        }
+
+    def _iter_collected(self, path):
+        """
+        Walk directory and only yield collected directories numbered in walk order.
+
+        Arguments:
+            path (pathlib.Path): Directory to walk.
+
+        Yields:
+            dict: Walked directory item with an additional ``index`` item.
+        """
+        index = 0
+
+        for item in self.walk_directory(path):
+            if item["collected"]:
+                item["index"] = index
+                index += 1
+                yield item
+            else:
+                self.trace_directory(item)
+
+    def _metadata_stage(self, item):
+        """
+        Pipeline handler for manifest and cover discovery.
+        """
+        if item["resumed"]:
+            return item
+
+        start = time.perf_counter()
+        self.enrich_directory(item["data"], available=item["available"])
+        item["elapsed"] += time.perf_counter() - start
+
+        return item
+
+    def _checksum_stage(self, item):
+        """
+        Pipeline handler for directory checksum.
+        """
+        if item["resumed"]:
+            return item
+
+        start = time.perf_counter()
+        self.checksum_directory(item["data"])
+        item["elapsed"] += time.perf_counter() - start
+
+        return item
+
+    def _store_stage(self, item):
+        """
+        Store directories in their walk order.
+
+        Directories may be received out of order from stages with multiple workers so
+        they are buffered until all the previous ones have been stored.
+        """
+        self._pending_store[item["index"]] = item
+
+        while self._next_store in self._pending_store:
+            ready = self._pending_store.pop(self._next_store)
+            self.store_item(ready)
+            self.trace_directory(ready)
+            self._next_store += 1
+
+        return item
+
+    def build_pipeline(self, checksum=False):
+        """
+        Build the collection pipeline.
+
+        Keyword Arguments:
+            checksum (boolean): Whether to include the checksum stage or not.
+
+        Returns:
+            Pipeline: Pipeline with stages for metadata (manifest and cover),
+            checksum if enabled and storing.
+        """
+        stages = [
+            PipelineStage(
+                "metadata",
+                self._metadata_stage,
+                workers=self.workers.get("metadata", 1),
+                queue_size=self.queue_size,
+            ),
+        ]
+
+        if checksum:
+            stages.append(
+                PipelineStage(
+                    "checksum",
+                    self._checksum_stage,
+                    workers=self.workers.get("checksum", 1),
+                    queue_size=self.queue_size,
+                )
+            )
+
+        stages.append(
+            PipelineStage(
+                "store",
+                self._store_stage,
+                workers=1,
+                queue_size=self.queue_size,
+            )
+        )
+
+        return Pipeline(stages)
+
+    def scan_pipeline(self, path, checksum=False):
+        """
+        Scan a directory with collection parts performed concurrently.
+
+        The directory walk is done from the calling thread and feeds a pipeline where
+        each stage have its own workers. Registry ends identical to the one from
+        ``scan_directory``.
+
+        Arguments:
+            path (pathlib.Path): Directory to scan.
+
+        Keyword Arguments:
+            checksum (boolean): Whether to enable directory checksums or not.
+
+        Returns:
+            dict: Pipeline statistics per stage.
+        """
+        self._pending_store = {}
+        self._next_store = 0
+
+        self.pipeline_stats = self.build_pipeline(checksum=checksum).run(
+            self._iter_collected(path)
+        )
+
+        return self.pipeline_stats
+
     def scan_basepath_device(self, path):
         """
         Collect basepath device information.
@@ -388,24 +1203,155 @@ class Collector(PrinterInterface):
             path (pathlib.Path): Path to use to get the device to scan.
 
         Returns:
-            dict: A dictionnary of device informations (total size, used size,
-            free space size and occupancy percentage).
+            dict: A dictionnary of device informations (device id, total size, used
+            size, free space size and occupancy percentage).
         """
         path = path.resolve()
         stats = disk_usage(path)
 
         return {
+            "id": path.stat().st_dev,
             "total": stats.total,
             "used": stats.used,
             "free": stats.free,
             "percentage": (stats.used / stats.total) * 100,
         }
 
+    def get_compression(self, destination):
+        """
+        Get the compression to use for a destination.
+
+        Arguments:
+            destination (pathlib.Path): Destination file path.
+
+        Returns:
+            string: Compression name from collector option, else from destination
+            suffix. None if there is no compression.
+        """
+        return self.compression or dump_compression(destination)
+
+    def write_json(self, destination, content, compression=None):
+        """
+        Write content to a JSON file.
+
+        Content is encoded with the collector serializer and indented with 4 spaces,
+        unless collector is compact. A compressed file is compressed on the fly while
+        content is encoded.
+
+        Arguments:
+            destination (pathlib.Path): Destination file path.
+            content (dict): Content to write.
+
+        Keyword Arguments:
+            compression (string): Compression name to use instead of the one from
+                ``get_compression``.
+        """
+        size = write_json(
+            destination,
+            content,
+            serializer=self.serializer,
+            compact=self.compact,
+            compression=compression or self.get_compression(destination),
+            opener=self.fs_op.open,
+        )
+        self.recorder.add_bytes(written=size)
+
+    def write_dump(self, destination, device, compression=None):
+        """
+        Write registry to a JSON dump file.
+
+        Arguments:
+            destination (pathlib.Path): Destination file path.
+            device (dict): Device informations as returned from
+                ``scan_basepath_device``.
+
+        Keyword Arguments:
+            compression (string): Compression name to use instead of the one from
+                ``get_compression``.
+        """
+        registry = self.registry
+        if self.sort_keys:
+            registry = dict(sorted(registry.items()))
+
+        content = {
+            "device": device,
+            "registry": registry,
+        }
+        if self.rollups:
+            content["rollups"] = self.directory_rollups
+        if self.top_files:
+            content["largest_files"] = self.largest_files.items()
+
+        with self.recorder.phase("dump"):
+            self.write_json(destination, content, compression=compression)
+
+    def write_registry_cache(self, destination, device):
+        """
+        Write registry to a binary cache file.
+
+        Cache can be read with ``deovi.collector.cache.RegistryCache`` which decodes
+        directories lazily from a memory mapping, this is a lot faster than loading
+        the JSON dump.
+
+        Arguments:
+            destination (pathlib.Path): Destination file path.
+            device (dict): Device informations as returned from
+                ``scan_basepath_device``.
+        """
+        with self.recorder.phase("cache"):
+            with self.fs_op.open(destination, "wb") as fp:
+                size = write_registry_cache(fp, self.registry, device=device)
+                self.recorder.add_bytes(written=size)
+
+    def delta_destination(self, destination):
+        """
+        Get the delta file path for a dump destination.
+
+        Arguments:
+            destination (pathlib.Path): Dump file path.
+
+        Returns:
+            pathlib.Path: The dump destination itself when delta is written instead of
+            the dump, else the dump destination with ``.delta`` before its extension,
+            like ``plop.delta.json`` for ``plop.json`` or ``plop.delta.json.gz`` for
+            ``plop.json.gz``.
+        """
+        if self.delta_only:
+            return destination
+
+        name, suffix = destination.stem, destination.suffix
+        if dump_compression(destination):
+            name, suffix = Path(name).stem, Path(name).suffix + suffix
+
+        return destination.with_name(name + ".delta" + suffix)
+
+    def write_delta(self, destination, delta):
+        """
+        Write a delta to a JSON file.
+
+        Arguments:
+            destination (pathlib.Path): Destination file path.
+            delta (dict): Delta as returned from
+                ``deovi.collector.diff.RegistryDelta.compare``.
+        """
+        with self.recorder.phase("dump"):
+            self.write_json(destination, delta)
+
     def run(self, destination=None, checksum=False):
         """
         Recursively scan everything from basepath to produce a registry of collected
         informations.
 
+        If collector has a journal, every stored directory is appended to it during
+        scan so an interrupted run can be resumed.
+
+        If collector has sinks, they are begun before scan, fed with every stored
+        directory then ended once everything else is done. They are always closed,
+        even if something fails after they have been begun.
+
+        If collector has a previous dump to compare to, the delta is computed before
+        writing anything so the dump destination can be the previous dump itself.
+
         Keyword Arguments:
             destination (pathlib.Path): Destination path to write a JSON file with
                 every collected informations. Default is ``None`` so no JSON dump
@@ -420,24 +1366,97 @@ class Collector(PrinterInterface):
         self.storage.set_basepath(destination, checksum=checksum)
 
         device_stats = self.scan_basepath_device(self.basepath)
-        self.scan_directory(self.basepath, checksum=checksum)
-
-        if self.registry and destination:
-            with destination.open("w") as fp:
-                json.dump(
-                    {
-                        "device": device_stats,
-                        "registry": self.registry,
-                    },
-                    fp,
-                    indent=4,
-                    cls=ExtendedJsonEncoder
-                )
-                self.log_info("Registry saved to: {}".format(str(destination)))
 
-            # Proceed to copy queued files into storage dir
-            container, stored = self.storage.store_assets(self.file_storage_queue)
-            if container:
-                self.stats["asset_storage"] = container
+        if self.journal_path:
+            self.journal = CollectorJournal(
+                self.journal_path,
+                self.basepath,
+                checksum=checksum,
+            )
+            if self.resume:
+                self.resumed = self.journal.load()
+                self.stats["resumed"] = 0
+            self.journal.open(resume=self.resume)
+
+        try:
+            try:
+                for sink in self.sinks:
+                    sink.begin(self, device_stats)
+                self.running_sinks = self.sinks
+                self.scan_pipeline(self.basepath, checksum=checksum)
+            finally:
+                if self.journal is not None:
+                    self.journal.close()
+                    self.journal = None
+                self.resumed = {}
+                self.running_sinks = []
+            self.recorder.checkpoint("scan")
+
+            # An empty registry still has a delta when every directory was removed
+            if destination and (self.registry or self.delta_against):
+                self.write_outputs(destination, device_stats)
+
+            if self.recorder.enabled:
+                self.stats["operations"] = self.recorder.operations_report()
+
+            self.end_sinks()
+        finally:
+            # Sinks which have not been ended release their resources
+            for sink in self.sinks:
+                sink.close()
 
         return self.stats
+
+    def write_outputs(self, destination, device):
+        """
+        Write dump, registry cache and delta then store queued assets.
+
+        Dump and registry cache are not written if registry is empty, delta is
+        always written since it then removes every directory from its base.
+
+        Arguments:
+            destination (pathlib.Path): Dump destination path.
+            device (dict): Device informations to include in dump.
+        """
+        delta = None
+        if self.delta_against:
+            with self.recorder.phase("delta"):
+                delta = RegistryDelta(
+                    self.delta_against,
+                    self.registry,
+                    checksum_op=self.checksum_op,
+                ).compare(device=device)
+            self.stats["delta"] = delta["stats"]
+
+        if self.registry and not self.delta_only:
+            self.write_dump(destination, device)
+            self.log_info("Registry saved to: {}".format(str(destination)))
+
+        if self.registry and self.registry_cache:
+            cache_destination = registry_cache_path(destination)
+            self.write_registry_cache(cache_destination, device)
+            self.log_info(
+                "Registry cache saved to: {}".format(str(cache_destination))
+            )
+
+        if delta is not None:
+            delta_destination = self.delta_destination(destination)
+            self.write_delta(delta_destination, delta)
+            self.log_info("Delta saved to: {}".format(str(delta_destination)))
+        self.recorder.checkpoint("dump")
+
+        # Proceed to copy queued files into storage dir
+        container, stored = self.storage.store_assets(self.file_storage_queue)
+        if container:
+            self.stats["asset_storage"] = container
+        self.recorder.checkpoint("assets")
+
+    def end_sinks(self):
+        """
+        End every sink.
+
+        Sinks are not closed here, ``run`` closes all of them even if one fails.
+        """
+        for sink in self.sinks:
+            if sink.end():
+                self.log_info("Output saved to: {}".format(str(sink)))
@@ -0,0 +1,389 @@
+import hashlib
+import json
+
+from ..exceptions import CollectorError
+from ..utils.checksum import ChecksumOperator
+from ..utils.jsons import ExtendedJsonEncoder
+from .dump import DumpReader
+
+
+# Version of diff document format
+DIFF_VERSION = 1
+
+# Version of delta document format
+DELTA_VERSION = 1
+
+# Payload items which are not compared since they change on every collection
+DIFF_IGNORED_FIELDS = {"cover"}
+
+# Payload items from checksums, only compared when both payloads have them
+DIFF_CHECKSUM_FIELDS = {"checksum", "cover_checksum"}
+
+
+def payload_digest(payload):
+    """
+    Compute a digest to compare a directory payload.
+
+    Digest is computed from payload items except the ignored ones and the checksum
+    ones, so a payload with checksums can be compared to a payload without them.
+
+    Arguments:
+        payload (dict): Directory payload.
+
+    Returns:
+        string: Payload digest.
+    """
+    serialized = json.dumps(
+        {
+            name: value
+            for name, value in payload.items()
+            if name not in DIFF_IGNORED_FIELDS and name not in DIFF_CHECKSUM_FIELDS
+        },
+        sort_keys=True,
+        cls=ExtendedJsonEncoder,
+    )
+
+    return hashlib.blake2b(serialized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def payload_signature(payload):
+    """
+    Build what is kept from a directory payload to compare it later.
+
+    Arguments:
+        payload (dict): Directory payload.
+
+    Returns:
+        tuple: Directory checksum (None if there is none) and payload digest.
+    """
+    return (payload.get("checksum") or None, payload_digest(payload))
+
+
+def signatures_differ(old, new):
+    """
+    Compare two payload signatures.
+
+    Directory checksums are compared when both payloads have one, else payload
+    digests are compared. So directories are not all reported as changed when only
+    one dump has been collected with checksums.
+
+    Arguments:
+        old (tuple): Old payload signature from ``payload_signature``.
+        new (tuple): New payload signature from ``payload_signature``.
+
+    Returns:
+        boolean: True if payloads differ.
+    """
+    if old[0] and new[0]:
+        return old[0] != new[0]
+
+    return old[1] != new[1]
+
+
+def payloads_differ(old, new):
+    """
+    Compare two payloads of the same directory like ``signatures_differ`` does.
+
+    Payload digests are only computed if needed.
+
+    Arguments:
+        old (dict): Old directory payload.
+        new (dict): New directory payload.
+
+    Returns:
+        boolean: True if payloads differ.
+    """
+    if old.get("checksum") and new.get("checksum"):
+        return old["checksum"] != new["checksum"]
+
+    return payload_digest(old) != payload_digest(new)
+
+
+def diff_payloads(old, new):
+    """
+    Compare two payloads of the same directory.
+
+    Arguments:
+        old (dict): Old directory payload.
+        new (dict): New directory payload.
+
+    Returns:
+        dict: Changes with ``fields`` for the new value of changed directory items
+        (``None`` for a removed item) and ``files`` for the ``added``, ``removed`` and
+        ``changed`` media files. Files are compared on their name, an added or changed
+        file is given with its new payload and a removed file with its name.
+    """
+    fields = {}
+    for name in sorted(set(old) | set(new)):
+        if name in DIFF_IGNORED_FIELDS or name == "children_files":
+            continue
+        # A checksum is not a change if the other payload has no checksum
+        if name in DIFF_CHECKSUM_FIELDS and (name not in old or name not in new):
+            continue
+        if old.get(name) != new.get(name):
+            fields[name] = new.get(name)
+
+    # Cover destination is only given if cover has changed
+    if "cover" in new and (
+        bool(old.get("cover")) != bool(new.get("cover")) or "cover_checksum" in fields
+    ):
+        fields["cover"] = new["cover"]
+
+    old_files = {item["name"]: item for item in old.get("children_files", [])}
+    new_files = {item["name"]: item for item in new.get("children_files", [])}
+
+    files = {
+        "added": [
+            item for name, item in new_files.items() if name not in old_files
+        ],
+        "removed": sorted([name for name in old_files if name not in new_files]),
+        "changed": [
+            item for name, item in new_files.items()
+            if name in old_files and old_files[name] != item
+        ],
+    }
+
+    return {"fields": fields, "files": files}
+
+
+class RegistryDiff:
+    """
+    Compare the registries from two dumps without loading them whole.
+
+    On default, digests of every old directory are kept in memory, then new directories
+    are compared to them and finally the payloads of changed directories are read
+    again from the old dump. Memory is proportional to the number of directories and
+    changes, not to the dump sizes.
+
+    If both dumps have their directories sorted on their key, they can be compared in a
+    single pass with a constant memory (excepted changes).
+
+    Arguments:
+        old (pathlib.Path): Old dump file path.
+        new (pathlib.Path): New dump file path.
+
+    Keyword Arguments:
+        sorted_keys (boolean): Whether both dumps have their directories sorted on
+            their key or not.
+    """
+    def __init__(self, old, new, sorted_keys=False):
+        self.old = old
+        self.new = new
+        self.sorted_keys = sorted_keys
+
+    def compare_indexed(self):
+        """
+        Compare dumps with an index of old directory digests.
+
+        Returns:
+            tuple: Added directory payloads indexed on their key, removed directory
+            keys and changes indexed on directory key.
+        """
+        signatures = {
+            key: payload_signature(data)
+            for key, data in DumpReader(self.old)
+        }
+
+        added = {}
+        changed = {}
+        for key, data in DumpReader(self.new):
+            signature = signatures.pop(key, None)
+            if signature is None:
+                added[key] = data
+            elif signatures_differ(signature, payload_signature(data)):
+                changed[key] = data
+
+        removed = sorted(signatures.keys())
+        del signatures
+
+        # Old payloads are only read again for changed directories
+        changes = {}
+        for key, data in DumpReader(self.old):
+            if key in changed:
+                changes[key] = diff_payloads(data, changed[key])
+
+        return added, removed, changes
+
+    def _sorted(self, reader):
+        """
+        Iterate over a dump and check its directories are sorted.
+        """
+        previous = None
+        for key, data in reader:
+            if previous is not None and key <= previous:
+                raise CollectorError(
+                    "Dump directories are not sorted on their key: {}".format(
+                        str(reader.path)
+                    )
+                )
+            previous = key
+            yield key, data
+
+    def compare_sorted(self):
+        """
+        Compare dumps with directories sorted on their key in a single pass.
+
+        Raises:
+            CollectorError: If a dump is not sorted.
+
+        Returns:
+            tuple: Added directory payloads indexed on their key, removed directory
+            keys and changes indexed on directory key.
+        """
+        added = {}
+        removed = []
+        changes = {}
+
+        old = self._sorted(DumpReader(self.old))
+        new = self._sorted(DumpReader(self.new))
+        old_item = next(old, None)
+        new_item = next(new, None)
+
+        while old_item is not None or new_item is not None:
+            if new_item is None or (
+                old_item is not None and old_item[0] < new_item[0]
+            ):
+                removed.append(old_item[0])
+                old_item = next(old, None)
+            elif old_item is None or new_item[0] < old_item[0]:
+                added[new_item[0]] = new_item[1]
+                new_item = next(new, None)
+            else:
+                if payloads_differ(old_item[1], new_item[1]):
+                    changes[new_item[0]] = diff_payloads(old_item[1], new_item[1])
+                old_item = next(old, None)
+                new_item = next(new, None)
+
+        return added, removed, changes
+
+    def compare(self):
+        """
+        Compare dumps.
+
+        Returns:
+            dict: Diff document with dump paths (``old`` and ``new``), ``added``
+            directory payloads, ``removed`` directory keys, ``changed`` directories
+            and ``stats`` with the number of directories and files for each kind of
+            change.
+        """
+        if self.sorted_keys:
+            added, removed, changes = self.compare_sorted()
+        else:
+            added, removed, changes = self.compare_indexed()
+
+        return {
+            "diff": DIFF_VERSION,
+            "old": str(self.old),
+            "new": str(self.new),
+            "added": added,
+            "removed": removed,
+            "changed": changes,
+            "stats": {
+                "added_directories": len(added),
+                "removed_directories": len(removed),
+                "changed_directories": len(changes),
+                "added_files": sum([
+                    len(item["files"]["added"]) for item in changes.values()
+                ]),
+                "removed_files": sum([
+                    len(item["files"]["removed"]) for item in changes.values()
+                ]),
+                "changed_files": sum([
+                    len(item["files"]["changed"]) for item in changes.values()
+                ]),
+            },
+        }
+
+
+class RegistryDelta:
+    """
+    Compute the delta of a registry against a base dump.
+
+    A delta only holds the added, changed and removed directories so a consumer which
+    already imported the base dump can apply changes without reading the whole
+    registry again. Base dump is read directory by directory.
+
+    Directories are compared like with ``RegistryDiff``, so without checksums a cover
+    change alone is not detected.
+
+    Arguments:
+        base (pathlib.Path): Base dump file path.
+        registry (dict): Registry to compare to the base dump.
+
+    Keyword Arguments:
+        checksum_op (deovi.utils.checksum.ChecksumOperator): Operator used to compute
+            the base dump checksum. Default to a new operator.
+    """
+    def __init__(self, base, registry, checksum_op=None):
+        self.base = base
+        self.registry = registry
+        self.checksum_op = checksum_op or ChecksumOperator()
+
+    def compare(self, device=None):
+        """
+        Compare registry to the base dump.
+
+        Keyword Arguments:
+            device (dict): Device informations to include in delta.
+
+        Returns:
+            dict: Delta document with ``base`` reference (dump path and checksum),
+            ``device`` informations, full payloads of ``added`` and ``changed``
+            directories, ``removed`` directory keys and ``stats`` with the number of
+            each kind of change and the number of ``unchanged`` directories.
+        """
+        checksum = self.checksum_op.file(self.base)
+
+        changed = {}
+        removed = []
+        seen = set()
+        for key, data in DumpReader(self.base):
+            seen.add(key)
+            if key not in self.registry:
+                removed.append(key)
+            elif payloads_differ(data, self.registry[key]):
+                changed[key] = self.registry[key]
+
+        added = {
+            key: data
+            for key, data in self.registry.items()
+            if key not in seen
+        }
+
+        return {
+            "delta": DELTA_VERSION,
+            "base": {
+                "path": str(self.base),
+                "checksum": checksum,
+            },
+            "device": device,
+            "added": added,
+            "changed": changed,
+            "removed": sorted(removed),
+            "stats": {
+                "added": len(added),
+                "changed": len(changed),
+                "removed": len(removed),
+                "unchanged": len(seen) - len(changed) - len(removed),
+            },
+        }
+
+
+def apply_delta(registry, delta):
+    """
+    Apply a delta to the registry from its base dump.
+
+    Arguments:
+        registry (dict): Registry from the base dump, it is modified in place.
+        delta (dict): Delta document as returned from ``RegistryDelta.compare``.
+
+    Returns:
+        dict: The given registry with changes applied.
+    """
+    for key in delta["removed"]:
+        registry.pop(key, None)
+
+    registry.update(delta["changed"])
+    registry.update(delta["added"])
+
+    return registry
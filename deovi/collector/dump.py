@@ -0,0 +1,419 @@
+import bz2
+import gzip
+import io
+import json
+import lzma
+import re
+from pathlib import Path
+
+from ..exceptions import CollectorError
+from ..utils.jsons import JsonSerializer
+
+
+# Size in characters of the chunks read from a dump file
+DUMP_CHUNK_SIZE = 1024 * 1024
+
+# Size in characters of the dump beginning read to guess its format
+DUMP_FORMAT_PROBE_SIZE = 64 * 1024
+
+# First member name of a JSON object
+DUMP_FIRST_MEMBER = re.compile(r'\s*\{\s*"((?:[^"\\]|\\.)*)"')
+
+# Root members which start a JSON dump
+DUMP_ROOT_MEMBERS = ("registry", "device")
+
+# Available dump compressions with their file suffix and file signature
+DUMP_COMPRESSIONS = {
+    "gzip": {"suffix": ".gz", "magic": b"\x1f\x8b"},
+    "xz": {"suffix": ".xz", "magic": b"\xfd7zXZ\x00"},
+    "bz2": {"suffix": ".bz2", "magic": b"BZh"},
+}
+
+# JSON separators for compact dumps without any whitespace
+DUMP_COMPACT_SEPARATORS = (",", ":")
+
+
+def dump_compression(path):
+    """
+    Get the compression of a dump from its file suffix.
+
+    Arguments:
+        path (pathlib.Path): Dump file path.
+
+    Returns:
+        string: Compression name from ``DUMP_COMPRESSIONS`` or None if suffix is not
+        a compression suffix.
+    """
+    suffix = Path(path).suffix
+    for name, options in DUMP_COMPRESSIONS.items():
+        if options["suffix"] == suffix:
+            return name
+
+    return None
+
+
+def detect_compression(path):
+    """
+    Get the compression of a dump from its file signature.
+
+    Arguments:
+        path (pathlib.Path): Dump file path.
+
+    Returns:
+        string: Compression name from ``DUMP_COMPRESSIONS`` or None if dump is not
+        compressed.
+    """
+    with Path(path).open("rb") as fp:
+        head = fp.read(8)
+
+    for name, options in DUMP_COMPRESSIONS.items():
+        if head.startswith(options["magic"]):
+            return name
+
+    return None
+
+
+def compressed_file(fp, compression, mode="rb"):
+    """
+    Wrap a binary file object with a compressor or a decompressor.
+
+    Closing the returned file object does not close the wrapped one.
+
+    Arguments:
+        fp (file object): File object opened in binary mode.
+        compression (string): Compression name from ``DUMP_COMPRESSIONS``.
+
+    Keyword Arguments:
+        mode (string): Either ``rb`` or ``wb``.
+
+    Returns:
+        file object: Binary file object.
+    """
+    if compression == "gzip":
+        # No file name nor time in header so the same content is always compressed
+        # to the same bytes
+        return gzip.GzipFile(filename="", fileobj=fp, mode=mode, mtime=0)
+    elif compression == "xz":
+        return lzma.LZMAFile(fp, mode=mode)
+    elif compression == "bz2":
+        return bz2.BZ2File(fp, mode=mode)
+
+    raise CollectorError("Unknown dump compression: {}".format(compression))
+
+
+def open_dump(path):
+    """
+    Open a dump file for reading, a compressed dump is decompressed on the fly.
+
+    Arguments:
+        path (pathlib.Path): Dump file path.
+
+    Returns:
+        file object: File object opened in text mode.
+    """
+    path = Path(path)
+    compression = detect_compression(path)
+
+    if compression == "gzip":
+        return gzip.open(path, "rt", encoding="utf-8")
+    elif compression == "xz":
+        return lzma.open(path, "rt", encoding="utf-8")
+    elif compression == "bz2":
+        return bz2.open(path, "rt", encoding="utf-8")
+
+    return path.open("r")
+
+
+def write_json(destination, content, serializer=None, compact=False,
+               compression=None, opener=open):
+    """
+    Write content to a JSON file, like a dump or a diff.
+
+    Content is indented with 4 spaces, unless it is compact. A compressed file is
+    compressed on the fly while content is encoded.
+
+    Arguments:
+        destination (pathlib.Path): Destination file path.
+        content (dict): Content to write.
+
+    Keyword Arguments:
+        serializer (deovi.utils.jsons.JsonSerializer): Serializer to encode content
+            with. Default to None for the ``json`` backend.
+        compact (boolean): If True, content is written without indentation nor
+            whitespaces. Default to False.
+        compression (string): Compression name from ``DUMP_COMPRESSIONS``. Default
+            to None so compression is chosen from the destination suffix.
+        opener (callable): Function to open the destination file with, it receives
+            the path and the mode. Default to the builtin ``open``.
+
+    Returns:
+        integer: Size in bytes written to the file.
+    """
+    serializer = serializer or JsonSerializer()
+    compression = compression or dump_compression(destination)
+    options = {"indent": 4}
+    if compact:
+        options = {"separators": DUMP_COMPACT_SEPARATORS}
+
+    if compression is None:
+        with opener(destination, "w") as fp:
+            serializer.dump(content, fp, **options)
+            return fp.tell()
+
+    with opener(destination, "wb") as fp:
+        with io.TextIOWrapper(
+            compressed_file(fp, compression, mode="wb"), encoding="utf-8"
+        ) as compressed:
+            serializer.dump(content, compressed, **options)
+        return fp.tell()
+
+
+def load_dump(path):
+    """
+    Load a whole dump file, compressed or not.
+
+    Arguments:
+        path (pathlib.Path): Dump file path.
+
+    Returns:
+        dict: Dump content.
+    """
+    with open_dump(path) as fp:
+        return json.load(fp)
+
+
+class JsonStream:
+    """
+    Read JSON values one by one from a file without loading the whole file.
+
+    Arguments:
+        fp (file object): Opened text file.
+
+    Keyword Arguments:
+        chunk_size (integer): Size in characters of the chunks to read.
+    """
+    def __init__(self, fp, chunk_size=DUMP_CHUNK_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def fill(self, size=None):
+        """
+        Read a chunk into buffer and drop the consumed part.
+
+        Returns:
+            boolean: False if there was nothing more to read.
+        """
+        data = self.fp.read(size or self.chunk_size)
+        self.buffer = self.buffer[self.position:] + data
+        self.position = 0
+        if not data:
+            self.eof = True
+
+        return bool(data)
+
+    def peek(self):
+        """
+        Return the next non whitespace character without consuming it.
+
+        Returns:
+            string: Next character or an empty string at the end of file.
+        """
+        while True:
+            while (
+                self.position < len(self.buffer) and
+                self.buffer[self.position] in " \t\n\r"
+            ):
+                self.position += 1
+
+            if self.position < len(self.buffer) or not self.fill():
+                return self.buffer[self.position:self.position + 1]
+
+    def expect(self, char):
+        """
+        Consume the next non whitespace character which must be the given one.
+
+        Raises:
+            CollectorError: If next character is another one.
+        """
+        found = self.peek()
+        if found != char:
+            raise CollectorError(
+                "Invalid dump, expected '{}' but got '{}'".format(char, found)
+            )
+        self.position += 1
+
+    def value(self):
+        """
+        Decode the next JSON value.
+
+        Raises:
+            CollectorError: If value is invalid.
+
+        Returns:
+            object: Decoded value.
+        """
+        self.peek()
+        size = self.chunk_size
+
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise CollectorError("Invalid dump: {}".format(e))
+                value = end = None
+
+            # A value ending the buffer may be truncated like a number
+            if end is not None and (end < len(self.buffer) or self.eof):
+                self.position = end
+                return value
+
+            # Value is larger than the buffer, read more and larger chunks so a huge
+            # value is not decoded again too many times
+            self.fill(size)
+            size *= 2
+
+    def members(self):
+        """
+        Iterate over members of the next JSON object.
+
+        Each member value must be consumed before asking for the next member.
+
+        Yields:
+            string: Member name, the stream is positionned at its value.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.position += 1
+            return
+
+        while True:
+            name = self.value()
+            self.expect(":")
+            yield name
+
+            if self.peek() == ",":
+                self.position += 1
+            else:
+                self.expect("}")
+                return
+
+
+class DumpReader:
+    """
+    Iterate over the directories of a dump without loading the whole dump.
+
+    Supported dump formats are the JSON dump from collector and NDJSON where each line
+    is an object with directory registry ``key`` and its payload in ``data`` (like a
+    collector journal). NDJSON lines without ``key`` are ignored. Compressed dumps
+    (see ``DUMP_COMPRESSIONS``) are decompressed on the fly.
+
+    Attributes:
+        device (dict): Device informations from a JSON dump or from the ``device``
+            item of a NDJSON header, only available once directories have started to
+            be iterated.
+        header (dict): First NDJSON line without ``key`` (like a journal header),
+            only available once directories have started to be iterated.
+
+    Arguments:
+        path (pathlib.Path): Dump file path.
+
+    Keyword Arguments:
+        chunk_size (integer): Size in characters of the chunks to read.
+    """
+    def __init__(self, path, chunk_size=DUMP_CHUNK_SIZE):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.device = None
+        self.header = None
+        self.format = self.get_format()
+
+    def get_format(self):
+        """
+        Guess dump format from its beginning.
+
+        Only the first ``DUMP_FORMAT_PROBE_SIZE`` characters are read, so a compact
+        dump on a single line is never read whole. A dump which starts with a root
+        member from ``DUMP_ROOT_MEMBERS`` is a JSON dump, a dump whose first line is
+        an object without ``registry`` is a NDJSON dump.
+
+        Returns:
+            string: Either ``json`` or ``ndjson``.
+        """
+        with open_dump(self.path) as fp:
+            prefix = fp.read(DUMP_FORMAT_PROBE_SIZE)
+
+        match = DUMP_FIRST_MEMBER.match(prefix)
+        if match is None or match.group(1) in DUMP_ROOT_MEMBERS:
+            return "json"
+
+        end = prefix.find("\n")
+        if end == -1:
+            # A single line can only be checked if it has been read whole
+            if len(prefix) == DUMP_FORMAT_PROBE_SIZE:
+                return "json"
+            end = len(prefix)
+
+        try:
+            content = json.loads(prefix[:end])
+        except json.JSONDecodeError:
+            return "json"
+
+        if isinstance(content, dict) and "registry" not in content:
+            return "ndjson"
+
+        return "json"
+
+    def iter_ndjson(self, fp):
+        """
+        Iterate over directories from a NDJSON dump.
+        """
+        for line in fp:
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                raise CollectorError(
+                    "Invalid line from NDJSON dump: {}".format(str(self.path))
+                )
+
+            if "key" in record:
+                yield record["key"], record["data"]
+            elif self.header is None:
+                self.header = record
+                self.device = record.get("device")
+
+    def iter_json(self, fp):
+        """
+        Iterate over directories from a JSON dump.
+        """
+        stream = JsonStream(fp, chunk_size=self.chunk_size)
+
+        for name in stream.members():
+            if name != "registry":
+                value = stream.value()
+                if name == "device":
+                    self.device = value
+                continue
+
+            for key in stream.members():
+                yield key, stream.value()
+
+    def __iter__(self):
+        """
+        Iterate over directories.
+
+        Yields:
+            tuple: Directory registry key and its payload.
+        """
+        with open_dump(self.path) as fp:
+            if self.format == "ndjson":
+                yield from self.iter_ndjson(fp)
+            else:
+                yield from self.iter_json(fp)
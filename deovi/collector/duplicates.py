@@ -0,0 +1,191 @@
+from ..utils.checksum import FINGERPRINT_SAMPLE_SIZE, ChecksumOperator
+from ..utils.filesystem import FilesystemOperator
+from ..utils.instrumentation import PhaseRecorder
+
+
+class DuplicateFinder:
+    """
+    Find files with identical contents.
+
+    Files are compared in stages where each stage only works on the groups of files
+    which still collide from the previous one:
+
+    #. Files are grouped on their size, which is already known from collection so most
+       files are eliminated without any read;
+    #. Files with the same size are grouped on a fingerprint from a few samples of
+       their content;
+    #. Files with the same fingerprint are grouped on a full checksum of their content.
+
+    Files with multiple hard links to the same content are not duplicates since they
+    do not use more space, only their first path is kept. File identities (device and
+    inode) from collection are used when given, else files with a colliding size are
+    stat again to get them.
+
+    Keyword Arguments:
+        sample_size (integer): Size in bytes of each sample read for a fingerprint.
+            Files which are not larger than three samples are directly compared on
+            their full checksum.
+        min_size (integer): Files smaller than this size in bytes are ignored. Default
+            to 1 so empty files are ignored.
+        recorder (deovi.utils.instrumentation.PhaseRecorder): Recorder to measure
+            stages (``identity``, ``fingerprint`` and ``checksum``). Default to a
+            disabled recorder.
+    """
+    def __init__(self, sample_size=FINGERPRINT_SAMPLE_SIZE, min_size=1,
+                 recorder=None):
+        self.sample_size = sample_size
+        self.min_size = min_size
+        self.recorder = recorder or PhaseRecorder(enabled=False)
+        self.fs_op = FilesystemOperator(recorder=self.recorder)
+        self.checksum_op = ChecksumOperator(recorder=self.recorder)
+        self.stats = {}
+
+    def group(self, files, key):
+        """
+        Group files on a key and only keep groups with more than one file.
+
+        Arguments:
+            files (iterable): Files as tuples ``(path, size)``.
+            key (callable): Function to get the group key from a file tuple.
+
+        Returns:
+            list: Groups as lists of file tuples.
+        """
+        groups = {}
+        for item in files:
+            groups.setdefault(key(item), []).append(item)
+
+        return [items for items in groups.values() if len(items) > 1]
+
+    def unique_identities(self, files, identities=None):
+        """
+        Remove files which are another hard link to a previous file.
+
+        Arguments:
+            files (list): Files as tuples ``(path, size)``.
+
+        Keyword Arguments:
+            identities (dict): Known file identities as ``(device, inode)`` indexed on
+                file path. A file without a known identity is stat to get it.
+
+        Returns:
+            list: Files without hard link duplicates.
+        """
+        identities = identities or {}
+        seen = set()
+        unique = []
+
+        for path, size in files:
+            identity = identities.get(path)
+            if identity is None:
+                with self.recorder.phase("identity", path=path):
+                    stats = self.fs_op.stat(path)
+                identity = (stats.st_dev, stats.st_ino)
+            else:
+                identity = tuple(identity[:2])
+
+            if identity not in seen:
+                seen.add(identity)
+                unique.append((path, size))
+
+        return unique
+
+    def fingerprint(self, item):
+        """
+        Return a file fingerprint.
+        """
+        path, size = item
+        with self.recorder.phase("fingerprint", path=path):
+            return self.checksum_op.fingerprint(
+                path,
+                size,
+                sample_size=self.sample_size,
+            )
+
+    def checksum(self, item):
+        """
+        Return a file full checksum.
+        """
+        path, size = item
+        with self.recorder.phase("checksum", path=path):
+            return self.checksum_op.file(path)
+
+    def find(self, files, identities=None):
+        """
+        Find groups of duplicate files.
+
+        Arguments:
+            files (iterable): Files as tuples ``(path, size)``.
+
+        Keyword Arguments:
+            identities (dict): Known file identities indexed on file path, like the
+                ``identity`` item of files collected with identities. Only the first
+                two values (device and inode) are used.
+
+        Returns:
+            list: Duplicate groups, each group is a dictionnary with the file
+            ``size``, the content ``checksum``, the file ``paths`` sorted and the
+            ``reclaimable`` size in bytes if only one file was kept. Groups are
+            ordered from the largest reclaimable size.
+        """
+        files = [item for item in files if item[1] >= self.min_size]
+        self.stats = {
+            "files": len(files),
+            "size_candidates": 0,
+            "fingerprint_candidates": 0,
+            "checksum_candidates": 0,
+        }
+
+        candidates = []
+        for items in self.group(files, key=lambda item: item[1]):
+            items = self.unique_identities(items, identities=identities)
+            if len(items) > 1:
+                candidates.append(items)
+        self.stats["size_candidates"] = sum([len(items) for items in candidates])
+
+        # Fingerprint would read almost the whole content of small files
+        threshold = 3 * self.sample_size
+        colliding = []
+        for items in candidates:
+            if items[0][1] <= threshold:
+                colliding.append(items)
+            else:
+                self.stats["fingerprint_candidates"] += len(items)
+                colliding.extend(self.group(items, key=self.fingerprint))
+
+        groups = []
+        for items in colliding:
+            self.stats["checksum_candidates"] += len(items)
+            checksums = {item[0]: self.checksum(item) for item in items}
+            for group in self.group(items, key=lambda item: checksums[item[0]]):
+                size = group[0][1]
+                groups.append({
+                    "size": size,
+                    "checksum": checksums[group[0][0]],
+                    "paths": sorted([path for path, size in group]),
+                    "reclaimable": size * (len(group) - 1),
+                })
+
+        return sorted(
+            groups,
+            key=lambda item: (-item["reclaimable"], item["paths"][0]),
+        )
+
+    def report(self, groups):
+        """
+        Build duplicates report.
+
+        Arguments:
+            groups (list): Duplicate groups as returned from ``find``.
+
+        Returns:
+            dict: Report with the ``groups``, the total of ``duplicates`` files which
+            could be removed, the total ``reclaimable`` size and the ``stats`` about
+            files compared at each stage.
+        """
+        return {
+            "duplicates": sum([len(item["paths"]) - 1 for item in groups]),
+            "reclaimable": sum([item["reclaimable"] for item in groups]),
+            "stats": self.stats,
+            "groups": groups,
+        }
@@ -0,0 +1,217 @@
+import re
+
+
+# File name of ignore rules to search in each walked directory
+IGNORE_FILENAME = ".deoviignore"
+
+
+def translate_pattern(pattern):
+    """
+    Translate a gitignore glob pattern to a regular expression.
+
+    Supported syntax is ``*`` and ``?`` which do not match a ``/``, ``[...]``
+    character classes (with ``!`` or ``^`` negation), ``**`` for any number of
+    directories and backslash escaping. Pattern should not have its negation or
+    directory marks anymore.
+
+    Arguments:
+        pattern (string): Glob pattern.
+
+    Returns:
+        string: Regular expression without any capturing group.
+    """
+    index = 0
+    length = len(pattern)
+    parts = []
+
+    while index < length:
+        char = pattern[index]
+
+        if char == "*":
+            is_segment = (
+                pattern[index:index + 2] == "**" and
+                (index == 0 or pattern[index - 1] == "/") and
+                (index + 2 == length or pattern[index + 2] == "/")
+            )
+            if is_segment and index + 2 == length:
+                # Trailing "**" match everything inside
+                parts.append(".*")
+                index += 2
+            elif is_segment:
+                # "**/" match zero or more directories
+                parts.append("(?:.*/)?")
+                index += 3
+            else:
+                parts.append("[^/]*")
+                index += 1
+        elif char == "?":
+            parts.append("[^/]")
+            index += 1
+        elif char == "[":
+            # A "]" right after the opening is a member of class
+            end = pattern.find("]", index + 2)
+            if end == -1:
+                parts.append(re.escape(char))
+                index += 1
+            else:
+                members = pattern[index + 1:end]
+                negate = members[0] in "!^"
+                if negate:
+                    members = members[1:]
+                parts.append("(?!/)[{}{}]".format(
+                    "^" if negate else "",
+                    "".join([
+                        item if item == "-" else re.escape(item)
+                        for item in members
+                    ]),
+                ))
+                index = end + 1
+        elif char == "\\" and index + 1 < length:
+            parts.append(re.escape(pattern[index + 1]))
+            index += 2
+        else:
+            parts.append(re.escape(char))
+            index += 1
+
+    return "".join(parts)
+
+
+def parse_rule(line):
+    """
+    Parse a gitignore rule line.
+
+    Arguments:
+        line (string): Rule line.
+
+    Returns:
+        tuple: Regular expression to match a path relative to the rule directory, a
+        boolean for negated rule and a boolean for directory only rule. ``None`` for
+        blank and comment lines.
+    """
+    # Trailing spaces are ignored unless escaped
+    pattern = line.rstrip("\n")
+    while pattern.endswith(" ") and not pattern.endswith("\\ "):
+        pattern = pattern[:-1]
+
+    if not pattern or pattern.startswith("#"):
+        return None
+
+    negate = pattern.startswith("!")
+    if negate:
+        pattern = pattern[1:]
+
+    directory = pattern.endswith("/")
+    if directory:
+        pattern = pattern.rstrip("/")
+
+    if not pattern:
+        return None
+
+    # A pattern with a separator is relative to the rule directory, else it matches
+    # at any level below
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    regex = translate_pattern(pattern)
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+
+    return (regex, negate, directory)
+
+
+class IgnoreRules:
+    """
+    Compiled gitignore rules from a directory.
+
+    All rules are compiled into a single regular expression, the last matching rule
+    wins like with gitignore.
+
+    Arguments:
+        lines (list): Rule lines.
+    """
+    def __init__(self, lines):
+        rules = [item for item in [parse_rule(line) for line in lines] if item]
+
+        self.negations = {}
+        directory_parts = []
+        file_parts = []
+
+        # Rules are reversed so the first matching alternative is the last rule
+        for index in reversed(range(len(rules))):
+            regex, negate, directory = rules[index]
+            name = "r{}".format(index)
+            self.negations[name] = negate
+
+            part = "(?P<{}>{})".format(name, regex)
+            directory_parts.append(part)
+            if not directory:
+                file_parts.append(part)
+
+        self.directory_regex = self.compile(directory_parts)
+        self.file_regex = self.compile(file_parts)
+
+    def compile(self, parts):
+        """
+        Compile alternatives into a single regular expression.
+
+        Arguments:
+            parts (list): Alternative regular expressions.
+
+        Returns:
+            re.Pattern: Compiled regular expression or ``None`` if there is no
+            alternative.
+        """
+        if not parts:
+            return None
+
+        return re.compile("|".join(parts))
+
+    def __bool__(self):
+        return self.directory_regex is not None
+
+    def match(self, path, is_dir=False):
+        """
+        Match a path against rules.
+
+        Arguments:
+            path (string): Path relative to the rules directory, with ``/`` separators.
+
+        Keyword Arguments:
+            is_dir (boolean): Whether path is a directory or not.
+
+        Returns:
+            boolean: True if path is ignored, False if it is explicitely not ignored
+            from a negated rule or ``None`` if no rule match.
+        """
+        regex = self.directory_regex if is_dir else self.file_regex
+        if regex is None:
+            return None
+
+        matched = regex.fullmatch(path)
+        if matched is None:
+            return None
+
+        return not self.negations[matched.lastgroup]
+
+
+def is_ignored(name, is_dir, scopes):
+    """
+    Check a directory entry against rules from its directory and parent directories.
+
+    Arguments:
+        name (string): Entry name.
+        is_dir (boolean): Whether entry is a directory or not.
+        scopes (list): List of tuples ``(rules, prefix)`` from the topmost rules to the
+            deepest ones, where ``rules`` is an ``IgnoreRules`` object and ``prefix``
+            the path of entry directory relative to the rules directory, either empty
+            or ending with a ``/``.
+
+    Returns:
+        boolean: True if entry is ignored. Deepest rules have precedence.
+    """
+    for rules, prefix in reversed(scopes):
+        result = rules.match(prefix + name, is_dir=is_dir)
+        if result is not None:
+            return result
+
+    return False
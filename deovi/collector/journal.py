@@ -0,0 +1,141 @@
+import json
+from pathlib import Path
+
+from ..exceptions import CollectorError
+from ..utils.jsons import ExtendedJsonEncoder
+
+
+# Version of journal format, a journal with another version can not be resumed
+JOURNAL_VERSION = 1
+
+
+class CollectorJournal:
+    """
+    Journal of directories stored during a collection.
+
+    Journal is a NDJSON file: a first line for the header with collection options then
+    a line for each stored directory payload. Lines are appended and flushed as soon as
+    a directory is stored, so an interrupted collection can be resumed from the
+    directories already done.
+
+    Arguments:
+        path (pathlib.Path): Journal file path.
+        basepath (pathlib.Path): Collection basepath.
+
+    Keyword Arguments:
+        checksum (boolean): Whether collection has directory checksums or not.
+    """
+    def __init__(self, path, basepath, checksum=False):
+        self.path = Path(path)
+        self.basepath = basepath
+        self.checksum = checksum
+        self.fp = None
+
+    def get_header(self):
+        """
+        Return journal header.
+
+        Returns:
+            dict: Journal format version and collection options.
+        """
+        return {
+            "journal": JOURNAL_VERSION,
+            "basepath": str(self.basepath),
+            "checksum": self.checksum,
+        }
+
+    def load(self):
+        """
+        Load directory records from journal file.
+
+        A truncated last line from an interrupted collection is ignored.
+
+        Raises:
+            CollectorError: If journal header does not match the collection options.
+
+        Returns:
+            dict: Directory records indexed on their registry key. Empty if journal
+            file does not exist.
+        """
+        records = {}
+
+        if not self.path.exists():
+            return records
+
+        with self.path.open("r") as fp:
+            header = fp.readline()
+            try:
+                header = json.loads(header)
+            except json.JSONDecodeError:
+                header = None
+
+            if header != self.get_header():
+                msg = (
+                    "Journal can not be resumed because it has been created for "
+                    "another collection: {}"
+                )
+                raise CollectorError(msg.format(str(self.path)))
+
+            for line in fp:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[record["key"]] = record
+
+        return records
+
+    def open(self, resume=False):
+        """
+        Open journal file to append records.
+
+        Keyword Arguments:
+            resume (boolean): If True, records are appended to the existing journal
+                file. Else the journal file is created again.
+        """
+        if resume and self.path.exists():
+            self.fp = self.path.open("a")
+            # Terminate a truncated last line so the next record starts on its own
+            # line
+            if self.fp.tell() > 0:
+                with self.path.open("rb") as reader:
+                    reader.seek(-1, 2)
+                    if reader.read(1) != b"\n":
+                        self.fp.write("\n")
+        else:
+            self.fp = self.path.open("w")
+            self.write(self.get_header())
+
+    def write(self, content):
+        """
+        Write a line and flush it.
+
+        Arguments:
+            content (dict): Line content.
+        """
+        self.fp.write(json.dumps(content, cls=ExtendedJsonEncoder) + "\n")
+        self.fp.flush()
+
+    def append(self, key, mtime, data):
+        """
+        Append a directory record.
+
+        Arguments:
+            key (string): Directory registry key.
+            mtime (integer): Directory modification time in nanoseconds, used to know
+                if directory has changed when resuming.
+            data (dict): Directory payload before it has been stored.
+        """
+        self.write({
+            "key": key,
+            "mtime": mtime,
+            "data": data,
+        })
+
+    def close(self):
+        """
+        Close journal file.
+        """
+        if self.fp is not None:
+            self.fp.close()
+            self.fp = None
@@ -0,0 +1,375 @@
+import contextlib
+import datetime
+import itertools
+import os
+import posixpath
+from decimal import Decimal, InvalidOperation
+from pathlib import Path, PurePosixPath
+
+from ..exceptions import CollectorError
+
+
+# Supported listing formats
+LISTING_FORMATS = ("find", "tar")
+
+# Maximum number of symbolic links to resolve for a path, like ``SYMLOOP_MAX``
+LISTING_MAX_LINKS = 40
+
+
+class ListingStats:
+    """
+    File or directory stats from a listing, alike ``os.stat_result``.
+
+    Listing does not know devices and inodes, every entry is on device ``0`` with a
+    unique inode number from listing order.
+
+    Arguments:
+        inode (integer): Unique entry number.
+        size (integer): Size in bytes.
+        mtime (decimal.Decimal): Modification timestamp in seconds.
+    """
+    def __init__(self, inode, size, mtime):
+        self.st_dev = 0
+        self.st_ino = inode
+        self.st_nlink = 1
+        self.st_size = size
+        self.st_mtime = float(mtime)
+        self.st_mtime_ns = int(mtime * 1000000000)
+
+
+class ListingEntry:
+    """
+    Directory entry from a listing, alike ``os.DirEntry``.
+
+    Like ``os.DirEntry.is_dir``, a symbolic link to a directory is a directory.
+
+    Arguments:
+        name (string): Entry name.
+        kind (string): Entry type, ``d`` for a directory or ``f`` for a file. For a
+            symbolic link this is the type of its target.
+
+    Keyword Arguments:
+        symlink (boolean): Whether entry is a symbolic link or not.
+    """
+    def __init__(self, name, kind, symlink=False):
+        self.name = name
+        self.kind = kind
+        self.symlink = symlink
+
+    def is_dir(self):
+        return self.kind == "d"
+
+    def is_symlink(self):
+        return self.symlink
+
+
+class FileListing:
+    """
+    Directory tree built from an offline listing of files.
+
+    A listing can be given to collector instead of walking the filesystem, it provides
+    the same ``stat``, ``scandir`` and ``entry_type`` methods than
+    ``deovi.utils.filesystem.FilesystemOperator`` for listed paths.
+
+    Directories which are not listed themselves but have listed children are created
+    with an empty size and modification time.
+
+    Symbolic links are resolved to their target in listing, so a link has the type
+    and stats of its target and paths through a link to a directory are listed like
+    the target directory, as they are on filesystem. A link without a known target,
+    with an absolute target or with a target which is not in listing is broken and
+    not listed.
+
+    Arguments:
+        basepath (pathlib.Path): Path which listing paths are relative to.
+    """
+    def __init__(self, basepath):
+        self.basepath = basepath
+        self.stats = {}
+        self.children = {}
+        # Symbolic link targets relative to basepath, None for a broken link
+        self.links = {}
+        self.inodes = itertools.count()
+        self.add(".", "d", 0, Decimal(0))
+
+    def add(self, path, kind, size, mtime, target=None):
+        """
+        Add an entry to listing.
+
+        Arguments:
+            path (string): Entry path relative to basepath, with ``/`` separators.
+            kind (string): Entry type, ``d`` for a directory, ``f`` for a file or
+                ``l`` for a symbolic link.
+            size (integer): Entry size in bytes.
+            mtime (decimal.Decimal): Entry modification timestamp in seconds.
+
+        Keyword Arguments:
+            target (string): Target of a symbolic link as stored in the link.
+        """
+        key = str(PurePosixPath(path))
+
+        if kind == "l":
+            self.links[key] = self.link_target(key, target)
+        else:
+            self.stats[key] = ListingStats(next(self.inodes), size, mtime)
+
+        if kind == "d":
+            self.children.setdefault(key, {})
+
+        if key == ".":
+            return
+
+        parent = str(PurePosixPath(key).parent)
+        if parent not in self.children:
+            self.add(parent, "d", 0, Decimal(0))
+        self.children[parent][PurePosixPath(key).name] = kind
+
+    def link_target(self, key, target):
+        """
+        Return the listing key of a symbolic link target.
+
+        Arguments:
+            key (string): Link key.
+            target (string): Target as stored in the link.
+
+        Returns:
+            string: Target key or None if target is unknown, absolute or out of
+            basepath.
+        """
+        if not target or posixpath.isabs(target):
+            return None
+
+        resolved = posixpath.normpath(
+            posixpath.join(posixpath.dirname(key), target)
+        )
+        if resolved == ".." or resolved.startswith("../"):
+            return None
+
+        return resolved
+
+    def resolve(self, key):
+        """
+        Resolve symbolic links from a listing key.
+
+        Arguments:
+            key (string): Listing key.
+
+        Returns:
+            string: Key without any symbolic link or None if a link is broken.
+        """
+        parts = list(PurePosixPath(key).parts)
+        current = "."
+        hops = 0
+
+        while parts:
+            name = parts.pop(0)
+            candidate = name if current == "." else current + "/" + name
+
+            if candidate not in self.links:
+                current = candidate
+                continue
+
+            hops += 1
+            target = self.links[candidate]
+            if target is None or hops > LISTING_MAX_LINKS:
+                return None
+
+            parts = [
+                item for item in PurePosixPath(target).parts if item != "."
+            ] + parts
+            current = "."
+
+        return current
+
+    def _key(self, path):
+        """
+        Return listing key for a path, with symbolic links resolved.
+
+        Raises:
+            FileNotFoundError: If path goes through a broken link.
+        """
+        try:
+            key = Path(path).relative_to(self.basepath).as_posix()
+        except ValueError:
+            msg = "Path is out of listing basepath: {}"
+            raise CollectorError(msg.format(str(path)))
+
+        resolved = self.resolve(key)
+        if resolved is None:
+            raise FileNotFoundError(
+                "Path is a broken link in listing: {}".format(str(path))
+            )
+
+        return resolved
+
+    def stat(self, path):
+        """
+        Get file or directory stats.
+
+        Arguments:
+            path (pathlib.Path): Path to stat.
+
+        Raises:
+            FileNotFoundError: If path is not in listing.
+
+        Returns:
+            ListingStats: Path stats.
+        """
+        key = self._key(path)
+        if key not in self.stats:
+            raise FileNotFoundError(
+                "Path is not in listing: {}".format(str(path))
+            )
+
+        return self.stats[key]
+
+    @contextlib.contextmanager
+    def scandir(self, path):
+        """
+        List directory entries.
+
+        Arguments:
+            path (pathlib.Path): Directory path to list.
+
+        Raises:
+            NotADirectoryError: If path is not a listed directory.
+
+        Yields:
+            iterator: Directory entries as ``ListingEntry`` objects.
+        """
+        key = self._key(path)
+        if key not in self.children:
+            raise NotADirectoryError(
+                "Directory is not in listing: {}".format(str(path))
+            )
+
+        entries = []
+        for name, kind in self.children[key].items():
+            if kind != "l":
+                entries.append(ListingEntry(name, kind))
+                continue
+
+            # Link has the type of its target, broken links are not listed
+            target = self.resolve(name if key == "." else key + "/" + name)
+            if target in self.children:
+                entries.append(ListingEntry(name, "d", symlink=True))
+            elif target in self.stats:
+                entries.append(ListingEntry(name, "f", symlink=True))
+
+        yield iter(entries)
+
+    def entry_type(self, entry):
+        """
+        Get the type of a directory entry as returned by ``scandir``.
+
+        Arguments:
+            entry (ListingEntry): Directory entry.
+
+        Returns:
+            tuple: Whether entry is a directory, following symbolic links, and whether
+            entry is a symbolic link.
+        """
+        return entry.is_dir(), entry.is_symlink()
+
+    @classmethod
+    def parse_find(cls, line):
+        """
+        Parse a line from a ``find`` listing.
+
+        Line is expected from ``find -printf '%P\\t%s\\t%T@\\t%y\\t%l\\n'``. The
+        last column for the target of symbolic links is optional.
+
+        Arguments:
+            line (string): Listing line.
+
+        Returns:
+            tuple: Path, type, size, modification time and link target (None if
+            there is none).
+        """
+        fields = line.rstrip("\n").split("\t")
+        if len(fields) == 4:
+            fields.append("")
+        path, size, mtime, kind, target = fields
+
+        return path or ".", kind, int(size), Decimal(mtime), target or None
+
+    @classmethod
+    def parse_tar(cls, line):
+        """
+        Parse a line from a ``tar`` verbose listing.
+
+        Line is expected from ``tar --list --verbose --full-time`` with GNU tar, like
+        ``-rw-r--r-- user/group 1057149 2023-03-03 15:28:31 ./foo/video.mp4``. Dates
+        are assumed to be in UTC.
+
+        Arguments:
+            line (string): Listing line.
+
+        Returns:
+            tuple: Path, type, size, modification time and link target (None if
+            there is none).
+        """
+        mode, owner, size, date, time, path = line.rstrip("\n").split(None, 5)
+
+        target = None
+        kind = {"d": "d", "l": "l", "-": "f", "h": "f"}.get(mode[0], mode[0])
+        if kind == "l":
+            path, _, target = path.partition(" -> ")
+        elif mode[0] == "h":
+            path = path.split(" link to ", 1)[0]
+
+        mtime = datetime.datetime.fromisoformat(
+            "{} {}".format(date, time)
+        ).replace(tzinfo=datetime.timezone.utc)
+
+        return (
+            path.rstrip("/") or ".",
+            kind,
+            int(size),
+            Decimal(mtime.timestamp()),
+            target or None,
+        )
+
+    @classmethod
+    def load(cls, source, basepath, format="find"):
+        """
+        Load a listing from a file.
+
+        Arguments:
+            source (pathlib.Path): Listing file path.
+            basepath (pathlib.Path): Path which listing paths are relative to.
+
+        Keyword Arguments:
+            format (string): Listing format from ``LISTING_FORMATS``.
+
+        Raises:
+            CollectorError: If format is unknown or a line can not be parsed.
+
+        Returns:
+            FileListing: Listing object.
+        """
+        if format not in LISTING_FORMATS:
+            msg = "Unknown listing format '{}', available formats are: {}"
+            raise CollectorError(msg.format(format, ", ".join(LISTING_FORMATS)))
+
+        parser = getattr(cls, "parse_{}".format(format))
+        listing = cls(basepath)
+
+        with Path(source).open("r") as fp:
+            for number, line in enumerate(fp, start=1):
+                if not line.strip():
+                    continue
+
+                try:
+                    path, kind, size, mtime, target = parser(line)
+                except (ValueError, InvalidOperation):
+                    msg = "Invalid line {} from listing: {}"
+                    raise CollectorError(msg.format(number, str(source)))
+
+                if os.path.isabs(path) or ".." in PurePosixPath(path).parts:
+                    msg = "Listing path must be relative to basepath on line {}: {}"
+                    raise CollectorError(msg.format(number, str(source)))
+
+                listing.add(path, kind, size, mtime, target=target)
+
+        return listing
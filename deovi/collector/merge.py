@@ -0,0 +1,278 @@
+import heapq
+import itertools
+import json
+from pathlib import Path
+
+from ..exceptions import CollectorError
+from ..renamer.printer import PrinterInterface
+from ..utils.jsons import ExtendedJsonEncoder
+from .dump import DumpReader
+
+
+# Available formats for merged dump
+MERGE_FORMATS = ("json", "ndjson")
+
+
+def payload_basepath(key, payload):
+    """
+    Guess the basepath a directory has been collected from.
+
+    Arguments:
+        key (string): Directory key.
+        payload (dict): Directory payload.
+
+    Returns:
+        string: Basepath or None if it can not be guessed from payload.
+    """
+    if not payload.get("path"):
+        return None
+
+    path = Path(payload["path"])
+    relative = str(payload.get("relative_dir", key))
+    parts = () if relative in ("", ".") else Path(relative).parts
+
+    if parts and path.parts[-len(parts):] != parts:
+        return None
+
+    for _ in parts:
+        path = path.parent
+
+    return str(path)
+
+
+def namespace_key(namespace, key):
+    """
+    Prefix a directory key with a namespace.
+
+    Arguments:
+        namespace (string): Namespace.
+        key (string): Directory key.
+
+    Returns:
+        string: Namespaced key, the namespace itself for the basepath directory.
+    """
+    if key in ("", "."):
+        return namespace
+
+    return namespace.rstrip("/") + "/" + key
+
+
+def device_identity(device):
+    """
+    Get the identity of a device to recognize dumps collected on the same device.
+
+    Arguments:
+        device (dict): Device informations from a dump.
+
+    Returns:
+        tuple: Device id with its total size. Dumps from older collector versions
+        have no device id, their total, used and free sizes are used instead.
+    """
+    if "id" in device:
+        return (device["id"], device.get("total"))
+
+    return tuple([device.get(name) for name in ("total", "used", "free")])
+
+
+def indent_json(value, level):
+    """
+    Serialize a value like ``json.dump`` with an indentation of 4 spaces would do
+    for a value nested at the given level.
+    """
+    return json.dumps(value, indent=4, cls=ExtendedJsonEncoder).replace(
+        "\n", "\n" + " " * (4 * level)
+    )
+
+
+class DumpMerger(PrinterInterface):
+    """
+    Merge the registries from dumps of different basepaths or devices with a
+    streaming k-way merge.
+
+    Directory keys are prefixed with a namespace for their dump, default to the
+    basepath they have been collected from. Dumps are read directory by directory and
+    merged directories are written as soon as they come, so registries are never
+    loaded in memory.
+
+    When every dump has its directories sorted on their key, like the dumps collected
+    with ``sort_keys``, the merged registry is sorted also. Unsorted dumps are still
+    merged but the merged registry is not sorted.
+
+    Attributes:
+        devices (dict): Device informations of each dump indexed on its namespace,
+            only available once merge is done.
+        unsorted (list): Namespaces of the dumps which were not sorted.
+
+    Arguments:
+        sources (list): Dump file paths, either JSON dumps or NDJSON dumps.
+
+    Keyword Arguments:
+        namespaces (list): Namespaces to use for the dumps in the same order. A dump
+            without a given namespace uses its basepath, from its journal header or
+            guessed from its first directory, else its file name.
+    """
+    def __init__(self, sources, namespaces=None):
+        super().__init__()
+
+        self.sources = [Path(item) for item in sources]
+        self.namespaces = list(namespaces or [])
+        self.devices = {}
+        self.unsorted = []
+
+        if len(self.namespaces) > len(self.sources):
+            raise CollectorError("There are more namespaces than dumps to merge")
+
+    def open_source(self, position):
+        """
+        Start reading a dump and find its namespace.
+
+        Arguments:
+            position (integer): Dump position from sources.
+
+        Returns:
+            tuple: Namespace, dump reader and an iterator over its directories.
+        """
+        path = self.sources[position]
+        reader = DumpReader(path)
+        items = iter(reader)
+        first = next(items, None)
+
+        if position < len(self.namespaces):
+            namespace = self.namespaces[position]
+        else:
+            namespace = (
+                (reader.header or {}).get("basepath") or
+                (first and payload_basepath(*first)) or
+                path.stem
+            )
+
+        if first is not None:
+            items = itertools.chain([first], items)
+
+        return namespace, reader, items
+
+    def namespaced(self, namespace, items):
+        """
+        Prefix the keys of directories from a dump and check they are sorted.
+        """
+        previous = None
+        for key, data in items:
+            if previous is not None and key <= previous and (
+                namespace not in self.unsorted
+            ):
+                self.unsorted.append(namespace)
+                self.log_warning(
+                    "Dump is not sorted, merged registry will not be sorted (collect "
+                    "it with '--sort-keys' to sort it): {}".format(namespace)
+                )
+            previous = key
+            yield namespace_key(namespace, key), data
+
+    def merge(self):
+        """
+        Merge dumps.
+
+        Raises:
+            CollectorError: If some dumps have the same namespace.
+
+        Yields:
+            tuple: Namespaced directory key and payload.
+        """
+        sources = [self.open_source(i) for i in range(len(self.sources))]
+
+        namespaces = [item[0] for item in sources]
+        duplicates = sorted(set([
+            item for item in namespaces if namespaces.count(item) > 1
+        ]))
+        if duplicates:
+            raise CollectorError(
+                "Dumps to merge have the same namespace: {}".format(
+                    ", ".join(duplicates)
+                )
+            )
+
+        yield from heapq.merge(
+            *[self.namespaced(namespace, items) for namespace, _, items in sources],
+            key=lambda item: item[0],
+        )
+
+        self.devices = {namespace: reader.device for namespace, reader, _ in sources}
+
+    def total_device(self):
+        """
+        Sum device informations from all dumps.
+
+        Dumps collected on the same device share its usage, so a device is counted
+        once with the informations from its first dump.
+
+        Returns:
+            dict: Total, used and free size with occupancy percentage from every
+            device with informations. None if there is none.
+        """
+        devices = {}
+        for item in self.devices.values():
+            if item:
+                devices.setdefault(device_identity(item), item)
+        devices = list(devices.values())
+        if not devices:
+            return None
+
+        total = {
+            name: sum([item.get(name, 0) for item in devices])
+            for name in ("total", "used", "free")
+        }
+        total["percentage"] = (
+            (total["used"] / total["total"]) * 100 if total["total"] else 0
+        )
+
+        return total
+
+    def write(self, fp, format="json"):
+        """
+        Merge dumps and write the merged dump.
+
+        JSON merged dump has the same structure than a dump from collector with an
+        additional item ``devices`` for device informations of each dump, item
+        ``device`` holds the sum of them. NDJSON merged dump has a line for each
+        directory and a last line for device items.
+
+        Arguments:
+            fp (file object): File object opened in text mode.
+
+        Keyword Arguments:
+            format (string): Merged dump format, either ``json`` or ``ndjson``.
+
+        Returns:
+            integer: Number of merged directories.
+        """
+        if format not in MERGE_FORMATS:
+            raise CollectorError("Unknown merge format: {}".format(format))
+
+        count = 0
+
+        if format == "ndjson":
+            for key, data in self.merge():
+                fp.write(json.dumps(
+                    {"key": key, "data": data}, cls=ExtendedJsonEncoder
+                ) + "\n")
+                count += 1
+
+            fp.write(json.dumps(
+                {"devices": self.devices, "device": self.total_device()},
+                cls=ExtendedJsonEncoder,
+            ) + "\n")
+
+            return count
+
+        fp.write("{\n    \"registry\": {")
+        for key, data in self.merge():
+            fp.write("," if count else "")
+            fp.write("\n        {}: {}".format(json.dumps(key), indent_json(data, 2)))
+            count += 1
+        fp.write("\n    }" if count else "}")
+
+        fp.write(",\n    \"devices\": {}".format(indent_json(self.devices, 1)))
+        fp.write(",\n    \"device\": {}".format(indent_json(self.total_device(), 1)))
+        fp.write("\n}")
+
+        return count
@@ -0,0 +1,234 @@
+import queue
+import threading
+import time
+
+
+# Default maximum number of items waiting in a stage input queue before producers
+# are blocked
+DEFAULT_QUEUE_SIZE = 64
+
+
+class PipelineStage:
+    """
+    A processing stage with its own worker threads and bounded input queue.
+
+    Arguments:
+        name (string): Stage name, used as key in pipeline statistics.
+        handler (callable): Function called with each received item. Its return value
+            is passed to the next stage, unless it is ``None`` which means the item is
+            dropped.
+
+    Keyword Arguments:
+        workers (integer): Number of worker threads for this stage. Default to 1.
+        queue_size (integer): Maximum number of items waiting in the stage input queue.
+            When the queue is full, the upstream stage (or the pipeline source) is
+            blocked until a worker has consumed an item. Default to
+            ``DEFAULT_QUEUE_SIZE``.
+    """
+    def __init__(self, name, handler, workers=1, queue_size=DEFAULT_QUEUE_SIZE):
+        if workers < 1:
+            msg = "Stage '{}' requires at least one worker, got: {}"
+            raise ValueError(msg.format(name, workers))
+
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue_size = queue_size
+        self.reset()
+
+    def reset(self):
+        """
+        Reset stage queue and counters.
+        """
+        self.queue = queue.Queue(maxsize=self.queue_size)
+        self.lock = threading.Lock()
+        self.running = 0
+        self.counters = {
+            "workers": self.workers,
+            "received": 0,
+            "emitted": 0,
+            "dropped": 0,
+            "busy_time": 0.0,
+            "blocked_time": 0.0,
+            "max_queue": 0,
+        }
+
+    def put(self, item):
+        """
+        Push an item into the stage queue.
+
+        This blocks while the queue is full and the time spent blocked is accounted in
+        ``blocked_time`` counter, it is the measure of backpressure applied from this
+        stage to the upstream one.
+
+        Arguments:
+            item (object): Item to push.
+        """
+        start = time.perf_counter()
+        self.queue.put(item)
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            self.counters["blocked_time"] += elapsed
+            self.counters["max_queue"] = max(
+                self.counters["max_queue"],
+                self.queue.qsize()
+            )
+
+    def report(self, elapsed):
+        """
+        Return stage counters.
+
+        Arguments:
+            elapsed (float): Total pipeline duration in seconds, used to compute the
+                stage throughput.
+
+        Returns:
+            dict: Stage counters including a ``throughput`` item for the number of
+            processed items per second.
+        """
+        counters = dict(self.counters)
+        counters["throughput"] = (counters["received"] / elapsed) if elapsed else 0.0
+
+        return counters
+
+
+class Pipeline:
+    """
+    Chain stages connected by bounded queues.
+
+    Items are produced by a source iterable consumed from the calling thread, then
+    pushed through every stage in order. Each stage runs its own workers so I/O bound
+    stages and CPU bound stages can be tuned independently. Since queues are bounded,
+    a slow stage applies backpressure to the upstream ones instead of letting items
+    accumulate in memory.
+
+    Item order is not guaranteed once a stage has more than one worker, a stage which
+    needs ordering has to do it itself.
+
+    Arguments:
+        stages (list): List of ``PipelineStage`` objects in processing order.
+    """
+    # Marker pushed into queues to stop workers
+    SENTINEL = object()
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.elapsed = 0.0
+        self.error = None
+
+    def _worker(self, index):
+        """
+        Worker loop for stage at given index.
+
+        Once the stage input is exhausted, the last worker to stop will forward the
+        stop sentinels to the next stage.
+
+        Arguments:
+            index (integer): Stage index in pipeline.
+        """
+        stage = self.stages[index]
+        following = self.stages[index + 1] if index + 1 < len(self.stages) else None
+
+        while True:
+            item = stage.queue.get()
+            if item is self.SENTINEL:
+                break
+
+            # Once an error occured, items are still consumed to unblock producers
+            # but they are not processed anymore
+            if self.error is not None:
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = stage.handler(item)
+            except BaseException as e:
+                self.error = e
+                continue
+            busy = time.perf_counter() - start
+
+            with stage.lock:
+                stage.counters["received"] += 1
+                stage.counters["busy_time"] += busy
+                if result is None:
+                    stage.counters["dropped"] += 1
+                else:
+                    stage.counters["emitted"] += 1
+
+            if result is not None and following is not None:
+                following.put(result)
+
+        with stage.lock:
+            stage.running -= 1
+            last = stage.running == 0
+
+        if last and following is not None:
+            for i in range(following.workers):
+                following.queue.put(self.SENTINEL)
+
+    def run(self, source):
+        """
+        Push every item from source through the pipeline and wait for all stages to
+        complete.
+
+        Arguments:
+            source (iterable): Items to process. It is consumed from the calling
+                thread, so a generator which walks a filesystem is naturally slowed down
+                by backpressure from the first stage.
+
+        Raises:
+            BaseException: Any exception raised by a stage handler is raised again
+                once every worker has stopped.
+
+        Returns:
+            dict: Statistics for each stage, indexed on stage names.
+        """
+        self.error = None
+        threads = []
+        start = time.perf_counter()
+
+        for index, stage in enumerate(self.stages):
+            stage.reset()
+            stage.running = stage.workers
+            for i in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    args=(index,),
+                    name="{}-{}".format(stage.name, i),
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+
+        first = self.stages[0]
+        try:
+            for item in source:
+                if self.error is not None:
+                    break
+                first.put(item)
+        finally:
+            for i in range(first.workers):
+                first.queue.put(self.SENTINEL)
+
+            for thread in threads:
+                thread.join()
+
+        self.elapsed = time.perf_counter() - start
+
+        if self.error is not None:
+            raise self.error
+
+        return self.report()
+
+    def report(self):
+        """
+        Return statistics for every stages.
+
+        Returns:
+            dict: Stage counters indexed on stage names.
+        """
+        return {
+            stage.name: stage.report(self.elapsed)
+            for stage in self.stages
+        }
@@ -0,0 +1,650 @@
+import array
+import bisect
+import datetime
+import fnmatch
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from pathlib import Path
+
+from ..exceptions import CollectorError
+from .cache import isoformat_to_timestamp
+
+
+# Query index file name suffix appended to dump file name
+QUERY_INDEX_SUFFIX = ".qidx"
+
+# Query index file identifier and format version
+QUERY_INDEX_MAGIC = b"DEOVIQRY"
+QUERY_INDEX_VERSION = 1
+
+# Header: magic, version and meta size
+QUERY_INDEX_HEADER = struct.Struct("<8sIQ")
+
+# File fields with an index of their values
+QUERY_INDEXED_FIELDS = ("extension", "container")
+
+# Comparison operators, the longest ones first so they are matched first
+QUERY_OPERATORS = ("!=", ">=", "<=", "=", ">", "<", "~")
+
+# Expression with an optionally negated field, then an optional operator and value
+QUERY_EXPRESSION = re.compile(
+    r"^\s*(?P<negated>!?)\s*(?P<name>[\w.-]+)\s*"
+    r"(?:(?P<operator>{})(?P<value>.*))?$".format(
+        "|".join([re.escape(item) for item in QUERY_OPERATORS])
+    )
+)
+
+# Expression scopes for directory fields, media file fields and the number of
+# matching files from a directory
+QUERY_SCOPES = ("dir", "file", "files")
+
+# Size value with an optional unit
+SIZE_VALUE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]i?B?|B)?\s*$", re.IGNORECASE)
+
+SIZE_UNITS = {"": 1, "B": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def query_index_path(path):
+    """
+    Get the query index file path for a dump.
+
+    Arguments:
+        path (pathlib.Path): Dump file path.
+
+    Returns:
+        pathlib.Path: Dump file path with ``QUERY_INDEX_SUFFIX`` appended, like
+        ``plop.json.qidx`` for ``plop.json``.
+    """
+    return path.with_name(path.name + QUERY_INDEX_SUFFIX)
+
+
+def parse_size(value):
+    """
+    Parse a size with an optional binary unit like ``8G`` or ``700MiB``.
+
+    Arguments:
+        value (string): Size to parse.
+
+    Raises:
+        CollectorError: If value is not a valid size.
+
+    Returns:
+        integer: Size in bytes.
+    """
+    match = SIZE_VALUE.match(value)
+    if match is None:
+        raise CollectorError("Invalid size: {}".format(value))
+
+    number, unit = match.groups()
+    unit = (unit or "")[:1].upper()
+
+    return int(float(number) * SIZE_UNITS[unit])
+
+
+def parse_datetime(value):
+    """
+    Parse a date or a datetime in ISO format to a timestamp. A datetime without
+    timezone is assumed to be in UTC.
+
+    Arguments:
+        value (string): Datetime to parse.
+
+    Raises:
+        CollectorError: If value is not a valid datetime.
+
+    Returns:
+        float: Timestamp.
+    """
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise CollectorError("Invalid datetime: {}".format(value))
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+
+    return parsed.timestamp()
+
+
+class QueryCondition:
+    """
+    A condition from a query expression.
+
+    An expression is made of a field, an operator and a value, like
+    ``file.size>8G``, or only a field to check it has a value, like ``dir.cover``. A
+    field name prefixed with ``!`` checks the field has no value.
+
+    Fields are prefixed with their scope: ``dir.`` for directory items (including
+    the ones from manifest), ``file.`` for media file items. Nested items are
+    reached with dots like ``dir.tmdb.id``. The ``files`` field is the number of
+    matching media files from a directory.
+
+    Operators are ``=``, ``!=``, ``>``, ``>=``, ``<``, ``<=`` and ``~`` for a case
+    insensitive pattern with wildcards. Size values accept binary units (``K``,
+    ``M``, ``G`` and ``T``) and ``mtime`` values are dates or datetimes in ISO
+    format.
+
+    Arguments:
+        expression (string): Expression to parse.
+
+    Raises:
+        CollectorError: If expression is invalid.
+    """
+    def __init__(self, expression):
+        self.expression = expression
+
+        match = QUERY_EXPRESSION.match(expression)
+        if match is None or (match.group("negated") and match.group("operator")):
+            raise CollectorError("Invalid query expression: {}".format(expression))
+
+        self.negated = bool(match.group("negated"))
+        self.operator = match.group("operator")
+        self.value = match.group("value")
+        if self.value is not None:
+            self.value = self.value.strip()
+
+        scope, _, field = match.group("name").partition(".")
+        if scope not in QUERY_SCOPES or (scope == "files") == bool(field):
+            raise CollectorError(
+                "Invalid query field, it must start with 'dir.' or 'file.' or be "
+                "'files': {}".format(expression)
+            )
+        if scope == "files" and self.operator in (None, "~"):
+            raise CollectorError(
+                "Field 'files' must be compared to a number: {}".format(expression)
+            )
+
+        self.scope = scope
+        self.field = field.split(".") if field else []
+        self.value = self.parse_value(self.value)
+
+    @property
+    def name(self):
+        """
+        Last part of field name.
+        """
+        return self.field[-1] if self.field else self.scope
+
+    def parse_value(self, value):
+        """
+        Parse expression value to the type of its field.
+
+        Arguments:
+            value (string): Value to parse.
+
+        Returns:
+            object: Parsed value.
+        """
+        if value is None or self.operator == "~":
+            return value
+
+        if self.scope == "files":
+            try:
+                return int(value)
+            except ValueError:
+                raise CollectorError(
+                    "Field 'files' must be compared to a number: {}".format(
+                        self.expression
+                    )
+                )
+        if self.name == "size":
+            return parse_size(value)
+        if self.name == "mtime":
+            return parse_datetime(value)
+
+        for kind in (int, float):
+            try:
+                return kind(value)
+            except ValueError:
+                pass
+
+        if value.lower() in ("true", "false"):
+            return value.lower() == "true"
+
+        return value
+
+    def resolve(self, payload):
+        """
+        Get the field value from a payload.
+
+        Arguments:
+            payload (dict): Directory or file payload.
+
+        Returns:
+            object: Field value, None if field does not exist.
+        """
+        value = payload
+        for part in self.field:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(part)
+
+        if self.name == "mtime" and value is not None:
+            return isoformat_to_timestamp(value)
+
+        return value
+
+    def compare(self, value):
+        """
+        Compare a value to condition.
+
+        Arguments:
+            value (object): Value to compare.
+
+        Returns:
+            boolean: Whether value matches condition or not.
+        """
+        if self.operator is None:
+            return not value if self.negated else bool(value)
+
+        if value is None:
+            return self.operator == "!="
+
+        if self.operator == "~":
+            return fnmatch.fnmatchcase(str(value).lower(), self.value.lower())
+
+        expected = self.value
+        if isinstance(value, str) or isinstance(expected, str):
+            value, expected = str(value), str(expected)
+
+        try:
+            if self.operator == "=":
+                return value == expected
+            elif self.operator == "!=":
+                return value != expected
+            elif self.operator == ">":
+                return value > expected
+            elif self.operator == ">=":
+                return value >= expected
+            elif self.operator == "<":
+                return value < expected
+            else:
+                return value <= expected
+        except TypeError:
+            return False
+
+    def match(self, payload):
+        """
+        Check a payload matches condition.
+
+        Arguments:
+            payload (dict): Directory or file payload.
+
+        Returns:
+            boolean: Whether payload matches condition or not.
+        """
+        return self.compare(self.resolve(payload))
+
+    def __repr__(self):
+        return "<QueryCondition {}>".format(self.expression)
+
+
+class QueryIndex:
+    """
+    Secondary indexes on the media files from a dump for queries.
+
+    Indexes are built from a ``Registry`` once then loaded from a sidecar file,
+    they are built again when dump has changed. There are indexes of file rows on
+    extension and container values, on size buckets (powers of two) and file rows
+    sorted on their modification time.
+
+    Arguments:
+        registry (deovi.collector.registry.Registry): Registry to index.
+
+    Keyword Arguments:
+        path (pathlib.Path): Index file path. Default to the dump file path with
+            ``QUERY_INDEX_SUFFIX``.
+        rebuild (boolean): If True, index is always built again.
+    """
+    def __init__(self, registry, path=None, rebuild=False):
+        self.registry = registry
+        self.path = Path(path) if path else query_index_path(registry.path)
+        self._fp = None
+        self.buffer = None
+        self.meta = None
+        self._mtimes = None
+
+        if rebuild or not self.load():
+            self.build()
+            if not self.load():
+                raise CollectorError(
+                    "Unable to load query index: {}".format(str(self.path))
+                )
+
+    def close(self):
+        """
+        Release memory mapping and file.
+        """
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def signature(self):
+        """
+        Signature of the indexed dump.
+        """
+        return {
+            "dump": self.registry.dump_signature(),
+            "byteorder": sys.byteorder,
+        }
+
+    def build(self):
+        """
+        Build indexes from registry and write them to index file.
+
+        Every directory payload is decoded once for file containers.
+        """
+        cache = self.registry.cache
+        postings = {name: {} for name in QUERY_INDEXED_FIELDS}
+        postings["size"] = {}
+        mtimes = []
+
+        for row in range(len(cache)):
+            _, _, _, _, _, start, count = cache.directory_row(row)
+            if not count:
+                continue
+
+            children = cache.payload(row).get("children_files", [])
+            for position, item in enumerate(children[:count]):
+                file_row = start + position
+                _, _, _, size, mtime = cache.file_row(file_row)
+
+                for name in QUERY_INDEXED_FIELDS:
+                    value = str(item.get(name) or "")
+                    postings[name].setdefault(value, array.array("I")).append(
+                        file_row
+                    )
+                postings["size"].setdefault(
+                    str(max(size, 0).bit_length()), array.array("I")
+                ).append(file_row)
+                mtimes.append((mtime, file_row))
+
+        mtimes.sort()
+
+        chunks = []
+        offset = 0
+        meta = self.signature()
+        meta["postings"] = {}
+        for name, values in postings.items():
+            meta["postings"][name] = {}
+            for value, rows in values.items():
+                data = rows.tobytes()
+                meta["postings"][name][value] = [offset, len(rows)]
+                chunks.append(data)
+                offset += len(data)
+
+        timestamps = array.array("d", [item[0] for item in mtimes]).tobytes()
+        rows = array.array("I", [item[1] for item in mtimes]).tobytes()
+        meta["mtime"] = [offset, len(mtimes)]
+        chunks.extend([timestamps, rows])
+
+        encoded = json.dumps(meta).encode("utf-8")
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        with temporary.open("wb") as fp:
+            fp.write(QUERY_INDEX_HEADER.pack(
+                QUERY_INDEX_MAGIC, QUERY_INDEX_VERSION, len(encoded)
+            ))
+            fp.write(encoded)
+            for chunk in chunks:
+                fp.write(chunk)
+        os.replace(temporary, self.path)
+
+    def load(self):
+        """
+        Load index file.
+
+        Returns:
+            boolean: False if index file does not exist, is invalid or has been built
+            for another dump.
+        """
+        self.close()
+        self._mtimes = None
+
+        if not self.path.exists():
+            return False
+
+        self._fp = self.path.open("rb")
+        try:
+            self.buffer = mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, size = QUERY_INDEX_HEADER.unpack_from(self.buffer, 0)
+            if magic != QUERY_INDEX_MAGIC or version != QUERY_INDEX_VERSION:
+                raise ValueError()
+            start = QUERY_INDEX_HEADER.size
+            self.meta = json.loads(self.buffer[start:start + size])
+        except (ValueError, struct.error):
+            self.close()
+            return False
+
+        if any([self.meta.get(k) != v for k, v in self.signature().items()]):
+            self.close()
+            return False
+
+        self.data_offset = QUERY_INDEX_HEADER.size + size
+
+        return True
+
+    def _array(self, kind, offset, count):
+        """
+        Read an array from index data.
+        """
+        values = array.array(kind)
+        start = self.data_offset + offset
+        values.frombytes(self.buffer[start:start + count * values.itemsize])
+
+        return values
+
+    def values(self, name):
+        """
+        Get the indexed values of a field.
+
+        Arguments:
+            name (string): Field name, either ``extension``, ``container`` or
+                ``size`` for size buckets.
+
+        Returns:
+            list: Indexed values.
+        """
+        return list(self.meta["postings"][name].keys())
+
+    def rows(self, name, value):
+        """
+        Get the file rows with a value.
+
+        Arguments:
+            name (string): Field name, either ``extension``, ``container`` or
+                ``size`` for size buckets.
+            value (string): Field value.
+
+        Returns:
+            array.array: File rows.
+        """
+        posting = self.meta["postings"][name].get(str(value))
+        if posting is None:
+            return array.array("I")
+
+        return self._array("I", *posting)
+
+    def size_rows(self, operator, value):
+        """
+        Get the file rows which may match a size comparison from size buckets.
+
+        Arguments:
+            operator (string): Comparison operator.
+            value (integer): Size in bytes.
+
+        Returns:
+            set: File rows, some of them may not match the comparison.
+        """
+        bucket = max(value, 0).bit_length()
+        rows = set()
+        for name in self.values("size"):
+            if (
+                (operator == "=" and int(name) == bucket) or
+                (operator in (">", ">=") and int(name) >= bucket) or
+                (operator in ("<", "<=") and int(name) <= bucket)
+            ):
+                rows.update(self.rows("size", name))
+
+        return rows
+
+    def mtime_rows(self, operator, value):
+        """
+        Get the file rows matching a modification time comparison.
+
+        Arguments:
+            operator (string): Comparison operator.
+            value (float): Timestamp.
+
+        Returns:
+            set: File rows.
+        """
+        offset, count = self.meta["mtime"]
+        if self._mtimes is None:
+            self._mtimes = self._array("d", offset, count)
+        timestamps = self._mtimes
+
+        if operator == ">":
+            start, end = bisect.bisect_right(timestamps, value), count
+        elif operator == ">=":
+            start, end = bisect.bisect_left(timestamps, value), count
+        elif operator == "<":
+            start, end = 0, bisect.bisect_left(timestamps, value)
+        elif operator == "<=":
+            start, end = 0, bisect.bisect_right(timestamps, value)
+        else:
+            start = bisect.bisect_left(timestamps, value)
+            end = bisect.bisect_right(timestamps, value)
+
+        rows = self._array("I", offset + count * timestamps.itemsize + start * 4,
+                           end - start)
+
+        return set(rows)
+
+    def candidates(self, condition):
+        """
+        Get the file rows which may match a file condition from indexes.
+
+        Arguments:
+            condition (QueryCondition): File condition.
+
+        Returns:
+            set: File rows or None if condition can not use an index.
+        """
+        if len(condition.field) != 1:
+            return None
+
+        name = condition.field[0]
+        if name in QUERY_INDEXED_FIELDS and condition.operator == "=":
+            return set(self.rows(name, condition.value))
+        if name == "size" and condition.operator in ("=", ">", ">=", "<", "<="):
+            return self.size_rows(condition.operator, condition.value)
+        if name == "mtime" and condition.operator in ("=", ">", ">=", "<", "<="):
+            return self.mtime_rows(condition.operator, condition.value)
+
+        return None
+
+
+class RegistryQuery:
+    """
+    Find directories and media files from a registry matching conditions.
+
+    File conditions use the query indexes to get candidate files, every condition is
+    then checked on payloads of candidate directories only. A directory matches when
+    it matches all directory conditions and, if there are file conditions, when it
+    has media files matching all of them.
+
+    Arguments:
+        registry (deovi.collector.registry.Registry): Registry to query.
+        conditions (list): ``QueryCondition`` objects.
+
+    Keyword Arguments:
+        index (QueryIndex): Query index. Default to None so candidates are all the
+            directories.
+    """
+    def __init__(self, registry, conditions, index=None):
+        self.registry = registry
+        self.index = index
+        self.directory_conditions = [
+            item for item in conditions if item.scope == "dir"
+        ]
+        self.file_conditions = [
+            item for item in conditions if item.scope == "file"
+        ]
+        self.count_conditions = [
+            item for item in conditions if item.scope == "files"
+        ]
+
+    def candidate_directories(self):
+        """
+        Find candidate directories from indexes.
+
+        Returns:
+            dict: Candidate file rows indexed on directory row, or None when all
+            directories are candidates.
+        """
+        if self.index is None:
+            return None
+
+        rows = None
+        for condition in self.file_conditions:
+            candidates = self.index.candidates(condition)
+            if candidates is None:
+                continue
+            rows = candidates if rows is None else rows & candidates
+
+        if rows is None:
+            return None
+
+        directories = {}
+        cache = self.registry.cache
+        for row in sorted(rows):
+            directories.setdefault(cache.file_row(row)[0], []).append(row)
+
+        return directories
+
+    def run(self):
+        """
+        Run query.
+
+        Yields:
+            tuple: Directory key, directory payload and the list of its matching
+            media file payloads (every media file when there are no file
+            conditions).
+        """
+        cache = self.registry.cache
+        candidates = self.candidate_directories()
+        rows = range(len(cache)) if candidates is None else candidates.keys()
+
+        for row in rows:
+            payload = cache.payload(row)
+            if not all([item.match(payload) for item in self.directory_conditions]):
+                continue
+
+            children = payload.get("children_files", [])
+            if candidates is not None:
+                start = cache.directory_row(row)[5]
+                children = [children[item - start] for item in candidates[row]]
+
+            files = [
+                item for item in children
+                if all([condition.match(item) for condition in self.file_conditions])
+            ]
+            if self.file_conditions and not files:
+                continue
+            if not all([item.compare(len(files)) for item in self.count_conditions]):
+                continue
+
+            yield cache.key(row), payload, files
@@ -0,0 +1,433 @@
+import codecs
+import datetime
+import json
+import lzma
+import mmap
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+from ..exceptions import CollectorError
+from .cache import RegistryCache, RegistryCacheWriter
+from .dump import compressed_file, detect_compression
+
+
+# Index file name suffix appended to dump file name
+REGISTRY_INDEX_SUFFIX = ".idx"
+
+# A JSON string or a bracket
+JSON_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\]]')
+
+# Size in bytes of the first chunk to decode a value from
+DECODE_CHUNK_SIZE = 4 * 1024
+
+
+def registry_index_path(path):
+    """
+    Get the sidecar index file path for a dump.
+
+    Arguments:
+        path (pathlib.Path): Dump file path.
+
+    Returns:
+        pathlib.Path: Dump file path with ``REGISTRY_INDEX_SUFFIX`` appended, like
+        ``plop.json.idx`` for ``plop.json``.
+    """
+    return path.with_name(path.name + REGISTRY_INDEX_SUFFIX)
+
+
+def decode_value(buffer, start, decoder=None):
+    """
+    Decode a JSON object or array from a position.
+
+    Value is decoded from a chunk which is doubled until it holds the whole value.
+
+    Arguments:
+        buffer (mmap.mmap or bytes): Dump content.
+        start (integer): Position of value first character.
+
+    Keyword Arguments:
+        decoder (json.JSONDecoder): Decoder to use.
+
+    Raises:
+        CollectorError: If value is invalid.
+
+    Returns:
+        tuple: Decoded value and position after its last character.
+    """
+    decoder = decoder or json.JSONDecoder()
+    size = DECODE_CHUNK_SIZE
+
+    while True:
+        chunk = buffer[start:start + size]
+        # Incremental decoder keeps a character truncated at the end of chunk
+        text = codecs.getincrementaldecoder("utf-8")().decode(chunk, final=False)
+        try:
+            value, end = decoder.raw_decode(text)
+        except json.JSONDecodeError as e:
+            if start + size >= len(buffer):
+                raise CollectorError("Invalid dump: {}".format(e))
+            size *= 2
+            continue
+
+        if not chunk.isascii():
+            end = len(text[:end].encode("utf-8"))
+
+        return value, start + end
+
+
+def scan_dump(buffer):
+    """
+    Decode every registry directory and other root items from a JSON dump with their
+    position.
+
+    Only the root object and the registry object are scanned token by token, each
+    directory payload is decoded at once.
+
+    Arguments:
+        buffer (mmap.mmap or bytes): Dump content.
+
+    Raises:
+        CollectorError: If dump structure is invalid.
+
+    Yields:
+        tuple: Name, start and end positions and decoded value. Names of registry
+        directories are prefixed with ``registry:`` and the ones of other root items
+        with ``root:``. Root items which are not an object or an array are ignored.
+    """
+    decoder = json.JSONDecoder()
+    depth = 0
+    name = None
+    in_registry = False
+    position = 0
+
+    while True:
+        match = JSON_TOKEN.search(buffer, position)
+        if match is None:
+            break
+        token = match.group(0)
+        position = match.end()
+
+        if token[:1] == b'"':
+            # Member names from root object and from registry object
+            if depth == 1 or (depth == 2 and in_registry):
+                name = json.loads(token)
+        elif token in (b"{", b"["):
+            if depth == 1 and name == "registry" and token == b"{":
+                depth = 2
+                in_registry = True
+            elif depth == 0:
+                depth = 1
+            else:
+                prefix = "registry:" if in_registry else "root:"
+                value, position = decode_value(buffer, match.start(), decoder)
+                yield prefix + name, match.start(), position, value
+        else:
+            depth -= 1
+            in_registry = False
+            if depth < 0:
+                raise CollectorError("Invalid dump, unbalanced brackets")
+
+    if depth != 0:
+        raise CollectorError("Invalid dump, unbalanced brackets")
+
+
+def to_timestamp(value):
+    """
+    Convert a datetime or a timestamp to a timestamp.
+    """
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+
+    return value
+
+
+class Registry:
+    """
+    Lazy dictionnary-like access to the registry from a JSON dump.
+
+    Dump file is mapped in memory and a directory payload is only decoded when it is
+    accessed. A sidecar index with the position of each directory in dump, their
+    keys sorted for lookups and file columns for filters is built on first usage
+    then loaded from file. Index is built again when the dump has changed.
+
+    A compressed dump can not be mapped, it is decompressed to a temporary file which
+    is mapped instead and removed on ``close``. Index is still built once and
+    positions are relative to the decompressed content.
+
+    Registry behaves like a read only dictionnary of directory payloads indexed on
+    their key, in the same order as in dump: ::
+
+        with Registry("plop.json") as registry:
+            payload = registry["Shows/Foo/S01"]
+
+    Arguments:
+        path (pathlib.Path): Dump file path.
+
+    Keyword Arguments:
+        index (pathlib.Path): Index file path. Default to the dump file path with
+            ``REGISTRY_INDEX_SUFFIX``.
+        rebuild (boolean): If True, index is always built again.
+
+    Raises:
+        CollectorError: If dump is not a valid JSON dump.
+    """
+    def __init__(self, path, index=None, rebuild=False):
+        self.path = Path(path)
+        self.index_path = Path(index) if index else registry_index_path(self.path)
+        self.cache = None
+
+        self._fp = self.open_dump()
+        try:
+            self.buffer = mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._fp.close()
+            raise CollectorError("Invalid dump: {}".format(str(self.path)))
+
+        try:
+            self.load_index(rebuild=rebuild)
+        except Exception:
+            self.close()
+            raise
+
+    def open_dump(self):
+        """
+        Open dump file to map, a compressed dump is decompressed to a temporary file.
+
+        Raises:
+            CollectorError: If compressed dump can not be decompressed.
+
+        Returns:
+            file object: File object opened in binary mode.
+        """
+        compression = detect_compression(self.path)
+        if compression is None:
+            return self.path.open("rb")
+
+        fp = tempfile.TemporaryFile()
+        try:
+            with self.path.open("rb") as source:
+                with compressed_file(source, compression, mode="rb") as decompressed:
+                    shutil.copyfileobj(decompressed, fp)
+        except (OSError, EOFError, lzma.LZMAError) as e:
+            fp.close()
+            raise CollectorError("Invalid compressed dump: {}".format(e))
+        fp.flush()
+
+        return fp
+
+    def dump_signature(self):
+        """
+        Signature of dump file to know if an index is still valid.
+
+        Returns:
+            dict: Dump file size and modification time in nanoseconds. For a
+            compressed dump, this is about the compressed file.
+        """
+        stat = self.path.stat()
+
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def build_index(self):
+        """
+        Build the index file from dump.
+
+        Index is written to a temporary file then moved to its final path, so an
+        index is always complete.
+        """
+        writer = RegistryCacheWriter(external=True)
+        meta = {"dump": self.dump_signature()}
+
+        for name, start, end, value in scan_dump(self.buffer):
+            kind, _, key = name.partition(":")
+            if kind == "registry":
+                writer.add(key, value, span=(start, end))
+            elif key == "device":
+                meta["device"] = value
+
+        temporary = self.index_path.with_name(self.index_path.name + ".tmp")
+        with temporary.open("wb") as fp:
+            writer.write(fp, meta=meta)
+        os.replace(temporary, self.index_path)
+
+    def load_index(self, rebuild=False):
+        """
+        Load index file, it is built if it does not exist yet or if dump has
+        changed.
+
+        Keyword Arguments:
+            rebuild (boolean): If True, index is always built again.
+        """
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+
+        if not rebuild and self.index_path.exists():
+            try:
+                cache = RegistryCache(self.index_path, payloads=self.buffer)
+            except CollectorError:
+                cache = None
+
+            if cache is not None and (
+                cache.meta.get("dump") == self.dump_signature()
+            ):
+                self.cache = cache
+                return
+
+            if cache is not None:
+                cache.close()
+
+        self.build_index()
+        self.cache = RegistryCache(self.index_path, payloads=self.buffer)
+
+    def close(self):
+        """
+        Release index, memory mapping and file.
+        """
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def device(self):
+        """
+        Device informations from dump.
+        """
+        return self.cache.device
+
+    def __len__(self):
+        return len(self.cache)
+
+    def __contains__(self, key):
+        return key in self.cache
+
+    def __getitem__(self, key):
+        return self.cache[key]
+
+    def get(self, key, default=None):
+        return self.cache.get(key, default)
+
+    def __iter__(self):
+        return self.cache.keys()
+
+    def keys(self):
+        """
+        Iterate over directory keys without decoding any payload.
+
+        Yields:
+            string: Directory key.
+        """
+        return self.cache.keys()
+
+    def values(self):
+        """
+        Iterate over directory payloads.
+
+        Yields:
+            dict: Directory payload.
+        """
+        return self.cache.values()
+
+    def items(self):
+        """
+        Iterate over directories.
+
+        Yields:
+            tuple: Directory key and payload.
+        """
+        return self.cache.items()
+
+    def _matches(self, extension=None, min_size=None, max_size=None, after=None,
+                 before=None):
+        """
+        Iterate over file rows from index matching all given filters.
+        """
+        if isinstance(extension, str):
+            extension = [extension]
+        extensions = set(extension) if extension is not None else None
+        after = to_timestamp(after)
+        before = to_timestamp(before)
+
+        # Extensions are checked on their string identifier
+        matching_extensions = {}
+
+        for row, name_sid, extension_sid, size, mtime in self.cache.file_rows():
+            if extensions is not None:
+                if extension_sid not in matching_extensions:
+                    matching_extensions[extension_sid] = (
+                        self.cache.string(extension_sid) in extensions
+                    )
+                if not matching_extensions[extension_sid]:
+                    continue
+            if (
+                (min_size is not None and size < min_size) or
+                (max_size is not None and size > max_size) or
+                (after is not None and mtime < after) or
+                (before is not None and mtime >= before)
+            ):
+                continue
+
+            yield row, name_sid
+
+    def files(self, **filters):
+        """
+        Iterate over media files matching all given filters.
+
+        Filters are applied on the index columns, only the payloads of directories
+        with matching files are decoded.
+
+        Keyword Arguments:
+            extension (string or list): File extension or a list of extensions
+                (without leading dot).
+            min_size (integer): Minimum file size in bytes.
+            max_size (integer): Maximum file size in bytes.
+            after (datetime.datetime or float): Only files modified since this
+                datetime or timestamp.
+            before (datetime.datetime or float): Only files modified before this
+                datetime or timestamp.
+
+        Yields:
+            tuple: Directory key and file payload.
+        """
+        current, key, files = None, None, None
+        for row, name_sid in self._matches(**filters):
+            if row != current:
+                current = row
+                key = self.cache.key(row)
+                files = {
+                    item["name"]: item
+                    for item in self.cache.payload(row).get("children_files", [])
+                }
+
+            yield key, files[self.cache.string(name_sid)]
+
+    def filter(self, **filters):
+        """
+        Iterate over directories with at least one media file matching all given
+        filters.
+
+        Keyword Arguments:
+            **filters: Filters as accepted by ``files``.
+
+        Yields:
+            tuple: Directory key and payload.
+        """
+        current = None
+        for row, _ in self._matches(**filters):
+            if row != current:
+                current = row
+                yield self.cache.key(row), self.cache.payload(row)
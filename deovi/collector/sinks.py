@@ -0,0 +1,245 @@
+import io
+import time
+from pathlib import Path
+
+from ..exceptions import CollectorError
+from .dump import compressed_file
+
+
+class OutputSink:
+    """
+    Base output sink fed by collector during ``run``.
+
+    A sink is begun before the scan, it receives every stored directory in walk
+    order then it is ended once collection is done. This allows a single scan to
+    write any number of outputs.
+
+    Arguments:
+        path (pathlib.Path): Output file path.
+    """
+    format_name = None
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.collector = None
+        self.device = None
+
+    def __str__(self):
+        return "{}:{}".format(self.format_name, self.path)
+
+    def begin(self, collector, device):
+        """
+        Start output before scan.
+
+        Arguments:
+            collector (deovi.collector.collect.Collector): Collector which feeds the
+                sink.
+            device (dict): Device informations as returned from
+                ``Collector.scan_basepath_device``.
+        """
+        self.collector = collector
+        self.device = device
+
+    def directory(self, key, payload):
+        """
+        Receive a stored directory.
+
+        Arguments:
+            key (string): Directory registry key.
+            payload (dict): Directory payload as stored in registry.
+        """
+        pass
+
+    def end(self):
+        """
+        Finish output once collection is done.
+
+        Returns:
+            boolean: True if output has been written.
+        """
+        self.close()
+
+        return True
+
+    def close(self):
+        """
+        Release any opened resource, it is called on ``end`` and once collection is
+        over even if it has failed. It may be called many times.
+        """
+        pass
+
+
+class JsonSink(OutputSink):
+    """
+    Write the registry to a JSON dump like the collector dump.
+
+    Dump is written at once on ``end`` with ``Collector.write_dump`` since the JSON
+    structure holds the device informations before the registry. Like the collector
+    dump, nothing is written if registry is empty.
+    """
+    format_name = "json"
+
+    def end(self):
+        if not self.collector.registry:
+            super().end()
+            return False
+
+        self.collector.write_dump(self.path, self.device)
+
+        return super().end()
+
+
+class NdjsonSink(OutputSink):
+    """
+    Write the registry to a NDJSON file while directories are stored.
+
+    First line is a header with the collection basepath and device informations, then
+    each directory is written on its own line with its ``key`` and its payload in
+    ``data`` as soon as it is stored. This can be read with
+    ``deovi.collector.dump.DumpReader`` and by the commands which accept NDJSON dumps.
+
+    Lines are written to a temporary file next to the output which replaces the
+    output on ``end``, so a failed collection does not leave a partial output.
+    """
+    format_name = "ndjson"
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.fp = None
+        self.temporary = None
+        self._raw = None
+
+    def begin(self, collector, device):
+        super().begin(collector, device)
+
+        self.temporary = self.path.with_name(self.path.name + ".tmp")
+
+        compression = collector.get_compression(self.path)
+        if compression is None:
+            self.fp = collector.fs_op.open(self.temporary, "w")
+        else:
+            self._raw = collector.fs_op.open(self.temporary, "wb")
+            self.fp = io.TextIOWrapper(
+                compressed_file(self._raw, compression, mode="wb"), encoding="utf-8"
+            )
+
+        self.write({
+            "basepath": str(collector.basepath),
+            "device": device,
+        })
+
+    def write(self, content):
+        """
+        Write a line.
+
+        Arguments:
+            content (dict): Line content.
+        """
+        self.fp.write(self.collector.serializer.dumps(content) + "\n")
+
+    def directory(self, key, payload):
+        self.write({
+            "key": key,
+            "data": payload,
+        })
+
+    def release(self):
+        """
+        Close opened files.
+        """
+        if self.fp is not None:
+            self.fp.close()
+            self.fp = None
+        if self._raw is not None:
+            self._raw.close()
+            self._raw = None
+
+    def end(self):
+        self.release()
+        self.collector.fs_op.rename(self.temporary, self.path)
+        self.temporary = None
+
+        return True
+
+    def close(self):
+        self.release()
+        # Output has not been ended so temporary file is a partial output
+        if self.temporary is not None:
+            self.collector.fs_op.unlink(self.temporary)
+            self.temporary = None
+
+
+class StatsSink(OutputSink):
+    """
+    Write collection statistics to a JSON file, like for monitoring.
+
+    Statistics hold the collector statistics, device informations, the elapsed time
+    and the number of media files with their total size for each extension.
+    """
+    format_name = "stats"
+
+    def begin(self, collector, device):
+        super().begin(collector, device)
+        self.start = time.perf_counter()
+        self.extensions = {}
+
+    def directory(self, key, payload):
+        for item in payload.get("children_files", []):
+            extension = self.extensions.setdefault(
+                item.get("extension", ""), {"files": 0, "size": 0}
+            )
+            extension["files"] += 1
+            extension["size"] += item.get("size", 0)
+
+    def end(self):
+        content = {
+            "basepath": str(self.collector.basepath),
+            "device": self.device,
+            "elapsed": time.perf_counter() - self.start,
+            "stats": self.collector.stats,
+            "extensions": dict(sorted(self.extensions.items())),
+        }
+
+        with self.collector.fs_op.open(self.path, "w") as fp:
+            self.collector.serializer.dump(content, fp, indent=4)
+
+        return super().end()
+
+
+# Available output sinks indexed on their format name
+OUTPUT_SINKS = {
+    JsonSink.format_name: JsonSink,
+    NdjsonSink.format_name: NdjsonSink,
+    StatsSink.format_name: StatsSink,
+}
+
+
+def parse_output(value):
+    """
+    Build an output sink from an output definition.
+
+    Arguments:
+        value (string): Output definition like ``FORMAT:PATH`` where format is a
+            name from ``OUTPUT_SINKS``.
+
+    Raises:
+        CollectorError: If definition is invalid or format is unknown.
+
+    Returns:
+        OutputSink: Sink for the output format.
+    """
+    format_name, separator, path = value.partition(":")
+
+    if not separator or not path:
+        raise CollectorError(
+            "Invalid output, it must be like 'FORMAT:PATH': {}".format(value)
+        )
+
+    if format_name not in OUTPUT_SINKS:
+        raise CollectorError(
+            "Unknown output format '{}', available formats are: {}".format(
+                format_name, ", ".join(OUTPUT_SINKS)
+            )
+        )
+
+    return OUTPUT_SINKS[format_name](path)
@@ -1,10 +1,12 @@
 import datetime
-import shutil
 import uuid
 from pathlib import Path
 
 from ..renamer.printer import PrinterInterface
 from ..utils.checksum import ChecksumOperator
+from ..utils.filesystem import FilesystemOperator
+from ..utils.instrumentation import PhaseRecorder
+from ..utils.tracing import get_tracer
 
 
 class AssetStorage(PrinterInterface):
@@ -25,14 +27,19 @@ class AssetStorage(PrinterInterface):
             to False, asset storage paths won't any checksum included in their name.
         allowed_cover_filenames (list): List of filenames elligible as a directory
             cover file.
+        recorder (deovi.utils.instrumentation.PhaseRecorder): Recorder to report
+            copied bytes to. Default to a disabled recorder.
     """
     # Name used when given basepath is an empty Path
     DEFAULT_BASE_PATH = "attachment"
 
-    def __init__(self, basepath=None, checksum=False, allowed_cover_filenames=None):
+    def __init__(self, basepath=None, checksum=False, allowed_cover_filenames=None,
+                 recorder=None):
         super().__init__()
 
-        self.checksum_op = ChecksumOperator()
+        self.recorder = recorder or PhaseRecorder(enabled=False)
+        self.fs_op = FilesystemOperator(recorder=self.recorder)
+        self.checksum_op = ChecksumOperator(recorder=self.recorder)
 
         self.set_basepath(basepath, checksum=checksum)
 
@@ -104,7 +111,7 @@ class AssetStorage(PrinterInterface):
         # Merge path stem with suffix
         return Path("{}_{}".format(filepath.stem, suffix))
 
-    def get_directory_asset(self, path, filename_patterns):
+    def get_directory_asset(self, path, filename_patterns, available=None):
         """
         Search for an asset file from given path.
 
@@ -117,6 +124,10 @@ class AssetStorage(PrinterInterface):
             filename_patterns (list): A list of strings for asset filenames to search
                 in directory.
 
+        Keyword Arguments:
+            available (set): File names known to exist in directory. If given, it is
+                used to know if an asset file exists instead of checking on filesystem.
+
         Returns:
             tuple: A tuple of two items ``(source, destination)`` where 'source' is the
                 source cover file (Path object) resolved to an absolute path
@@ -127,9 +138,14 @@ class AssetStorage(PrinterInterface):
         for filename in filename_patterns:
             filepath = path / filename
 
-            if filepath.exists():
+            if available is not None:
+                exists = filename in available
+            else:
+                exists = self.fs_op.exists(filepath)
+
+            if exists:
                 return (
-                    filepath.resolve(),
+                    self.fs_op.resolve(filepath),
                     self.storage_assets / Path(
                         "".join([str(uuid.uuid4()), filepath.suffix])
                     ),
@@ -137,7 +153,7 @@ class AssetStorage(PrinterInterface):
 
         return None
 
-    def get_directory_cover(self, path):
+    def get_directory_cover(self, path, available=None):
         """
         Shortand around ``get_directory_asset`` to check for cover filenames.
 
@@ -145,14 +161,55 @@ class AssetStorage(PrinterInterface):
             path (pathlib.Path): A Path object for the directory where to find
                 cover image file.
 
+        Keyword Arguments:
+            available (set): File names known to exist in directory.
+
         Returns:
             tuple: A tuple with the format as from ``get_directory_asset`` returns.
         """
         return self.get_directory_asset(
             path,
             self.allowed_cover_filenames,
+            available=available,
         )
 
+    def is_stored(self, source, destination):
+        """
+        Check if an asset is already stored from its current source file.
+
+        A stored copy is assumed to be up to date if it has the same size than its
+        source and it has not been modified before it.
+
+        Arguments:
+            source (pathlib.Path): Asset source file path.
+            destination (pathlib.Path): Asset destination path relative to storage
+                path.
+
+        Returns:
+            boolean: True if asset does not need to be copied again.
+        """
+        stored = self.storage_path / destination
+        if not self.fs_op.exists(stored) or not self.fs_op.exists(source):
+            return False
+
+        source_stats = self.fs_op.stat(source)
+        stored_stats = self.fs_op.stat(stored)
+
+        return (
+            source_stats.st_size == stored_stats.st_size and
+            source_stats.st_mtime_ns <= stored_stats.st_mtime_ns
+        )
+
+    def remove_asset(self, destination):
+        """
+        Remove a stored asset file.
+
+        Arguments:
+            destination (pathlib.Path): Asset destination path relative to storage
+                path.
+        """
+        self.fs_op.unlink(self.storage_path / destination)
+
     def store_assets(self, assets):
         """
         Store all given assets files into the assets directory.
@@ -172,20 +229,29 @@ class AssetStorage(PrinterInterface):
         stored = []
 
         if len(assets) > 0:
-            container = self.storage_path / self.storage_assets
-
-            if not container.exists():
-                container.mkdir(parents=True, exist_ok=True)
-
-            for source, destination in assets:
-                if not source.exists():
-                    msg = "File to store does not exists from your filesystem: {}"
-                    self.log_warning(msg.format(source))
-
-                # Destination path should be a relative path (from base) which already
-                # include the assets directory
-                shutil.copy(source, self.storage_path / destination)
-                stored.append(self.storage_path / destination)
+            with self.recorder.phase("assets", items=len(assets)):
+                container = self.storage_path / self.storage_assets
+
+                if not self.fs_op.exists(container):
+                    self.fs_op.mkdir(container)
+
+                for source, destination in assets:
+                    if not self.fs_op.exists(source):
+                        msg = "File to store does not exists from your filesystem: {}"
+                        self.log_warning(msg.format(source))
+
+                    # Destination path should be a relative path (from base) which
+                    # already include the assets directory
+                    with get_tracer().span("copy", category="assets", file=source):
+                        self.fs_op.copy(source, self.storage_path / destination)
+                    stored.append(self.storage_path / destination)
+
+                    if self.recorder.enabled:
+                        self.recorder.add_bytes(
+                            written=self.fs_op.stat(
+                                self.storage_path / destination
+                            ).st_size
+                        )
 
         return (
             container,
@@ -0,0 +1,418 @@
+import os
+import threading
+from pathlib import Path
+
+from ..renamer.printer import PrinterInterface
+from ..utils.inotify import (
+    IN_CREATE, IN_DELETE, IN_DELETE_SELF, IN_IGNORED, IN_MOVE_SELF, IN_MOVED_FROM,
+    IN_MOVED_TO, IN_Q_OVERFLOW, Inotify,
+)
+from .cache import registry_cache_path
+
+
+# Default time in seconds without any event before changes are collected
+DEFAULT_DEBOUNCE = 2.0
+
+
+class CollectorWatcher(PrinterInterface):
+    """
+    Keep a collector registry and its dump up to date with directory changes.
+
+    After an initial collection, every walked directory is watched with inotify.
+    Changes are accumulated until there is no event for the debounce time, then only
+    the changed directories are scanned again (with their manifest, cover and checksum)
+    and the dump is written again.
+
+    A directory collected again keeps the stored cover from its previous payload, so
+    the cover is only copied again if its source has changed. Stored covers from
+    removed directories are removed and collector statistics are kept for the current
+    registry.
+
+    This is only available on Linux.
+
+    Arguments:
+        collector (deovi.collector.Collector): Collector to keep up to date, it is
+            used for the initial collection.
+        destination (pathlib.Path): Dump file path.
+
+    Keyword Arguments:
+        checksum (boolean): Whether to enable directory checksums or not.
+        debounce (float): Time in seconds without any event before changes are
+            collected.
+    """
+    def __init__(self, collector, destination, checksum=False,
+                 debounce=DEFAULT_DEBOUNCE):
+        super().__init__()
+
+        self.collector = collector
+        self.collector.watcher = self
+        self.destination = destination
+        self.checksum = checksum
+        self.debounce = debounce
+        self.inotify = None
+        self.device = None
+        self.stopping = threading.Event()
+        # Watched directories from watch descriptors and the reverse
+        self.watches = {}
+        self.watched = {}
+        self.lock = threading.Lock()
+        self.reset_changes()
+
+    def reset_changes(self):
+        """
+        Forget accumulated changes.
+        """
+        # Directories to scan again
+        self.dirty = set()
+        # New directories to walk recursively
+        self.created = set()
+        # Directories removed with all their children
+        self.removed = set()
+        # Events have been lost so everything must be collected again
+        self.overflow = False
+        # Registry keys collected since changes have been reset
+        self.collected = set()
+
+    @property
+    def pending(self):
+        """
+        Whether there are accumulated changes or not.
+        """
+        return bool(self.dirty or self.created or self.removed or self.overflow)
+
+    def watch(self, path):
+        """
+        Watch a directory, this is called from collector for each walked directory.
+
+        Arguments:
+            path (pathlib.Path): Directory path.
+        """
+        if self.inotify is None:
+            return
+
+        try:
+            wd = self.inotify.add_watch(path)
+        except OSError as e:
+            self.log_warning("Unable to watch directory {}: {}".format(
+                str(path), e.strerror
+            ))
+            return
+
+        with self.lock:
+            self.watches[wd] = path
+            self.watched[path] = wd
+
+    def unwatch_tree(self, path):
+        """
+        Stop watching a directory and all its children.
+
+        Arguments:
+            path (pathlib.Path): Directory path.
+        """
+        with self.lock:
+            paths = [
+                item for item in self.watched
+                if item == path or path in item.parents
+            ]
+            for item in paths:
+                wd = self.watched.pop(item)
+                self.watches.pop(wd, None)
+                self.inotify.rm_watch(wd)
+
+    def start(self):
+        """
+        Perform the initial collection and watch every walked directory.
+
+        Returns:
+            dict: Collector statistics from initial collection.
+        """
+        self.inotify = Inotify()
+        self.device = self.collector.fs_op.stat(self.collector.basepath).st_dev
+
+        stats = self.collector.run(
+            destination=self.destination,
+            checksum=self.checksum,
+        )
+        # Initial assets have already been stored
+        self.collector.file_storage_queue = []
+
+        return stats
+
+    def handle(self, event):
+        """
+        Accumulate changes from an event.
+
+        Arguments:
+            event (deovi.utils.inotify.InotifyEvent): Event to handle.
+        """
+        if event.mask & IN_Q_OVERFLOW:
+            self.log_warning("Events have been lost, everything will be collected")
+            self.overflow = True
+            return
+
+        with self.lock:
+            path = self.watches.get(event.wd)
+            if event.mask & IN_IGNORED:
+                if path is not None:
+                    self.watches.pop(event.wd)
+                    if self.watched.get(path) == event.wd:
+                        self.watched.pop(path)
+                return
+
+        if path is None:
+            return
+
+        if event.mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+            self.removed.add(path)
+            return
+
+        if event.name and event.is_dir:
+            child = path / event.name
+            if event.mask & (IN_CREATE | IN_MOVED_TO):
+                self.created.add(child)
+            elif event.mask & (IN_DELETE | IN_MOVED_FROM):
+                self.removed.add(child)
+
+        self.dirty.add(path)
+
+    def poll(self, timeout=None):
+        """
+        Wait for events and accumulate their changes.
+
+        Keyword Arguments:
+            timeout (float): Time in seconds to wait for events. Default to None to
+                wait until there are events.
+
+        Returns:
+            integer: Number of handled events.
+        """
+        events = self.inotify.read(timeout=timeout)
+        for event in events:
+            self.handle(event)
+
+        return len(events)
+
+    def discount(self, payload):
+        """
+        Subtract a registry directory from collector statistics.
+
+        Arguments:
+            payload (dict): Directory payload from registry.
+        """
+        stats = self.collector.stats
+        files = payload.get("children_files", [])
+
+        stats["directories"] -= 1
+        stats["files"] -= len(files)
+        stats["size"] -= payload["size"] + sum([item["size"] for item in files])
+
+    def forget(self, key):
+        """
+        Remove a directory from registry with its stored cover and its statistics.
+
+        Arguments:
+            key (string): Directory registry key.
+        """
+        payload = self.collector.registry.pop(key, None)
+        if payload is None:
+            return
+
+        self.discount(payload)
+        if payload.get("cover"):
+            self.collector.storage.remove_asset(Path(payload["cover"]))
+        self.log_debug("Removed {}".format(key))
+
+    def remove_tree(self, path):
+        """
+        Remove a directory and all its children from registry.
+
+        Arguments:
+            path (pathlib.Path): Directory path.
+        """
+        key = str(path.relative_to(self.collector.basepath))
+        prefix = "" if key == "." else key + "/"
+
+        for name in list(self.collector.registry.keys()):
+            if name == key or name.startswith(prefix):
+                self.forget(name)
+
+        self.unwatch_tree(path)
+
+    def keep_cover(self, data, previous):
+        """
+        Reuse the stored cover of a directory collected again.
+
+        Cover destination from previous payload is kept if the new cover has the same
+        file extension, so the stored cover is replaced and not duplicated. Else the
+        previous stored cover is removed.
+
+        Arguments:
+            data (dict): Directory payload as built from ``enrich_directory``.
+            previous (dict): Previous directory payload from registry.
+        """
+        if not previous.get("cover"):
+            return
+
+        destination = Path(previous["cover"])
+        cover = data.get("cover")
+
+        if cover and cover[1].suffix == destination.suffix:
+            data["cover"] = (cover[0], destination)
+        else:
+            self.collector.storage.remove_asset(destination)
+
+    def collect_item(self, item):
+        """
+        Enrich and store a walked directory or remove it from registry if it is not
+        elligible anymore.
+
+        Arguments:
+            item (dict): Walked directory item.
+        """
+        data = item["data"]
+        key = str(data["relative_dir"])
+
+        if not item["collected"]:
+            self.forget(key)
+            return
+
+        self.collected.add(key)
+
+        # Walk has already counted the directory again
+        previous = self.collector.registry.get(key)
+        if previous is not None:
+            self.discount(previous)
+
+        self.collector.enrich_directory(data, available=item["available"])
+        if previous is not None:
+            self.keep_cover(data, previous)
+        if self.checksum:
+            self.collector.checksum_directory(data)
+        self.collector.store(data)
+        self.log_debug("Collected {}".format(key))
+
+    def scan(self, path, recursive=True):
+        """
+        Walk and collect a directory.
+
+        Arguments:
+            path (pathlib.Path): Directory path.
+
+        Keyword Arguments:
+            recursive (boolean): If True, children directories are walked also. Else
+                only the new children directories which are not watched yet are
+                walked.
+        """
+        # Directories are tracked only during a walk to avoid loops
+        self.collector.visited_directories = set()
+
+        for item in self.collector.walk_directory(
+            path,
+            scopes=self.collector.directory_scopes(path),
+            device=self.device,
+            recursive=recursive,
+        ):
+            self.collect_item(item)
+
+            if not recursive:
+                for child in item["subdirectories"]:
+                    if child not in self.watched:
+                        self.scan(child)
+
+    def flush(self):
+        """
+        Collect accumulated changes and write the dump again.
+        """
+        basepath = self.collector.basepath
+
+        if self.overflow:
+            self.reset_changes()
+            self.unwatch_tree(basepath)
+            self.scan(basepath)
+
+            for key in list(self.collector.registry.keys()):
+                if key not in self.collected:
+                    self.forget(key)
+        else:
+            removed, created, dirty = self.removed, self.created, self.dirty
+            self.reset_changes()
+
+            for path in sorted(removed):
+                self.remove_tree(path)
+
+            scanned = []
+            for path in sorted(created):
+                if path.is_dir() and not any([
+                    path == item or item in path.parents
+                    for item in scanned
+                ]):
+                    self.scan(path)
+                    scanned.append(path)
+
+            for path in sorted(dirty):
+                if any([path == item or item in path.parents for item in scanned]):
+                    continue
+                if path.is_dir():
+                    self.scan(path, recursive=False)
+                else:
+                    self.remove_tree(path)
+
+        self.write()
+
+    def write(self):
+        """
+        Store queued assets and write the dump with an atomic replacement.
+
+        Assets already stored from an unchanged source are not copied again.
+        """
+        storage = self.collector.storage
+        storage.store_assets([
+            (source, destination)
+            for source, destination in self.collector.file_storage_queue
+            if not storage.is_stored(source, destination)
+        ])
+        self.collector.file_storage_queue = []
+
+        device = self.collector.scan_basepath_device(self.collector.basepath)
+
+        temporary = self.destination.with_name(self.destination.name + ".tmp")
+        self.collector.write_dump(
+            temporary,
+            device,
+            compression=self.collector.get_compression(self.destination),
+        )
+        os.replace(temporary, self.destination)
+        self.log_info("Registry saved to: {}".format(str(self.destination)))
+
+        if self.collector.registry_cache:
+            cache_destination = registry_cache_path(self.destination)
+            temporary = cache_destination.with_name(cache_destination.name + ".tmp")
+            self.collector.write_registry_cache(temporary, device)
+            os.replace(temporary, cache_destination)
+
+    def run(self):
+        """
+        Watch changes until ``stop`` is called.
+
+        Changes are collected once there has been no event for the debounce time.
+        """
+        while not self.stopping.is_set():
+            # Wake up regularly to check for stopping
+            handled = self.poll(timeout=self.debounce if self.pending else 1.0)
+            if not handled and self.pending:
+                self.flush()
+
+    def stop(self):
+        """
+        Stop watching.
+        """
+        self.stopping.set()
+
+    def close(self):
+        """
+        Release inotify instance.
+        """
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+        self.collector.watcher = None
@@ -4,9 +4,12 @@ from pathlib import Path
 from slugify import slugify
 
 from ..exceptions import JobValidationError
+from ..utils.filesystem import FilesystemOperator
+from ..utils.instrumentation import PhaseRecorder
+from ..utils.tracing import get_tracer
 
 from .printer import PrinterInterface
-from .validators import is_allowed_file
+from .validators import is_allowed_extension
 
 
 class Job(PrinterInterface):
@@ -24,6 +27,9 @@ class Job(PrinterInterface):
         extensions (list): List of file extensions to filter files. If empty, all file
             extensions are allowed.
         reverse (boolean): Enable reversion of file names when performing tasks.
+        recorder (deovi.utils.instrumentation.PhaseRecorder): Recorder to measure job
+            phases (``planning``, ``tasks`` and ``rename``). Default to a disabled
+            recorder.
     """
     DEFAULT_NAME = "Job from '{}'"
     EMPTY_JOB_MATRIX = {
@@ -35,9 +41,12 @@ class Job(PrinterInterface):
     }
 
     def __init__(self, source, basepath, name=None, tasks=None, extensions=None,
-                 reverse=False):
+                 reverse=False, recorder=None):
         super().__init__()
 
+        self.recorder = recorder or PhaseRecorder(enabled=False)
+        self.fs_op = FilesystemOperator(recorder=self.recorder)
+
         self.source = source
         self.name = name or self.DEFAULT_NAME.format(source)
         self.basepath = basepath
@@ -107,7 +116,7 @@ class Job(PrinterInterface):
         return destination
 
     @classmethod
-    def load(cls, source):
+    def load(cls, source, recorder=None):
         """
         Load Job parameters from a filepath and return a model instance.
 
@@ -117,6 +126,10 @@ class Job(PrinterInterface):
         Arguments:
             source (string or pathlib.Path): Path to the Job file to load.
 
+        Keyword Arguments:
+            recorder (deovi.utils.instrumentation.PhaseRecorder): Recorder to give to
+                Job.
+
         Returns:
             Job: Instance of model configured with job parameters.
         """
@@ -138,6 +151,7 @@ class Job(PrinterInterface):
             tasks=data["tasks"],
             extensions=data.get("extensions", None),
             reverse=data.get("reversed", False),
+            recorder=recorder,
         )
 
     def get_target_files(self):
@@ -154,9 +168,16 @@ class Job(PrinterInterface):
         msg = self.extensions or ["All"]
         self.log_info(" • Allowed file extension(s): {}".format(", ".join(msg)))
 
-        for filename in self.basepath.iterdir():
-            if is_allowed_file(filename, extensions=self.extensions):
-                files.append(filename)
+        # File type is known from directory listing and extension is checked first,
+        # so there is no filesystem operation for each entry
+        with self.recorder.phase("planning"):
+            with self.fs_op.scandir(self.basepath) as entries:
+                for entry in entries:
+                    if (
+                        is_allowed_extension(entry.name, extensions=self.extensions) and
+                        entry.is_file()
+                    ):
+                        files.append(self.basepath / entry.name)
 
         if self.sort:
             files = sorted(files)
@@ -193,6 +214,7 @@ class Job(PrinterInterface):
 
         # A list of original source filenames
         original_store = self.get_target_files()
+        self.recorder.checkpoint("planning")
         self.log_info("")
 
         # Build row indice and indentation stuff. Indentation length is computed
@@ -211,22 +233,29 @@ class Job(PrinterInterface):
                 destination = source
 
                 # Perform task to alter destination to final renamed filename
-                for name, options in self.tasks:
-                    task_method = "task_{}".format(name)
+                with self.recorder.phase("tasks"):
+                    for name, options in self.tasks:
+                        task_method = "task_{}".format(name)
 
-                    # Perform task
-                    paths = getattr(task_manager, task_method)(
-                        i,  destination, _indent=indentation, **options
-                    )
+                        # Perform task
+                        with get_tracer().span(
+                            task_method, category="tasks", file=destination.name
+                        ):
+                            paths = getattr(task_manager, task_method)(
+                                i,  destination, _indent=indentation, **options
+                            )
 
-                    # Update destination filename from returned task value
-                    destination = paths[1]
+                        # Update destination filename from returned task value
+                        destination = paths[1]
 
                 # If final destination is not the same as the original
                 if destination != source:
 
                     # Error if file already exists, no overwritting is allowed
-                    if destination.exists():
+                    with self.recorder.phase("rename"):
+                        exists = self.fs_op.exists(destination)
+
+                    if exists:
                         msg = (
                             "❗ Destination already exists and won't be overwritten: {}"
                         ).format(
@@ -254,7 +283,8 @@ class Job(PrinterInterface):
                             (source, destination)
                         )
                         # Perform renaming
-                        source.rename(destination)
+                        with self.recorder.phase("rename"):
+                            self.fs_op.rename(source, destination)
                         rename_store.add(destination)
                     # White space divider between jobs
                     self.log_info("")
@@ -278,13 +308,15 @@ class Job(PrinterInterface):
 
             # Restore renamed file to their original filenames
             for source, destination in reverse_store:
-                self.log_error("*", destination, "=>", source)
-                source.rename(destination, source)
+                self.log_error("* {} => {}".format(destination, source))
+                self.fs_op.rename(destination, source)
             self.log_error("")
 
             # Finally raise the original error
             raise
 
+        self.recorder.checkpoint("rename")
+
         return {
             "original_store": original_store,
             "rename_store": rename_store,
@@ -1,4 +1,5 @@
 from ..exceptions import JobValidationError, TaskValidationError
+from ..utils.instrumentation import PhaseRecorder
 
 from .printer import PrinterInterface
 from .jobs import Job
@@ -12,10 +13,15 @@ class JobRunner(PrinterInterface):
     Arguments:
         task_class (tasks.TaskMaster): The task manager class to instanciate for each
             Job.
+
+    Keyword Arguments:
+        recorder (deovi.utils.instrumentation.PhaseRecorder): Recorder given to every
+            Job. Default to a disabled recorder.
     """
-    def __init__(self, task_class):
+    def __init__(self, task_class, recorder=None):
         super().__init__()
 
+        self.recorder = recorder or PhaseRecorder(enabled=False)
         self.task_class = task_class
         self.task_infos = None
 
@@ -76,7 +82,7 @@ class JobRunner(PrinterInterface):
             )
 
         # Load every job files in models
-        jobs = [Job.load(item) for item in filepaths]
+        jobs = [Job.load(item, recorder=self.recorder) for item in filepaths]
 
         # Validate tasks from all jobs
         task_by_job_errors = {}
@@ -160,3 +160,29 @@ def is_allowed_file(source, extensions=[]):
         return False
 
     return True
+
+
+def is_allowed_extension(filename, extensions=[]):
+    """
+    Check if a file name is allowed against a set of file extensions.
+
+    This is the same extension matching than ``is_allowed_file`` except it does not
+    check anything on filesystem, so it can be used on names from a directory listing
+    without any additional filesystem operation.
+
+    Arguments:
+        filename (string): File name.
+
+    Keyword Arguments:
+        extensions (list): A list of extensions to check against. If empty, every
+            file names are allowed. Default to empty.
+
+    Returns:
+        boolean: True if file name is allowed.
+    """
+    if not extensions:
+        return True
+
+    ext = Path(filename).suffix.lower()[1:]
+
+    return bool(ext) and ext in extensions
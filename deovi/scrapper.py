@@ -8,6 +8,8 @@ from tmdbv3api import Configuration, TMDb, TV
 
 import yaml
 
+from .utils.tracing import get_tracer
+
 
 class TmdbScrapper:
     """
@@ -54,7 +56,8 @@ class TmdbScrapper:
         This can only be done once the client has been initialized.
         """
         _api_configuration = Configuration()
-        _api_infos = _api_configuration.info()
+        with get_tracer().span("configuration", category="tmdb"):
+            _api_infos = _api_configuration.info()
 
         # Entry point from TMDb API to download medias
         self.secure_base_url = _api_infos.images["secure_base_url"]
@@ -80,7 +83,8 @@ class TmdbScrapper:
         Get informations payload for given TV ID.
         """
         # Fetch payload from API
-        payload = provider.details(tv_id)
+        with get_tracer().span("tv_details", category="tmdb", tv_id=tv_id):
+            payload = provider.details(tv_id)
 
         # print()
         # print("- id:", tv_id)
@@ -120,14 +124,15 @@ class TmdbScrapper:
         destination = basefilepath.with_suffix(extension)
 
         # Go download the file
-        with requests.get(url, stream=True) as r:
-            if not self.dry:
-                # Create destination directory if missing
-                if not basepath.exists():
-                    basepath.mkdir(parents=True, exist_ok=True)
-                # Write file from stream
-                with open(destination, "wb") as f:
-                    shutil.copyfileobj(r.raw, f)
+        with get_tracer().span("poster", category="tmdb", url=url):
+            with requests.get(url, stream=True) as r:
+                if not self.dry:
+                    # Create destination directory if missing
+                    if not basepath.exists():
+                        basepath.mkdir(parents=True, exist_ok=True)
+                    # Write file from stream
+                    with open(destination, "wb") as f:
+                        shutil.copyfileobj(r.raw, f)
 
         return destination
 
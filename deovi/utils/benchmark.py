@@ -0,0 +1,150 @@
+"""
+Benchmark helpers
+=================
+
+Run benchmark cases in isolated processes and compare their results to a baseline
+to flag regressions. Cases without baseline results are reported so a benchmark does
+not silently pass when there is nothing to compare to.
+"""
+import json
+import multiprocessing
+import resource
+from pathlib import Path
+
+
+# Default tolerated increase ratio for each compared metric. Operation counts are
+# deterministic so any increase is a regression. ``traced_peak`` is the peak of memory
+# traced with ``deovi.utils.memory.MemoryProfiler`` for a part of a case.
+DEFAULT_TOLERANCES = {
+    "wall": 0.25,
+    "peak_memory": 0.25,
+    "traced_peak": 0.25,
+    "operations": 0.0,
+}
+
+
+def _isolated_call(func, args, kwargs):
+    """
+    Call function and add the peak resident memory of current process to its
+    result.
+    """
+    result = func(*args, **kwargs)
+    # Linux reports maximum resident set size in kilobytes
+    result["peak_memory"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    return result
+
+
+def run_isolated(func, *args, **kwargs):
+    """
+    Run a benchmark case in a new process so its peak memory is not polluted by
+    previous cases.
+
+    Arguments:
+        func (callable): Module level function to call, it must return a dictionnary
+            of results.
+        *args: Positional arguments passed to function.
+        **kwargs: Keyword arguments passed to function.
+
+    Returns:
+        dict: Function results with an additional ``peak_memory`` item for the peak
+        resident memory in bytes.
+    """
+    context = multiprocessing.get_context("fork")
+
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        return pool.apply(_isolated_call, (func, args, kwargs))
+
+
+def load_baseline(path):
+    """
+    Load baseline results.
+
+    Arguments:
+        path (pathlib.Path): Baseline JSON file path.
+
+    Returns:
+        dict: Case results indexed on case names. Empty if file does not exist.
+    """
+    path = Path(path)
+
+    if not path.exists():
+        return {}
+
+    return json.loads(path.read_text())
+
+
+def write_baseline(path, results):
+    """
+    Write results as the new baseline, results from cases which are not in the new
+    results are kept.
+
+    Arguments:
+        path (pathlib.Path): Baseline JSON file path.
+        results (dict): Case results indexed on case names.
+
+    Returns:
+        dict: Written baseline.
+    """
+    baseline = load_baseline(path)
+    baseline.update(results)
+
+    Path(path).write_text(json.dumps(baseline, indent=4, sort_keys=True))
+
+    return baseline
+
+
+def missing_cases(baseline, results):
+    """
+    Find cases without baseline results.
+
+    Arguments:
+        baseline (dict): Baseline case results indexed on case names.
+        results (dict): Case results indexed on case names.
+
+    Returns:
+        list: Sorted names of cases which are not in baseline.
+    """
+    return sorted([case for case in results if not baseline.get(case)])
+
+
+def compare_results(baseline, results, tolerances=None):
+    """
+    Compare results to a baseline.
+
+    Arguments:
+        baseline (dict): Baseline case results indexed on case names.
+        results (dict): Case results indexed on case names.
+
+    Keyword Arguments:
+        tolerances (dict): Tolerated increase ratio indexed on metric names, only
+            these metrics are compared. Default to ``DEFAULT_TOLERANCES``.
+
+    Returns:
+        list: Regressions as dictionnaries with ``case``, ``metric``, ``baseline``,
+        ``value`` and ``ratio`` items. Cases or metrics missing from baseline are
+        ignored.
+    """
+    tolerances = DEFAULT_TOLERANCES if tolerances is None else tolerances
+    regressions = []
+
+    for case, values in results.items():
+        reference = baseline.get(case)
+        if not reference:
+            continue
+
+        for metric, tolerance in tolerances.items():
+            if metric not in values or not reference.get(metric):
+                continue
+
+            ratio = values[metric] / reference[metric]
+            if ratio > 1 + tolerance:
+                regressions.append({
+                    "case": case,
+                    "metric": metric,
+                    "baseline": reference[metric],
+                    "value": values[metric],
+                    "ratio": ratio,
+                })
+
+    return regressions
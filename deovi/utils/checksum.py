@@ -1,14 +1,30 @@
 import datetime
-import json
 import hashlib
 
-from .jsons import ExtendedJsonEncoder
+from .filesystem import FilesystemOperator
+from .instrumentation import PhaseRecorder
+from .jsons import JsonSerializer
+from .tracing import get_tracer
+
+
+# Default size in bytes of each sample read for a file fingerprint
+FINGERPRINT_SAMPLE_SIZE = 64 * 1024
 
 
 class ChecksumOperator:
     """
     Gather all methods which perform checksums.
+
+    Keyword Arguments:
+        recorder (deovi.utils.instrumentation.PhaseRecorder): Recorder to report read
+            bytes and filesystem operations to. Default to a disabled recorder.
     """
+    def __init__(self, recorder=None):
+        self.recorder = recorder or PhaseRecorder(enabled=False)
+        self.fs_op = FilesystemOperator(recorder=self.recorder)
+        # Always the standard library backend so checksums never change
+        self.serializer = JsonSerializer()
+
     def file(self, filepath):
         """
         Checksum a file in an efficient way for large files with blake2b.
@@ -25,9 +41,56 @@ class ChecksumOperator:
         b = bytearray(128 * 1024)
         mv = memoryview(b)
 
-        with open(filepath, "rb", buffering=0) as f:
-            for n in iter(lambda: f.readinto(mv), 0):
-                h.update(mv[:n])
+        size = 0
+        with get_tracer().span("file", category="checksum", file=filepath):
+            with self.fs_op.open(filepath, "rb", buffering=0) as f:
+                for n in iter(lambda: f.readinto(mv), 0):
+                    h.update(mv[:n])
+                    size += n
+
+        self.recorder.add_bytes(read=size)
+
+        return h.hexdigest()
+
+    def fingerprint(self, filepath, size, sample_size=FINGERPRINT_SAMPLE_SIZE):
+        """
+        Compute a fingerprint from file size and samples from the start, the middle and
+        the end of a file with blake2b.
+
+        This is a lot faster than a full checksum for large files but two files with
+        the same fingerprint may still have different contents.
+
+        Arguments:
+            filepath (pathlib.Path): File path to open and fingerprint.
+            size (integer): File size in bytes.
+
+        Keyword Arguments:
+            sample_size (integer): Size in bytes of each sample.
+
+        Returns:
+            string: The file fingerprint.
+        """
+        h = hashlib.blake2b(str(size).encode("utf-8"))
+        b = bytearray(sample_size)
+        mv = memoryview(b)
+
+        # Sample offsets are deduplicated for files smaller than three samples
+        offsets = sorted(set([
+            0,
+            max(0, (size - sample_size) // 2),
+            max(0, size - sample_size),
+        ]))
+
+        read = 0
+        with get_tracer().span("fingerprint", category="checksum", file=filepath):
+            with self.fs_op.open(filepath, "rb", buffering=0) as f:
+                for offset in offsets:
+                    f.seek(offset)
+                    n = f.readinto(mv)
+                    h.update(mv[:n])
+                    read += n
+
+        self.recorder.add_bytes(read=read)
 
         return h.hexdigest()
 
@@ -87,7 +150,7 @@ class ChecksumOperator:
 
                 # Checksum the file if it exists
                 key = "{}_checksum".format(fieldname)
-                if filepath.exists():
+                if self.fs_op.exists(filepath):
                     payload[key] = self.file(filepath)
                 else:
                     payload[key] = None
@@ -126,11 +189,6 @@ class ChecksumOperator:
                 payload[fieldname] = source
 
         # Serialize to JSON
-        serialized = json.dumps(
-            payload,
-            indent=4,
-            sort_keys=True,
-            cls=ExtendedJsonEncoder
-        )
+        serialized = self.serializer.dumps(payload, indent=4, sort_keys=True)
 
         return hashlib.blake2b(serialized.encode("utf-8")).hexdigest()
@@ -0,0 +1,201 @@
+import os
+import shutil
+
+from .instrumentation import PhaseRecorder
+
+
+class FilesystemOperator:
+    """
+    Gather filesystem operations which are accounted per phase.
+
+    Every method performs a filesystem operation and counts it into the recorder for
+    the current phase, so the number of metadata operations issued by a process can be
+    measured and guarded against regressions.
+
+    Counted operation names are ``stat``, ``listdir``, ``open``, ``exists``,
+    ``rename``, ``copy``, ``unlink``, ``mkdir`` and ``resolve``.
+
+    Keyword Arguments:
+        recorder (deovi.utils.instrumentation.PhaseRecorder): Recorder to count
+            operations to. Default to a disabled recorder.
+    """
+    def __init__(self, recorder=None):
+        self.recorder = recorder or PhaseRecorder(enabled=False)
+
+    def stat(self, path):
+        """
+        Get file or directory stats.
+
+        Arguments:
+            path (pathlib.Path): Path to stat.
+
+        Returns:
+            os.stat_result: Path stats.
+        """
+        self.recorder.count("stat")
+        return path.stat()
+
+    def entry_stat(self, entry):
+        """
+        Get stats from a directory entry as returned by ``scandir``.
+
+        Arguments:
+            entry (os.DirEntry): Directory entry.
+
+        Returns:
+            os.stat_result: Entry stats.
+        """
+        self.recorder.count("stat")
+        return entry.stat()
+
+    def entry_type(self, entry):
+        """
+        Get the type of a directory entry as returned by ``scandir``.
+
+        Entry type is known from directory listing, except for a symbolic link which
+        is followed with a stat to know if its target is a directory, this stat is
+        counted. On filesystems which do not report entry types in listing,
+        ``os.DirEntry`` makes another stat for each entry which can not be detected
+        from here, so it is not counted.
+
+        Arguments:
+            entry (os.DirEntry): Directory entry.
+
+        Returns:
+            tuple: Whether entry is a directory, following symbolic links, and whether
+            entry is a symbolic link.
+        """
+        is_symlink = entry.is_symlink()
+        if is_symlink:
+            self.recorder.count("stat")
+
+        return entry.is_dir(), is_symlink
+
+    def scandir(self, path):
+        """
+        List directory entries.
+
+        Arguments:
+            path (pathlib.Path): Directory path to list.
+
+        Returns:
+            iterator: Directory entries as ``os.DirEntry`` objects, it must be closed
+            after usage.
+        """
+        self.recorder.count("listdir")
+        return os.scandir(path)
+
+    def exists(self, path):
+        """
+        Check if path exists.
+
+        Arguments:
+            path (pathlib.Path): Path to check.
+
+        Returns:
+            boolean: True if path exists.
+        """
+        self.recorder.count("exists")
+        return path.exists()
+
+    def is_dir(self, path):
+        """
+        Check if path is an existing directory.
+
+        Arguments:
+            path (pathlib.Path): Path to check.
+
+        Returns:
+            boolean: True if path is a directory.
+        """
+        self.recorder.count("stat")
+        return path.is_dir()
+
+    def open(self, path, *args, **kwargs):
+        """
+        Open a file.
+
+        Arguments:
+            path (pathlib.Path): File path to open.
+            *args: Positional arguments passed to ``open()``.
+            **kwargs: Keyword arguments passed to ``open()``.
+
+        Returns:
+            object: File object.
+        """
+        self.recorder.count("open")
+        return open(path, *args, **kwargs)
+
+    def read_text(self, path):
+        """
+        Read file content as text.
+
+        Arguments:
+            path (pathlib.Path): File path to read.
+
+        Returns:
+            string: File content.
+        """
+        self.recorder.count("open")
+        return path.read_text()
+
+    def rename(self, source, destination):
+        """
+        Rename a file.
+
+        Arguments:
+            source (pathlib.Path): File path to rename.
+            destination (pathlib.Path): New file path.
+
+        Returns:
+            pathlib.Path: The destination path.
+        """
+        self.recorder.count("rename")
+        return source.rename(destination)
+
+    def copy(self, source, destination):
+        """
+        Copy a file with its permission mode.
+
+        Arguments:
+            source (pathlib.Path): File path to copy.
+            destination (pathlib.Path): Destination path.
+
+        Returns:
+            string: The destination path.
+        """
+        self.recorder.count("copy")
+        return shutil.copy(source, destination)
+
+    def unlink(self, path):
+        """
+        Remove a file, a missing file is ignored.
+
+        Arguments:
+            path (pathlib.Path): File path to remove.
+        """
+        self.recorder.count("unlink")
+        path.unlink(missing_ok=True)
+
+    def mkdir(self, path):
+        """
+        Create a directory with its missing parents.
+
+        Arguments:
+            path (pathlib.Path): Directory path to create.
+        """
+        self.recorder.count("mkdir")
+        path.mkdir(parents=True, exist_ok=True)
+
+    def resolve(self, path):
+        """
+        Resolve a path to an absolute path without symlinks.
+
+        Arguments:
+            path (pathlib.Path): Path to resolve.
+
+        Returns:
+            pathlib.Path: Resolved path.
+        """
+        self.recorder.count("resolve")
+        return path.resolve()
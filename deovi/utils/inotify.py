@@ -0,0 +1,168 @@
+"""
+Inotify
+=======
+
+Minimal binding to the Linux inotify API with ctypes to watch directory changes.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+
+
+# Event masks from "sys/inotify.h"
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+# Every event which changes a directory listing or its files
+DIRECTORY_EVENTS = (
+    IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+    IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+
+# Header of an event: watch descriptor, mask, cookie and name length
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyEvent:
+    """
+    An inotify event.
+
+    Arguments:
+        wd (integer): Watch descriptor the event is for.
+        mask (integer): Event mask.
+        cookie (integer): Cookie to associate the two events of a move.
+        name (string): Name of the entry in watched directory, empty if event is for
+            the watched directory itself.
+    """
+    def __init__(self, wd, mask, cookie, name):
+        self.wd = wd
+        self.mask = mask
+        self.cookie = cookie
+        self.name = name
+
+    @property
+    def is_dir(self):
+        return bool(self.mask & IN_ISDIR)
+
+    def __repr__(self):
+        return "<InotifyEvent wd={} mask={:#x} name={!r}>".format(
+            self.wd, self.mask, self.name
+        )
+
+
+class Inotify:
+    """
+    Inotify instance to watch directories.
+
+    Raises:
+        OSError: If inotify is not available on system.
+    """
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("Inotify is only available on Linux")
+
+        self.libc = ctypes.CDLL(
+            ctypes.util.find_library("c") or "libc.so.6",
+            use_errno=True,
+        )
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise_error()
+
+    def _raise_error(self, path=None):
+        """
+        Raise an OSError from the last C error.
+        """
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno), path)
+
+    def add_watch(self, path, mask=DIRECTORY_EVENTS):
+        """
+        Watch a directory.
+
+        Arguments:
+            path (pathlib.Path): Directory path to watch.
+
+        Keyword Arguments:
+            mask (integer): Events to watch.
+
+        Returns:
+            integer: Watch descriptor. Watching a directory already watched returns its
+            existing descriptor.
+        """
+        wd = self.libc.inotify_add_watch(
+            self.fd,
+            os.fsencode(str(path)),
+            mask | IN_ONLYDIR,
+        )
+        if wd < 0:
+            self._raise_error(str(path))
+
+        return wd
+
+    def rm_watch(self, wd):
+        """
+        Stop watching a directory.
+
+        Removing a watch which does not exist anymore is silently ignored.
+
+        Arguments:
+            wd (integer): Watch descriptor.
+        """
+        self.libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout=None):
+        """
+        Read pending events.
+
+        Keyword Arguments:
+            timeout (float): Time in seconds to wait for events. Default to None to
+                wait until there are events.
+
+        Returns:
+            list: ``InotifyEvent`` objects, empty if there was no event before
+            timeout.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            events.append(InotifyEvent(wd, mask, cookie, os.fsdecode(name)))
+
+        return events
+
+    def close(self):
+        """
+        Close inotify instance, every watch is removed.
+        """
+        if self.fd is not None and self.fd >= 0:
+            os.close(self.fd)
+            self.fd = None
@@ -0,0 +1,421 @@
+import contextlib
+import heapq
+import itertools
+import json
+import threading
+import time
+from pathlib import Path
+
+from .tracing import get_tracer
+
+
+# Shared context manager returned when recording is disabled, so a disabled recorder
+# costs only a method call
+NULL_PHASE = contextlib.nullcontext()
+
+
+class Phase:
+    """
+    Context manager to measure a phase occurrence.
+
+    Time is recorded exclusively: while a nested phase is running in the same thread,
+    the parent phase is paused so the time is only accounted to the nested one.
+
+    Arguments:
+        recorder (PhaseRecorder): Recorder to report measures to.
+        name (string): Phase name.
+        items (integer): Number of items processed in this phase occurrence.
+
+    Keyword Arguments:
+        tracer (deovi.utils.tracing.TraceRecorder): If given, the phase occurrence is
+            also recorded as a span.
+        args (dict): Span arguments.
+    """
+    def __init__(self, recorder, name, items, tracer=None, args=None):
+        self.recorder = recorder
+        self.name = name
+        self.items = items
+        self.tracer = tracer
+        self.args = args
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def pause(self):
+        """
+        Accumulate time spent since last resume.
+        """
+        self.wall += time.perf_counter() - self.wall_start
+        self.cpu += time.thread_time() - self.cpu_start
+
+    def resume(self):
+        """
+        Start measuring time again.
+        """
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+
+    def __enter__(self):
+        stack = self.recorder.get_stack()
+        if stack:
+            stack[-1].pause()
+        stack.append(self)
+        self.resume()
+        self.start = self.wall_start
+
+        return self
+
+    def __exit__(self, *args):
+        self.pause()
+
+        stack = self.recorder.get_stack()
+        stack.pop()
+        if stack:
+            stack[-1].resume()
+
+        self.recorder.record(self.name, self.wall, self.cpu, self.items)
+
+        if self.tracer is not None:
+            self.tracer.add_complete(
+                self.name,
+                "phase",
+                self.start,
+                time.perf_counter() - self.start,
+                self.args,
+            )
+
+        return False
+
+
+class PhaseRecorder:
+    """
+    Record wall time, CPU time, item counts, bytes read or written and filesystem
+    operations per phase.
+
+    A phase is a named part of a process (like ``walk`` or ``checksum``) which may
+    occur many times, possibly from multiple threads, every occurrence is accumulated
+    in the phase counters.
+
+    Keyword Arguments:
+        enabled (boolean): If disabled, nothing is recorded and phases are no-op.
+            Default to True.
+        memory (deovi.utils.memory.MemoryProfiler): Memory profiler which takes
+            snapshots at checkpoints. It works even if recorder is disabled. Default
+            to None so there is no memory profiling.
+    """
+    def __init__(self, enabled=True, memory=None):
+        self.enabled = enabled
+        self.memory = memory
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.reset()
+
+    def reset(self):
+        """
+        Reset recorded phases and the elapsed time origin.
+        """
+        self.phases = {}
+        self.operations = {}
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+
+    def get_stack(self):
+        """
+        Return the stack of running phases for the current thread.
+
+        Returns:
+            list: Running ``Phase`` objects, the last one is the current phase.
+        """
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+
+        return stack
+
+    def current(self):
+        """
+        Return the name of the current phase for the current thread.
+
+        Returns:
+            string: Phase name or ``None`` if there is no running phase.
+        """
+        stack = self.get_stack()
+
+        return stack[-1].name if stack else None
+
+    def _counters(self, name):
+        """
+        Return counters for a phase, create them if needed.
+
+        This must be called with the recorder lock.
+        """
+        if name not in self.phases:
+            self.phases[name] = {
+                "wall": 0.0,
+                "cpu": 0.0,
+                "items": 0,
+                "bytes_read": 0,
+                "bytes_written": 0,
+            }
+
+        return self.phases[name]
+
+    def phase(self, name, items=1, **args):
+        """
+        Return a context manager to measure a phase occurrence.
+
+        When the process tracer is enabled, the phase occurrence is also recorded as
+        a span, even if the recorder itself is disabled.
+
+        Arguments:
+            name (string): Phase name.
+
+        Keyword Arguments:
+            items (integer): Number of items processed in this occurrence. Default to
+                1.
+            **args (dict): Span arguments, only used when tracing.
+
+        Returns:
+            object: A ``Phase`` object, a span or a no-op context manager if both
+            recorder and tracer are disabled.
+        """
+        tracer = get_tracer()
+
+        if not self.enabled:
+            if tracer.enabled:
+                return tracer.span(name, category="phase", **args)
+            return NULL_PHASE
+
+        return Phase(
+            self,
+            name,
+            items,
+            tracer=tracer if tracer.enabled else None,
+            args=args,
+        )
+
+    def record(self, name, wall, cpu, items=1):
+        """
+        Add measures to a phase.
+
+        Arguments:
+            name (string): Phase name.
+            wall (float): Wall time in seconds.
+            cpu (float): CPU time in seconds.
+
+        Keyword Arguments:
+            items (integer): Number of processed items.
+        """
+        with self.lock:
+            counters = self._counters(name)
+            counters["wall"] += wall
+            counters["cpu"] += cpu
+            counters["items"] += items
+
+    def checkpoint(self, label):
+        """
+        Take a memory snapshot if there is a memory profiler.
+
+        Checkpoints are meant for boundaries between large parts of a process, not for
+        every phase occurrence since a snapshot is costly.
+
+        Arguments:
+            label (string): Checkpoint label.
+        """
+        if self.memory is not None:
+            self.memory.checkpoint(label)
+
+    def add_bytes(self, read=0, written=0, phase=None):
+        """
+        Add read or written bytes to a phase.
+
+        Keyword Arguments:
+            read (integer): Number of read bytes.
+            written (integer): Number of written bytes.
+            phase (string): Phase name. Default to the current phase of the current
+                thread, if there is none the bytes are accounted to phase ``other``.
+        """
+        if not self.enabled:
+            return
+
+        name = phase or self.current() or "other"
+
+        with self.lock:
+            counters = self._counters(name)
+            counters["bytes_read"] += read
+            counters["bytes_written"] += written
+
+    def count(self, operation, number=1):
+        """
+        Count a filesystem operation for the current phase.
+
+        Arguments:
+            operation (string): Operation name.
+
+        Keyword Arguments:
+            number (integer): Number of operations to count. Default to 1.
+        """
+        if not self.enabled:
+            return
+
+        name = self.current() or "other"
+
+        with self.lock:
+            counters = self.operations.setdefault(name, {})
+            counters[operation] = counters.get(operation, 0) + number
+
+    def operations_report(self):
+        """
+        Return counted filesystem operations.
+
+        Returns:
+            dict: Operation counters indexed on phase names and a ``total`` item with
+            operation counters summed from all phases.
+        """
+        total = {}
+
+        with self.lock:
+            report = {
+                name: dict(counters)
+                for name, counters in self.operations.items()
+            }
+
+        for counters in report.values():
+            for operation, number in counters.items():
+                total[operation] = total.get(operation, 0) + number
+
+        report["total"] = total
+
+        return report
+
+    def report(self, **extra):
+        """
+        Build report of recorded phases.
+
+        Keyword Arguments:
+            **extra (dict): Additional items to include in report.
+
+        Returns:
+            dict: Report with total ``elapsed`` wall time, total process ``cpu`` time,
+            ``phases`` counters, filesystem ``operations``, the ``memory`` report if
+            there is a memory profiler and given extra items.
+        """
+        with self.lock:
+            phases = {
+                name: dict(counters)
+                for name, counters in self.phases.items()
+            }
+
+        report = {
+            "elapsed": time.perf_counter() - self.wall_start,
+            "cpu": time.process_time() - self.cpu_start,
+            "phases": phases,
+            "operations": self.operations_report(),
+        }
+        if self.memory is not None:
+            report["memory"] = self.memory.report()
+        report.update(extra)
+
+        return report
+
+    def write(self, path, **extra):
+        """
+        Write report to a JSON file.
+
+        Arguments:
+            path (pathlib.Path): Destination file path.
+
+        Keyword Arguments:
+            **extra (dict): Additional items to include in report.
+
+        Returns:
+            dict: Written report.
+        """
+        report = self.report(**extra)
+
+        with Path(path).open("w") as fp:
+            json.dump(report, fp, indent=4, default=str)
+
+        return report
+
+    def summary(self):
+        """
+        Build human readable lines to resume recorded phases.
+
+        Returns:
+            list: A line for each phase and a line for filesystem operations if any.
+        """
+        lines = []
+
+        for name, counters in self.report()["phases"].items():
+            lines.append(
+                "Phase '{}': {} item(s), {:.3f}s wall, {:.3f}s CPU, {} bytes read, "
+                "{} bytes written".format(
+                    name,
+                    counters["items"],
+                    counters["wall"],
+                    counters["cpu"],
+                    counters["bytes_read"],
+                    counters["bytes_written"],
+                )
+            )
+
+        total = self.operations_report()["total"]
+        if total:
+            lines.append("Filesystem operations: {}".format(
+                ", ".join([
+                    "{}={}".format(name, number)
+                    for name, number in sorted(total.items())
+                ])
+            ))
+
+        return lines
+
+
+class TopTracker:
+    """
+    Keep the items with the highest values using a fixed-size heap.
+
+    Memory and cost per pushed item stay bounded whatever the number of pushed items,
+    so it is suitable to track items along a very long process.
+
+    Arguments:
+        size (integer): Maximum number of items to keep. If lower than 1, nothing is
+            kept.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.heap = []
+        self.lock = threading.Lock()
+        # Tie breaker so items themselves are never compared
+        self.counter = itertools.count()
+
+    def push(self, value, item):
+        """
+        Push an item, it is kept only if its value is high enough.
+
+        Arguments:
+            value (number): Value to compare items.
+            item (object): Item to keep.
+        """
+        if self.size < 1:
+            return
+
+        entry = (value, next(self.counter), item)
+
+        with self.lock:
+            if len(self.heap) < self.size:
+                heapq.heappush(self.heap, entry)
+            elif value > self.heap[0][0]:
+                heapq.heapreplace(self.heap, entry)
+
+    def items(self):
+        """
+        Return kept items.
+
+        Returns:
+            list: Kept items ordered from the highest value to the lowest one.
+        """
+        with self.lock:
+            entries = sorted(self.heap, key=lambda x: (-x[0], x[1]))
+
+        return [item for value, index, item in entries]
@@ -2,22 +2,212 @@ import datetime
 import json
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Available serializer backends, ``orjson`` requires the orjson package
+JSON_BACKENDS = ("json", "orjson")
+
+# Types which are serialized as they are
+JSON_SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
+
+
+def extended_value(obj):
+    """
+    Convert a value which is not natively supported by JSON.
+
+    Arguments:
+        obj (object): Value to convert.
+
+    Raises:
+        TypeError: If value type is not supported.
+
+    Returns:
+        object: Converted value.
+    """
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8")
+    # Support for pathlib.Path to a string
+    if isinstance(obj, Path):
+        return str(obj)
+    # Support for set to a list
+    if isinstance(obj, set):
+        return list(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+
+    raise TypeError(
+        "Object of type {} is not JSON serializable".format(type(obj).__name__)
+    )
+
 
 class ExtendedJsonEncoder(json.JSONEncoder):
     """
     Additional opiniated support for more basic object types.
     """
     def default(self, obj):
-        if isinstance(obj, bytes):
-            return obj.decode("utf-8")
-        # Support for pathlib.Path to a string
-        if isinstance(obj, Path):
-            return str(obj)
-        # Support for set to a list
-        if isinstance(obj, set):
-            return list(obj)
-        if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
-            return obj.isoformat()
-
-        # Let the base class default method raise the TypeError
-        return json.JSONEncoder.default(self, obj)
+        try:
+            return extended_value(obj)
+        except TypeError:
+            # Let the base class default method raise the TypeError
+            return json.JSONEncoder.default(self, obj)
+
+
+def to_json_native(value):
+    """
+    Convert a value to JSON native types in a single pass.
+
+    Conversions are the same than ``ExtendedJsonEncoder`` does, so encoding the
+    converted value with the standard encoder gives the same output without any call
+    to ``default`` hook. Containers are copied, scalar values are not.
+
+    Arguments:
+        value (object): Value to convert.
+
+    Returns:
+        object: Converted value. Unsupported values are left unchanged so the
+        encoder fails on them.
+    """
+    kind = type(value)
+
+    # Scalar items are checked inline to avoid a call for each of them
+    if kind is dict:
+        return {
+            key: item if type(item) in JSON_SCALAR_TYPES else to_json_native(item)
+            for key, item in value.items()
+        }
+    elif kind is list or kind is tuple:
+        return [
+            item if type(item) in JSON_SCALAR_TYPES else to_json_native(item)
+            for item in value
+        ]
+    elif kind in JSON_SCALAR_TYPES or isinstance(value, (str, int, float)):
+        return value
+    elif isinstance(value, Path):
+        return str(value)
+    elif isinstance(value, dict):
+        return {key: to_json_native(item) for key, item in value.items()}
+    elif isinstance(value, (list, tuple)):
+        return [to_json_native(item) for item in value]
+
+    try:
+        value = extended_value(value)
+    except TypeError:
+        return value
+
+    return to_json_native(value)
+
+
+class JsonSerializer:
+    """
+    Serialize content to JSON.
+
+    With the default ``json`` backend, output is the same than with the standard
+    library and ``ExtendedJsonEncoder``. Indented content is converted to JSON native
+    types in a single pass before being encoded, so the indenting encoder (which is
+    written in Python) never falls back to the ``default`` hook. Content without
+    indentation is encoded at once with the C encoder which is faster than a
+    conversion pass.
+
+    The ``orjson`` backend is a lot faster but its output differs: indentation is
+    always 2 spaces, there is no whitespace after separators and non ASCII characters
+    are not escaped.
+
+    Keyword Arguments:
+        backend (string): Backend name from ``JSON_BACKENDS``. Default to ``json``.
+
+    Raises:
+        ValueError: If backend is unknown or not installed.
+    """
+    def __init__(self, backend="json"):
+        if backend not in JSON_BACKENDS:
+            raise ValueError("Unknown JSON serializer backend: {}".format(backend))
+
+        if backend == "orjson" and orjson is None:
+            raise ValueError("JSON serializer backend is not installed: orjson")
+
+        self.backend = backend
+
+    def orjson_options(self, indent=None, sort_keys=False):
+        """
+        Get orjson options from encoding options.
+        """
+        options = orjson.OPT_NON_STR_KEYS
+        if indent is not None:
+            options |= orjson.OPT_INDENT_2
+        if sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+
+        return options
+
+    def dumps(self, content, indent=None, separators=None, sort_keys=False):
+        """
+        Serialize content to a JSON string.
+
+        Arguments:
+            content (object): Content to serialize.
+
+        Keyword Arguments:
+            indent (integer): Indentation, see ``json.dumps``.
+            separators (tuple): Item and key separators, see ``json.dumps``. Ignored
+                with ``orjson`` backend.
+            sort_keys (boolean): Sort dictionnary keys.
+
+        Returns:
+            string: JSON.
+        """
+        if self.backend == "orjson":
+            return orjson.dumps(
+                content,
+                default=extended_value,
+                option=self.orjson_options(indent=indent, sort_keys=sort_keys),
+            ).decode("utf-8")
+
+        if indent is None:
+            return json.dumps(
+                content,
+                separators=separators,
+                sort_keys=sort_keys,
+                cls=ExtendedJsonEncoder,
+            )
+
+        return json.dumps(
+            to_json_native(content),
+            indent=indent,
+            separators=separators,
+            sort_keys=sort_keys,
+        )
+
+    def dump(self, content, fp, indent=None, separators=None, sort_keys=False):
+        """
+        Serialize content to a JSON file.
+
+        Indented content is written in chunks while it is encoded, content without
+        indentation is encoded at once then written.
+
+        Arguments:
+            content (object): Content to serialize.
+            fp (file object): File object opened in text mode.
+
+        Keyword Arguments:
+            indent (integer): Indentation, see ``json.dump``.
+            separators (tuple): Item and key separators, see ``json.dump``. Ignored
+                with ``orjson`` backend.
+            sort_keys (boolean): Sort dictionnary keys.
+        """
+        if self.backend == "orjson" or indent is None:
+            fp.write(self.dumps(
+                content, indent=indent, separators=separators, sort_keys=sort_keys
+            ))
+            return
+
+        json.dump(
+            to_json_native(content),
+            fp,
+            indent=indent,
+            separators=separators,
+            sort_keys=sort_keys,
+        )
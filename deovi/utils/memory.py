@@ -0,0 +1,206 @@
+"""
+Memory profiling
+================
+
+Take tracemalloc snapshots at checkpoints to know how much memory each part of a
+process has allocated and where it was allocated from.
+"""
+import os
+import threading
+import time
+import tracemalloc
+
+
+def get_rss():
+    """
+    Return the current resident set size of process.
+
+    This is only supported on Linux.
+
+    Returns:
+        integer: Resident memory in bytes or ``None`` if it can not be read.
+    """
+    try:
+        with open("/proc/self/statm") as fp:
+            pages = int(fp.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+class MemoryProfiler:
+    """
+    Trace memory allocations and take snapshots at checkpoints.
+
+    Each checkpoint records the current and peak traced memory since the previous
+    checkpoint and the allocation sites which have grown the most since then.
+
+    Keyword Arguments:
+        top (integer): Number of allocation sites to keep for each checkpoint and for
+            the final report. Default to 10.
+        rss_interval (float): If given, resident memory is sampled from a thread at
+            this interval in seconds. Default to None so it is not sampled.
+        frames (integer): Number of frames to store for each allocation traceback.
+            Default to 1 so an allocation site is only its file and line.
+    """
+    def __init__(self, top=10, rss_interval=None, frames=1):
+        self.top = top
+        self.rss_interval = rss_interval
+        self.frames = frames
+        self.checkpoints = []
+        self.rss = []
+        self.peak = 0
+        self.sites = []
+        self.previous = None
+        self.sampler = None
+        self.stopping = threading.Event()
+
+    def _filter(self, snapshot):
+        """
+        Exclude allocations from tracemalloc itself.
+        """
+        return snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def _sites(self, stats):
+        """
+        Format allocation statistics.
+        """
+        sites = []
+
+        for stat in stats[:self.top]:
+            frame = stat.traceback[0]
+            sites.append({
+                "site": "{}:{}".format(frame.filename, frame.lineno),
+                "size": getattr(stat, "size_diff", stat.size),
+                "count": getattr(stat, "count_diff", stat.count),
+            })
+
+        return sites
+
+    def _sample(self):
+        """
+        Sample resident memory until profiler is stopped.
+        """
+        while not self.stopping.wait(self.rss_interval):
+            self.rss.append({
+                "elapsed": time.perf_counter() - self.started,
+                "rss": get_rss(),
+            })
+
+    def start(self):
+        """
+        Start tracing allocations and sampling resident memory if enabled.
+        """
+        self.started = time.perf_counter()
+        self.stopping.clear()
+        tracemalloc.start(self.frames)
+        self.previous = self._filter(tracemalloc.take_snapshot())
+
+        if self.rss_interval and get_rss() is not None:
+            self.sampler = threading.Thread(
+                target=self._sample,
+                name="rss-sampler",
+                daemon=True,
+            )
+            self.sampler.start()
+
+    def checkpoint(self, label):
+        """
+        Take a snapshot and record memory since the previous checkpoint.
+
+        Arguments:
+            label (string): Checkpoint label, commonly the name of the part which has
+                just ended.
+        """
+        if not tracemalloc.is_tracing():
+            return
+
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = self._filter(tracemalloc.take_snapshot())
+
+        self.checkpoints.append({
+            "label": label,
+            "elapsed": time.perf_counter() - self.started,
+            "current": current,
+            "peak": peak,
+            "rss": get_rss(),
+            "top": self._sites(snapshot.compare_to(self.previous, "lineno")),
+        })
+
+        self.peak = max(self.peak, peak)
+        self.previous = snapshot
+
+        # Peak is measured for each interval between checkpoints, this is not
+        # available before Python 3.9
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+
+    def stop(self):
+        """
+        Take a last ``end`` checkpoint, then stop tracing and sampling.
+        """
+        if not tracemalloc.is_tracing():
+            return
+
+        self.checkpoint("end")
+        self.sites = self._sites(self.previous.statistics("lineno"))
+        self.previous = None
+        tracemalloc.stop()
+
+        if self.sampler is not None:
+            self.stopping.set()
+            self.sampler.join()
+            self.sampler = None
+
+    def report(self):
+        """
+        Build memory report.
+
+        Returns:
+            dict: Report with traced memory ``peak``, the ``checkpoints``, the
+            ``top`` allocation sites of memory still allocated at the end and the
+            ``rss`` samples.
+        """
+        return {
+            "peak": self.peak,
+            "checkpoints": self.checkpoints,
+            "top": self.sites,
+            "rss": self.rss,
+        }
+
+    def summary(self):
+        """
+        Build human readable lines to resume memory usage.
+
+        Returns:
+            list: A line for peak memory, a line for each checkpoint and a line for
+            each top allocation site.
+        """
+        mib = 1024 * 1024
+        lines = ["Memory peak: {:.1f}MiB".format(self.peak / mib)]
+
+        for item in self.checkpoints:
+            lines.append(
+                "Memory at '{}': {:.1f}MiB, {:.1f}MiB peak, {:+.1f}MiB from top "
+                "sites".format(
+                    item["label"],
+                    item["current"] / mib,
+                    item["peak"] / mib,
+                    sum([site["size"] for site in item["top"]]) / mib,
+                )
+            )
+
+        if self.sites:
+            lines.append("Top allocation sites:")
+            for site in self.sites:
+                lines.append("- {:.1f}KiB in {} blocks: {}".format(
+                    site["size"] / 1024,
+                    site["count"],
+                    site["site"],
+                ))
+
+        return lines
@@ -0,0 +1,169 @@
+"""
+Synthetic media trees
+=====================
+
+Build directory trees which look like a media device, mostly to benchmark collection
+and renaming on a realistic scale.
+
+Media files are created as sparse files so they have a realistic apparent size
+without using disk space.
+"""
+import math
+
+
+class SyntheticTree:
+    """
+    Build a synthetic media tree.
+
+    Every directory (including the root one) is filled with the same number of media
+    files and may have a manifest and a cover.
+
+    Keyword Arguments:
+        depth (integer): Number of directory levels below the root directory.
+            Default to 2.
+        fanout (integer): Number of subdirectories in each directory, excepted for
+            the directories at the deepest level. Default to 3.
+        files (integer): Number of media files in each directory. Default to 10.
+        file_size (integer): Apparent size of each media file in bytes. Default to
+            700MiB.
+        extensions (list): File extensions used in turn for media files. Default to
+            ``["mkv", "mp4", "avi"]``.
+        manifest (boolean): Create a manifest in each directory. Default to True.
+        cover (boolean): Create a cover image in each directory. Default to True.
+        cover_size (integer): Size of each cover image in bytes. Cover files are not
+            sparse since they are read for checksums. Default to 50KiB.
+        manifest_filename (string): Manifest filename. Default to ``manifest.yaml``.
+        cover_filename (string): Cover filename. Default to ``cover.jpg``.
+        filename_template (string): Template for media filenames, formatted with
+            file ``index`` in directory and its ``extension``. Default to
+            ``Media {index:06d}.{extension}``.
+    """
+    def __init__(self, depth=2, fanout=3, files=10, file_size=700 * 1024 * 1024,
+                 extensions=None, manifest=True, cover=True, cover_size=50 * 1024,
+                 manifest_filename="manifest.yaml", cover_filename="cover.jpg",
+                 filename_template="Media {index:06d}.{extension}"):
+        self.depth = depth
+        self.fanout = fanout
+        self.files = files
+        self.file_size = file_size
+        self.extensions = extensions or ["mkv", "mp4", "avi"]
+        self.manifest = manifest
+        self.cover = cover
+        self.cover_size = cover_size
+        self.manifest_filename = manifest_filename
+        self.cover_filename = cover_filename
+        self.filename_template = filename_template
+
+    @classmethod
+    def for_files(cls, total, depth=2, fanout=3, **kwargs):
+        """
+        Create a tree which holds at least the given total number of media files.
+
+        Arguments:
+            total (integer): Minimum total number of media files.
+
+        Keyword Arguments:
+            depth (integer): Number of directory levels below the root directory.
+            fanout (integer): Number of subdirectories in each directory.
+            **kwargs: Other arguments passed to ``SyntheticTree``.
+
+        Returns:
+            SyntheticTree: Tree object with the number of files per directory
+            required to reach the total.
+        """
+        directories = cls.count_directories(depth, fanout)
+
+        return cls(
+            depth=depth,
+            fanout=fanout,
+            files=math.ceil(total / directories),
+            **kwargs
+        )
+
+    @staticmethod
+    def count_directories(depth, fanout):
+        """
+        Count directories of a tree.
+
+        Arguments:
+            depth (integer): Number of directory levels below the root directory.
+            fanout (integer): Number of subdirectories in each directory.
+
+        Returns:
+            integer: Number of directories, including the root one.
+        """
+        return sum([fanout ** level for level in range(depth + 1)])
+
+    def fill_directory(self, path, level):
+        """
+        Create media files, manifest and cover for a directory.
+
+        Arguments:
+            path (pathlib.Path): Existing directory to fill.
+            level (integer): Directory level, zero for the root directory.
+
+        Returns:
+            integer: Number of created media files.
+        """
+        for i in range(self.files):
+            filename = self.filename_template.format(
+                index=i,
+                extension=self.extensions[i % len(self.extensions)],
+            )
+            with (path / filename).open("wb") as fp:
+                fp.truncate(self.file_size)
+
+        if self.manifest:
+            (path / self.manifest_filename).write_text(
+                "title: {}\nlevel: {}\n".format(path.name, level)
+            )
+
+        if self.cover:
+            # Content is made of the directory name so each cover has a different
+            # checksum
+            name = path.name.encode("utf-8") or b"root"
+            content = name * (self.cover_size // len(name) + 1)
+            (path / self.cover_filename).write_bytes(content[:self.cover_size])
+
+        return self.files
+
+    def build(self, destination):
+        """
+        Create the tree.
+
+        Arguments:
+            destination (pathlib.Path): Root directory of the tree, it is created if
+                it does not exist yet.
+
+        Returns:
+            dict: Number of created ``directories``, ``files``, ``manifests`` and
+            ``covers`` and the total apparent ``size`` of media files.
+        """
+        stats = {
+            "directories": 0,
+            "files": 0,
+            "manifests": 0,
+            "covers": 0,
+            "size": 0,
+        }
+
+        destination.mkdir(parents=True, exist_ok=True)
+        pending = [(destination, 0)]
+
+        while pending:
+            path, level = pending.pop()
+
+            files = self.fill_directory(path, level)
+            stats["directories"] += 1
+            stats["files"] += files
+            stats["size"] += files * self.file_size
+            stats["manifests"] += 1 if self.manifest else 0
+            stats["covers"] += 1 if self.cover else 0
+
+            if level < self.depth:
+                for i in range(self.fanout):
+                    child = path / "Directory {:03d}".format(i)
+                    child.mkdir()
+                    pending.append((child, level + 1))
+
+        return stats
@@ -0,0 +1,181 @@
+"""
+Tracing
+=======
+
+Record spans in Chrome Trace Event format, a trace file can be opened with Perfetto
+or ``chrome://tracing`` to inspect concurrency and stalls.
+
+There is a single process wide tracer, like the application logger. It is disabled
+on default so spans cost only a method call until a tracer is enabled with
+``set_tracer()``.
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+
+# Shared context manager returned when tracing is disabled
+NULL_SPAN = contextlib.nullcontext()
+
+
+class Span:
+    """
+    Context manager to record a span as a complete event.
+
+    Arguments:
+        tracer (TraceRecorder): Tracer to record event to.
+        name (string): Span name.
+        category (string): Span category.
+        args (dict): Span arguments to display with event.
+    """
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.tracer.add_complete(
+            self.name,
+            self.category,
+            self.start,
+            time.perf_counter() - self.start,
+            self.args,
+        )
+        return False
+
+
+class TraceRecorder:
+    """
+    Record trace events.
+
+    Keyword Arguments:
+        enabled (boolean): If disabled, nothing is recorded and spans are no-op.
+            Default to True.
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.events = []
+        self.threads = set()
+
+    def span(self, name, category="deovi", **args):
+        """
+        Return a context manager to record a span.
+
+        Arguments:
+            name (string): Span name.
+
+        Keyword Arguments:
+            category (string): Span category. Default to ``deovi``.
+            **args (dict): Span arguments, values which are not JSON native types are
+                converted to strings when trace is written.
+
+        Returns:
+            object: A ``Span`` object or a no-op context manager if tracer is
+            disabled.
+        """
+        if not self.enabled:
+            return NULL_SPAN
+
+        return Span(self, name, category, args)
+
+    def add_complete(self, name, category, start, duration, args=None):
+        """
+        Add a complete event for the current thread.
+
+        Arguments:
+            name (string): Event name.
+            category (string): Event category.
+            start (float): Start time as returned from ``time.perf_counter()``.
+            duration (float): Event duration in seconds.
+
+        Keyword Arguments:
+            args (dict): Event arguments.
+        """
+        thread = threading.current_thread()
+        tid = threading.get_native_id()
+
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - self.origin) * 1000000,
+            "dur": duration * 1000000,
+            "pid": self.pid,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = args
+
+        with self.lock:
+            # Name thread once so workers are recognizable in trace viewers
+            if tid not in self.threads:
+                self.threads.add(tid)
+                self.events.append({
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self.pid,
+                    "tid": tid,
+                    "args": {"name": thread.name},
+                })
+            self.events.append(event)
+
+    def write(self, path):
+        """
+        Write recorded events to a JSON file in Chrome Trace Event format.
+
+        Arguments:
+            path (pathlib.Path): Destination file path.
+        """
+        with self.lock:
+            events = list(self.events)
+
+        with Path(path).open("w") as fp:
+            json.dump(
+                {
+                    "traceEvents": events,
+                    "displayTimeUnit": "ms",
+                },
+                fp,
+                default=str,
+            )
+
+
+_TRACER = TraceRecorder(enabled=False)
+
+
+def get_tracer():
+    """
+    Return the process wide tracer.
+
+    Returns:
+        TraceRecorder: Current tracer, it is disabled on default.
+    """
+    return _TRACER
+
+
+def set_tracer(tracer):
+    """
+    Set the process wide tracer.
+
+    Arguments:
+        tracer (TraceRecorder): Tracer to use from now. Give a disabled tracer to stop
+            tracing.
+
+    Returns:
+        TraceRecorder: Given tracer.
+    """
+    global _TRACER
+    _TRACER = tracer
+
+    return tracer
@@ -6,6 +6,7 @@ import pytest
 from deovi.exceptions import TaskValidationError
 from deovi.renamer.validators import (
     validate_task_options, validate_job_file, validate_jobs, is_allowed_file,
+    is_allowed_extension,
 )
 from deovi.renamer.tasks import TaskMaster
 
@@ -294,3 +295,21 @@ def test_is_allowed_file(various_filenames, source, extensions, expected):
     source = various_filenames.joinpath(source)
 
     assert is_allowed_file(source, extensions=extensions) == expected
+
+
+@pytest.mark.parametrize("filename, extensions, expected", [
+    ("foo.txt", [], True),
+    ("foo", [], True),
+    ("foo", ["txt"], False),
+    ("foo.txt", ["txt"], True),
+    ("foo.TXT", ["txt"], True),
+    ("foo.txt", ["mp4"], False),
+    ("foo.mp4.txt", ["mp4"], False),
+    ("foo.mp4.txt", ["txt"], True),
+    (".txt", ["txt"], False),
+])
+def test_is_allowed_extension(filename, extensions, expected):
+    """
+    File name should be allowed only if its last extension is in allowed extensions.
+    """
+    assert is_allowed_extension(filename, extensions=extensions) is expected
@@ -5,6 +5,8 @@ import pytest
 
 from deovi.exceptions import JobValidationError
 from deovi.renamer.jobs import Job
+from deovi.renamer.tasks import TaskMaster
+from deovi.utils.instrumentation import PhaseRecorder
 
 
 def test_job_model():
@@ -386,3 +388,73 @@ def test_job_run_errors(caplog, debug_logger, task_manager, basic_sample):
         "",
     ]
     assert expected_logs == [rec.message for rec in caplog.records]
+
+
+def test_job_run_restore(caplog, debug_logger, basic_sample):
+    """
+    Method "run" should restore every renamed file to its original name when a task
+    fails after some files have already been renamed.
+    """
+    class FailingTaskMaster(TaskMaster):
+        """
+        Task manager with a task which fails on the third file.
+        """
+        def task_fail(self, index, source, **options):
+            if index == 3:
+                raise RuntimeError("Task failure")
+
+            return source, source
+
+    basepath = basic_sample / "files"
+
+    job = Job(
+        basic_sample / "job.json",
+        basepath,
+        extensions=["mp4", "mpeg4", "avi"],
+        tasks=[
+            ["uppercase", {}],
+            ["fail", {}],
+        ],
+    )
+
+    with pytest.raises(RuntimeError):
+        job.run(FailingTaskMaster(), dry_run=False)
+
+    # Files renamed before failure are restored and the failing one is untouched
+    for name in ("bar.mpeg4", "barriton.mp4", "ping.avi"):
+        assert (basepath / name).exists() is True
+    for name in ("BAR.MPEG4", "BARRITON.MP4", "PING.AVI"):
+        assert (basepath / name).exists() is False
+
+    messages = [rec.message for rec in caplog.records]
+    assert "* {} => {}".format(
+        basepath / "BAR.MPEG4", basepath / "bar.mpeg4"
+    ) in messages
+    assert "* {} => {}".format(
+        basepath / "BARRITON.MP4", basepath / "barriton.mp4"
+    ) in messages
+
+
+def test_job_get_target_files_operations(basic_sample):
+    """
+    Target files should be found from a single directory listing without any
+    filesystem operation per entry.
+    """
+    recorder = PhaseRecorder()
+
+    job = Job(
+        basic_sample / "job.json",
+        basic_sample / "files",
+        extensions=["mp4", "txt"],
+        recorder=recorder,
+    )
+
+    files = job.get_target_files()
+
+    assert [item.name for item in files] == [
+        "barriton.mp4", "fake-barriton.mp4.txt", "foo.txt",
+    ]
+    assert recorder.operations_report() == {
+        "planning": {"listdir": 1},
+        "total": {"listdir": 1},
+    }
@@ -84,3 +84,34 @@ def test_collector_scan_directory_single(monkeypatch, media_sample):
         "size": 1059817,
         "asset_storage": None,
     }
+
+
+@pytest.mark.parametrize("method", ["scan_directory", "scan_pipeline"])
+def test_collector_scan_directory_top_directories(media_sample, method):
+    """
+    Slowest and largest directories should be tracked from every walked directories,
+    including the ones which are not collected.
+    """
+    collector = Collector(media_sample, top_directories=2)
+
+    getattr(collector, method)(media_sample)
+
+    report = collector.top_directories_report()
+
+    assert len(report["slowest"]) == 2
+    assert report["slowest"][0]["elapsed"] >= report["slowest"][1]["elapsed"]
+
+    # Other largest directories have the same number of entries so the second one
+    # depends from walk order
+    assert [item["entries"] for item in report["largest"]] == [6, 4]
+    assert report["largest"][0] == {
+        "path": ".",
+        "elapsed": report["largest"][0]["elapsed"],
+        "entries": 6,
+        "files": 1,
+    }
+
+    # Tracking is disabled on default
+    collector = Collector(media_sample)
+    getattr(collector, method)(media_sample)
+    assert collector.top_directories_report() == {"slowest": [], "largest": []}
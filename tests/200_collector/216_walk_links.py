@@ -0,0 +1,89 @@
+import os
+import shutil
+
+import pytest
+
+from deovi.collector import Collector
+
+
+EXPECTED_KEYS = [".", "foo", "foo/bar", "moo", "ping", "ping/pong", "ping/pong/pang"]
+
+
+@pytest.mark.parametrize("follow", [False, True])
+def test_collector_symlink_loop(media_sample, follow):
+    """
+    A symbolic link loop should never be walked twice.
+    """
+    (media_sample / "ping" / "pong" / "loop").symlink_to(media_sample)
+
+    collector = Collector(media_sample, follow_symlinks=follow)
+    collector.run()
+
+    assert sorted(collector.registry.keys()) == EXPECTED_KEYS
+
+
+@pytest.mark.parametrize("follow, expected", [
+    (False, EXPECTED_KEYS),
+    (True, sorted(EXPECTED_KEYS + ["linked"])),
+])
+def test_collector_follow_symlinks(tmp_path, media_sample, follow, expected):
+    """
+    Symbolic links to directories should only be walked when enabled.
+    """
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    shutil.copy(media_sample / "moo" / "SampleVideo_720x480_1mb.mp4", outside)
+    (media_sample / "linked").symlink_to(outside)
+
+    collector = Collector(media_sample, follow_symlinks=follow)
+    collector.run()
+
+    assert sorted(collector.registry.keys()) == expected
+
+
+def test_collector_hardlink_size(tmp_path, media_sample):
+    """
+    Size of a file with multiple hard links should only be counted once.
+    """
+    source = media_sample / "foo" / "bar" / "SampleVideo_720x480_1mb.flv"
+    duplicate = media_sample / "moo" / "Duplicate.flv"
+
+    shutil.copy(source, duplicate)
+    copied = Collector(media_sample).run()
+
+    duplicate.unlink()
+    os.link(source, duplicate)
+    linked = Collector(media_sample).run()
+
+    assert linked["files"] == copied["files"]
+    assert linked["size"] == copied["size"] - source.stat().st_size
+
+
+def test_collector_one_file_system(media_sample):
+    """
+    Directories from another device should be skipped when enabled.
+    """
+    class OtherDevice:
+        """
+        Stats proxy with another device.
+        """
+        def __init__(self, stats):
+            self.stats = stats
+            self.st_dev = stats.st_dev + 1
+
+        def __getattr__(self, name):
+            return getattr(self.stats, name)
+
+    collector = Collector(media_sample, one_file_system=True)
+    stat = collector.fs_op.stat
+
+    def fake_stat(path):
+        stats = stat(path)
+        if path.name == "ping":
+            return OtherDevice(stats)
+        return stats
+
+    collector.fs_op.stat = fake_stat
+    collector.run()
+
+    assert sorted(collector.registry.keys()) == [".", "foo", "foo/bar", "moo"]
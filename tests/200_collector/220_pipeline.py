@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+
+from deovi.collector.pipeline import Pipeline, PipelineStage
+
+
+def test_pipeline_stage_workers():
+    """
+    Stage requires at least one worker.
+    """
+    with pytest.raises(ValueError):
+        PipelineStage("foo", lambda item: item, workers=0)
+
+
+def test_pipeline_run():
+    """
+    Every item should pass through every stages, dropped items should not be passed
+    to next stages and counters should be computed.
+    """
+    results = []
+    lock = threading.Lock()
+
+    def double(item):
+        return item * 2
+
+    def odd_only(item):
+        # Drop item which comes from an even source number
+        return item if item % 4 else None
+
+    def collect(item):
+        with lock:
+            results.append(item)
+        return item
+
+    pipeline = Pipeline([
+        PipelineStage("double", double, workers=3, queue_size=2),
+        PipelineStage("filter", odd_only, workers=2, queue_size=2),
+        PipelineStage("collect", collect, queue_size=2),
+    ])
+
+    stats = pipeline.run(range(1, 11))
+
+    assert sorted(results) == [2, 6, 10, 14, 18]
+
+    assert list(stats.keys()) == ["double", "filter", "collect"]
+    assert stats["double"]["workers"] == 3
+    assert stats["double"]["received"] == 10
+    assert stats["double"]["emitted"] == 10
+    assert stats["filter"]["received"] == 10
+    assert stats["filter"]["emitted"] == 5
+    assert stats["filter"]["dropped"] == 5
+    assert stats["collect"]["received"] == 5
+    assert stats["collect"]["max_queue"] <= 2
+
+
+def test_pipeline_backpressure():
+    """
+    Source should not be consumed further than what the bounded queues can hold while
+    a stage is blocked.
+    """
+    release = threading.Event()
+    produced = []
+
+    def source():
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    def blocked(item):
+        release.wait()
+        return item
+
+    pipeline = Pipeline([
+        PipelineStage("blocked", blocked, queue_size=3),
+    ])
+
+    runner = threading.Thread(target=pipeline.run, args=(source(),))
+    runner.start()
+
+    # Give some time to the source to fill the queue, it can not go further than one
+    # item in worker, three items in queue and one item waiting to be put
+    runner.join(timeout=0.2)
+    assert len(produced) <= 5
+
+    release.set()
+    runner.join()
+
+    assert len(produced) == 20
+    assert pipeline.report()["blocked"]["received"] == 20
+
+
+def test_pipeline_error():
+    """
+    An error from a stage handler should be raised from pipeline once workers have
+    stopped.
+    """
+    def failing(item):
+        if item == 5:
+            raise RuntimeError("Boom")
+        return item
+
+    pipeline = Pipeline([
+        PipelineStage("failing", failing, workers=2, queue_size=1),
+        PipelineStage("noop", lambda item: item),
+    ])
+
+    with pytest.raises(RuntimeError, match="Boom"):
+        pipeline.run(range(100))
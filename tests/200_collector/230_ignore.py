@@ -0,0 +1,130 @@
+import pytest
+
+from deovi.collector import Collector, IgnoreRules
+from deovi.collector.ignore import is_ignored, translate_pattern
+from deovi.utils.instrumentation import PhaseRecorder
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("foo", "foo"),
+    ("*.mkv", "[^/]*\\.mkv"),
+    ("?a", "[^/]a"),
+    ("[!a-c]x", "(?!/)[^a-c]x"),
+    ("**/foo", "(?:.*/)?foo"),
+    ("foo/**", "foo/.*"),
+    ("a/**/b", "a/(?:.*/)?b"),
+    ("a**b", "a[^/]*[^/]*b"),
+    ("\\#foo", "\\#foo"),
+])
+def test_translate_pattern(pattern, expected):
+    """
+    Glob patterns should be translated to regular expressions.
+    """
+    assert translate_pattern(pattern) == expected
+
+
+@pytest.mark.parametrize("lines, path, is_dir, expected", [
+    # No rules
+    ([], "foo", False, None),
+    # Comments and blank lines
+    (["# foo", "", "   "], "# foo", False, None),
+    # Pattern without separator match at any level
+    (["*.txt"], "foo.txt", False, True),
+    (["*.txt"], "foo/bar.txt", False, True),
+    (["*.txt"], "foo.mkv", False, None),
+    # Pattern with separator is anchored
+    (["/foo"], "foo", True, True),
+    (["/foo"], "bar/foo", True, None),
+    (["foo/bar"], "foo/bar", False, True),
+    (["foo/bar"], "ping/foo/bar", False, None),
+    # Directory only pattern
+    (["cache/"], "cache", True, True),
+    (["cache/"], "cache", False, None),
+    (["cache/"], "foo/cache", True, True),
+    # Double star
+    (["**/@eaDir"], "foo/bar/@eaDir", True, True),
+    (["foo/**/*.ts"], "foo/a/b/seg.ts", False, True),
+    (["foo/**/*.ts"], "foo/seg.ts", False, True),
+    # Last matching rule wins and negation
+    (["*.mkv", "!keep.mkv"], "keep.mkv", False, False),
+    (["*.mkv", "!keep.mkv"], "drop.mkv", False, True),
+    (["!keep.mkv", "*.mkv"], "keep.mkv", False, True),
+    # Escaped negation
+    (["\\!foo"], "!foo", False, True),
+])
+def test_ignore_rules_match(lines, path, is_dir, expected):
+    """
+    Rules should match paths with gitignore semantics.
+    """
+    assert IgnoreRules(lines).match(path, is_dir=is_dir) is expected
+
+
+def test_is_ignored_scopes():
+    """
+    Deepest rules should have precedence over parent rules.
+    """
+    parent = IgnoreRules(["*.mkv"])
+    child = IgnoreRules(["!keep.mkv"])
+
+    assert is_ignored("keep.mkv", False, [(parent, "foo/")]) is True
+    assert is_ignored("keep.mkv", False, [(parent, "foo/"), (child, "")]) is False
+    assert is_ignored("drop.mkv", False, [(parent, "foo/"), (child, "")]) is True
+    assert is_ignored("drop.mp4", False, [(parent, "foo/"), (child, "")]) is False
+
+
+def test_collector_exclude(media_sample):
+    """
+    Excluded directories should not be walked at all.
+    """
+    recorder = PhaseRecorder()
+    collector = Collector(
+        media_sample,
+        exclude=["pong/", "*.mkv"],
+        recorder=recorder,
+    )
+    collector.run()
+
+    # Root directory is not collected since it only has a mkv file
+    assert sorted(collector.registry.keys()) == ["foo", "foo/bar", "moo", "ping"]
+    assert [
+        item["name"] for item in collector.registry["foo/bar"]["children_files"]
+    ] == ["SampleVideo_720x480_1mb.flv"]
+    assert recorder.operations_report()["walk"]["listdir"] == 6
+
+
+def test_collector_ignore_file(media_sample):
+    """
+    Rules from ignore files should apply to their directory and children.
+    """
+    (media_sample / ".deoviignore").write_text("*.3gp\n")
+    (media_sample / "ping" / "pong" / ".deoviignore").write_text(
+        "!*.3gp\npang/\n*2mb*\n"
+    )
+
+    collector = Collector(media_sample, allow_empty_dir=True)
+    collector.run()
+
+    assert sorted(collector.registry.keys()) == [
+        ".", "foo", "foo/bar", "moo", "moo/boo", "ping", "ping/pong",
+    ]
+    assert [
+        item["name"] for item in collector.registry["moo"]["children_files"]
+    ] == ["SampleVideo_720x480_1mb.mp4"]
+    assert [
+        item["name"] for item in collector.registry["ping/pong"]["children_files"]
+    ] == ["SampleVideo_720x480_1mb.mkv"]
+
+
+@pytest.mark.parametrize("max_depth, expected", [
+    (0, ["."]),
+    (1, [".", "foo", "moo", "ping"]),
+    (2, [".", "foo", "foo/bar", "moo", "ping", "ping/pong"]),
+])
+def test_collector_max_depth(media_sample, max_depth, expected):
+    """
+    Directories deeper than maximum depth should not be walked.
+    """
+    collector = Collector(media_sample, max_depth=max_depth)
+    collector.run()
+
+    assert sorted(collector.registry.keys()) == expected
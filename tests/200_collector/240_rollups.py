@@ -0,0 +1,88 @@
+import os
+
+from deovi.collector import Collector
+
+
+def test_collector_rollups(media_sample):
+    """
+    Directory rollups should sum media files from the whole directory tree.
+    """
+    collector = Collector(media_sample, rollups=True, top_files=2)
+    collector.run()
+
+    files = {
+        str(path.relative_to(media_sample)): path.stat().st_size
+        for path in media_sample.rglob("*")
+        if path.suffix[1:] in collector.extensions
+    }
+
+    def total(prefix, extension=None):
+        return sum([
+            size
+            for path, size in files.items()
+            if (prefix == "." or path.startswith(prefix + "/")) and (
+                extension is None or path.endswith("." + extension)
+            )
+        ])
+
+    # Directory without media files in its tree has no rollup
+    assert sorted(collector.directory_rollups.keys()) == [
+        ".", "foo", "foo/bar", "moo", "ping", "ping/pong", "ping/pong/pang",
+    ]
+    assert collector.directory_rollups["."]["files"] == len(files)
+    assert collector.directory_rollups["."]["size"] == total(".")
+    assert collector.directory_rollups["ping"] == {
+        "size": total("ping"),
+        "files": 4,
+        "extensions": {
+            "mp4": total("ping", "mp4"),
+            "mkv": total("ping", "mkv"),
+            "3gp": total("ping", "3gp"),
+        },
+    }
+    assert sum([
+        collector.directory_rollups[key]["size"] for key in ("foo", "moo", "ping")
+    ]) + collector.registry["."]["children_files"][0]["size"] == total(".")
+
+    largest = sorted(files.items(), key=lambda x: -x[1])[:2]
+    assert collector.largest_files.items() == [
+        {"path": path, "size": size} for path, size in largest
+    ]
+
+
+def test_collector_rollups_disabled(media_sample):
+    """
+    Nothing should be computed without rollups and tracked files.
+    """
+    collector = Collector(media_sample)
+    collector.run()
+
+    assert collector.directory_rollups == {}
+    assert collector.largest_files.items() == []
+
+
+def test_collector_rollups_hardlinks(media_sample):
+    """
+    Size of a file with multiple hard links should only be counted once in rollups,
+    like in size stats.
+    """
+    source = media_sample / "foo" / "bar" / "SampleVideo_720x480_1mb.flv"
+
+    plain = Collector(media_sample, rollups=True)
+    plain_stats = plain.run()
+
+    os.link(source, media_sample / "moo" / "Link.flv")
+
+    collector = Collector(media_sample, rollups=True)
+    stats = collector.run()
+
+    rollups = collector.directory_rollups
+    assert stats["size"] == plain_stats["size"]
+    assert rollups["."]["size"] == plain.directory_rollups["."]["size"]
+    assert rollups["."]["files"] == plain.directory_rollups["."]["files"] + 1
+    assert rollups["."]["extensions"] == plain.directory_rollups["."]["extensions"]
+    # Link is only counted in one of both directories
+    assert rollups["foo"]["size"] + rollups["moo"]["size"] == (
+        plain.directory_rollups["foo"]["size"] + plain.directory_rollups["moo"]["size"]
+    )
+    assert collector.linked_files == set()
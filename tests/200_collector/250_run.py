@@ -2,9 +2,12 @@ import json
 import uuid
 from pathlib import Path
 
+import pytest
 from freezegun import freeze_time
 
 from deovi.collector import Collector
+from deovi.exceptions import CollectorError
+from deovi.utils.instrumentation import PhaseRecorder
 from deovi.utils.checksum import ChecksumOperator
 from deovi.utils.tests import (
     DUMMY_ISO_DATETIME, timestamp_to_isoformat, dummy_uuid4,
@@ -197,3 +200,103 @@ def test_collector_run_checksum(monkeypatch, media_sample):
     assert second_moo_checksum == first_moo_checksum
     assert second_ping_pong_checksum == first_ping_pong_checksum
     assert second_foo_bar_checksum == first_foo_bar_checksum
+
+
+@freeze_time("2012-10-15 10:00:00")
+def test_collector_run_workers(monkeypatch, media_sample):
+    """
+    Collect with multiple workers per stage should produce the same registry, in the
+    same order, than the sequential scan.
+    """
+    monkeypatch.setattr(Collector, "timestamp_to_isoformat", timestamp_to_isoformat)
+    monkeypatch.setattr(uuid, "uuid4", dummy_uuid4)
+    monkeypatch.setattr(ChecksumOperator, "filepath", dummy_checksumoperator_filepath)
+
+    sequential = Collector(media_sample)
+    sequential.storage.set_basepath(None, checksum=True)
+    sequential.scan_directory(media_sample, checksum=True)
+
+    collector = Collector(
+        media_sample,
+        workers={"metadata": 3, "checksum": 2},
+        queue_size=1,
+    )
+    stats = collector.run(checksum=True)
+
+    assert list(collector.registry.keys()) == list(sequential.registry.keys())
+    assert collector.registry == sequential.registry
+    assert stats == sequential.stats
+
+    assert collector.pipeline_stats["metadata"]["workers"] == 3
+    assert collector.pipeline_stats["checksum"]["workers"] == 2
+    assert collector.pipeline_stats["store"]["received"] == len(collector.registry)
+
+
+def test_collector_run_workers_unknown_stage(media_sample):
+    """
+    Worker numbers can only be given for known stages.
+    """
+    with pytest.raises(CollectorError):
+        Collector(media_sample, workers={"nope": 2})
+
+
+def test_collector_run_recorder(monkeypatch, media_sample):
+    """
+    Collect with an enabled recorder should record every collection phases.
+    """
+    monkeypatch.setattr(Collector, "timestamp_to_isoformat", timestamp_to_isoformat)
+
+    recorder = PhaseRecorder()
+    collector = Collector(media_sample, recorder=recorder)
+
+    dump_destination = media_sample / "dump.json"
+    collector.run(dump_destination, checksum=True)
+
+    phases = recorder.report()["phases"]
+
+    assert sorted(phases.keys()) == [
+        "assets", "checksum", "cover", "dump", "manifest", "store", "walk",
+    ]
+    # Every walked directories, including the ones without media files
+    assert phases["walk"]["items"] == 8
+    assert phases["store"]["items"] == len(collector.registry)
+    assert phases["dump"]["bytes_written"] == dump_destination.stat().st_size
+    assert phases["manifest"]["bytes_read"] > 0
+    assert phases["checksum"]["bytes_read"] > 0
+    # Four cover files are copied
+    assert phases["assets"]["items"] == 4
+    assert phases["assets"]["bytes_written"] > 0
+
+
+def test_collector_run_operations(monkeypatch, media_sample):
+    """
+    Filesystem operations should be counted in stats when recorder is enabled.
+
+    This guards against filesystem operation regressions: directory walk only stat
+    directories and media files, manifest and cover are known from directory listing.
+    """
+    monkeypatch.setattr(Collector, "timestamp_to_isoformat", timestamp_to_isoformat)
+
+    collector = Collector(media_sample, recorder=PhaseRecorder())
+    stats = collector.run(media_sample / "dump.json", checksum=True)
+
+    assert stats["operations"]["walk"] == {
+        # 8 directories and 10 media files
+        "stat": 18,
+        "listdir": 8,
+    }
+    # Only existing manifest are opened
+    assert stats["operations"]["manifest"] == {"open": 2}
+    # Only existing covers are resolved
+    assert stats["operations"]["cover"] == {"resolve": 4}
+    assert stats["operations"]["checksum"] == {"exists": 4, "open": 4}
+    assert stats["operations"]["dump"] == {"open": 1}
+    assert stats["operations"]["assets"] == {
+        "exists": 5, "mkdir": 1, "copy": 4, "stat": 4,
+    }
+    assert "other" not in stats["operations"]
+
+    # Without recorder there is no operations statistics
+    collector = Collector(media_sample)
+    stats = collector.run(media_sample / "dump.json", checksum=True)
+    assert "operations" not in stats
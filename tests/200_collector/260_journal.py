@@ -0,0 +1,139 @@
+import json
+import shutil
+import uuid
+
+import pytest
+from freezegun import freeze_time
+
+from deovi.collector import Collector, CollectorJournal
+from deovi.exceptions import CollectorError
+from deovi.utils.checksum import ChecksumOperator
+from deovi.utils.instrumentation import PhaseRecorder
+from deovi.utils.tests import (
+    timestamp_to_isoformat, dummy_uuid4, dummy_checksumoperator_filepath,
+)
+
+
+@pytest.fixture
+def frozen_collect(monkeypatch):
+    """
+    Patch everything which changes from a collection to another.
+    """
+    monkeypatch.setattr(Collector, "timestamp_to_isoformat", timestamp_to_isoformat)
+    monkeypatch.setattr(uuid, "uuid4", dummy_uuid4)
+    monkeypatch.setattr(ChecksumOperator, "filepath", dummy_checksumoperator_filepath)
+
+
+def test_journal_write(media_sample, tmp_path):
+    """
+    Every stored directory should be appended to journal after its header.
+    """
+    journal = tmp_path / "journal.ndjson"
+
+    collector = Collector(media_sample, journal=journal)
+    collector.run(checksum=True)
+
+    lines = [json.loads(line) for line in journal.read_text().splitlines()]
+
+    assert lines[0] == {
+        "journal": 1,
+        "basepath": str(media_sample),
+        "checksum": True,
+    }
+    assert [item["key"] for item in lines[1:]] == list(collector.registry.keys())
+    assert lines[1]["mtime"] == (media_sample / lines[1]["key"]).stat().st_mtime_ns
+    assert lines[1]["data"]["path"] == str(media_sample / lines[1]["key"])
+    assert "checksum" in lines[1]["data"]
+
+    # Journal is created again when not resuming
+    Collector(media_sample, journal=journal).run(checksum=True)
+    assert len(journal.read_text().splitlines()) == 8
+
+
+@freeze_time("2012-10-15 10:00:00")
+def test_journal_resume_interrupted(frozen_collect, media_sample, tmp_path):
+    """
+    Resuming from an interrupted journal should only scan remaining directories and
+    produce the same dump than a full collection.
+    """
+    journal = tmp_path / "journal.ndjson"
+    # Dumps have the same name so they have the same asset storage directory name
+    (tmp_path / "expected").mkdir()
+    (tmp_path / "resumed").mkdir()
+    expected_dump = tmp_path / "expected" / "registry.json"
+    resumed_dump = tmp_path / "resumed" / "registry.json"
+
+    expected_stats = Collector(media_sample, journal=journal).run(
+        destination=expected_dump,
+        checksum=True,
+    )
+
+    # Keep header and 3 directories with a truncated line for an interruption during
+    # a write
+    lines = journal.read_text().splitlines()
+    journal.write_text("\n".join(lines[:4] + [lines[4][:20]]))
+
+    recorder = PhaseRecorder()
+    collector = Collector(
+        media_sample,
+        journal=journal,
+        resume=True,
+        recorder=recorder,
+    )
+    stats = dict(collector.run(destination=resumed_dump, checksum=True))
+
+    assert stats.pop("resumed") == 3
+    assert stats.pop("operations")["walk"]["listdir"] == 8
+    assert stats.pop("asset_storage").name == expected_stats["asset_storage"].name
+    assert stats == {
+        "directories": expected_stats["directories"],
+        "files": expected_stats["files"],
+        "size": expected_stats["size"],
+    }
+    # Device usage may have changed between collections
+    assert (
+        json.loads(resumed_dump.read_text())["registry"] ==
+        json.loads(expected_dump.read_text())["registry"]
+    )
+    assert recorder.report()["phases"]["manifest"]["items"] == 4
+    # Resumed covers are copied again in the new asset storage
+    assert recorder.report()["phases"]["assets"]["items"] == 4
+
+    # Journal is complete again
+    records = CollectorJournal(journal, media_sample, checksum=True).load()
+    assert list(records.keys()) == list(collector.registry.keys())
+
+
+def test_journal_resume_changed(media_sample, tmp_path):
+    """
+    Directories modified since journal should be scanned again.
+    """
+    journal = tmp_path / "journal.ndjson"
+
+    expected_stats = Collector(media_sample, journal=journal).run()
+
+    shutil.copy(
+        media_sample / "moo" / "SampleVideo_720x480_1mb.mp4",
+        media_sample / "moo" / "SampleVideo_720x480_1mb_copy.mp4",
+    )
+
+    collector = Collector(media_sample, journal=journal, resume=True)
+    stats = collector.run()
+
+    assert stats["resumed"] == 6
+    assert stats["files"] == expected_stats["files"] + 1
+    assert "SampleVideo_720x480_1mb_copy.mp4" in [
+        item["name"] for item in collector.registry["moo"]["children_files"]
+    ]
+
+
+def test_journal_resume_mismatch(media_sample, tmp_path):
+    """
+    Journal can not be resumed with other collection options.
+    """
+    journal = tmp_path / "journal.ndjson"
+
+    Collector(media_sample, journal=journal).run()
+
+    with pytest.raises(CollectorError):
+        Collector(media_sample, journal=journal, resume=True).run(checksum=True)
@@ -0,0 +1,91 @@
+import json
+import os
+
+from deovi.collector import Collector
+from deovi.utils.jsons import ExtendedJsonEncoder
+
+
+def test_collector_identities(media_sample):
+    """
+    File identity should only be collected when enabled.
+    """
+    collector = Collector(media_sample)
+    collector.run()
+    assert "identity" not in collector.registry["moo"]["children_files"][0]
+
+    collector = Collector(media_sample, identities=True)
+    collector.run()
+    item = collector.registry["moo"]["children_files"][0]
+    stats = item["path"].stat()
+    assert item["identity"] == [
+        stats.st_dev, stats.st_ino, stats.st_size, stats.st_mtime_ns,
+    ]
+
+
+def test_collector_previous(media_sample):
+    """
+    Moved files should be matched against their previous payload.
+    """
+    collector = Collector(media_sample, identities=True)
+    collector.run()
+    # Registry as loaded from a dump
+    previous = json.loads(json.dumps(collector.registry, cls=ExtendedJsonEncoder))
+    # Simulate an item added from another tool
+    for item in previous["ping/pong"]["children_files"]:
+        item["checksum"] = "checksum-{}".format(item["name"])
+
+    source = media_sample / "ping" / "pong" / "SampleVideo_720x480_1mb.mkv"
+    source.rename(media_sample / "foo" / "Renamed.mkv")
+
+    collector = Collector(media_sample, previous=previous)
+    stats = collector.run()
+
+    assert stats["moved"] == 1
+
+    moved = [
+        item for item in collector.registry["foo"]["children_files"]
+        if item["name"] == "Renamed.mkv"
+    ][0]
+    assert moved["moved_from"] == "ping/pong/SampleVideo_720x480_1mb.mkv"
+    assert moved["checksum"] == "checksum-SampleVideo_720x480_1mb.mkv"
+    # Collected items are never replaced from previous payload
+    assert moved["relative_dir"].name == "foo"
+
+    # Unmoved file still gets its previous items
+    unmoved = collector.registry["ping/pong"]["children_files"][0]
+    assert "moved_from" not in unmoved
+    assert unmoved["checksum"] == "checksum-SampleVideo_720x480_2mb.mkv"
+
+
+def test_collector_previous_hard_links(media_sample):
+    """
+    Unchanged hard links should not be matched against another link and a moved link
+    should be matched against the link which is not there anymore.
+    """
+    source = media_sample / "moo" / "SampleVideo_720x480_1mb.mp4"
+    os.link(source, media_sample / "moo" / "Link.mp4")
+    os.link(source, media_sample / "foo" / "Other.mp4")
+
+    collector = Collector(media_sample, identities=True)
+    collector.run()
+    previous = json.loads(json.dumps(collector.registry, cls=ExtendedJsonEncoder))
+
+    collector = Collector(media_sample, previous=previous)
+    stats = collector.run()
+
+    assert stats["moved"] == 0
+    for data in collector.registry.values():
+        for item in data["children_files"]:
+            assert "moved_from" not in item
+
+    (media_sample / "moo" / "Link.mp4").rename(media_sample / "foo" / "Moved.mp4")
+
+    collector = Collector(media_sample, previous=previous)
+    stats = collector.run()
+
+    assert stats["moved"] == 1
+    moved = [
+        item for item in collector.registry["foo"]["children_files"]
+        if item["name"] == "Moved.mp4"
+    ][0]
+    assert moved["moved_from"] == "moo/Link.mp4"
@@ -0,0 +1,134 @@
+import os
+
+from deovi.collector import DuplicateFinder
+from deovi.utils.checksum import ChecksumOperator
+from deovi.utils.instrumentation import PhaseRecorder
+
+
+def test_checksum_fingerprint(tmp_path):
+    """
+    Fingerprint should only depend on sampled contents and file size.
+    """
+    checksum_op = ChecksumOperator()
+
+    first = tmp_path / "first.bin"
+    first.write_bytes(b"a" * 100 + b"b" * 100 + b"c" * 100)
+    # Same samples with a different unsampled content
+    second = tmp_path / "second.bin"
+    second.write_bytes(b"a" * 50 + b"x" + b"a" * 49 + b"b" * 100 + b"c" * 100)
+    # Same sampled content but different size
+    third = tmp_path / "third.bin"
+    third.write_bytes(b"a" * 100 + b"b" * 101 + b"c" * 100)
+
+    def fingerprint(path):
+        return checksum_op.fingerprint(path, path.stat().st_size, sample_size=10)
+
+    assert fingerprint(first) == fingerprint(second)
+    assert fingerprint(first) != fingerprint(third)
+
+    # Small file is fully read
+    small = tmp_path / "small.bin"
+    small.write_bytes(b"abc")
+    assert checksum_op.fingerprint(small, 3, sample_size=10) != fingerprint(first)
+
+
+def test_duplicate_finder(tmp_path):
+    """
+    Only files with identical contents should be grouped and only files with
+    colliding sizes or fingerprints should be read.
+    """
+    content = b"a" * 100 + b"b" * 100 + b"c" * 100
+    files = {
+        "original.mkv": content,
+        "copy.mkv": content,
+        "foo/copy.mkv": content,
+        # Same fingerprint but different contents
+        "unsampled.mkv": b"a" * 50 + b"x" + b"a" * 49 + b"b" * 100 + b"c" * 100,
+        # Same size but different fingerprint
+        "start.mkv": b"z" * 100 + b"b" * 100 + b"c" * 100,
+        "unique.mkv": b"unique",
+        "small.mkv": b"small",
+        "small-copy.mkv": b"small",
+        "empty.mkv": b"",
+        "empty-copy.mkv": b"",
+    }
+    for name, data in files.items():
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(data)
+    # Hard link is not a duplicate
+    os.link(tmp_path / "original.mkv", tmp_path / "z-link.mkv")
+
+    finder = DuplicateFinder(sample_size=10)
+    groups = finder.find([
+        (path, path.stat().st_size)
+        for path in sorted(tmp_path.rglob("*.mkv"))
+    ])
+
+    assert [(item["size"], item["reclaimable"], item["paths"]) for item in groups] == [
+        (300, 600, [
+            tmp_path / "copy.mkv",
+            tmp_path / "foo" / "copy.mkv",
+            tmp_path / "original.mkv",
+        ]),
+        (5, 5, [tmp_path / "small-copy.mkv", tmp_path / "small.mkv"]),
+    ]
+    assert groups[0]["checksum"] == ChecksumOperator().file(tmp_path / "copy.mkv")
+    assert finder.stats == {
+        "files": 9,
+        "size_candidates": 7,
+        "fingerprint_candidates": 5,
+        "checksum_candidates": 6,
+    }
+
+    report = finder.report(groups)
+    assert report["duplicates"] == 3
+    assert report["reclaimable"] == 605
+
+
+def test_duplicate_finder_identities(tmp_path):
+    """
+    Known file identities should be used instead of a stat.
+    """
+    recorder = PhaseRecorder()
+    content = b"content"
+    for name in ("first.mkv", "second.mkv", "third.mkv"):
+        (tmp_path / name).write_bytes(content)
+    os.link(tmp_path / "first.mkv", tmp_path / "link.mkv")
+
+    files = [
+        (path, path.stat().st_size)
+        for path in sorted(tmp_path.glob("*.mkv"))
+    ]
+    # Identities as collected, only missing for the third file
+    identities = {
+        path: [path.stat().st_dev, path.stat().st_ino, size, 0]
+        for path, size in files
+        if path.name != "third.mkv"
+    }
+
+    finder = DuplicateFinder(recorder=recorder)
+    groups = finder.find(files, identities=identities)
+
+    assert [item["paths"] for item in groups] == [[
+        tmp_path / "first.mkv",
+        tmp_path / "second.mkv",
+        tmp_path / "third.mkv",
+    ]]
+    assert recorder.phases["identity"]["items"] == 1
+    assert recorder.operations_report()["identity"] == {"stat": 1}
+
+
+def test_duplicate_finder_none(media_sample):
+    """
+    Files without any size collision should never be read.
+    """
+    finder = DuplicateFinder()
+    groups = finder.find([
+        (path, path.stat().st_size)
+        for path in media_sample.rglob("*")
+        if path.is_file()
+    ])
+
+    assert groups == []
+    assert finder.stats["size_candidates"] == 0
@@ -0,0 +1,242 @@
+import os
+from decimal import Decimal
+
+import pytest
+
+from deovi.collector import Collector, FileListing
+from deovi.exceptions import CollectorError
+from deovi.utils.instrumentation import PhaseRecorder
+
+
+def write_find_listing(basepath, destination, extra=None):
+    """
+    Write a listing of basepath like the one from
+    ``find -printf '%P\\t%s\\t%T@\\t%y\\t%l\\n'``.
+    """
+    lines = []
+    paths = [basepath]
+    for root, dirnames, filenames in os.walk(basepath):
+        paths.extend([
+            basepath.joinpath(root, name) for name in dirnames + filenames
+        ])
+
+    for path in sorted(paths):
+        stats = path.lstat()
+        if path.is_symlink():
+            kind, target = "l", os.readlink(path)
+        else:
+            kind, target = "d" if path.is_dir() else "f", ""
+        lines.append("{}\t{}\t{:.10f}\t{}\t{}".format(
+            "" if path == basepath else path.relative_to(basepath).as_posix(),
+            stats.st_size,
+            stats.st_mtime,
+            kind,
+            target,
+        ))
+
+    destination.write_text("\n".join(lines + (extra or [])) + "\n")
+
+    return destination
+
+
+def normalize(registry):
+    """
+    Remove cover destinations with random names and sort files on their name since
+    listing order may differ.
+    """
+    return {
+        key: dict(
+            [(name, value) for name, value in data.items() if name != "cover"],
+            children_files=sorted(data["children_files"], key=lambda x: x["name"]),
+        )
+        for key, data in registry.items()
+    }
+
+
+def test_listing_parse_tar():
+    """
+    Tar verbose listing lines should be parsed.
+    """
+    path, kind, size, mtime, target = FileListing.parse_tar(
+        "-rw-r--r-- user/group   1057149 2023-03-03 15:28:31 ./foo/bar video.mp4\n"
+    )
+    assert target is None
+    assert (path, kind, size, int(mtime)) == (
+        "./foo/bar video.mp4", "f", 1057149, 1677857311
+    )
+
+    assert FileListing.parse_tar(
+        "drwxr-xr-x user/group 0 2023-03-03 15:28:31 ./foo/\n"
+    )[:2] == ("./foo", "d")
+    assert FileListing.parse_tar(
+        "lrwxrwxrwx user/group 0 2023-03-03 15:28:31 ./link -> foo\n"
+    )[:2] == ("./link", "l")
+    assert FileListing.parse_tar(
+        "lrwxrwxrwx user/group 0 2023-03-03 15:28:31 ./link -> ../foo\n"
+    )[4] == "../foo"
+
+
+def test_listing_parse_find():
+    """
+    Find listing lines should be parsed with an optional link target.
+    """
+    assert FileListing.parse_find("foo/video.mp4\t10\t1677857311.5\tf\n") == (
+        "foo/video.mp4", "f", 10, Decimal("1677857311.5"), None,
+    )
+    assert FileListing.parse_find("link\t3\t1677857311.5\tl\tfoo\n")[4] == "foo"
+
+
+def test_listing_links(tmp_path):
+    """
+    Symbolic links should be resolved to their target in listing.
+    """
+    source = tmp_path / "listing.txt"
+    source.write_text(
+        "-rw-r--r-- user/group 5000 2023-03-03 15:28:31 ./foo/video.mp4\n"
+        "lrwxrwxrwx user/group 9 2023-03-03 15:28:31 ./foo/link.mp4 -> video.mp4\n"
+        "lrwxrwxrwx user/group 3 2023-03-03 15:28:31 ./bar -> foo\n"
+        "lrwxrwxrwx user/group 4 2023-03-03 15:28:31 ./broken -> nope\n"
+        "lrwxrwxrwx user/group 4 2023-03-03 15:28:31 ./outside -> ../foo\n"
+        "lrwxrwxrwx user/group 4 2023-03-03 15:28:31 ./loop -> loop\n"
+    )
+    listing = FileListing.load(source, tmp_path, format="tar")
+
+    with listing.scandir(tmp_path) as entries:
+        assert sorted([
+            (item.name, item.is_dir(), item.is_symlink()) for item in entries
+        ]) == [("bar", True, True), ("foo", True, False)]
+
+    with listing.scandir(tmp_path / "bar") as entries:
+        assert sorted([
+            (item.name, item.is_dir(), item.is_symlink()) for item in entries
+        ]) == [("link.mp4", False, True), ("video.mp4", False, False)]
+
+    video = listing.stat(tmp_path / "foo" / "video.mp4")
+    assert listing.stat(tmp_path / "foo" / "link.mp4") is video
+    assert listing.stat(tmp_path / "bar" / "link.mp4") is video
+    assert video.st_size == 5000
+
+    for name in ("broken", "outside", "loop"):
+        with pytest.raises(FileNotFoundError):
+            listing.stat(tmp_path / name)
+
+
+def test_listing_tree(tmp_path):
+    """
+    Listing should create missing parent directories.
+    """
+    source = tmp_path / "listing.txt"
+    source.write_text(
+        "-rw-r--r-- user/group 10 2023-03-03 15:28:31 ./foo/bar/video.mp4\n"
+        "drwxr-xr-x user/group 4096 2023-03-03 15:28:31 ./foo/\n"
+    )
+    listing = FileListing.load(source, tmp_path, format="tar")
+
+    assert listing.stat(tmp_path / "foo").st_size == 4096
+    assert listing.stat(tmp_path / "foo" / "bar").st_size == 0
+    with listing.scandir(tmp_path / "foo") as entries:
+        assert [(item.name, item.is_dir()) for item in entries] == [("bar", True)]
+
+    with pytest.raises(FileNotFoundError):
+        listing.stat(tmp_path / "nope")
+
+
+def test_listing_invalid(tmp_path):
+    """
+    Invalid listing lines should raise an error.
+    """
+    source = tmp_path / "listing.txt"
+
+    source.write_text("foo\t10\n")
+    with pytest.raises(CollectorError):
+        FileListing.load(source, tmp_path)
+
+    source.write_text("../foo\t10\t0\tf\n")
+    with pytest.raises(CollectorError):
+        FileListing.load(source, tmp_path)
+
+
+def test_collector_listing(tmp_path, media_sample):
+    """
+    Registry from a listing should be the same than from filesystem without any
+    stat or listing on filesystem.
+    """
+    expected = Collector(media_sample)
+    expected.run()
+
+    listing = FileListing.load(
+        write_find_listing(media_sample, tmp_path / "listing.txt"),
+        media_sample,
+    )
+    recorder = PhaseRecorder()
+    collector = Collector(media_sample, listing=listing, recorder=recorder)
+    collector.run()
+
+    assert normalize(collector.registry) == normalize(expected.registry)
+    assert collector.stats["files"] == expected.stats["files"]
+    assert collector.stats["size"] == expected.stats["size"]
+    operations = recorder.operations_report().get("walk", {})
+    assert "stat" not in operations
+    assert "listdir" not in operations
+
+
+@pytest.mark.parametrize("follow_symlinks", [False, True])
+def test_collector_listing_symlinks(tmp_path, media_sample, follow_symlinks):
+    """
+    Registry from a listing with file and directory symbolic links should be the same
+    than from filesystem, whether links are followed or not.
+    """
+    (media_sample / "moo" / "Link.mp4").symlink_to("SampleVideo_720x480_1mb.mp4")
+    (media_sample / "ping" / "Parent.mkv").symlink_to(
+        "../moo/SampleVideo_320x240_2mb.3gp"
+    )
+    # Linked directory is excluded so it is only walked through the link
+    (media_sample / "shown").symlink_to("hidden")
+    (media_sample / "hidden").mkdir()
+    (media_sample / "hidden" / "Episode.mkv").write_text("episode")
+    options = {"exclude": ["hidden"], "follow_symlinks": follow_symlinks}
+
+    expected = Collector(media_sample, **options)
+    expected.run()
+
+    listing = FileListing.load(
+        write_find_listing(media_sample, tmp_path / "listing.txt"),
+        media_sample,
+    )
+    collector = Collector(media_sample, listing=listing, **options)
+    collector.run()
+
+    assert normalize(collector.registry) == normalize(expected.registry)
+    assert collector.stats["files"] == expected.stats["files"]
+    assert collector.stats["size"] == expected.stats["size"]
+
+    linked = [
+        item for item in collector.registry["moo"]["children_files"]
+        if item["name"] == "Link.mp4"
+    ][0]
+    assert linked["size"] == (media_sample / "moo" / "Link.mp4").stat().st_size
+    assert ("shown" in collector.registry) is follow_symlinks
+
+
+def test_collector_listing_offline(tmp_path, media_sample):
+    """
+    Listed files which are not on filesystem should be collected.
+    """
+    listing = FileListing.load(
+        write_find_listing(
+            media_sample,
+            tmp_path / "listing.txt",
+            extra=["ghost/Episode.mkv\t42\t1677857311.5\tf"],
+        ),
+        media_sample,
+    )
+    collector = Collector(media_sample, listing=listing)
+    collector.run()
+
+    assert collector.registry["ghost"]["children_files"][0]["size"] == 42
+    assert collector.registry["ghost"]["children_files"][0]["mtime"] == (
+        "2023-03-03T15:28:31+00:00"
+    )
+
+    with pytest.raises(CollectorError):
+        Collector(media_sample, listing=listing, identities=True)
@@ -0,0 +1,152 @@
+import json
+import shutil
+import sys
+
+import pytest
+
+from deovi.collector import Collector, CollectorWatcher
+from deovi.utils.inotify import IN_CLOSE_WRITE, IN_CREATE, Inotify
+
+
+pytestmark = pytest.mark.skipif(
+    not sys.platform.startswith("linux"),
+    reason="Inotify is only available on Linux",
+)
+
+
+def wait_changes(watcher):
+    """
+    Handle events until there is no more.
+    """
+    while watcher.poll(timeout=0.2):
+        pass
+
+
+def test_inotify(tmp_path):
+    """
+    Inotify should read events from watched directory.
+    """
+    inotify = Inotify()
+    wd = inotify.add_watch(tmp_path)
+
+    (tmp_path / "foo.txt").write_text("foo")
+    events = inotify.read(timeout=1)
+    inotify.close()
+
+    assert [(item.wd, item.name) for item in events if item.mask & IN_CREATE] == [
+        (wd, "foo.txt"),
+    ]
+    assert [item.name for item in events if item.mask & IN_CLOSE_WRITE] == [
+        "foo.txt",
+    ]
+
+
+def test_collector_directory_scopes(media_sample):
+    """
+    Directory scopes should be the same than the ones built during walk.
+    """
+    (media_sample / ".deoviignore").write_text("*.3gp\n")
+    (media_sample / "ping" / "pong" / ".deoviignore").write_text("*2mb*\n")
+
+    collector = Collector(media_sample, exclude=["pong/"])
+    scopes = collector.directory_scopes(media_sample / "ping" / "pong" / "pang")
+
+    assert [prefix for rules, prefix in scopes] == [
+        "ping/pong/pang/", "ping/pong/pang/", "pang/",
+    ]
+    assert scopes[0][0] is collector.exclude_rules
+    assert collector.directory_scopes(media_sample)[0][1] == ""
+
+
+def test_collector_watcher(tmp_path, media_sample):
+    """
+    Watcher should collect changed directories again and write the dump.
+    """
+    destination = tmp_path / "registry.json"
+    watcher = CollectorWatcher(Collector(media_sample), destination, checksum=True)
+
+    try:
+        watcher.start()
+        assert len(watcher.watched) == 8
+
+        # New file in an existing directory
+        shutil.copy(
+            media_sample / "moo" / "SampleVideo_720x480_1mb.mp4",
+            media_sample / "moo" / "New.mkv",
+        )
+        # New directory tree
+        (media_sample / "new" / "show").mkdir(parents=True)
+        (media_sample / "new" / "show" / "Episode.mkv").write_text("episode")
+        # Removed directory tree
+        shutil.rmtree(media_sample / "ping" / "pong")
+        # Directory without media files anymore
+        (media_sample / "ping" / "SampleVideo_1280x720_1mb.mp4").unlink()
+
+        wait_changes(watcher)
+        assert watcher.pending is True
+        watcher.flush()
+        assert watcher.pending is False
+    finally:
+        watcher.close()
+
+    registry = json.loads(destination.read_text())["registry"]
+    assert sorted(registry.keys()) == [".", "foo", "foo/bar", "moo", "new/show"]
+    assert sorted([item["name"] for item in registry["moo"]["children_files"]]) == [
+        "New.mkv", "SampleVideo_320x240_2mb.3gp", "SampleVideo_720x480_1mb.mp4",
+    ]
+    assert registry["moo"]["checksum"] is not None
+    # Cover from collected again directory is stored again
+    assert (tmp_path / registry["moo"]["cover"]).exists()
+
+    assert (media_sample / "new" / "show") in watcher.watched
+    assert (media_sample / "ping" / "pong") not in watcher.watched
+    assert not destination.with_name("registry.json.tmp").exists()
+
+
+def test_collector_watcher_rescan(tmp_path, media_sample):
+    """
+    Directories collected again should keep their stored cover and statistics should
+    match a new collection.
+    """
+    destination = tmp_path / "registry.json"
+    collector = Collector(media_sample)
+    watcher = CollectorWatcher(collector, destination)
+
+    try:
+        watcher.start()
+        covers = {
+            key: payload["cover"]
+            for key, payload in collector.registry.items()
+            if payload.get("cover")
+        }
+        assert covers
+
+        for i in range(3):
+            for key in covers:
+                path = media_sample / key
+                (path / "Extra-{}.mkv".format(i)).write_text("extra")
+            # Cover of removed directory is removed from storage
+            if i == 2:
+                shutil.rmtree(media_sample / "ping" / "pong")
+
+            wait_changes(watcher)
+            watcher.flush()
+    finally:
+        watcher.close()
+
+    stored = sorted([
+        str(item.relative_to(tmp_path))
+        for item in tmp_path.glob("registry_*/*")
+    ])
+    assert stored == sorted([
+        str(payload["cover"])
+        for payload in collector.registry.values()
+        if payload.get("cover")
+    ])
+    for key, cover in covers.items():
+        if key in collector.registry:
+            assert collector.registry[key]["cover"] == cover
+
+    expected = Collector(media_sample, allow_media_cover=False).run()
+    for name in ("directories", "files", "size"):
+        assert collector.stats[name] == expected[name]
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from deovi.collector import Collector, DumpReader
+from deovi.exceptions import CollectorError
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024 * 1024])
+def test_dump_reader_json(tmp_path, media_sample, chunk_size):
+    """
+    Directories from a JSON dump should be read one by one whatever the chunk size.
+    """
+    destination = tmp_path / "dump.json"
+    Collector(media_sample).run(destination=destination)
+    expected = json.loads(destination.read_text())
+
+    reader = DumpReader(destination, chunk_size=chunk_size)
+    assert reader.format == "json"
+    assert list(reader) == list(expected["registry"].items())
+    assert reader.device == expected["device"]
+
+
+def test_dump_reader_compact(tmp_path):
+    """
+    Dump without indentation should be read also.
+    """
+    destination = tmp_path / "dump.json"
+    destination.write_text(json.dumps({
+        "registry": {"foo": {"size": 1}, "bar": {"size": 2.5}},
+        "device": {"total": 10},
+    }))
+
+    reader = DumpReader(destination, chunk_size=3)
+    assert list(reader) == [("foo", {"size": 1}), ("bar", {"size": 2.5})]
+    assert reader.device == {"total": 10}
+
+    destination.write_text('{"registry": {"foo": {"size": 1}')
+    with pytest.raises(CollectorError):
+        list(DumpReader(destination, chunk_size=3))
+
+
+def test_dump_reader_ndjson(tmp_path):
+    """
+    Directories from a NDJSON dump should be read from lines with a key.
+    """
+    destination = tmp_path / "dump.ndjson"
+    destination.write_text("\n".join([
+        json.dumps({"journal": 1}),
+        json.dumps({"key": "foo", "data": {"size": 1}}),
+        "",
+        json.dumps({"key": "bar", "data": {"size": 2}}),
+    ]))
+
+    reader = DumpReader(destination)
+    assert reader.format == "ndjson"
+    assert list(reader) == [("foo", {"size": 1}), ("bar", {"size": 2})]
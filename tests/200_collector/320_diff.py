@@ -0,0 +1,133 @@
+import json
+import shutil
+
+import pytest
+
+from deovi.collector import Collector, RegistryDiff
+from deovi.exceptions import CollectorError
+
+
+def write_sorted(source, destination):
+    """
+    Write a dump with directories sorted on their key.
+    """
+    content = json.loads(source.read_text())
+    content["registry"] = dict(sorted(content["registry"].items()))
+    destination.write_text(json.dumps(content, indent=4))
+
+    return destination
+
+
+@pytest.mark.parametrize("checksum", [False, True])
+@pytest.mark.parametrize("sorted_keys", [False, True])
+def test_registry_diff(tmp_path, media_sample, checksum, sorted_keys):
+    """
+    Added, removed and changed directories and files should be found.
+    """
+    old = tmp_path / "old.json"
+    new = tmp_path / "new.json"
+
+    Collector(media_sample).run(destination=old, checksum=checksum)
+
+    # Removed directory
+    shutil.rmtree(media_sample / "ping" / "pong" / "pang")
+    # Added directory
+    (media_sample / "new").mkdir()
+    (media_sample / "new" / "Episode.mkv").write_text("episode")
+    # Changed directory
+    (media_sample / "moo" / "SampleVideo_720x480_1mb.mp4").rename(
+        media_sample / "moo" / "Renamed.mp4"
+    )
+    (media_sample / "moo" / "SampleVideo_320x240_2mb.3gp").write_text("changed")
+    (media_sample / "moo" / "Added.mkv").write_text("added")
+
+    Collector(media_sample).run(destination=new, checksum=checksum)
+
+    if sorted_keys:
+        old = write_sorted(old, tmp_path / "old-sorted.json")
+        new = write_sorted(new, tmp_path / "new-sorted.json")
+
+    diff = RegistryDiff(old, new, sorted_keys=sorted_keys).compare()
+
+    assert list(diff["added"].keys()) == ["new"]
+    assert diff["removed"] == ["ping/pong/pang"]
+    # Directory mtime of parent changes from removed or added directories
+    assert sorted(diff["changed"].keys()) == [".", "moo", "ping/pong"]
+
+    files = diff["changed"]["moo"]["files"]
+    assert sorted([item["name"] for item in files["added"]]) == [
+        "Added.mkv", "Renamed.mp4",
+    ]
+    assert files["removed"] == ["SampleVideo_720x480_1mb.mp4"]
+    assert [item["name"] for item in files["changed"]] == [
+        "SampleVideo_320x240_2mb.3gp",
+    ]
+    assert diff["changed"]["ping/pong"]["files"] == {
+        "added": [], "removed": [], "changed": [],
+    }
+    assert diff["stats"] == {
+        "added_directories": 1,
+        "removed_directories": 1,
+        "changed_directories": 3,
+        "added_files": 2,
+        "removed_files": 1,
+        "changed_files": 1,
+    }
+
+
+def test_registry_diff_unchanged(tmp_path, media_sample):
+    """
+    Directories should not change between two collections without changes, even if
+    their cover destination always changes.
+    """
+    old = tmp_path / "old.json"
+    new = tmp_path / "new.json"
+    Collector(media_sample).run(destination=old)
+    Collector(media_sample).run(destination=new)
+
+    diff = RegistryDiff(old, new).compare()
+    assert diff["added"] == {}
+    assert diff["removed"] == []
+    assert diff["changed"] == {}
+
+
+@pytest.mark.parametrize("sorted_keys", [False, True])
+def test_registry_diff_checksum_modes(tmp_path, media_sample, sorted_keys):
+    """
+    Directories should not change when only one dump has checksums.
+    """
+    old = tmp_path / "old.json"
+    new = tmp_path / "new.json"
+    Collector(media_sample).run(destination=old, checksum=True)
+    Collector(media_sample).run(destination=new)
+
+    if sorted_keys:
+        old = write_sorted(old, tmp_path / "old-sorted.json")
+        new = write_sorted(new, tmp_path / "new-sorted.json")
+
+    for first, second in ((old, new), (new, old)):
+        diff = RegistryDiff(first, second, sorted_keys=sorted_keys).compare()
+        assert diff["changed"] == {}
+        assert diff["stats"]["changed_directories"] == 0
+
+    # A change is still found and checksums are not reported as changed
+    (media_sample / "moo" / "Added.mkv").write_text("added")
+    Collector(media_sample).run(destination=new)
+    if sorted_keys:
+        new = write_sorted(new, tmp_path / "new-sorted.json")
+
+    diff = RegistryDiff(old, new, sorted_keys=sorted_keys).compare()
+    assert "moo" in diff["changed"]
+    assert "checksum" not in diff["changed"]["moo"]["fields"]
+    assert "cover_checksum" not in diff["changed"]["moo"]["fields"]
+
+
+def test_registry_diff_not_sorted(tmp_path, media_sample):
+    """
+    Comparing unsorted dumps as sorted ones should raise an error.
+    """
+    old = tmp_path / "old.json"
+    Collector(media_sample).run(destination=old)
+
+    with pytest.raises(CollectorError):
+        RegistryDiff(old, old, sorted_keys=True).compare()
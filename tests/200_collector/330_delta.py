@@ -0,0 +1,109 @@
+import json
+import shutil
+
+import pytest
+
+from deovi.collector import Collector, apply_delta
+from deovi.exceptions import CollectorError
+
+
+@pytest.mark.parametrize("checksum", [False, True])
+def test_collector_delta(tmp_path, media_sample, checksum):
+    """
+    Delta should only include changed directories and applying it to the base
+    registry should give the new registry.
+    """
+    base = tmp_path / "base.json"
+    destination = tmp_path / "registry.json"
+
+    Collector(media_sample).run(destination=base, checksum=checksum)
+
+    shutil.rmtree(media_sample / "ping" / "pong" / "pang")
+    (media_sample / "new").mkdir()
+    (media_sample / "new" / "Episode.mkv").write_text("episode")
+    (media_sample / "moo" / "Added.mkv").write_text("added")
+
+    collector = Collector(media_sample, delta_against=base)
+    stats = collector.run(destination=destination, checksum=checksum)
+
+    delta_path = tmp_path / "registry.delta.json"
+    delta = json.loads(delta_path.read_text())
+    registry = json.loads(destination.read_text())["registry"]
+
+    assert delta["base"]["path"] == str(base)
+    assert delta["base"]["checksum"] == collector.checksum_op.file(base)
+    assert list(delta["added"].keys()) == ["new"]
+    assert delta["removed"] == ["ping/pong/pang"]
+    # Parent directories of removed or added directories have a new mtime
+    assert sorted(delta["changed"].keys()) == [".", "moo", "ping/pong"]
+    assert delta["changed"]["moo"] == registry["moo"]
+    assert stats["delta"] == delta["stats"]
+    assert delta["stats"]["unchanged"] == (
+        len(registry) - delta["stats"]["added"] - delta["stats"]["changed"]
+    )
+
+    # Covers are copied again on each collection, so they are ignored
+    expected = {
+        key: {k: v for k, v in item.items() if k != "cover"}
+        for key, item in registry.items()
+    }
+    applied = apply_delta(json.loads(base.read_text())["registry"], delta)
+    assert {
+        key: {k: v for k, v in item.items() if k != "cover"}
+        for key, item in applied.items()
+    } == expected
+
+
+def test_collector_delta_only(tmp_path, media_sample):
+    """
+    With delta only, delta should be written to destination even if it is the base
+    dump itself.
+    """
+    base = tmp_path / "base.json"
+    Collector(media_sample).run(destination=base)
+
+    stats = Collector(media_sample, delta_against=base, delta_only=True).run(
+        destination=base
+    )
+
+    delta = json.loads(base.read_text())
+    assert "registry" not in delta
+    assert delta["added"] == {}
+    assert delta["changed"] == {}
+    assert delta["removed"] == []
+    assert stats["delta"]["unchanged"] == stats["directories"]
+    assert (tmp_path / "base.delta.json").exists() is False
+
+    with pytest.raises(CollectorError):
+        Collector(media_sample, delta_only=True)
+
+
+def test_collector_delta_empty(tmp_path, media_sample):
+    """
+    When every directory has been removed, delta should remove all of them from base
+    although there is no dump to write.
+    """
+    base = tmp_path / "base.json"
+    destination = tmp_path / "registry.json"
+
+    Collector(media_sample).run(destination=base)
+    registry = json.loads(base.read_text())["registry"]
+
+    for path in media_sample.iterdir():
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+
+    collector = Collector(media_sample, delta_against=base)
+    stats = collector.run(destination=destination)
+
+    assert collector.registry == {}
+    assert destination.exists() is False
+
+    delta = json.loads((tmp_path / "registry.delta.json").read_text())
+    assert delta["added"] == {}
+    assert delta["changed"] == {}
+    assert sorted(delta["removed"]) == sorted(registry.keys())
+    assert stats["delta"]["removed"] == len(registry)
+    assert apply_delta(registry, delta) == {}
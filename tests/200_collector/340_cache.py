@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from deovi.collector import Collector, RegistryCache, registry_cache_path
+from deovi.collector.cache import isoformat_to_timestamp, write_registry_cache
+from deovi.exceptions import CollectorError
+
+
+def test_registry_cache_path(tmp_path):
+    """
+    Cache file name should be the dump file name with cache suffix.
+    """
+    assert registry_cache_path(tmp_path / "plop.json") == tmp_path / "plop.json.bin"
+
+
+def test_registry_cache_read(tmp_path):
+    """
+    Cache should behave like the registry it has been written from.
+    """
+    registry = {
+        "foo": {
+            "size": 10,
+            "mtime": "2024-04-28T00:06:48+00:00",
+            "children_files": [
+                {
+                    "name": "Episode 1.mkv",
+                    "extension": "mkv",
+                    "size": 4,
+                    "mtime": "2024-04-28T00:06:48+00:00",
+                },
+                {
+                    "name": "Épisode 2.mp4",
+                    "extension": "mp4",
+                    "size": 6,
+                    "mtime": "2024-04-27T00:06:48+00:00",
+                },
+            ],
+        },
+        "bar/ping": {"size": 2, "title": "Ping", "children_files": []},
+        "bar": {
+            "size": 3,
+            "children_files": [{"name": "Movie.mkv", "extension": "mkv", "size": 3}],
+        },
+    }
+    destination = tmp_path / "registry.bin"
+    with destination.open("wb") as fp:
+        size = write_registry_cache(fp, registry, device={"total": 42})
+    assert size == destination.stat().st_size
+
+    with RegistryCache(destination) as cache:
+        assert len(cache) == 3
+        assert list(cache) == ["foo", "bar/ping", "bar"]
+        assert dict(cache.items()) == registry
+        assert cache["bar/ping"] == registry["bar/ping"]
+        assert "bar" in cache
+        assert "nope" not in cache
+        assert "ba" not in cache
+        assert cache.get("nope") is None
+        with pytest.raises(KeyError):
+            cache["nope"]
+        assert cache.device == {"total": 42}
+
+        mtime = isoformat_to_timestamp("2024-04-28T00:06:48+00:00")
+        assert list(cache.directories()) == [
+            ("foo", 10, mtime), ("bar/ping", 2, 0.0), ("bar", 3, 0.0),
+        ]
+        assert [item[1] for item in cache.files()] == [
+            "Episode 1.mkv", "Épisode 2.mp4", "Movie.mkv",
+        ]
+        assert list(cache.files("foo"))[0] == ("foo", "Episode 1.mkv", "mkv", 4, mtime)
+        assert list(cache.files("bar/ping")) == []
+        assert list(cache.files("nope")) == []
+
+
+def test_registry_cache_invalid(tmp_path):
+    """
+    A file which is not a registry cache should raise an error.
+    """
+    destination = tmp_path / "registry.bin"
+    destination.write_text("{}")
+
+    with pytest.raises(CollectorError):
+        RegistryCache(destination)
+
+    destination.write_text("")
+    with pytest.raises(CollectorError):
+        RegistryCache(destination)
+
+
+def test_collector_registry_cache(tmp_path, media_sample):
+    """
+    Collector should write a cache with the same registry than dump.
+    """
+    destination = tmp_path / "registry.json"
+    Collector(media_sample, registry_cache=True).run(
+        destination=destination, checksum=True
+    )
+
+    dump = json.loads(destination.read_text())
+    with RegistryCache(registry_cache_path(destination)) as cache:
+        assert dict(cache.items()) == dump["registry"]
+        assert cache.device == dump["device"]
+
+    with pytest.raises(CollectorError):
+        Collector(
+            media_sample,
+            registry_cache=True,
+            delta_against=destination,
+            delta_only=True,
+        )
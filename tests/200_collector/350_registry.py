@@ -0,0 +1,209 @@
+import datetime
+import json
+import os
+
+import pytest
+
+from deovi.collector import Collector, Registry, registry_index_path
+from deovi.collector.registry import decode_value, scan_dump
+from deovi.exceptions import CollectorError
+
+
+def write_dump(path, content, **kwargs):
+    """
+    Write a dump and return its content.
+    """
+    path.write_text(json.dumps(content, **kwargs))
+
+    return content
+
+
+SAMPLE = {
+    "device": {"total": 42},
+    "registry": {
+        "foo": {
+            "title": "Foo {[\"}",
+            "size": 10,
+            "children_files": [
+                {
+                    "name": "Episode 1.mkv",
+                    "extension": "mkv",
+                    "size": 4,
+                    "mtime": "2024-04-28T00:06:48+00:00",
+                },
+                {
+                    "name": "Épisode 2.mp4",
+                    "extension": "mp4",
+                    "size": 6,
+                    "mtime": "2024-04-27T00:06:48+00:00",
+                },
+            ],
+        },
+        "bar": {
+            "size": 3,
+            "children_files": [
+                {
+                    "name": "Movie.mkv",
+                    "extension": "mkv",
+                    "size": 3,
+                    "mtime": "2024-04-20T00:06:48+00:00",
+                },
+            ],
+        },
+        "bar/ping": {"size": 0, "children_files": []},
+    },
+    "largest_files": [{"path": "foo/Épisode 2.mp4", "size": 6}],
+}
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"indent": 4},
+    {"indent": 4, "ensure_ascii": False},
+    {"separators": (",", ":")},
+])
+def test_scan_dump(tmp_path, kwargs):
+    """
+    Every directory and root item should be decoded with their positions whatever
+    the dump formatting.
+    """
+    destination = tmp_path / "dump.json"
+    write_dump(destination, SAMPLE, **kwargs)
+    buffer = destination.read_bytes()
+
+    values = {}
+    for name, start, end, value in scan_dump(buffer):
+        assert json.loads(buffer[start:end]) == value
+        values[name] = value
+
+    assert values == {
+        "root:device": SAMPLE["device"],
+        "registry:foo": SAMPLE["registry"]["foo"],
+        "registry:bar": SAMPLE["registry"]["bar"],
+        "registry:bar/ping": SAMPLE["registry"]["bar/ping"],
+        "root:largest_files": SAMPLE["largest_files"],
+    }
+
+
+@pytest.mark.parametrize("content", [
+    '{"registry": {"foo": {"name": "foo}}}',
+    '{"registry": {"foo": {"name": "foo"}}',
+])
+def test_scan_dump_invalid(content):
+    """
+    Invalid dump structure should raise an error.
+    """
+    with pytest.raises(CollectorError):
+        list(scan_dump(content.encode("utf-8")))
+
+
+def test_decode_value_chunks(monkeypatch):
+    """
+    Values larger than the first chunk should be decoded, even with a multibyte
+    character cut at the end of a chunk.
+    """
+    monkeypatch.setattr("deovi.collector.registry.DECODE_CHUNK_SIZE", 3)
+
+    content = json.dumps(
+        {"name": "Épisode", "files": ["é" * 10]}, ensure_ascii=False
+    ).encode("utf-8")
+    buffer = b"  " + content + b", {}"
+
+    assert decode_value(buffer, 2) == (json.loads(content), 2 + len(content))
+
+
+def test_registry_access(tmp_path):
+    """
+    Registry should behave like the registry from dump and build its index once.
+    """
+    destination = tmp_path / "dump.json"
+    write_dump(destination, SAMPLE, indent=4, ensure_ascii=False)
+    index = registry_index_path(destination)
+
+    with Registry(destination) as registry:
+        assert index.exists()
+        assert len(registry) == 3
+        assert list(registry) == ["foo", "bar", "bar/ping"]
+        assert dict(registry.items()) == SAMPLE["registry"]
+        assert registry["bar"] == SAMPLE["registry"]["bar"]
+        assert registry.get("nope") is None
+        assert "bar/ping" in registry
+        assert registry.device == {"total": 42}
+        with pytest.raises(KeyError):
+            registry["nope"]
+
+    # Index is loaded as long as dump has not changed
+    built = index.stat().st_mtime_ns
+    with Registry(destination) as registry:
+        assert registry["foo"] == SAMPLE["registry"]["foo"]
+    assert index.stat().st_mtime_ns == built
+
+    # Index is built again once dump has changed
+    content = write_dump(destination, {"registry": {"plop": {"size": 1}}})
+    with Registry(destination) as registry:
+        assert dict(registry.items()) == content["registry"]
+        assert registry.device is None
+
+
+def test_registry_filters(tmp_path):
+    """
+    Files and directories should be filtered on file extension, size and mtime.
+    """
+    destination = tmp_path / "dump.json"
+    write_dump(destination, SAMPLE, indent=4)
+
+    def names(items):
+        return [item["name"] for key, item in items]
+
+    with Registry(destination) as registry:
+        assert names(registry.files()) == [
+            "Episode 1.mkv", "Épisode 2.mp4", "Movie.mkv",
+        ]
+        assert names(registry.files(extension="mkv")) == [
+            "Episode 1.mkv", "Movie.mkv",
+        ]
+        assert names(registry.files(extension=["mp4", "avi"])) == ["Épisode 2.mp4"]
+        assert names(registry.files(min_size=4)) == ["Episode 1.mkv", "Épisode 2.mp4"]
+        assert names(registry.files(max_size=3)) == ["Movie.mkv"]
+        assert names(registry.files(
+            after=datetime.datetime(2024, 4, 27, tzinfo=datetime.timezone.utc),
+        )) == ["Episode 1.mkv", "Épisode 2.mp4"]
+        assert names(registry.files(
+            before=datetime.datetime(
+                2024, 4, 27, tzinfo=datetime.timezone.utc
+            ).timestamp(),
+            extension="mkv",
+        )) == ["Movie.mkv"]
+
+        assert [key for key, data in registry.filter(extension="mkv")] == [
+            "foo", "bar",
+        ]
+        assert [key for key, data in registry.filter(min_size=5)] == ["foo"]
+        assert list(registry.filter(extension="avi")) == []
+
+
+def test_registry_invalid(tmp_path):
+    """
+    An invalid dump should raise an error and not leave any index.
+    """
+    destination = tmp_path / "dump.json"
+    destination.write_text('{"registry": {"foo": {"name": "foo"}}')
+
+    with pytest.raises(CollectorError):
+        Registry(destination)
+
+    assert os.listdir(tmp_path) == ["dump.json"]
+
+
+def test_registry_collector(tmp_path, media_sample):
+    """
+    Registry should give the same directories than the dump from collector.
+    """
+    destination = tmp_path / "dump.json"
+    Collector(media_sample, top_files=2, rollups=True).run(
+        destination=destination, checksum=True
+    )
+
+    dump = json.loads(destination.read_text())
+    with Registry(destination) as registry:
+        assert dict(registry.items()) == dump["registry"]
+        assert registry.device == dump["device"]
@@ -0,0 +1,174 @@
+import json
+
+import pytest
+
+from deovi.collector import QueryCondition, QueryIndex, Registry, RegistryQuery
+from deovi.collector.query import parse_size, query_index_path
+from deovi.exceptions import CollectorError
+
+
+def media_file(name, size, mtime="2024-04-28T00:06:48+00:00", **kwargs):
+    extension = name.rsplit(".", 1)[-1]
+    return dict(
+        name=name,
+        extension=extension,
+        container={"mkv": "Matroska", "mp4": "MPEG-4"}.get(extension, "Unknow"),
+        size=size,
+        mtime=mtime,
+        **kwargs
+    )
+
+
+SAMPLE = {
+    "device": {"total": 42},
+    "registry": {
+        "Shows/Foo": {
+            "title": "Foo show",
+            "cover": "foo.jpg",
+            "tmdb": {"id": 12},
+            "children_files": [
+                media_file("Foo {}.mkv".format(i), i * 1024**3) for i in range(1, 13)
+            ],
+        },
+        "Shows/Bar": {
+            "title": "Bar show",
+            "children_files": [
+                media_file("Bar {}.mkv".format(i), i * 1024**2) for i in range(1, 13)
+            ],
+        },
+        "Movies": {
+            "cover": "movies.jpg",
+            "children_files": [
+                media_file("Ping.mp4", 9 * 1024**3, "2020-01-01T00:00:00+00:00"),
+                media_file("Pong.avi", 10, "2020-06-01T00:00:00+00:00"),
+            ],
+        },
+        "Empty": {"children_files": []},
+    },
+}
+
+
+@pytest.fixture
+def sample_registry(tmp_path):
+    """
+    Open a registry from sample dump.
+    """
+    destination = tmp_path / "dump.json"
+    destination.write_text(json.dumps(SAMPLE, indent=4))
+
+    with Registry(destination) as registry:
+        yield registry
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("10", 10),
+    ("1K", 1024),
+    ("1.5M", int(1.5 * 1024**2)),
+    ("8G", 8 * 1024**3),
+    ("2TiB", 2 * 1024**4),
+    ("700 mb", 700 * 1024**2),
+])
+def test_parse_size(value, expected):
+    """
+    Sizes should be parsed with their unit.
+    """
+    assert parse_size(value) == expected
+
+
+@pytest.mark.parametrize("expression", [
+    "plop",
+    "dir",
+    "files",
+    "files~3",
+    "!file.size>3",
+    "file.size>big",
+    "file.mtime<yesterday",
+])
+def test_condition_invalid(expression):
+    """
+    Invalid expressions should raise an error.
+    """
+    with pytest.raises(CollectorError):
+        QueryCondition(expression)
+
+
+@pytest.mark.parametrize("expression, payload, expected", [
+    ("dir.cover", {"cover": "foo.jpg"}, True),
+    ("dir.cover", {"cover": None}, False),
+    ("!dir.cover", {}, True),
+    ("dir.title~*FOO*", {"title": "Foo show"}, True),
+    ("dir.title~*a=b*", {"title": "a=b"}, True),
+    ("dir.title=Foo", {"title": "Foo show"}, False),
+    ("dir.title!=Foo", {}, True),
+    ("dir.tmdb.id=12", {"tmdb": {"id": 12}}, True),
+    ("dir.tmdb.id>=13", {"tmdb": {"id": 12}}, False),
+    ("dir.tmdb.id=12", {"tmdb": "12"}, False),
+    ("file.size>1K", {"size": 1025}, True),
+    ("file.size<=1K", {"size": 1025}, False),
+    ("file.mtime>2024-01-01", {"mtime": "2024-04-28T00:06:48+00:00"}, True),
+    ("file.mtime<2024-01-01T00:00:00+02:00", {"mtime": "2023-12-31T22:00:00"}, False),
+    ("file.year=2024", {"year": 2024}, True),
+    ("file.year>abc", {"year": 2024}, False),
+])
+def test_condition_match(expression, payload, expected):
+    """
+    Conditions should be matched against payloads.
+    """
+    assert QueryCondition(expression).match(payload) is expected
+
+
+def test_query_index(sample_registry):
+    """
+    Index should be built once and give candidate file rows.
+    """
+    path = query_index_path(sample_registry.path)
+
+    with QueryIndex(sample_registry) as index:
+        assert sorted(index.values("container")) == ["MPEG-4", "Matroska", "Unknow"]
+        assert len(index.rows("extension", "mkv")) == 24
+        assert len(index.rows("extension", "nope")) == 0
+
+        big = index.candidates(QueryCondition("file.size>8G"))
+        assert len(big) >= 5
+        assert index.candidates(QueryCondition("file.mtime<2021-01-01")) == {24, 25}
+        assert index.candidates(QueryCondition("file.name~*")) is None
+
+    built = path.stat().st_mtime_ns
+    with QueryIndex(sample_registry):
+        pass
+    assert path.stat().st_mtime_ns == built
+
+
+@pytest.mark.parametrize("expressions, expected", [
+    ([], {
+        "Shows/Foo": 12, "Shows/Bar": 12, "Movies": 2, "Empty": 0,
+    }),
+    (["dir.cover"], {"Shows/Foo": 12, "Movies": 2}),
+    (["dir.cover", "file.extension=mkv", "files>10"], {"Shows/Foo": 12}),
+    (["file.extension=mkv", "files>12"], {}),
+    (["file.size>8G"], {"Shows/Foo": 4, "Movies": 1}),
+    (["file.size>=8G", "file.container=Matroska"], {"Shows/Foo": 5}),
+    (["file.mtime<2020-03-01"], {"Movies": 1}),
+    (["file.name~pong*"], {"Movies": 1}),
+    (["dir.title~*show", "file.size<2M"], {"Shows/Bar": 1}),
+    (["files=0"], {"Empty": 0}),
+])
+@pytest.mark.parametrize("indexed", [False, True])
+def test_registry_query(sample_registry, expressions, expected, indexed):
+    """
+    Query should give the same results with or without indexes.
+    """
+    conditions = [QueryCondition(item) for item in expressions]
+    index = QueryIndex(sample_registry) if indexed else None
+
+    results = {
+        key: len(files)
+        for key, payload, files in RegistryQuery(
+            sample_registry, conditions, index=index
+        ).run()
+    }
+
+    if index:
+        index.close()
+
+    assert results == expected
@@ -0,0 +1,224 @@
+import json
+import shutil
+
+import pytest
+
+from deovi.collector import Collector, DumpMerger, NdjsonSink
+from deovi.collector.merge import device_identity, namespace_key, payload_basepath
+from deovi.exceptions import CollectorError
+
+
+def collect_sorted(source, destination):
+    """
+    Collect a directory and write its dump with directories sorted on their key.
+    """
+    Collector(source, sort_keys=True).run(destination=destination)
+
+    return json.loads(destination.read_text())
+
+
+@pytest.mark.parametrize("key, payload, expected", [
+    (".", {"path": "/media/foo", "relative_dir": "."}, "/media/foo"),
+    ("bar/ping", {"path": "/media/foo/bar/ping"}, "/media/foo"),
+    (
+        "bar/ping",
+        {"path": "/media/foo/bar/ping", "relative_dir": "bar/ping"},
+        "/media/foo",
+    ),
+    ("bar/ping", {"path": "/media/foo/nope"}, None),
+    ("bar", {}, None),
+])
+def test_payload_basepath(key, payload, expected):
+    """
+    Basepath should be guessed from directory path and its relative path.
+    """
+    assert payload_basepath(key, payload) == expected
+
+
+@pytest.mark.parametrize("namespace, key, expected", [
+    ("disk1", ".", "disk1"),
+    ("disk1", "foo/bar", "disk1/foo/bar"),
+    ("/media/disk1/", "foo", "/media/disk1/foo"),
+])
+def test_namespace_key(namespace, key, expected):
+    """
+    Directory key should be prefixed with namespace.
+    """
+    assert namespace_key(namespace, key) == expected
+
+
+def test_merge_json(tmp_path, media_sample):
+    """
+    Merged dump should have the same structure as a collector dump, with sorted
+    namespaced keys and device informations for each dump.
+    """
+    other = tmp_path / "other"
+    shutil.copytree(media_sample, other)
+
+    first = collect_sorted(media_sample, tmp_path / "first.json")
+    second = collect_sorted(other, tmp_path / "second.json")
+
+    destination = tmp_path / "merged.json"
+    merger = DumpMerger([tmp_path / "second.json", tmp_path / "first.json"])
+    with destination.open("w") as fp:
+        count = merger.write(fp)
+
+    content = json.loads(destination.read_text())
+    # Written like json.dump would do
+    assert destination.read_text() == json.dumps(content, indent=4)
+
+    expected = {}
+    for basepath, dump in ((str(media_sample), first), (str(other), second)):
+        for key, payload in dump["registry"].items():
+            expected[namespace_key(basepath, key)] = payload
+
+    assert count == len(expected)
+    assert list(content["registry"].keys()) == sorted(expected.keys())
+    assert content["registry"] == expected
+    assert merger.unsorted == []
+
+    assert content["devices"] == {
+        str(other): second["device"],
+        str(media_sample): first["device"],
+    }
+    # Both dumps are on the same device which is counted once
+    assert first["device"]["id"] == second["device"]["id"]
+    assert content["device"]["total"] == first["device"]["total"]
+
+
+def test_merge_ndjson(tmp_path):
+    """
+    NDJSON dumps should be merged with namespace from their header or from given
+    namespaces, into a NDJSON merged dump.
+    """
+    first = tmp_path / "first.ndjson"
+    first.write_text("\n".join([
+        json.dumps({"basepath": "/media/disk1", "checksum": False}),
+        json.dumps({"key": ".", "mtime": 1, "data": {"size": 1}}),
+        json.dumps({"key": "b", "mtime": 1, "data": {"size": 2}}),
+    ]))
+    second = tmp_path / "second.ndjson"
+    second.write_text("\n".join([
+        json.dumps({"key": "a", "data": {"size": 3}}),
+        json.dumps({"key": "c", "data": {"size": 4}}),
+    ]))
+
+    destination = tmp_path / "merged.ndjson"
+    merger = DumpMerger([first, second], namespaces=["/media/disk1", "/media/disk0"])
+    with destination.open("w") as fp:
+        assert merger.write(fp, format="ndjson") == 4
+
+    lines = [json.loads(item) for item in destination.read_text().splitlines()]
+    assert [(item["key"], item["data"]["size"]) for item in lines[:-1]] == [
+        ("/media/disk0/a", 3),
+        ("/media/disk0/c", 4),
+        ("/media/disk1", 1),
+        ("/media/disk1/b", 2),
+    ]
+    assert lines[-1] == {
+        "devices": {"/media/disk1": None, "/media/disk0": None},
+        "device": None,
+    }
+
+    # Namespace from journal header and from file name
+    merger = DumpMerger([first, second])
+    assert [key for key, data in merger.merge()] == [
+        "/media/disk1", "/media/disk1/b", "second/a", "second/c",
+    ]
+
+
+def test_merge_ndjson_sink(tmp_path, media_sample):
+    """
+    Device informations from the header of a NDJSON sink output should be merged.
+    """
+    other = tmp_path / "other"
+    shutil.copytree(media_sample, other)
+
+    first = tmp_path / "first.ndjson"
+    Collector(media_sample, sinks=[NdjsonSink(first)]).run()
+    second = collect_sorted(other, tmp_path / "second.json")
+    header = json.loads(first.read_text().splitlines()[0])
+
+    merger = DumpMerger([first, tmp_path / "second.json"], namespaces=["x", "y"])
+    destination = tmp_path / "merged.json"
+    with destination.open("w") as fp:
+        merger.write(fp)
+
+    content = json.loads(destination.read_text())
+    assert content["devices"] == {"x": header["device"], "y": second["device"]}
+    assert content["devices"]["x"] is not None
+    assert content["device"]["total"] == header["device"]["total"]
+
+
+def test_merge_unsorted(caplog, tmp_path):
+    """
+    Unsorted dumps should be merged with a warning.
+    """
+    first = tmp_path / "first.ndjson"
+    first.write_text("\n".join([
+        json.dumps({"key": "b", "data": {}}),
+        json.dumps({"key": "a", "data": {}}),
+    ]))
+    second = tmp_path / "second.ndjson"
+    second.write_text(json.dumps({"key": "a", "data": {}}))
+
+    merger = DumpMerger([first, second])
+    assert sorted([key for key, data in merger.merge()]) == [
+        "first/a", "first/b", "second/a",
+    ]
+    assert merger.unsorted == ["first"]
+
+
+@pytest.mark.parametrize("device, expected", [
+    ({"id": 1, "total": 10, "used": 4, "free": 6}, (1, 10)),
+    ({"total": 10, "used": 4, "free": 6}, (10, 4, 6)),
+])
+def test_device_identity(device, expected):
+    """
+    Device should be identified from its id, else from its sizes.
+    """
+    assert device_identity(device) == expected
+
+
+def test_merge_total_device():
+    """
+    Devices should be summed once for each device identity.
+    """
+    merger = DumpMerger([])
+    merger.devices = {
+        "disk1": {"id": 1, "total": 100, "used": 40, "free": 60, "percentage": 40},
+        "disk1/shows": {
+            "id": 1, "total": 100, "used": 40, "free": 60, "percentage": 40,
+        },
+        "disk2": {"id": 2, "total": 100, "used": 80, "free": 20, "percentage": 80},
+        "disk3": None,
+    }
+
+    assert merger.total_device() == {
+        "total": 200,
+        "used": 120,
+        "free": 80,
+        "percentage": 60.0,
+    }
+
+    merger.devices = {"disk3": None}
+    assert merger.total_device() is None
+
+
+def test_merge_errors(tmp_path):
+    """
+    Dumps with the same namespace or too many namespaces should raise an error.
+    """
+    first = tmp_path / "first.ndjson"
+    first.write_text(json.dumps({"key": "a", "data": {}}))
+    second = tmp_path / "second.ndjson"
+    second.write_text(json.dumps({"key": "a", "data": {}}))
+
+    with pytest.raises(CollectorError):
+        list(DumpMerger([first, second], namespaces=["foo", "foo"]).merge())
+
+    with pytest.raises(CollectorError):
+        DumpMerger([first], namespaces=["foo", "bar"])
+
+    with pytest.raises(CollectorError):
+        DumpMerger([first]).write(tmp_path / "nope", format="yaml")
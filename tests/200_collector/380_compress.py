@@ -0,0 +1,186 @@
+import bz2
+import gzip
+import json
+import lzma
+
+import pytest
+
+from deovi.collector import Collector, DumpReader, Registry
+from deovi.collector.dump import (
+    DUMP_FORMAT_PROBE_SIZE, detect_compression, dump_compression, load_dump,
+    open_dump,
+)
+from deovi.exceptions import CollectorError
+
+
+OPENERS = {
+    "gzip": gzip.open,
+    "xz": lzma.open,
+    "bz2": bz2.open,
+}
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("plop.json", None),
+    ("plop.json.gz", "gzip"),
+    ("plop.json.xz", "xz"),
+    ("plop.json.bz2", "bz2"),
+    ("plop.gz.json", None),
+])
+def test_dump_compression(name, expected):
+    """
+    Compression should be found from file suffix.
+    """
+    assert dump_compression(name) == expected
+
+
+@pytest.mark.parametrize("compression", [None, "gzip", "xz", "bz2"])
+def test_open_dump(tmp_path, compression):
+    """
+    Dumps should be read decompressed whatever their file name is.
+    """
+    destination = tmp_path / "plop.data"
+    content = json.dumps({"registry": {"foo": {"name": "Élément"}}})
+
+    if compression:
+        with OPENERS[compression](destination, "wt", encoding="utf-8") as fp:
+            fp.write(content)
+    else:
+        destination.write_text(content)
+
+    assert detect_compression(destination) == compression
+    with open_dump(destination) as fp:
+        assert fp.read() == content
+    assert load_dump(destination) == json.loads(content)
+
+
+def test_dump_reader_format_prefix(monkeypatch, tmp_path):
+    """
+    Format of a large compact compressed dump should be guessed without reading it
+    whole.
+    """
+    destination = tmp_path / "plop.json.gz"
+    content = {
+        "device": {"total": 1},
+        "registry": {
+            "dir-{}".format(i): {"name": "dir-{}".format(i), "size": i}
+            for i in range(50000)
+        },
+    }
+    with gzip.open(destination, "wt", encoding="utf-8") as fp:
+        json.dump(content, fp, separators=(",", ":"))
+
+    read = []
+
+    class TrackedFile:
+        def __init__(self, fp):
+            self.fp = fp
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            self.fp.close()
+
+        def read(self, size=-1):
+            chunk = self.fp.read(size)
+            read.append(len(chunk))
+            return chunk
+
+    monkeypatch.setattr(
+        "deovi.collector.dump.open_dump", lambda path: TrackedFile(open_dump(path))
+    )
+
+    reader = DumpReader(destination)
+    assert reader.format == "json"
+    assert sum(read) <= DUMP_FORMAT_PROBE_SIZE
+    assert sum(read) < len(json.dumps(content, separators=(",", ":")))
+
+    # A NDJSON dump on a single line is still recognized
+    destination = tmp_path / "plop.ndjson.gz"
+    with gzip.open(destination, "wt", encoding="utf-8") as fp:
+        fp.write(json.dumps({"key": "a", "data": {}}))
+
+    assert DumpReader(destination).format == "ndjson"
+
+
+@pytest.mark.parametrize("compression", ["gzip", "xz", "bz2"])
+@pytest.mark.parametrize("compact", [False, True])
+def test_collector_compress(tmp_path, media_sample, compression, compact):
+    """
+    Compressed dump should have the same content as a plain dump and be read
+    transparently.
+    """
+    plain = tmp_path / "plain.json"
+    destination = tmp_path / "dump.json"
+
+    # Covers are disabled since their stored file name changes on each run
+    Collector(media_sample, allow_media_cover=False).run(destination=plain)
+    Collector(
+        media_sample,
+        allow_media_cover=False,
+        compression=compression,
+        compact=compact,
+    ).run(destination=destination)
+    expected = json.loads(plain.read_text())["registry"]
+
+    assert detect_compression(destination) == compression
+    with OPENERS[compression](destination, "rt") as fp:
+        text = fp.read()
+    content = json.loads(text)
+    assert content["registry"] == expected
+    if compact:
+        assert "\n" not in text and ": " not in text
+    else:
+        assert text == json.dumps(content, indent=4)
+
+    reader = DumpReader(destination)
+    assert dict(reader) == expected
+
+    with Registry(destination) as registry:
+        assert dict(registry.items()) == expected
+        assert registry.device == content["device"]
+
+    # Index is reused
+    with Registry(destination) as registry:
+        assert registry.cache.meta["dump"]["size"] == destination.stat().st_size
+        assert len(registry) == len(expected)
+
+
+def test_collector_compress_suffix(tmp_path, media_sample):
+    """
+    Compression should be chosen from destination suffix, delta is compressed
+    also.
+    """
+    previous = tmp_path / "previous.json"
+    destination = tmp_path / "dump.json.gz"
+
+    Collector(media_sample).run(destination=previous)
+    (media_sample / "moo" / "Added.mkv").write_text("added")
+
+    collector = Collector(media_sample, delta_against=previous)
+    collector.run(destination=destination)
+
+    delta = tmp_path / "dump.delta.json.gz"
+    assert collector.delta_destination(destination) == delta
+    assert detect_compression(destination) == "gzip"
+    assert load_dump(delta)["changed"].keys() == {"moo"}
+    # Same content is always compressed to the same bytes
+    collector.write_json(destination, {"foo": "bar"})
+    content = destination.read_bytes()
+    collector.write_json(destination, {"foo": "bar"})
+    assert destination.read_bytes() == content
+
+
+def test_collector_compress_errors(tmp_path, media_sample):
+    """
+    Unknown compression or an invalid compressed dump should raise an error.
+    """
+    with pytest.raises(CollectorError):
+        Collector(media_sample, compression="zip")
+
+    destination = tmp_path / "dump.json.gz"
+    destination.write_bytes(b"\x1f\x8bnope")
+
+    with pytest.raises(CollectorError):
+        Registry(destination)
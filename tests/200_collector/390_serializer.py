@@ -0,0 +1,88 @@
+import hashlib
+import json
+
+import pytest
+
+from deovi.collector import Collector
+from deovi.exceptions import CollectorError
+from deovi.utils.jsons import ExtendedJsonEncoder
+
+
+def test_collector_serializer_default(tmp_path, media_sample):
+    """
+    Default serializer should write the same dump and checksums than the standard
+    encoder with ExtendedJsonEncoder.
+    """
+    destination = tmp_path / "dump.json"
+
+    collector = Collector(media_sample)
+    collector.run(destination=destination, checksum=True)
+
+    content = json.loads(destination.read_text())
+    expected = json.dumps(
+        {"device": content["device"], "registry": collector.registry},
+        indent=4,
+        cls=ExtendedJsonEncoder,
+    )
+    assert destination.read_text() == expected
+
+    # Directory checksum is computed from the same JSON than before
+    payload = {
+        key: value
+        for key, value in collector.registry["moo"].items()
+        if key not in ("checksum", "cover")
+    }
+    serialized = json.dumps(payload, indent=4, sort_keys=True, cls=ExtendedJsonEncoder)
+    assert collector.checksum_op.directory_payload(payload) == hashlib.blake2b(
+        serialized.encode("utf-8")
+    ).hexdigest()
+
+
+def test_collector_serializer_orjson(tmp_path, media_sample):
+    """
+    orjson serializer should write the same data with the same checksums.
+    """
+    pytest.importorskip("orjson")
+
+    plain = tmp_path / "plain.json"
+    destination = tmp_path / "dump.json"
+
+    Collector(media_sample, allow_media_cover=False).run(
+        destination=plain, checksum=True
+    )
+    Collector(media_sample, allow_media_cover=False, serializer="orjson").run(
+        destination=destination, checksum=True
+    )
+
+    assert destination.read_text().splitlines()[1].startswith('  "device"')
+    assert json.loads(destination.read_text())["registry"] == json.loads(
+        plain.read_text()
+    )["registry"]
+
+
+def test_collector_serializer_error(media_sample):
+    """
+    Unknown serializer should raise an error.
+    """
+    with pytest.raises(CollectorError):
+        Collector(media_sample, serializer="nope")
+
+
+def test_collector_sort_keys(tmp_path, media_sample):
+    """
+    Dump directories should be written sorted on their key only when it is required.
+    """
+    plain = tmp_path / "plain.json"
+    destination = tmp_path / "dump.json"
+
+    Collector(media_sample, allow_media_cover=False).run(destination=plain)
+    Collector(media_sample, allow_media_cover=False, sort_keys=True).run(
+        destination=destination
+    )
+
+    registry = json.loads(plain.read_text())["registry"]
+    assert list(registry) != sorted(registry)
+
+    sorted_registry = json.loads(destination.read_text())["registry"]
+    assert list(sorted_registry) == sorted(registry)
+    assert sorted_registry == registry
@@ -0,0 +1,138 @@
+import gzip
+import json
+
+import pytest
+
+from deovi.collector import (
+    Collector, DumpReader, JsonSink, NdjsonSink, StatsSink, parse_output,
+)
+from deovi.collector.sinks import OutputSink
+from deovi.exceptions import CollectorError
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("json:foo.json", JsonSink),
+    ("ndjson:foo/bar.ndjson", NdjsonSink),
+    ("stats:C:/foo.json", StatsSink),
+])
+def test_parse_output(value, expected):
+    """
+    Output definition should build a sink for its format.
+    """
+    sink = parse_output(value)
+
+    assert isinstance(sink, expected)
+    assert str(sink) == value
+
+
+@pytest.mark.parametrize("value", ["json", "json:", "yaml:foo.yaml"])
+def test_parse_output_invalid(value):
+    """
+    Invalid output definition or unknown format should raise an error.
+    """
+    with pytest.raises(CollectorError):
+        parse_output(value)
+
+
+def test_collector_sinks(tmp_path, media_sample):
+    """
+    A single run should feed every sink.
+    """
+    destination = tmp_path / "dump.json"
+    sinks = [
+        JsonSink(tmp_path / "copy.json"),
+        NdjsonSink(tmp_path / "feed.ndjson"),
+        NdjsonSink(tmp_path / "feed.ndjson.gz"),
+        StatsSink(tmp_path / "stats.json"),
+    ]
+
+    collector = Collector(media_sample, sinks=sinks)
+    stats = collector.run(destination=destination)
+
+    # JSON sink writes the same dump
+    assert (tmp_path / "copy.json").read_text() == destination.read_text()
+
+    # NDJSON sink has directories in walk order after its header
+    registry = json.loads(destination.read_text())["registry"]
+    lines = [
+        json.loads(item)
+        for item in (tmp_path / "feed.ndjson").read_text().splitlines()
+    ]
+    assert lines[0]["basepath"] == str(media_sample)
+    assert [item["key"] for item in lines[1:]] == list(registry.keys())
+
+    reader = DumpReader(tmp_path / "feed.ndjson")
+    assert dict(reader) == registry
+    assert reader.header["basepath"] == str(media_sample)
+
+    with gzip.open(tmp_path / "feed.ndjson.gz", "rt") as fp:
+        assert fp.read() == (tmp_path / "feed.ndjson").read_text()
+
+    content = json.loads((tmp_path / "stats.json").read_text())
+    assert content["stats"]["files"] == stats["files"]
+    assert content["stats"]["directories"] == stats["directories"]
+    assert sum([item["files"] for item in content["extensions"].values()]) == (
+        stats["files"]
+    )
+    assert content["extensions"]["mkv"]["files"] == 4
+
+    # Sinks are only fed during run
+    assert collector.running_sinks == []
+
+
+def test_collector_sinks_failure(tmp_path, media_sample):
+    """
+    Sinks should be closed when collection fails.
+    """
+    class FailingSink(OutputSink):
+        def directory(self, key, payload):
+            raise CollectorError("Failure")
+
+    feed = NdjsonSink(tmp_path / "feed.ndjson")
+    collector = Collector(media_sample, sinks=[feed, FailingSink(tmp_path / "nope")])
+
+    with pytest.raises(CollectorError):
+        collector.run(destination=tmp_path / "dump.json")
+
+    assert feed.fp is None
+    assert (tmp_path / "dump.json").exists() is False
+    # Partial output is removed
+    assert list(tmp_path.glob("feed.ndjson*")) == []
+
+
+def test_collector_sinks_failure_after_scan(monkeypatch, tmp_path, media_sample):
+    """
+    Sinks should be closed when writing outputs fails after scan.
+    """
+    def failing_write_dump(*args, **kwargs):
+        raise CollectorError("Failure")
+
+    feed = NdjsonSink(tmp_path / "feed.ndjson.gz")
+    collector = Collector(media_sample, sinks=[feed])
+    monkeypatch.setattr(collector, "write_dump", failing_write_dump)
+
+    with pytest.raises(CollectorError):
+        collector.run(destination=tmp_path / "dump.json")
+
+    assert feed.fp is None
+    assert feed._raw is None
+    assert list(tmp_path.glob("feed.ndjson*")) == []
+
+
+def test_collector_sinks_empty(tmp_path):
+    """
+    JSON sink should not write anything for an empty registry, like the collector
+    dump.
+    """
+    basepath = tmp_path / "empty"
+    basepath.mkdir()
+
+    collector = Collector(basepath, sinks=[
+        JsonSink(tmp_path / "copy.json"),
+        NdjsonSink(tmp_path / "feed.ndjson"),
+    ])
+    collector.run(destination=tmp_path / "dump.json")
+
+    assert (tmp_path / "dump.json").exists() is False
+    assert (tmp_path / "copy.json").exists() is False
+    assert len((tmp_path / "feed.ndjson").read_text().splitlines()) == 1
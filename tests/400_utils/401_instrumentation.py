@@ -0,0 +1,92 @@
+import json
+import time
+
+from deovi.utils.instrumentation import NULL_PHASE, PhaseRecorder, TopTracker
+
+
+def test_recorder_disabled():
+    """
+    Disabled recorder should not record anything.
+    """
+    recorder = PhaseRecorder(enabled=False)
+
+    assert recorder.phase("foo") is NULL_PHASE
+
+    with recorder.phase("foo"):
+        recorder.add_bytes(read=42)
+
+    assert recorder.report()["phases"] == {}
+
+
+def test_recorder_phases():
+    """
+    Phase occurences should be accumulated and nested phases should be recorded
+    exclusively from their parent.
+    """
+    recorder = PhaseRecorder()
+
+    for i in range(3):
+        with recorder.phase("foo"):
+            recorder.add_bytes(read=10)
+
+            with recorder.phase("bar", items=5):
+                recorder.add_bytes(written=3)
+                time.sleep(0.02)
+
+    recorder.add_bytes(read=1)
+
+    phases = recorder.report()["phases"]
+
+    assert phases["foo"]["items"] == 3
+    assert phases["foo"]["bytes_read"] == 30
+    assert phases["foo"]["bytes_written"] == 0
+    assert phases["bar"]["items"] == 15
+    assert phases["bar"]["bytes_read"] == 0
+    assert phases["bar"]["bytes_written"] == 9
+    assert phases["other"]["bytes_read"] == 1
+
+    # Sleeping time is only accounted in nested phase
+    assert phases["bar"]["wall"] >= 0.06
+    assert phases["foo"]["wall"] < phases["bar"]["wall"]
+
+    assert recorder.current() is None
+
+
+def test_recorder_write(tmp_path):
+    """
+    Report should be written as JSON with extra items.
+    """
+    recorder = PhaseRecorder()
+
+    with recorder.phase("foo"):
+        pass
+
+    destination = tmp_path / "report.json"
+    recorder.write(destination, stats={"files": 1})
+
+    report = json.loads(destination.read_text())
+
+    assert report["stats"] == {"files": 1}
+    assert list(report["phases"].keys()) == ["foo"]
+    assert report["elapsed"] >= 0
+
+    assert len(recorder.summary()) == 1
+    assert recorder.summary()[0].startswith("Phase 'foo': 1 item(s), ")
+
+
+def test_top_tracker():
+    """
+    Tracker should only keep items with the highest values.
+    """
+    tracker = TopTracker(3)
+
+    for value in [5, 1, 8, 3, 9, 2, 8]:
+        tracker.push(value, "item-{}".format(value))
+
+    assert tracker.items() == ["item-9", "item-8", "item-8"]
+    assert len(tracker.heap) == 3
+
+    # Disabled tracker
+    tracker = TopTracker(0)
+    tracker.push(1, "foo")
+    assert tracker.items() == []
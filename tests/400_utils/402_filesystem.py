@@ -0,0 +1,72 @@
+from deovi.utils.filesystem import FilesystemOperator
+from deovi.utils.instrumentation import PhaseRecorder
+
+
+def test_filesystem_operations_disabled(media_sample):
+    """
+    Operations should still work without any recorder.
+    """
+    fs_op = FilesystemOperator()
+
+    assert fs_op.exists(media_sample / "cover.png") is True
+    assert fs_op.recorder.operations_report() == {"total": {}}
+
+
+def test_filesystem_operations_count(media_sample):
+    """
+    Operations should be counted per phase.
+    """
+    recorder = PhaseRecorder()
+    fs_op = FilesystemOperator(recorder=recorder)
+
+    with recorder.phase("foo"):
+        fs_op.exists(media_sample / "cover.png")
+        fs_op.stat(media_sample / "cover.png")
+        with fs_op.scandir(media_sample) as entries:
+            names = [entry.name for entry in entries]
+
+    with recorder.phase("bar"):
+        fs_op.copy(media_sample / "cover.png", media_sample / "copied.png")
+        fs_op.rename(media_sample / "copied.png", media_sample / "renamed.png")
+        fs_op.read_text(media_sample / "manifest.yaml")
+        fs_op.unlink(media_sample / "renamed.png")
+        fs_op.unlink(media_sample / "renamed.png")
+
+    fs_op.exists(media_sample / "nope")
+
+    assert "cover.png" in names
+    assert (media_sample / "renamed.png").exists() is False
+
+    assert recorder.operations_report() == {
+        "foo": {"exists": 1, "stat": 1, "listdir": 1},
+        "bar": {"copy": 1, "rename": 1, "open": 1, "unlink": 2},
+        "other": {"exists": 1},
+        "total": {
+            "exists": 2, "stat": 1, "listdir": 1, "copy": 1, "rename": 1, "open": 1,
+            "unlink": 2,
+        },
+    }
+
+
+def test_filesystem_entry_type(tmp_path):
+    """
+    Entry type should be given without any counted stat, except for a symbolic link
+    which is followed.
+    """
+    (tmp_path / "directory").mkdir()
+    (tmp_path / "file.mkv").write_text("file")
+    (tmp_path / "link").symlink_to("directory")
+
+    recorder = PhaseRecorder()
+    fs_op = FilesystemOperator(recorder=recorder)
+
+    with recorder.phase("foo"):
+        with fs_op.scandir(tmp_path) as entries:
+            types = {entry.name: fs_op.entry_type(entry) for entry in entries}
+
+    assert types == {
+        "directory": (True, False),
+        "file.mkv": (False, False),
+        "link": (True, True),
+    }
+    assert recorder.operations_report()["foo"] == {"listdir": 1, "stat": 1}
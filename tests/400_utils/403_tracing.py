@@ -0,0 +1,73 @@
+import json
+
+from deovi.utils.instrumentation import PhaseRecorder
+from deovi.utils.tracing import NULL_SPAN, TraceRecorder, get_tracer, set_tracer
+
+
+def test_tracer_disabled():
+    """
+    Disabled tracer should not record anything.
+    """
+    tracer = TraceRecorder(enabled=False)
+
+    assert tracer.span("foo") is NULL_SPAN
+
+    with tracer.span("foo"):
+        pass
+
+    assert tracer.events == []
+
+
+def test_tracer_write(tmp_path):
+    """
+    Spans should be written as complete events with a thread name metadata event.
+    """
+    tracer = TraceRecorder()
+
+    with tracer.span("foo", category="bar", path=tmp_path):
+        with tracer.span("ping"):
+            pass
+
+    destination = tmp_path / "trace.json"
+    tracer.write(destination)
+
+    events = json.loads(destination.read_text())["traceEvents"]
+
+    assert [(item["ph"], item["name"]) for item in events] == [
+        ("M", "thread_name"),
+        ("X", "ping"),
+        ("X", "foo"),
+    ]
+    assert events[0]["args"] == {"name": "MainThread"}
+    assert events[2]["cat"] == "bar"
+    assert events[2]["args"] == {"path": str(tmp_path)}
+    assert "args" not in events[1]
+    # Nested span is contained in its parent
+    assert events[2]["ts"] <= events[1]["ts"]
+    assert events[2]["dur"] >= events[1]["dur"]
+
+
+def test_tracer_phases():
+    """
+    Recorder phases should be traced when the process tracer is enabled, even if
+    recorder is disabled.
+    """
+    tracer = set_tracer(TraceRecorder())
+
+    try:
+        with PhaseRecorder().phase("foo", path="ping"):
+            pass
+        with PhaseRecorder(enabled=False).phase("bar"):
+            pass
+    finally:
+        set_tracer(TraceRecorder(enabled=False))
+
+    assert get_tracer().enabled is False
+    assert [
+        (item["name"], item["cat"], item.get("args"))
+        for item in tracer.events
+        if item["ph"] == "X"
+    ] == [
+        ("foo", "phase", {"path": "ping"}),
+        ("bar", "phase", None),
+    ]
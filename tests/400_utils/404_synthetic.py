@@ -0,0 +1,75 @@
+import os
+
+from deovi.collector import Collector
+from deovi.utils.synthetic import SyntheticTree
+
+
+def test_synthetic_for_files():
+    """
+    Number of files per directory should be computed to reach the total.
+    """
+    assert SyntheticTree.count_directories(2, 3) == 13
+
+    tree = SyntheticTree.for_files(100, depth=2, fanout=3)
+    assert tree.files == 8
+
+
+def test_synthetic_build(tmp_path):
+    """
+    Built tree should have sparse media files, manifests and covers in every
+    directory and be collectable.
+    """
+    tree = SyntheticTree(depth=2, fanout=2, files=3, file_size=1024 * 1024)
+    basepath = tmp_path / "tree"
+
+    stats = tree.build(basepath)
+    assert stats == {
+        "directories": 7,
+        "files": 21,
+        "manifests": 7,
+        "covers": 7,
+        "size": 21 * 1024 * 1024,
+    }
+
+    media = basepath / "Directory 001" / "Media 000001.mp4"
+    assert media.stat().st_size == 1024 * 1024
+    # Sparse file does not use the disk space for its size
+    assert media.stat().st_blocks * 512 < 1024 * 1024
+    assert (basepath / "Directory 001" / "cover.jpg").stat().st_size == 50 * 1024
+    assert sorted(os.listdir(basepath / "Directory 001")) == [
+        "Directory 000",
+        "Directory 001",
+        "Media 000000.mkv",
+        "Media 000001.mp4",
+        "Media 000002.avi",
+        "cover.jpg",
+        "manifest.yaml",
+    ]
+
+    collector = Collector(basepath)
+    collector.run(checksum=True)
+
+    assert collector.stats["directories"] == 7
+    assert collector.stats["files"] == 21
+    assert collector.registry["Directory 001"]["title"] == "Directory 001"
+
+
+def test_synthetic_filename_template(tmp_path):
+    """
+    Media filenames should be built from given template.
+    """
+    tree = SyntheticTree(
+        depth=0,
+        files=2,
+        file_size=0,
+        manifest=False,
+        cover=False,
+        extensions=["mkv"],
+        filename_template="Show_-_S01E{index:02d}.{extension}",
+    )
+
+    assert tree.build(tmp_path)["files"] == 2
+    assert sorted(os.listdir(tmp_path)) == [
+        "Show_-_S01E00.mkv",
+        "Show_-_S01E01.mkv",
+    ]
@@ -0,0 +1,83 @@
+import json
+import os
+
+from deovi.utils.benchmark import (
+    compare_results, load_baseline, missing_cases, run_isolated, write_baseline,
+)
+
+
+def pid_case(value):
+    return {"value": value, "pid": os.getpid()}
+
+
+def test_run_isolated():
+    """
+    Case should be run in another process and report its peak memory.
+    """
+    result = run_isolated(pid_case, 42)
+
+    assert result["value"] == 42
+    assert result["pid"] != os.getpid()
+    assert result["peak_memory"] > 0
+
+
+def test_baseline_write(tmp_path):
+    """
+    Written baseline should keep previous cases missing from new results.
+    """
+    path = tmp_path / "baseline.json"
+
+    assert load_baseline(path) == {}
+
+    write_baseline(path, {"foo": {"wall": 1.0}, "bar": {"wall": 2.0}})
+    write_baseline(path, {"foo": {"wall": 3.0}})
+
+    assert json.loads(path.read_text()) == {
+        "foo": {"wall": 3.0},
+        "bar": {"wall": 2.0},
+    }
+
+
+def test_missing_cases():
+    """
+    Cases without baseline results should be reported.
+    """
+    results = {"foo": {"wall": 1.0}, "bar": {"wall": 1.0}, "ping": {"wall": 1.0}}
+
+    assert missing_cases({}, results) == ["bar", "foo", "ping"]
+    assert missing_cases({"foo": {"wall": 2.0}, "ping": {}}, results) == [
+        "bar", "ping",
+    ]
+
+
+def test_compare_results():
+    """
+    Only metrics increased beyond their tolerance should be flagged.
+    """
+    baseline = {
+        "foo": {"wall": 1.0, "peak_memory": 100, "operations": 10},
+        "bar": {"wall": 1.0, "peak_memory": 100, "operations": 10},
+    }
+    results = {
+        "foo": {"wall": 1.2, "peak_memory": 150, "operations": 10},
+        "bar": {"wall": 0.5, "peak_memory": 100, "operations": 11},
+        "new": {"wall": 10.0, "peak_memory": 1000, "operations": 100},
+    }
+
+    regressions = compare_results(baseline, results)
+
+    assert [(item["case"], item["metric"]) for item in regressions] == [
+        ("foo", "peak_memory"),
+        ("bar", "operations"),
+    ]
+    assert regressions[0]["ratio"] == 1.5
+
+    assert compare_results(baseline, results, tolerances={"wall": 0.1}) == [
+        {
+            "case": "foo",
+            "metric": "wall",
+            "baseline": 1.0,
+            "value": 1.2,
+            "ratio": 1.2,
+        },
+    ]
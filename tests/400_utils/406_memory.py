@@ -0,0 +1,77 @@
+import time
+import tracemalloc
+
+from deovi.utils.instrumentation import PhaseRecorder
+from deovi.utils.memory import MemoryProfiler, get_rss
+
+
+def allocate():
+    return [str(i) * 10 for i in range(20000)]
+
+
+def test_memory_checkpoints():
+    """
+    Checkpoints should record memory grown since previous checkpoint and its top
+    allocation sites.
+    """
+    profiler = MemoryProfiler(top=3)
+    recorder = PhaseRecorder(enabled=False, memory=profiler)
+
+    profiler.start()
+    kept = allocate()
+    recorder.checkpoint("allocate")
+    recorder.checkpoint("nothing")
+    profiler.stop()
+
+    assert tracemalloc.is_tracing() is False
+    assert len(kept) == 20000
+
+    labels = [item["label"] for item in profiler.checkpoints]
+    assert labels == ["allocate", "nothing", "end"]
+
+    allocated = profiler.checkpoints[0]
+    assert allocated["current"] > 1000000
+    assert allocated["peak"] >= allocated["current"]
+    assert len(allocated["top"]) == 3
+    # The allocating function is the top site
+    assert allocated["top"][0]["site"].startswith(__file__)
+    assert allocated["top"][0]["size"] > 1000000
+
+    report = recorder.report()["memory"]
+    assert report["peak"] >= allocated["peak"]
+    assert report["top"][0]["site"].startswith(__file__)
+    assert report["rss"] == []
+
+    summary = profiler.summary()
+    assert summary[0].startswith("Memory peak: ")
+    assert summary[1].startswith("Memory at 'allocate': ")
+    assert "Top allocation sites:" in summary
+
+
+def test_memory_rss_sampling():
+    """
+    Resident memory should be sampled at given interval.
+    """
+    profiler = MemoryProfiler(rss_interval=0.01)
+
+    profiler.start()
+    time.sleep(0.1)
+    profiler.stop()
+
+    if get_rss() is None:
+        assert profiler.rss == []
+    else:
+        assert len(profiler.rss) > 1
+        assert profiler.rss[0]["rss"] > 0
+        assert profiler.sampler is None
+
+
+def test_memory_checkpoint_stopped():
+    """
+    Checkpoint should be ignored when profiler is not started.
+    """
+    profiler = MemoryProfiler()
+    profiler.checkpoint("foo")
+    profiler.stop()
+
+    assert profiler.report() == {"peak": 0, "checkpoints": [], "top": [], "rss": []}
@@ -0,0 +1,91 @@
+import datetime
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from deovi.utils.jsons import ExtendedJsonEncoder, JsonSerializer, to_json_native
+
+
+CONTENT = {
+    "path": Path("/foo/bar"),
+    "name": "Élément",
+    "raw": b"bytes",
+    "tags": {"one"},
+    "date": datetime.datetime(2024, 1, 2, 3, 4, 5, 6),
+    "cover": (Path("/foo/cover.jpg"), Path("cover/abc.jpg")),
+    "size": 42,
+    "ratio": 0.1,
+    "empty": None,
+    "nested": [{"relative": Path("bar"), "flag": True}],
+    1: "integer key",
+}
+
+
+def test_to_json_native():
+    """
+    Values should be converted to JSON native types like ExtendedJsonEncoder does.
+    """
+    converted = to_json_native(CONTENT)
+
+    assert converted["path"] == "/foo/bar"
+    assert converted["raw"] == "bytes"
+    assert converted["tags"] == ["one"]
+    assert converted["date"] == "2024-01-02T03:04:05.000006"
+    assert converted["cover"] == ["/foo/cover.jpg", "cover/abc.jpg"]
+    assert converted["nested"] == [{"relative": "bar", "flag": True}]
+    # Source is not mutated
+    assert CONTENT["path"] == Path("/foo/bar")
+
+    # Unsupported values are left unchanged
+    value = object()
+    assert to_json_native([value]) == [value]
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"indent": 4},
+    {"indent": 4, "sort_keys": True},
+    {"separators": (",", ":")},
+])
+def test_serializer_json(options):
+    """
+    Default backend should output the same JSON than ExtendedJsonEncoder.
+    """
+    content = {key: value for key, value in CONTENT.items() if key != 1}
+    expected = json.dumps(content, cls=ExtendedJsonEncoder, **options)
+
+    serializer = JsonSerializer()
+    assert serializer.dumps(content, **options) == expected
+
+    fp = io.StringIO()
+    serializer.dump(content, fp, **options)
+    assert fp.getvalue() == expected
+
+
+def test_serializer_orjson():
+    """
+    orjson backend should output the same data.
+    """
+    pytest.importorskip("orjson")
+
+    serializer = JsonSerializer(backend="orjson")
+    output = serializer.dumps(CONTENT, indent=4, sort_keys=True)
+
+    assert json.loads(output) == json.loads(
+        json.dumps(CONTENT, cls=ExtendedJsonEncoder)
+    )
+    assert output.splitlines()[1].startswith('  "1"')
+    assert "Élément" in output
+
+
+def test_serializer_errors():
+    """
+    Unknown backend or unsupported value should raise an error.
+    """
+    with pytest.raises(ValueError):
+        JsonSerializer(backend="nope")
+
+    with pytest.raises(TypeError):
+        JsonSerializer().dumps({"foo": object()})
@@ -118,3 +118,68 @@ def test_rename_required_success(caplog, basic_sample, basic_suite):
         "",
     ]
     assert expected_logs == [rec.message for rec in caplog.records]
+
+
+def test_rename_stats_report(caplog, basic_suite):
+    """
+    Stats report option should write a JSON report with job phases.
+    """
+    job_source = basic_suite / "job.json"
+    with job_source.open("w") as fp:
+        json.dump({
+            "basepath": "files",
+            "extensions": ["mp4"],
+            "tasks": [
+                ["lowercase", {}],
+            ],
+        }, fp, indent=4)
+
+    report = basic_suite / "report.json"
+
+    runner = CliRunner()
+    result = runner.invoke(cli_frontend, [
+        "rename",
+        str(job_source),
+        "--commit",
+        "--stats-report", str(report),
+    ])
+
+    assert result.exit_code == 0
+
+    content = json.loads(report.read_text())
+    assert content["phases"]["tasks"]["items"] == 4
+    assert content["operations"]["planning"] == {"listdir": 1}
+    assert content["operations"]["rename"] == {"exists": 4, "rename": 4}
+
+    messages = [msg for name, level, msg in caplog.record_tuples]
+    assert "Statistics report saved to: {}".format(str(report)) in messages
+    assert "Filesystem operations: exists=4, listdir=1, rename=4" in messages
+
+
+def test_rename_memory_profile(caplog, basic_suite):
+    """
+    Memory profile option should output memory usage for each job.
+    """
+    job_source = basic_suite / "job.json"
+    with job_source.open("w") as fp:
+        json.dump({
+            "basepath": "files",
+            "extensions": ["mp4"],
+            "tasks": [
+                ["lowercase", {}],
+            ],
+        }, fp, indent=4)
+
+    runner = CliRunner()
+    result = runner.invoke(cli_frontend, [
+        "rename",
+        str(job_source),
+        "--memory-profile",
+    ])
+
+    assert result.exit_code == 0
+
+    messages = [msg for name, level, msg in caplog.record_tuples]
+    assert any([msg.startswith("Memory peak: ") for msg in messages])
+    assert any([msg.startswith("Memory at 'planning': ") for msg in messages])
+    assert any([msg.startswith("Memory at 'rename': ") for msg in messages])
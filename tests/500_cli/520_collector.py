@@ -1,9 +1,12 @@
 import json
 import logging
+import lzma
+import shutil
 
+import pytest
 from click.testing import CliRunner
 
-from deovi.collector import Collector
+from deovi.collector import Collector, RegistryCache, load_dump
 from deovi.cli.entrypoint import cli_frontend
 from deovi.utils.tests import DUMMY_ISO_DATETIME, timestamp_to_isoformat
 
@@ -121,3 +124,549 @@ def test_job_success(monkeypatch, caplog, media_sample):
             "cover": None,
         }
     }
+
+
+def test_job_workers_option(monkeypatch, caplog, media_sample):
+    """
+    Worker option should only accept known stages with a valid number.
+    """
+    monkeypatch.setattr(Collector, "timestamp_to_isoformat", timestamp_to_isoformat)
+
+    runner = CliRunner()
+
+    destination = media_sample / "registry.json"
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--workers", "nope=2",
+    ])
+    assert result.exit_code == 2
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--workers", "metadata=2",
+        "--workers", "checksum=3",
+        "--queue-size", "2",
+        "--checksum",
+    ])
+    assert result.exit_code == 0
+
+    with destination.open() as fp:
+        content = json.load(fp)
+
+    assert sorted(content["registry"].keys()) == [
+        ".", "foo", "foo/bar", "moo", "ping", "ping/pong", "ping/pong/pang",
+    ]
+
+
+def test_job_stats_report(caplog, media_sample):
+    """
+    Stats report option should write a JSON report and output phases resume.
+    """
+    runner = CliRunner()
+
+    destination = media_sample / "registry.json"
+    report = media_sample / "report.json"
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--stats-report", str(report),
+    ])
+    assert result.exit_code == 0
+
+    content = json.loads(report.read_text())
+    assert content["stats"]["directories"] == 7
+    assert "walk" in content["phases"]
+    assert "metadata" in content["pipeline"]
+
+    messages = [msg for name, level, msg in caplog.record_tuples]
+    assert "Statistics report saved to: {}".format(str(report)) in messages
+    assert any([msg.startswith("Phase 'walk': 8 item(s)") for msg in messages])
+
+
+def test_job_top_directories(caplog, media_sample):
+    """
+    Top directories option should output slowest and largest directories and include
+    them in statistics report.
+    """
+    runner = CliRunner()
+
+    destination = media_sample / "registry.json"
+    report = media_sample / "report.json"
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--top-directories", "3",
+        "--stats-report", str(report),
+    ])
+    assert result.exit_code == 0
+
+    content = json.loads(report.read_text())
+    assert len(content["directories"]["slowest"]) == 3
+    assert content["directories"]["largest"][0]["path"] == "."
+
+    messages = [msg for name, level, msg in caplog.record_tuples]
+    assert "Slowest directories:" in messages
+    assert "Largest directories:" in messages
+    assert any([msg.startswith("- 6 entries: . (") for msg in messages])
+
+
+def test_job_trace(caplog, media_sample, tmp_path):
+    """
+    Trace option should write spans in Chrome Trace Event format.
+    """
+    runner = CliRunner()
+
+    destination = media_sample / "registry.json"
+    trace = tmp_path / "trace.json"
+
+    result = runner.invoke(cli_frontend, [
+        "--trace", str(trace),
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--checksum",
+    ])
+    assert result.exit_code == 0
+
+    events = json.loads(trace.read_text())["traceEvents"]
+    spans = [item for item in events if item["ph"] == "X"]
+
+    names = [item["name"] for item in spans]
+    assert names.count("walk") == 8
+    assert names.count("manifest") == 7
+    assert "file" in names
+    assert "copy" in names
+    assert all(["tid" in item for item in spans])
+
+    # Every thread which recorded a span is named
+    assert (
+        set([item["tid"] for item in spans]) ==
+        set([item["tid"] for item in events if item["ph"] == "M"])
+    )
+
+    messages = [msg for name, level, msg in caplog.record_tuples]
+    assert "Trace saved to: {}".format(str(trace)) in messages
+
+
+def test_job_memory_profile(caplog, media_sample):
+    """
+    Memory profile option should output memory usage and include it in statistics
+    report.
+    """
+    runner = CliRunner()
+
+    destination = media_sample / "registry.json"
+    report = media_sample / "report.json"
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--memory-profile",
+        "--rss-interval", "0.01",
+        "--stats-report", str(report),
+    ])
+    assert result.exit_code == 0
+
+    content = json.loads(report.read_text())
+    assert [item["label"] for item in content["memory"]["checkpoints"]] == [
+        "scan", "dump", "assets", "end",
+    ]
+    assert content["memory"]["peak"] > 0
+
+    messages = [msg for name, level, msg in caplog.record_tuples]
+    assert any([msg.startswith("Memory peak: ") for msg in messages])
+    assert any([msg.startswith("Memory at 'scan': ") for msg in messages])
+
+
+def test_job_resume(caplog, media_sample, tmp_path):
+    """
+    Resume option should restore unchanged directories from journal.
+    """
+    runner = CliRunner()
+
+    destination = tmp_path / "registry.json"
+    journal = tmp_path / "journal.ndjson"
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--resume",
+    ])
+    assert result.exit_code == 2
+    assert "Option '--resume' requires option '--journal'." in result.output
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--journal", str(journal),
+    ])
+    assert result.exit_code == 0
+
+    caplog.clear()
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--journal", str(journal),
+        "--resume",
+    ])
+    assert result.exit_code == 0
+
+    assert (APPLABEL, logging.INFO, "Directories resumed from journal: 7") in (
+        caplog.record_tuples
+    )
+    assert len(json.loads(destination.read_text())["registry"]) == 7
+
+
+def test_job_exclude(caplog, media_sample, tmp_path):
+    """
+    Exclude and max depth options should prune collected directories.
+    """
+    runner = CliRunner()
+
+    destination = tmp_path / "registry.json"
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--exclude", "foo/",
+        "--exclude", "moo",
+        "--max-depth", "1",
+    ])
+    assert result.exit_code == 0
+
+    registry = json.loads(destination.read_text())["registry"]
+    assert sorted(registry.keys()) == [".", "ping"]
+
+
+def test_job_follow_symlinks(caplog, media_sample, tmp_path):
+    """
+    Symbolic links to directories should only be walked with option
+    '--follow-symlinks'.
+    """
+    runner = CliRunner()
+
+    (media_sample / "linked").symlink_to(media_sample / "foo" / "bar")
+    destination = tmp_path / "registry.json"
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--one-file-system",
+    ])
+    assert result.exit_code == 0
+    registry = json.loads(destination.read_text())["registry"]
+    assert "linked" not in registry
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--follow-symlinks",
+    ])
+    assert result.exit_code == 0
+    registry = json.loads(destination.read_text())["registry"]
+    # Linked directory is walked only once from its first found path
+    assert ("linked" in registry) != ("foo/bar" in registry)
+
+
+def test_job_rollups(caplog, media_sample, tmp_path):
+    """
+    Rollups and largest files should be included in dump only when enabled.
+    """
+    runner = CliRunner()
+
+    destination = tmp_path / "registry.json"
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+    ])
+    assert result.exit_code == 0
+    assert list(json.loads(destination.read_text()).keys()) == ["device", "registry"]
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--rollups",
+        "--top-files", "1",
+    ])
+    assert result.exit_code == 0
+    assert (APPLABEL, logging.INFO, "Largest files:") in caplog.record_tuples
+
+    dump = json.loads(destination.read_text())
+    assert dump["rollups"]["ping/pong"]["files"] == 3
+    assert dump["largest_files"] == [{
+        "path": "moo/SampleVideo_320x240_2mb.3gp",
+        "size": (media_sample / "moo/SampleVideo_320x240_2mb.3gp").stat().st_size,
+    }]
+
+
+def test_job_previous(caplog, media_sample, tmp_path):
+    """
+    Moved files should be reported from a previous dump with identities.
+    """
+    runner = CliRunner()
+
+    previous = tmp_path / "previous.json"
+    destination = tmp_path / "registry.json"
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(previous),
+        "--identities",
+    ])
+    assert result.exit_code == 0
+
+    (media_sample / "moo" / "SampleVideo_720x480_1mb.mp4").rename(
+        media_sample / "moo" / "Renamed.mp4"
+    )
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--previous", str(previous),
+    ])
+    assert result.exit_code == 0
+    assert (APPLABEL, logging.INFO, "Files moved since previous dump: 1") in (
+        caplog.record_tuples
+    )
+
+    registry = json.loads(destination.read_text())["registry"]
+    assert [
+        item.get("moved_from") for item in registry["moo"]["children_files"]
+        if item["name"] == "Renamed.mp4"
+    ] == ["moo/SampleVideo_720x480_1mb.mp4"]
+
+
+def test_job_delta(caplog, media_sample, tmp_path):
+    """
+    Command should write a delta next to the dump from a previous dump.
+    """
+    runner = CliRunner()
+
+    previous = tmp_path / "previous.json"
+    destination = tmp_path / "registry.json"
+
+    result = runner.invoke(cli_frontend, ["collect", str(media_sample), str(previous)])
+    assert result.exit_code == 0
+
+    shutil.rmtree(media_sample / "ping" / "pong" / "pang")
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--delta-against", str(previous),
+    ])
+    assert result.exit_code == 0
+    assert (
+        APPLABEL, logging.INFO, "Delta: 0 added, 1 changed, 1 removed, 5 unchanged"
+    ) in caplog.record_tuples
+
+    delta = json.loads((tmp_path / "registry.delta.json").read_text())
+    assert delta["removed"] == ["ping/pong/pang"]
+    assert list(delta["changed"].keys()) == ["ping/pong"]
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--delta-only",
+    ])
+    assert result.exit_code == 2
+    assert "Option '--delta-only' requires option '--delta-against'." in (
+        result.output
+    )
+
+
+def test_job_registry_cache(caplog, media_sample, tmp_path):
+    """
+    Command should write a registry cache next to the dump.
+    """
+    runner = CliRunner()
+
+    destination = tmp_path / "registry.json"
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--registry-cache",
+    ])
+    assert result.exit_code == 0
+
+    with RegistryCache(tmp_path / "registry.json.bin") as cache:
+        assert dict(cache.items()) == json.loads(destination.read_text())["registry"]
+
+
+def test_job_compress(caplog, media_sample, tmp_path):
+    """
+    Command should write a compressed compact dump and load a compressed previous
+    dump.
+    """
+    runner = CliRunner()
+
+    plain = tmp_path / "registry.json"
+    destination = tmp_path / "registry.json.xz"
+    compressed = tmp_path / "registry.json.data"
+
+    Collector(media_sample).run(destination=plain)
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--compact",
+    ])
+    assert result.exit_code == 0
+    assert load_dump(destination)["registry"].keys() == json.loads(
+        plain.read_text()
+    )["registry"].keys()
+    with lzma.open(destination, "rt") as fp:
+        assert "\n" not in fp.read()
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(compressed),
+        "--compress=gzip",
+        "--previous", str(destination),
+    ])
+    assert result.exit_code == 0
+    assert compressed.read_bytes()[:2] == b"\x1f\x8b"
+    assert list(load_dump(compressed)["registry"].keys()) == list(
+        load_dump(destination)["registry"].keys()
+    )
+
+
+def test_job_serializer(caplog, media_sample, tmp_path):
+    """
+    Command should write the dump with the given serializer.
+    """
+    pytest.importorskip("orjson")
+    runner = CliRunner()
+
+    destination = tmp_path / "registry.json"
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--serializer=orjson",
+    ])
+    assert result.exit_code == 0
+    assert destination.read_text().splitlines()[1].startswith('  "device"')
+    assert len(json.loads(destination.read_text())["registry"]) == 7
+
+
+def test_job_outputs(caplog, media_sample, tmp_path):
+    """
+    Command should write every output from a single scan.
+    """
+    runner = CliRunner()
+
+    destination = tmp_path / "registry.json"
+    feed = tmp_path / "feed.ndjson"
+    stats = tmp_path / "stats.json"
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--output", "ndjson:{}".format(feed),
+        "--output", "stats:{}".format(stats),
+    ])
+    assert result.exit_code == 0
+    assert (
+        APPLABEL, logging.INFO, "Output saved to: ndjson:{}".format(feed)
+    ) in caplog.record_tuples
+
+    registry = json.loads(destination.read_text())["registry"]
+    assert len(feed.read_text().splitlines()) == len(registry) + 1
+    assert json.loads(stats.read_text())["stats"]["files"] == 10
+
+    # Invalid output or path already used
+    for value in ["yaml:foo.yaml", "json:{}".format(destination)]:
+        result = runner.invoke(cli_frontend, [
+            "collect",
+            str(media_sample),
+            str(destination),
+            "--output", value,
+        ])
+        assert result.exit_code == 2
+
+
+def test_job_listing(caplog, media_sample, tmp_path):
+    """
+    Command should collect from a listing file.
+    """
+    runner = CliRunner()
+
+    listing = tmp_path / "listing.txt"
+    listing.write_text("\n".join([
+        "\t4096\t1677857311.0\td",
+        "show\t4096\t1677857311.0\td",
+        "show/Episode 01.mkv\t1000\t1677857311.0\tf",
+        "show/Episode 02.mkv\t2000\t1677857311.0\tf",
+    ]) + "\n")
+    destination = tmp_path / "registry.json"
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--listing", str(listing),
+    ])
+    assert result.exit_code == 0
+
+    registry = json.loads(destination.read_text())["registry"]
+    assert list(registry.keys()) == ["show"]
+    assert [item["size"] for item in registry["show"]["children_files"]] == [
+        1000, 2000,
+    ]
+
+    listing.write_text("invalid\n")
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(destination),
+        "--listing", str(listing),
+    ])
+    assert result.exit_code == 2
+    assert "Invalid line 1 from listing" in result.output
+
+
+def test_job_watch_usage(caplog, media_sample, tmp_path):
+    """
+    Watch mode should not be allowed with options which can not be kept up to date.
+    """
+    runner = CliRunner()
+
+    result = runner.invoke(cli_frontend, [
+        "collect",
+        str(media_sample),
+        str(tmp_path / "registry.json"),
+        "--watch",
+        "--rollups",
+    ])
+    assert result.exit_code == 2
+    assert "can not be used with option '--watch'" in result.output
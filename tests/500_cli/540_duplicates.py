@@ -0,0 +1,51 @@
+import json
+import logging
+import shutil
+
+from click.testing import CliRunner
+
+from deovi.cli.entrypoint import cli_frontend
+
+
+APPLABEL = "deovi"
+
+
+def test_duplicates_success(caplog, media_sample, tmp_path):
+    """
+    Command should output duplicate groups and write them into given destination.
+    """
+    runner = CliRunner()
+
+    source = media_sample / "foo" / "bar" / "SampleVideo_720x480_1mb.flv"
+    shutil.copy(source, media_sample / "moo" / "Copy.flv")
+    destination = tmp_path / "duplicates.json"
+    stats_report = tmp_path / "stats.json"
+
+    result = runner.invoke(cli_frontend, [
+        "duplicates",
+        str(media_sample),
+        str(destination),
+        "--stats-report", str(stats_report),
+    ])
+
+    assert result.exit_code == 0
+
+    size = source.stat().st_size
+    assert (APPLABEL, logging.INFO, "2 files of {} bytes:".format(size)) in (
+        caplog.record_tuples
+    )
+    assert (APPLABEL, logging.INFO, "- moo/Copy.flv") in caplog.record_tuples
+    assert (APPLABEL, logging.INFO, "Duplicate files: 1") in caplog.record_tuples
+
+    report = json.loads(destination.read_text())
+    assert report["reclaimable"] == size
+    assert report["groups"][0]["paths"] == [
+        str(source),
+        str(media_sample / "moo" / "Copy.flv"),
+    ]
+
+    stats = json.loads(stats_report.read_text())
+    assert stats["phases"]["fingerprint"]["items"] == 2
+    assert stats["phases"]["checksum"]["items"] == 2
+    # File identities are known from walk
+    assert "identity" not in stats["phases"]
@@ -0,0 +1,113 @@
+import json
+import logging
+import shutil
+
+from click.testing import CliRunner
+
+from deovi.cli.entrypoint import cli_frontend
+from deovi.collector import Collector
+
+
+APPLABEL = "deovi"
+
+
+def test_diff_success(caplog, media_sample, tmp_path):
+    """
+    Command should output changed directories and write the diff into given
+    destination.
+    """
+    runner = CliRunner()
+
+    old = tmp_path / "old.json"
+    new = tmp_path / "new.json"
+    destination = tmp_path / "diff.json"
+
+    Collector(media_sample).run(destination=old)
+    shutil.rmtree(media_sample / "ping" / "pong" / "pang")
+    (media_sample / "moo" / "Added.mkv").write_text("added")
+    Collector(media_sample).run(destination=new)
+
+    result = runner.invoke(cli_frontend, [
+        "diff",
+        str(old),
+        str(new),
+        str(destination),
+    ])
+
+    assert result.exit_code == 0
+
+    assert (APPLABEL, logging.INFO, "- ping/pong/pang") in caplog.record_tuples
+    assert (APPLABEL, logging.INFO, "~ moo") in caplog.record_tuples
+    assert (
+        APPLABEL, logging.INFO, "Directories: 0 added, 1 removed, 2 changed"
+    ) in caplog.record_tuples
+    assert (
+        APPLABEL,
+        logging.INFO,
+        "Files from changed directories: 1 added, 0 removed, 0 changed",
+    ) in caplog.record_tuples
+
+    diff = json.loads(destination.read_text())
+    assert diff["removed"] == ["ping/pong/pang"]
+    assert [item["name"] for item in diff["changed"]["moo"]["files"]["added"]] == [
+        "Added.mkv",
+    ]
+
+
+def test_diff_unsorted(caplog, media_sample, tmp_path):
+    """
+    Command should abort when dumps are compared as sorted but they are not.
+    """
+    runner = CliRunner()
+
+    old = tmp_path / "old.json"
+    Collector(media_sample).run(destination=old)
+
+    result = runner.invoke(cli_frontend, ["diff", str(old), str(old), "--sorted"])
+
+    assert result.exit_code == 1
+    assert (
+        APPLABEL,
+        logging.CRITICAL,
+        "Dump directories are not sorted on their key: {}".format(old),
+    ) in caplog.record_tuples
+
+
+def test_diff_sorted_compact(caplog, media_sample, tmp_path):
+    """
+    Dumps collected with sorted keys should be compared in a single pass and the diff
+    should be written compact.
+    """
+    runner = CliRunner()
+
+    old = tmp_path / "old.json"
+    new = tmp_path / "new.json"
+    destination = tmp_path / "diff.json"
+
+    result = runner.invoke(cli_frontend, [
+        "collect", str(media_sample), str(old), "--sort-keys",
+    ])
+    assert result.exit_code == 0
+    shutil.rmtree(media_sample / "ping" / "pong" / "pang")
+    result = runner.invoke(cli_frontend, [
+        "collect", str(media_sample), str(new), "--sort-keys",
+    ])
+    assert result.exit_code == 0
+
+    registry = json.loads(old.read_text())["registry"]
+    assert list(registry) == sorted(registry)
+
+    result = runner.invoke(cli_frontend, [
+        "diff",
+        str(old),
+        str(new),
+        str(destination),
+        "--sorted",
+        "--compact",
+    ])
+
+    assert result.exit_code == 0
+
+    content = destination.read_text()
+    assert "\n" not in content
+    assert json.loads(content)["removed"] == ["ping/pong/pang"]
@@ -0,0 +1,86 @@
+import json
+import logging
+
+from click.testing import CliRunner
+
+from deovi.cli.entrypoint import cli_frontend
+from deovi.collector import Collector
+
+
+APPLABEL = "deovi"
+
+
+def test_query_directories(caplog, media_sample, tmp_path):
+    """
+    Command should output matching directories and write them into given
+    destination.
+    """
+    runner = CliRunner()
+
+    dump = tmp_path / "dump.json"
+    destination = tmp_path / "results.json"
+    Collector(media_sample).run(destination=dump)
+
+    result = runner.invoke(cli_frontend, [
+        "query",
+        str(dump),
+        str(destination),
+        "--where", "file.extension=mkv",
+        "--where", "files>1",
+    ])
+
+    assert result.exit_code == 0
+    assert (APPLABEL, logging.INFO, "Directories: 1") in caplog.record_tuples
+    assert (APPLABEL, logging.INFO, "Files: 2") in caplog.record_tuples
+    assert (tmp_path / "dump.json.idx").exists()
+    assert (tmp_path / "dump.json.qidx").exists()
+
+    results = json.loads(destination.read_text())
+    assert results["query"] == ["file.extension=mkv", "files>1"]
+    assert [item["key"] for item in results["directories"]] == ["ping/pong"]
+    assert sorted(results["directories"][0]["files"]) == [
+        "SampleVideo_720x480_1mb.mkv", "SampleVideo_720x480_2mb.mkv",
+    ]
+
+
+def test_query_group_by(caplog, media_sample, tmp_path):
+    """
+    Command should output matching files grouped on a field.
+    """
+    runner = CliRunner()
+
+    dump = tmp_path / "dump.json"
+    destination = tmp_path / "results.json"
+    Collector(media_sample).run(destination=dump)
+
+    result = runner.invoke(cli_frontend, [
+        "query",
+        str(dump),
+        str(destination),
+        "--where", "file.size>1M",
+        "--group-by", "container",
+    ])
+
+    assert result.exit_code == 0
+
+    results = json.loads(destination.read_text())
+    groups = {item["value"]: item["files"] for item in results["groups"]}
+    assert groups == {"Matroska": 4, "MPEG-4": 3, "3GPP": 1, "Flash Video": 1}
+    assert list(groups.keys())[0] == "Matroska"
+
+
+def test_query_invalid(caplog, tmp_path):
+    """
+    Command should fail on invalid expression or dump.
+    """
+    runner = CliRunner()
+
+    dump = tmp_path / "dump.json"
+    dump.write_text('{"registry": {"foo": {}')
+
+    result = runner.invoke(cli_frontend, ["query", str(dump), "--where", "plop"])
+    assert result.exit_code == 2
+    assert "Invalid query field" in result.output
+
+    result = runner.invoke(cli_frontend, ["query", str(dump)])
+    assert result.exit_code == 1
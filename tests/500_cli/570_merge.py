@@ -0,0 +1,94 @@
+import json
+import logging
+import shutil
+
+from click.testing import CliRunner
+
+from deovi.cli.entrypoint import cli_frontend
+from deovi.collector import Collector
+
+
+APPLABEL = "deovi"
+
+
+def test_merge_success(caplog, media_sample, tmp_path):
+    """
+    Command should write a merged dump with directory keys prefixed by namespaces,
+    without any warning for sorted dumps.
+    """
+    runner = CliRunner()
+
+    other = tmp_path / "other"
+    shutil.copytree(media_sample, other)
+    first = tmp_path / "first.json"
+    second = tmp_path / "second.json"
+    destination = tmp_path / "merged.json"
+
+    Collector(media_sample, sort_keys=True).run(destination=first)
+    Collector(other, sort_keys=True).run(destination=second)
+    registry = json.loads(first.read_text())["registry"]
+
+    result = runner.invoke(cli_frontend, [
+        "merge",
+        "--namespace=disk1",
+        "--namespace=disk2",
+        str(first),
+        str(second),
+        str(destination),
+    ])
+
+    assert result.exit_code == 0
+
+    assert (
+        APPLABEL, logging.INFO, "Directories: {}".format(len(registry) * 2)
+    ) in caplog.record_tuples
+    assert (
+        APPLABEL, logging.INFO, "Merged dump saved to: {}".format(destination)
+    ) in caplog.record_tuples
+
+    assert [
+        item for item in caplog.record_tuples if item[1] == logging.WARNING
+    ] == []
+
+    content = json.loads(destination.read_text())
+    assert sorted(content["devices"].keys()) == ["disk1", "disk2"]
+    assert list(content["registry"]) == sorted(content["registry"])
+    assert content["registry"]["disk1"] == registry["."]
+    assert content["registry"]["disk2/moo"]["path"] == str(other / "moo")
+
+
+def test_merge_errors(caplog, media_sample, tmp_path):
+    """
+    Command should refuse invalid arguments and abort on dumps with the same
+    namespace.
+    """
+    runner = CliRunner()
+
+    first = tmp_path / "first.json"
+    second = tmp_path / "second.json"
+    destination = tmp_path / "merged.json"
+
+    Collector(media_sample).run(destination=first)
+    shutil.copy(first, second)
+
+    # Destination is a dump to merge
+    result = runner.invoke(cli_frontend, ["merge", str(first), str(first)])
+    assert result.exit_code == 2
+
+    # Too many namespaces
+    result = runner.invoke(cli_frontend, [
+        "merge", "--namespace=foo", "--namespace=bar", str(first), str(destination),
+    ])
+    assert result.exit_code == 2
+
+    # Both dumps are from the same basepath
+    result = runner.invoke(cli_frontend, [
+        "merge", str(first), str(second), str(destination),
+    ])
+    assert result.exit_code == 1
+    assert destination.exists() is False
+    assert (
+        APPLABEL,
+        logging.CRITICAL,
+        "Dumps to merge have the same namespace: {}".format(media_sample),
+    ) in caplog.record_tuples